@@ -0,0 +1,367 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Standalone benchmark suite for the control pipeline.
+Runs entirely on mock hardware (gpiozero MockFactory pins and MockTemperatureSensor)
+against a temporary copy of persistent_data.json, with the weather API call stubbed out.
+
+Results are written as JSON so that runs can be compared against a baseline:
+    python -m benchmarks.run_benchmarks --output results.json
+    python -m benchmarks.run_benchmarks --baseline results.json --threshold 0.25
+
+The exit code is 1 when any benchmark is slower than the baseline by more than the threshold.
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+from gpiozero import Device
+from gpiozero.pins.mock import MockFactory
+
+import controlalgorithm.persistent_data as p_data
+import controlalgorithm.max_sunlight_algorithm as max_sun
+from blinds.blinds_api import Blinds, SmartBlindsSystem
+from blinds.blinds_schedule import BlindMode, BlindsSchedule, ScheduleTimeBlock
+from controlalgorithm.angle_step_mapper import AngleStepMapper
+from easydriver.easydriver import EasyDriver, MicroStepResolution
+from easydriver.gpiomem import GPIOMemFactory, MockGPIOMemory
+from tempsensor.tempsensor import MockTemperatureSensor
+
+"""
+Constants
+
+DEFAULT_THRESHOLD: allowed slowdown of the median time relative to the baseline before it counts as a regression
+SCHEDULE_SIZES: number of time blocks per day used for the schedule serialization benchmarks
+"""
+DEFAULT_THRESHOLD = 0.25
+SCHEDULE_SIZES = (1, 10, 50)
+
+# Same pins as piserver/app.py
+STEP_PIN = 20
+DIR_PIN = 21
+ENABLE_PIN = 25
+MS1_PIN = 24
+MS2_PIN = 23
+
+# Cached weather used instead of calling the DarkSky API
+MOCK_CLOUD_COVER_PERCENTAGE = 28.0
+MOCK_EXT_TEMP_CELSIUS = -2.9
+
+"""Registry of benchmarks as (name, setup) pairs.
+A setup function takes the BenchmarkEnvironment and returns a parameterless callable to time.
+"""
+BENCHMARKS = []
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+"""Mock hardware and isolated persistent data for the benchmarks.
+Use as a context manager, everything is restored on exit.
+"""
+class BenchmarkEnvironment:
+    def __init__(self):
+        self._data_context = None
+        self._patches = []
+        self._original_pin_factory = None
+        self.driver = None
+        self.app = None
+        self.app_error = None
+        self.temp_sensor = MockTemperatureSensor()
+        self.mapper = AngleStepMapper()
+
+    def __enter__(self):
+        # work on a copy so that the benchmarks never touch the real persistent data
+        self._data_context = p_data.isolated_persistent_data()
+        self._data_context.__enter__()
+
+        # the only network dependency in the loop is the periodic weather refresh
+        weather_patch = patch.object(p_data, "update_cloud_cover_percentage_and_ext_temp",
+                                     return_value=(MOCK_CLOUD_COVER_PERCENTAGE, MOCK_EXT_TEMP_CELSIUS))
+        weather_patch.start()
+        self._patches.append(weather_patch)
+
+        self._original_pin_factory = Device.pin_factory
+        Device.pin_factory = MockFactory()
+
+        # the app reserves the motor pins on import, so its driver is shared when it can be imported
+        try:
+            self.app = _import_app()
+            self.driver = self.app.motor_driver
+        except Exception as err:
+            self.app_error = err
+            self.driver = EasyDriver(step_pin=STEP_PIN,
+                                     dir_pin=DIR_PIN,
+                                     ms1_pin=MS1_PIN,
+                                     ms2_pin=MS2_PIN,
+                                     enable_pin=ENABLE_PIN)
+
+        # keep moves short, the step delay would otherwise dominate every timing
+        self.driver.speed = 1000000
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.driver.close()
+        Device.pin_factory = self._original_pin_factory
+
+        for active_patch in reversed(self._patches):
+            active_patch.stop()
+
+        self._data_context.__exit__(exc_type, exc_value, traceback)
+        return False
+
+    """Create a blinds system using the mock hardware with a schedule that only uses the default mode
+    """
+    def blinds_system(self, mode, position=None):
+        return SmartBlindsSystem(Blinds(self.driver, self.mapper), BlindsSchedule(mode, position), self.temp_sensor)
+
+"""Build a schedule dictionary with the given number of non-overlapping blocks per day
+"""
+def make_schedule_dict(blocks_per_day):
+    modes = [BlindMode.LIGHT, BlindMode.DARK, BlindMode.ECO, BlindMode.BALANCED, BlindMode.MANUAL]
+    minutes_per_block = (24 * 60 - 1) // blocks_per_day
+
+    schedule = {}
+    for day in BlindsSchedule.DAYS_OF_WEEK:
+        blocks = []
+        for i in range(blocks_per_day):
+            start = i * minutes_per_block
+            end = start + minutes_per_block - 1
+            mode = modes[i % len(modes)]
+            blocks.append(ScheduleTimeBlock(datetime.time(start // 60, start % 60), datetime.time(end // 60, end % 60),
+                                            mode, 50 if mode == BlindMode.MANUAL else None))
+        schedule[day] = blocks
+
+    return BlindsSchedule.toDict(BlindsSchedule(BlindMode.DARK, schedule=schedule))
+
+# ---------- Benchmarks --------- #
+def _register_check_state_and_update(mode, position=None):
+    @benchmark("check_state_and_update[{}]".format(mode.name))
+    def setup(env):
+        system = env.blinds_system(mode, position)
+        # first iteration performs the initial move, the timed ones measure the steady state tick
+        system.check_state_and_update()
+        return system.check_state_and_update
+
+for _mode in BlindMode:
+    _register_check_state_and_update(_mode, 25 if _mode == BlindMode.MANUAL else None)
+
+def _register_schedule(blocks_per_day):
+    @benchmark("BlindsSchedule.fromDict[{}]".format(blocks_per_day))
+    def setup_from_dict(env):
+        schedule_dict = make_schedule_dict(blocks_per_day)
+        return lambda: BlindsSchedule.fromDict(schedule_dict)
+
+    @benchmark("BlindsSchedule.toDict[{}]".format(blocks_per_day))
+    def setup_to_dict(env):
+        schedule = BlindsSchedule.fromDict(make_schedule_dict(blocks_per_day))
+        return lambda: BlindsSchedule.toDict(schedule)
+
+for _size in SCHEDULE_SIZES:
+    _register_schedule(_size)
+
+@benchmark("AngleStepMapper.map_angle_to_step")
+def setup_map_angle_to_step(env):
+    return lambda: env.mapper.map_angle_to_step(45, MicroStepResolution.FULL_STEP)
+
+def _register_step_edges(name, make_factory):
+    @benchmark("step pin edge pair[{}]".format(name))
+    def setup(env):
+        # a free pin, the motor pins are reserved by the driver of the environment
+        pin = make_factory().pin(STEP_PIN + 6)
+        pin.output_with_state(0)
+
+        def edges():
+            pin.state = 1
+            pin.state = 0
+        return edges
+
+# one step pulse of EasyDriver._step_once without its delays, on the gpiozero mock and on the mock /dev/gpiomem
+_register_step_edges("gpiozero MockFactory", MockFactory)
+_register_step_edges("GPIOMemFactory", lambda: GPIOMemFactory(MockGPIOMemory()))
+
+@benchmark("get_solar_angle")
+def setup_get_solar_angle(env):
+    return max_sun.get_solar_angle
+
+@benchmark("persistent_data.get_motor_position")
+def setup_get_motor_position(env):
+    return p_data.get_motor_position
+
+@benchmark("persistent_data.set_motor_position")
+def setup_set_motor_position(env):
+    return lambda: p_data.set_motor_position(0)
+
+@benchmark("persistent_data.move journal records")
+def setup_move_journal(env):
+    def move():
+        p_data.begin_motor_move(0, 8)
+        p_data.commit_motor_move(8)
+    return move
+
+@benchmark("persistent_data.get_cloud_cover_percentage_and_ext_temp")
+def setup_get_weather(env):
+    return p_data.get_cloud_cover_percentage_and_ext_temp
+
+def _register_route(route):
+    @benchmark("route GET {}".format(route))
+    def setup(env):
+        if env.app is None:
+            raise env.app_error
+        client = env.app.app.test_client()
+        return lambda: client.get(route)
+
+"""Import the flask app module without starting its main loop
+"""
+def _import_app():
+    os.environ["START_MAIN_LOOP"] = "false"
+    import piserver.app
+    return piserver.app
+
+for _route in ("/api/v1/pos", "/api/v1/status", "/api/v1/temp", "/api/v1/schedule", "/metrics"):
+    _register_route(_route)
+# ---------- END OF Benchmarks --------- #
+
+"""Time iterations calls of fxn
+
+Returns:
+    float -- elapsed seconds
+"""
+def _time_iterations(fxn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fxn()
+    return time.perf_counter() - start
+
+"""Measure the time per call of fxn. The number of iterations per round is calibrated so that
+each round takes at least min_round_time.
+
+Returns:
+    dict -- per call statistics in seconds
+"""
+def measure(fxn, rounds=5, min_round_time=0.05, max_iterations=100000):
+    fxn() # warm up caches and lazy imports
+
+    iterations = 1
+    while iterations < max_iterations:
+        elapsed = _time_iterations(fxn, iterations)
+        if elapsed >= min_round_time:
+            break
+        iterations = min(max_iterations, iterations * max(2, int(min_round_time / max(elapsed, 1e-9))))
+
+    timings = [_time_iterations(fxn, iterations) / iterations for _ in range(rounds)]
+    return {
+        "rounds": rounds,
+        "iterations": iterations,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "stdev": statistics.stdev(timings) if rounds > 1 else 0.0,
+    }
+
+"""Run all benchmarks whose name contains name_filter
+
+Returns:
+    dict -- results document that can be written as JSON
+"""
+def run(name_filter=None, rounds=5, min_round_time=0.05, log=print):
+    results = {}
+    with BenchmarkEnvironment() as env:
+        for name, setup in BENCHMARKS:
+            if name_filter and name_filter not in name:
+                continue
+
+            # the control code prints on every call, which would otherwise flood the output
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                try:
+                    fxn = setup(env)
+                    result = measure(fxn, rounds=rounds, min_round_time=min_round_time)
+                except Exception as err:
+                    result = {"error": "{}: {}".format(type(err).__name__, err)}
+
+            results[name] = result
+            if "error" in result:
+                log("{:<60} ERROR {}".format(name, result["error"]))
+            elif name.startswith("step pin edge pair"):
+                log("{:<60} {:>12.1f} us {:>12.0f} edges/s".format(name, result["median"] * 1e6, 2 / result["median"]))
+            else:
+                log("{:<60} {:>12.1f} us".format(name, result["median"] * 1e6))
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+"""Compare results against a baseline results document.
+Only benchmarks present in both without errors are compared.
+
+Returns:
+    list -- dicts with the name, both medians, the ratio and whether it is a regression
+"""
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    comparison = []
+    for name, result in results["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or "median" not in base or "median" not in result:
+            continue
+
+        ratio = result["median"] / base["median"] if base["median"] > 0 else float("inf")
+        comparison.append({
+            "name": name,
+            "baseline": base["median"],
+            "current": result["median"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        })
+    return comparison
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the smart blinds control pipeline on mock hardware")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a previous results JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown before failing (default %(default)s)")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this string")
+    parser.add_argument("--rounds", type=int, default=5, help="timed rounds per benchmark")
+    parser.add_argument("--min-round-time", type=float, default=0.05, help="minimum seconds per round")
+    args = parser.parse_args(argv)
+
+    results = run(name_filter=args.filter, rounds=args.rounds, min_round_time=args.min_round_time)
+
+    if args.output:
+        output_dir = os.path.dirname(os.path.abspath(args.output))
+        os.makedirs(output_dir, exist_ok=True)
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, "r") as fp:
+            baseline = json.load(fp)
+
+        comparison = compare(results, baseline, threshold=args.threshold)
+        print()
+        for entry in comparison:
+            print("{:<60} {:>6.2f}x {}".format(entry["name"], entry["ratio"], "REGRESSION" if entry["regression"] else ""))
+
+        if any(entry["regression"] for entry in comparison):
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,50 +23,106 @@ import smbus2
 from easydriver.easydriver import MicroStepResolution, StepDirection
 import time
 import datetime
+import numpy
 
 from blinds.blinds_command import BlindsCommand
-from blinds.blinds_schedule import BlindMode, BlindsSchedule, ScheduleTimeBlock, InvalidBlindsScheduleException, BlindSchedulingException
+from blinds.clock import SystemClock
+from blinds.request_coalescer import RequestCoalescer
+from blinds.motion_executor import MotionExecutor
+from blinds.blinds_schedule import BlindMode, BlindsSchedule, ScheduleTimeBlock, ScheduleOverride, InvalidBlindsScheduleException, BlindSchedulingException
 from controlalgorithm.angle_step_mapper import ANGLE_POSITION_FACTOR
-from controlalgorithm.angle_step_mapper import NUM_STEPS_FACTOR
 from controlalgorithm.angle_step_mapper import AngleStepMapper
-from controlalgorithm.persistent_data import get_motor_position
-from controlalgorithm.persistent_data import set_motor_position
+from controlalgorithm.angle_step_mapper import DEFAULT_ANGULAR_ACCURACY
+from controlalgorithm.angle_step_mapper import MICROSTEPS_PER_STEP
+from controlalgorithm.persistent_data import get_motor_microsteps, get_motor_direction
+from controlalgorithm.persistent_data import set_motor_microsteps
+from controlalgorithm.persistent_data import begin_motor_move, record_motor_progress, commit_motor_move, sync_motor_position
 from controlalgorithm.max_sunlight_algorithm import max_sunlight_algorithm
 from controlalgorithm.composite_algorithm import composite_algorithm
-from controlalgorithm.heat_mgmt_algorithm import heat_mgmt_algorithm
+from controlalgorithm.heat_mgmt_algorithm import heat_mgmt_algorithm, DESIRED_INTERNAL_TEMP
+from controlalgorithm.environment import LiveEnvironment
+from controlalgorithm.motion_planner import MotionPlanner
+from httpclient.client import HttpClientException
+from controlalgorithm.schedule_preview import preview_positions, change_indices
 from easydriver.easydriver import EasyDriver, PowerState, MicroStepResolution, StepDirection
+from metrics.metrics import REGISTRY
+from metrics.profiler import IterationProfiler
 from piserver.api_routes import *
 import threading
 
+# ---------- Metrics --------- #
+LOOP_ITERATION_SECONDS = REGISTRY.histogram( "smartblinds_loop_iteration_seconds",
+        "Duration of a single check_state_and_update iteration" )
+LOOP_ITERATION_FAILURES = REGISTRY.counter( "smartblinds_loop_iteration_failures",
+        "Main loop iterations that raised an exception" )
+ALGORITHM_SECONDS = REGISTRY.histogram( "smartblinds_algorithm_seconds",
+        "Time spent computing the target position for a mode", labelnames=( "mode", ) )
+PREVIEW_SECONDS = REGISTRY.histogram( "smartblinds_preview_seconds",
+        "Time spent computing a schedule preview" )
+MOVES_CANCELLED = REGISTRY.counter( "smartblinds_moves_cancelled",
+        "Moves stopped before their target because a newer request superseded them" )
+# ---------- END OF Metrics --------- #
+
 '''
 Class to model blinds as an abstraction. 
 Gives the ability to control blinds position 
 '''
 class Blinds:
     # Public attributes
-    step_resolution = MicroStepResolution.FULL_STEP
+    # allowed error of the slat tilt angle after a move in degrees, the resolution is chosen per move to meet it
+    angularAccuracy = DEFAULT_ANGULAR_ACCURACY
+    # a progress record is written to the position journal every this many eighth steps during a move
+    progressMicrosteps = 64
 
     # Private attributes
     _motorDriver = None
     _angleStepMapper = None
-    # current position of the blinds as a rotational % 0 is horizontal, 100 is fully closed "up" position, -100 is fully closed "down" position
-    _currentPosition = None 
+    # current position of the motor in eighth steps from the horizontal position. This is the canonical position of 
+    # the blinds, the tilt angle and the rotational % are derived from it so that moves never accumulate rounding error 
+    _motorMicrosteps = None
+    # direction of the last move, which sets the backlash of the slats. None if unknown
+    _lastDirection = None
 
     '''
     Constuctor. Set the motor driver.
-    Set driver to None to allow for testing without a driver. 
+    Set driver to None to allow for testing without a driver. Set mapper to None for the default calibration.
     '''
-    def __init__( self, driver, mapper ):
+    def __init__( self, driver, mapper, angularAccuracy=DEFAULT_ANGULAR_ACCURACY ):
         self._motorDriver = driver
-        self._angleStepMapper = mapper
-        self._currentPosition = get_motor_position() * ( 1/ANGLE_POSITION_FACTOR )
+        self._angleStepMapper = mapper if mapper is not None else AngleStepMapper()
+        self.angularAccuracy = angularAccuracy
+        self._motorMicrosteps = get_motor_microsteps()
+        self._lastDirection = get_motor_direction()
+
+    '''
+    Finest step resolution needed for the angular accuracy. Moves use coarser steps wherever possible.
+    '''
+    @property
+    def step_resolution( self ):
+        return self._angleStepMapper.resolution_for_accuracy( self.angularAccuracy )
 
     '''
-    Gets current position of blinds.
+    Gets current position of blinds as a rotational % 0 is horizontal, 100 is fully closed "up" position, -100 is fully 
+    closed "down" position
     '''
     @property 
     def currentPosition( self ):
-        return self._currentPosition
+        position = self._angleStepMapper.microsteps_to_tilt_angle( self._motorMicrosteps, self._lastDirection ) / ANGLE_POSITION_FACTOR
+        return max( -100, min( 100, position ) )
+
+    '''
+    Mapper of the tilt angle to the motor position, with the calibration of the blinds
+    '''
+    @property
+    def angleStepMapper( self ):
+        return self._angleStepMapper
+
+    '''
+    Current position of the motor in eighth steps
+    '''
+    @property
+    def motorMicrosteps( self ):
+        return self._motorMicrosteps
 
     '''
     Resets the blinds to the 0% tilt position (horizontal slats)
@@ -74,49 +130,100 @@ class Blinds:
     def reset_position( self ):
         print( "resetting to horizontal position" )
 
-        motor_position = get_motor_position() # in degrees from [-90,90]
-
-        if motor_position != 0:
-            num_steps, motor_dir = self._angleStepMapper.map_angle_to_step(0, self.step_resolution)
-            self._motorDriver.microstep_resolution = self.step_resolution
-            self._motorDriver.step(steps=num_steps, direction=motor_dir)
-            set_motor_position(0)
-
-        self._currentPosition = 0
-
-        pass
+        target_microsteps, segments = self._angleStepMapper.plan_move( self._motorMicrosteps, 0, 0, self._lastDirection )
+        if segments:
+            self._move( target_microsteps, segments )
 
     '''
-    Adjust blinds to the position specified as a percentage in [-100%, 100%]
+    Raises InvalidBlindPositionException if the position is not a percentage in [-100%, 100%]
     '''
-    def rotateToPosition( self, position ):
+    @staticmethod
+    def checkPosition( position ):
         if ( position > 100 or position < -100 ):
             raise InvalidBlindPositionException( "Position must be between -100 and 100")
 
+    '''
+    Adjust blinds to the position specified as a percentage in [-100%, 100%]
+    When cancelEvent (threading.Event) is given and set during the move, the move stops at the next step boundary 
+    where the progress is recorded, and the blinds stay where they are. 
+    progressCallback( stepsDone, totalSteps ) is called before the first step and after every chunk of steps. 
+    '''
+    def rotateToPosition( self, position, cancelEvent=None, progressCallback=None ):
+        Blinds.checkPosition( position )
+
         print( "rotating to {}%".format( position ) )
 
         desired_tilt_angle = position * ANGLE_POSITION_FACTOR
         
-        num_steps, motor_dir = self._angleStepMapper.map_angle_to_step(desired_tilt_angle, self.step_resolution)
-
-        num_steps = int(abs(round(num_steps * NUM_STEPS_FACTOR)))
-
-        self._motorDriver.microstep_resolution = self.step_resolution
-        self._motorDriver.step(steps=num_steps, direction=motor_dir)
-
-        #DEBUG
-        print("resolution: ", self.step_resolution, "num_steps: ", num_steps, "direction: ", motor_dir)
-
-        set_motor_position(desired_tilt_angle)
-
-        self._currentPosition = position
+        # the move is the exact difference in steps between the current and target motor positions, including the 
+        # backlash of its direction. Coarse steps are used for the bulk of the move, finer steps only as needed for 
+        # the accuracy
+        target_microsteps, segments = self._angleStepMapper.plan_move( self._motorMicrosteps, desired_tilt_angle, 
+                                                                       self.angularAccuracy, self._lastDirection )
+
+        if segments:
+            self._move( target_microsteps, segments, cancelEvent, progressCallback )
+
+    '''
+    Issue the (resolution, num_steps, direction) segments of a move to the motor driver. 
+    The move is journalled: an intent before the first step, progress every progressMicrosteps and a commit at the end, 
+    so that the position can be recovered after a power cut at any point. 
+    The chunks of all segments are streamed to the driver, which stays enabled from the first step to the last. 
+    A set cancelEvent is checked after every chunk, the move is then committed at the position reached. 
+    '''
+    def _move( self, targetMicrosteps, segments, cancelEvent=None, progressCallback=None ):
+        begin_motor_move( self._motorMicrosteps, targetMicrosteps )
+        direction = self._lastDirection
+        totalSteps = sum( num_steps for _, num_steps, _ in segments )
+        stepsDone = 0
+        if progressCallback is not None:
+            progressCallback( stepsDone, totalSteps )
+
+        with self._motorDriver.stream():
+            for resolution, num_steps, motor_dir in segments:
+                self._motorDriver.microstep_resolution = resolution
+                microsteps = MICROSTEPS_PER_STEP[ resolution ] * ( 1 if motor_dir == StepDirection.FORWARD else -1 )
+                chunk = max( 1, self.progressMicrosteps // MICROSTEPS_PER_STEP[ resolution ] )
+
+                remaining = num_steps
+                while remaining > 0:
+                    steps = min( chunk, remaining )
+                    self._motorDriver.step(steps=steps, direction=motor_dir)
+                    remaining -= steps
+                    stepsDone += steps
+                    direction = motor_dir
+
+                    self._motorMicrosteps += steps * microsteps
+                    if progressCallback is not None:
+                        progressCallback( stepsDone, totalSteps )
+                    if self._motorMicrosteps == targetMicrosteps:
+                        break
+                    if cancelEvent is not None and cancelEvent.is_set():
+                        print( "move cancelled at", self._motorMicrosteps )
+                        MOVES_CANCELLED.inc()
+                        targetMicrosteps = self._motorMicrosteps
+                        break
+                    record_motor_progress( self._motorMicrosteps )
+
+                #DEBUG
+                print("resolution: ", resolution, "num_steps: ", num_steps, "direction: ", motor_dir)
+                if self._motorMicrosteps == targetMicrosteps:
+                    break
+
+        commit_motor_move( targetMicrosteps, direction )
+        self._motorMicrosteps = targetMicrosteps
+        self._lastDirection = direction
+
+    def _setMotorMicrosteps( self, microsteps ):
+        set_motor_microsteps( microsteps )
+        self._motorMicrosteps = microsteps
+        self._lastDirection = None
 
     '''
     Re-define 0 position after user manually places blinds
     '''
     def calibratePosition( self ):
-        set_motor_position( 0 )
-        self._currentPosition = 0
+        self._setMotorMicrosteps( self._angleStepMapper.tilt_angle_to_microsteps( 0 ) )
 
 
 '''
@@ -128,6 +235,26 @@ class SmartBlindsSystem:
     _blindsSchedule = None
     _temperatureSensor = None
     _currentMode = None
+    _profiler = None
+    _clock = None
+    _environment = None
+    _motionPlanner = None
+    _store = None
+    _predictiveHeatMgmt = None
+    _thermalController = None
+    _glareAwareLight = None
+    _solarTable = None
+    _coalescer = None
+    _motionExecutor = None
+
+    # longest preview given by getPreview
+    MAX_PREVIEW_HOURS = 48
+
+    # modes whose target position is given by the user rather than computed continuously by an algorithm
+    EXACT_POSITION_MODES = ( BlindMode.MANUAL, BlindMode.DARK )
+
+    # modes using the thermal model, which observes the conditions of their updates only
+    THERMAL_MODEL_MODES = ( BlindMode.ECO, )
 
     '''
     Costructor for modelling the system of blinds as a whole. 
@@ -138,18 +265,66 @@ class SmartBlindsSystem:
             concept, but can be extended to a list of Blinds objects for controlling multiple blinds throughout the house
         blindsSchedule : a BlindsSchedule object to control the schedule of the blinds
         temperatureSensor : an abstraction of the temperature sensor controls 
-    '''
-    def __init__( self, blinds, blindsSchedule, temperatureSensor ):
+
+    Keyword arguments:
+        profiler : an optional IterationProfiler, used to profile main loop iterations when armed
+        clock : source of the current time and sleeping for the main loop, defaults to SystemClock. 
+            A SimulatedClock allows the system to be fast-forwarded.
+        environment : source of the solar angle and weather for the control algorithms, defaults to LiveEnvironment
+        motionPlanner : MotionPlanner deciding when the algorithm driven modes move the blinds. Defaults to a planner 
+            without deadband that only skips moves smaller than one step.
+        store : optional SmartBlindsStore. Posted schedules and commands are saved to it and restored from it on 
+            construction, and moves are recorded in its history.
+        predictiveHeatMgmt : optional PredictiveHeatMgmt. When given, BlindMode.ECO follows the forecast through its
+            precomputed plan, and only falls back to the reactive algorithm without a forecast.
+        thermalController : optional ThermalController. When given, it learns the response of the room every tick, and 
+            once trained BlindMode.ECO uses the tilt it predicts to bring the room closest to the setpoint. 
+            The samples are recorded as "thermal" events in the history of the store.
+        glareAwareLight : optional GlareAwareLight for the window of the blinds. When given, BlindMode.LIGHT cuts off the 
+            direct sunlight instead of pointing the slats at the sun, and stays open when the sun is not on the window.
+        solarTable : SolarTable used to resolve the solar anchors of the schedule (ex. "sunset-30") once per day, 
+            defaults to a table for the location in persistent data, created when a schedule first uses anchors. 
+        coalesceWindow : seconds to collect a burst of POST position and command requests (ex. from dragging a slider) 
+            before moving, see RequestCoalescer. A request always cancels the move of an older one at a step boundary, 
+            and every request of a burst gets the response of the final move. 
+    '''
+    def __init__( self, blinds, blindsSchedule, temperatureSensor, profiler=None, clock=None, environment=None, motionPlanner=None, 
+            store=None, predictiveHeatMgmt=None, thermalController=None, glareAwareLight=None, solarTable=None, 
+            coalesceWindow=0 ):
         self._blinds = blinds 
         self._blindsSchedule = blindsSchedule
         self._temperatureSensor = temperatureSensor
-
-        # the currently active manual command, if any 
-        # self._activeCommandTimeBlock should be set to a ScheduleTimeBlock 
-        self._activeCommandTimeBlock = None
+        self._profiler = profiler
+        self._clock = clock if clock is not None else SystemClock()
+        self._environment = environment if environment is not None else LiveEnvironment()
+        self._motionPlanner = motionPlanner if motionPlanner is not None else \
+            MotionPlanner( step_resolution=blinds.step_resolution, mapper=blinds.angleStepMapper )
+        self._predictiveHeatMgmt = predictiveHeatMgmt
+        self._thermalController = thermalController
+        self._glareAwareLight = glareAwareLight
+        self._solarTable = solarTable
+        self._coalescer = RequestCoalescer( coalesceWindow )
+        self._motionExecutor = MotionExecutor( self._blinds, self._coalescer.executionLock )
+
+        # the currently active manual command, if any, as ( ScheduleTimeBlock, end datetime ). It is only ever replaced
+        # as a whole, so that the main loop never sees the time block of one command with the end of another
+        self._activeCommand = None
+        self._activeCommandLock = threading.Lock()
+
+        self._store = store
+        if self._store is not None:
+            self._restoreState()
 
         self._currentMode = self._blindsSchedule._default_mode
 
+    '''
+    Preemptible executor for streams of target positions (ex. from the control channel). Its moves hold the same lock 
+    as the moves of the requests and the main loop.
+    '''
+    @property
+    def motionExecutor( self ):
+        return self._motionExecutor
+
     # ---------- API functions --------- #
     '''
     API GET request handler for temperature
@@ -186,14 +361,21 @@ class SmartBlindsSystem:
 
     '''
     API POST request handler for position
+    Requests in quick succession are coalesced into a single move to the latest position, the response gives the 
+    position it was made to ("target") and the resulting position.
     URL: POSITION_ROUTE
     '''
     def postPosition( self, data ):
         print( f"processing request for POST position, data: {data}" )
         try:
             position = data["position"]
-            self._blinds.rotateToPosition(position)
-            return ( {}, RESP_CODES[ "OK" ] )
+            Blinds.checkPosition( position )
+
+            def move():
+                self._blinds.rotateToPosition( position, self._coalescer.cancelEvent )
+                return { "target" : position, "position" : self._blinds.currentPosition }
+
+            return ( self._coalescer.submit( move ), RESP_CODES[ "OK" ] )
         except Exception as err:
             return ( str(err), RESP_CODES[ "BAD_REQUEST" ] )
 
@@ -274,7 +456,11 @@ class SmartBlindsSystem:
         print( "received schedule=\n", schedule )
 
         try:
-            self._blindsSchedule = BlindsSchedule.fromDict( schedule )
+            blindsSchedule = BlindsSchedule.fromDict( schedule )
+            # resolve the solar anchors for today, so that time blocks conflicting at their actual times are rejected
+            self._resolveSolarAnchors( blindsSchedule, self._clock.now( blindsSchedule._timezone ) )
+            self._blindsSchedule = blindsSchedule
+            self._saveSchedule()
 
             if forceUpdate:
                 self.check_state_and_update()
@@ -310,6 +496,10 @@ class SmartBlindsSystem:
                 BlindsSchedule.FRIDAY : [],
                 BlindsSchedule.SATURDAY : []
             }
+            self._blindsSchedule._overrides = []
+            # recompile the timeline without the time blocks
+            self._blindsSchedule.checkHasNoTimeConflicts()
+            self._saveSchedule()
 
             if forceUpdate:
                 # force update on current state
@@ -330,9 +520,11 @@ class SmartBlindsSystem:
         "position" : integer between -100 and 100
         "duration" : positive integer minutes
     }
-    if time is given value 0, this is change will remain until the next day
+    if time is given value 0, this is change will remain until the next day. 
+    Commands may last several days, the response gives the time block of the command and its end ("until").
 
-    Set forceUpdate to true for immediate update.
+    Set forceUpdate to true for immediate update. Updates in quick succession are coalesced, every request then gets 
+    the time block of the latest command and the position of the blinds after the move it caused. 
 
     URL: COMMAND_ROUTE
     '''
@@ -342,15 +534,27 @@ class SmartBlindsSystem:
             blindsCommand = BlindsCommand.fromDict( command )
 
             # update active command, use custome time provider to insert a timezone
-            self._activeCommandTimeBlock = blindsCommand.toTimeBlock( 
-                    currentTimeProvider=datetime.datetime.now( self._blindsSchedule._timezone ).time )
+            now = self._clock.now( self._blindsSchedule._timezone )
+            timeBlock = blindsCommand.toTimeBlock( currentTimeProvider=lambda: now.time() )
+            end = blindsCommand.endDateTime( now ) if timeBlock is not None else None
 
             # return the resulting time block from the command
-            data = ScheduleTimeBlock.toDict( self._activeCommandTimeBlock ) or {}
+            data = ScheduleTimeBlock.toDict( timeBlock ) or {}
+            if end is not None:
+                data[ "until" ] = end.isoformat()
+
+            with self._activeCommandLock:
+                self._activeCommand = ( timeBlock, end ) if timeBlock is not None else None
+                if self._store is not None:
+                    self._store.commands.set_active( command, data, now.date().isoformat() )
 
             if forceUpdate:
                 # Update current state based on the command
-                self.check_state_and_update()
+                def update():
+                    self.check_state_and_update()
+                    return dict( data, position=self._blinds.currentPosition )
+
+                data = self._coalescer.submit( update )
 
             return data, RESP_CODES[ "ACCEPTED" ]   
 
@@ -367,7 +571,7 @@ class SmartBlindsSystem:
     '''
     def deleteBlindsCommand( self, forceUpdate=False ): 
         print( "processing request for DELETE command")
-        self._activeCommandTimeBlock = None
+        self._clearActiveCommand()
 
         # Force system update to move blinds to desired position
         if forceUpdate:
@@ -375,8 +579,164 @@ class SmartBlindsSystem:
 
         return {}, RESP_CODES[ "OK" ]
     
+    '''
+    API GET request handler for history, returns the latest events recorded in the store
+    URL: HISTORY_ROUTE
+    '''
+    def getHistory( self, limit=100, event=None ):
+        try:
+            if self._store is None:
+                return ( "History is not available without a store", RESP_CODES[ "BAD_REQUEST" ] )
+
+            data = { "history" : self._store.history.recent( limit=int( limit ), event=event ) }
+            return ( data, RESP_CODES[ "OK" ] )
+        except Exception as err:
+            return ( str(err), RESP_CODES[ "BAD_REQUEST" ] )
+
+    '''
+    API GET request handler for the preview, the positions the blinds are expected to take over the next hours
+    URL: PREVIEW_ROUTE
+    '''
+    def getPreview( self, hours=24 ):
+        try:
+            hours = float( hours )
+            if not 0 < hours <= SmartBlindsSystem.MAX_PREVIEW_HOURS:
+                raise ValueError( f"hours must be between 0 and {SmartBlindsSystem.MAX_PREVIEW_HOURS}" )
+
+            with PREVIEW_SECONDS.time():
+                data = self._preview( int( round( hours * 60 ) ) )
+            data[ "hours" ] = hours
+            return ( data, RESP_CODES[ "OK" ] )
+        except Exception as err:
+            return ( str(err), RESP_CODES[ "BAD_REQUEST" ] )
+
     # ---------- END OF API functions --------- #
 
+    '''
+    Preview of the next numMinutes minutes, one update per minute starting at the current minute. 
+
+    The mode of every minute comes from the active command and the schedule, and the target positions of all minutes 
+    are computed by the vectorized algorithms in one pass, with the solar positions of the solar table, the weather 
+    forecast if there is one and the current weather otherwise, and the current internal temperature. The motion 
+    planner then estimates the moves from the current position without changing its state. 
+    The learned thermal model is not previewed, ECO follows the heat management algorithm. 
+    '''
+    def _preview( self, numMinutes ):
+        tz = self._blindsSchedule._timezone
+        start = self._clock.now( tz ).replace( second=0, microsecond=0 )
+        try:
+            self._resolveSolarAnchors( self._blindsSchedule, start )
+        except BlindSchedulingException as err:
+            print( "WARNING: keeping the previous times of the solar anchors:", err )
+
+        # step through UTC so that the minutes stay one minute apart over daylight saving changes
+        startUtc = start.astimezone( datetime.timezone.utc )
+        times = [ ( startUtc + datetime.timedelta( minutes=minute ) ).astimezone( tz ) for minute in range( numMinutes ) ]
+        timestamps = start.timestamp() + numpy.arange( numMinutes ) * 60.0
+
+        modes = []
+        positions = numpy.zeros( numMinutes )
+        setpoints = numpy.full( numMinutes, numpy.nan )
+        activeCommand = self._activeCommand
+        for minute, dateTime in enumerate( times ):
+            if activeCommand is not None and dateTime < activeCommand[ 1 ]:
+                commandBlock = activeCommand[ 0 ]
+                mode, position, setpoint = commandBlock._mode, commandBlock._position, self._blockSetpoint( commandBlock )
+            else:
+                mode, position, setpoint, _, _ = self._scheduledState( dateTime )
+            modes.append( mode.name )
+            if position is not None:
+                positions[ minute ] = position
+            if setpoint is not None:
+                setpoints[ minute ] = setpoint
+        modes = numpy.array( modes )
+
+        solarAngle = self.solarTable.elevations( start, numMinutes )
+        forecast = self._environment.get_forecast( start )
+        if forecast is not None:
+            cloudCover, extTemp = forecast.at( timestamps )
+        else:
+            cloudCover, extTemp = self._environment.get_weather( start )
+
+        ecoConditions = None
+        if self._predictiveHeatMgmt is not None and forecast is not None:
+            # the predictive plan takes the conditions lead_minutes ahead, while the forecast covers the minute
+            leadMinutes = self._predictiveHeatMgmt.lead_minutes
+            leadCloudCover, leadExtTemp = forecast.at( timestamps + leadMinutes * 60 )
+            leadSolarAngle = self.solarTable.elevations( start + datetime.timedelta( minutes=leadMinutes ), numMinutes )
+            covered = timestamps <= forecast.end
+            ecoConditions = ( numpy.where( covered, leadCloudCover, cloudCover ), numpy.where( covered, leadExtTemp, extTemp ), 
+                    numpy.where( covered, leadSolarAngle, solarAngle ) )
+
+        window = self._glareAwareLight.window if self._glareAwareLight is not None else None
+        targets = preview_positions( modes, positions, setpoints, solarAngle, cloudCover, extTemp, 
+                self._temperatureSensor.getSample(), 
+                solar_azimuth=self.solarTable.azimuths( start, numMinutes ) if window is not None else None, 
+                window=window, eco_conditions=ecoConditions )
+
+        exact = numpy.isin( modes, [ mode.name for mode in SmartBlindsSystem.EXACT_POSITION_MODES ] )
+        heldPositions, totals = self._motionPlanner.preview( self._blinds.currentPosition, targets, exact, times )
+
+        timeline = [ { 
+                "time" : times[ index ].isoformat(), 
+                "mode" : str( modes[ index ] ), 
+                "position" : float( heldPositions[ index ] ) } 
+            for index in change_indices( modes, heldPositions ) ]
+
+        data = { "start" : start.isoformat(), "timeline" : timeline }
+        data.update( totals )
+        return data
+
+    '''
+    Restore the latest schedule and the active command from the store. 
+    A command lasts until its end, so a command that has ended is discarded.
+    '''
+    def _restoreState( self ):
+        latest = self._store.schedules.latest()
+        if latest is not None:
+            version, scheduleDict = latest
+            try:
+                self._blindsSchedule = BlindsSchedule.fromDict( scheduleDict )
+                print( f"Restored schedule version {version}" )
+            except Exception as err:
+                print( f"WARNING: could not restore schedule version {version}: {err}" )
+
+        activeCommand = self._store.commands.get_active()
+        if activeCommand is not None:
+            now = self._clock.now( self._blindsSchedule._timezone )
+            timeBlock = activeCommand[ "time_block" ]
+            end = None
+            if timeBlock and "until" in timeBlock:
+                end = datetime.datetime.fromisoformat( timeBlock[ "until" ] )
+            elif timeBlock and activeCommand[ "date" ] == now.date().isoformat():
+                # saved without an end, these commands lasted until the end of the day they were given on
+                end = BlindsCommand( BlindMode.LIGHT, 0 ).endDateTime( now )
+
+            if end is not None and now < end:
+                self._activeCommand = ( ScheduleTimeBlock.fromDict( timeBlock ), end )
+                print( "Restored active command", activeCommand[ "command" ] )
+            else:
+                self._store.commands.clear_active()
+
+    '''
+    Save the current schedule to the store as a new version
+    '''
+    def _saveSchedule( self ):
+        if self._store is not None:
+            self._store.schedules.save( BlindsSchedule.toDict( self._blindsSchedule ) )
+
+    '''
+    Clear the active command, also in the store. If expired is given, the command is only cleared if it is still that 
+    command, and not one posted since.
+    '''
+    def _clearActiveCommand( self, expired=None ):
+        with self._activeCommandLock:
+            if expired is not None and self._activeCommand is not expired:
+                return
+            self._activeCommand = None
+            if self._store is not None:
+                self._store.commands.clear_active()
+
     '''
     Start the main loop for the system. This performs checks of the system state, ie. what is currently scheduled or
     current commands and defaults. This will generate a new thread (thus sharing the memory space) to allow the same 
@@ -393,68 +753,196 @@ class SmartBlindsSystem:
         def main_loop():   
             while True: 
                 print( "Performing main loop iteration" )
-                # TODO: what happens in an iteration
-                self.check_state_and_update()
-                time.sleep( sleep_time )
+                # a failed iteration (ex. an external API outage) must not stop the loop, the next one retries
+                try:
+                    self.check_state_and_update()
+                    # the commit of the last move is otherwise only made durable by the next move
+                    sync_motor_position()
+                    if self._store is not None:
+                        self._store.flush()
+                except Exception as err:
+                    LOOP_ITERATION_FAILURES.inc()
+                    print( "ERROR: main loop iteration failed:", repr( err ) )
+                self._clock.sleep( sleep_time )
 
         thread = threading.Thread(target=main_loop)
         thread.start()
 
     '''
     Single iteration of the main loop.
-    
+    Runs under the execution lock of the request coalescer, so it never moves the blinds at the same time as a request.
     '''
     def check_state_and_update( self ):
-        current_datetime = datetime.datetime.now( self._blindsSchedule._timezone )
-        current_time = current_datetime.time()
-        print( f"Checking and updating at time: {current_datetime}" )
+        with self._coalescer.executionLock, LOOP_ITERATION_SECONDS.time():
+            if self._profiler is not None:
+                with self._profiler.profile( IterationProfiler.ITERATIONS, "check_state_and_update" ):
+                    self._check_state_and_update()
+            else:
+                self._check_state_and_update()
 
-        # check active command. apply or clear the command
-        if self._activeCommandTimeBlock is not None:
-            check_time_result = self._activeCommandTimeBlock.checkTime( current_time )
+    '''
+    Solar table for the solar anchors, created from persistent data if not given
+    '''
+    @property
+    def solarTable( self ):
+        if self._solarTable is None:
+            from controlalgorithm.solar_table import SolarTable
+            self._solarTable = SolarTable.from_persistent_data()
+        return self._solarTable
 
-            # case 1: current time is before the command duration
-            # ignore and do nothing, this means the command does not have to be dealt with yet
+    '''
+    Solar times of a day for ScheduleTimeBlock solar anchors, in minutes since midnight in the timezone tz
+    '''
+    def _solarTimes( self, date, tz ):
+        midnight = datetime.datetime.combine( date, datetime.time() )
+        midnight = tz.localize( midnight ) if hasattr( tz, "localize" ) else midnight.replace( tzinfo=tz )
+        events = self.solarTable.for_date( date ).solar_events()
+        return { event : int( ( eventTime - midnight ).total_seconds() // 60 ) for event, eventTime in events.items() }
 
-            # case 2: current time is within the command duration
-            if check_time_result == 0:
-                print( "DEBUG: Found an applicable command.", ScheduleTimeBlock.toJson( self._activeCommandTimeBlock ) )
-                self.do_blinds_update( self._activeCommandTimeBlock._mode, self._activeCommandTimeBlock._position )
-                return
+    '''
+    Resolves the solar anchors of blindsSchedule for the day of currentDateTime, if they are not resolved for it yet. 
+    Raises BlindSchedulingException when the resolved time blocks conflict. 
+    '''
+    def _resolveSolarAnchors( self, blindsSchedule, currentDateTime ):
+        if blindsSchedule.resolveSolarAnchors( currentDateTime.date(), lambda date: self._solarTimes( date, blindsSchedule._timezone ) ):
+            print( "Resolved the solar anchors of the schedule for", currentDateTime.date() )
 
-            # case 3: current time is after the command duration
-            elif check_time_result == 1:
-                # clear the current command, it is no longer valid
-                self._activeCommandTimeBlock = None
-                
-        # At this point, there is no need to deal with manual commands. Check the schedule for a time block
-        current_weekday_index = current_datetime.weekday()
-        current_weekday_name = BlindsSchedule.DAYS_OF_WEEK[ current_weekday_index ]
+    '''
+    Body of check_state_and_update, separated so that the whole iteration can be timed.
+    '''
+    def _check_state_and_update( self ):
+        current_datetime = self._clock.now( self._blindsSchedule._timezone )
+        print( f"Checking and updating at time: {current_datetime}" )
 
-        day_sched = self._blindsSchedule._schedule.get( current_weekday_name )
+        # check active command. apply or clear the command
+        activeCommand = self._activeCommand
+        if activeCommand is not None:
+            commandBlock, commandEnd = activeCommand
+            # case 1: current time is before the end of the command, commands apply from when they are given
+            if current_datetime < commandEnd:
+                print( "DEBUG: Found an applicable command.", ScheduleTimeBlock.toJson( commandBlock ) )
+                self.do_blinds_update( commandBlock._mode, commandBlock._position, current_datetime, 
+                        self._blockSetpoint( commandBlock ) )
+                return
 
-        active_schedule_block = None
-        for block in day_sched:
-            if block.checkTime( current_time ) == 0:
-                active_schedule_block = block
-                break
+            # case 2: current time is after the command duration
+            # clear the current command, it is no longer valid
+            self._clearActiveCommand( expired=activeCommand )
+                
+        # At this point, there is no need to deal with manual commands. Look up the time block of the current minute
+        # in the override of the current day if there is one, otherwise in the compiled weekly timeline of the schedule, 
+        # with the solar anchors resolved for the current day
+        try:
+            self._resolveSolarAnchors( self._blindsSchedule, current_datetime )
+        except BlindSchedulingException as err:
+            print( "WARNING: keeping the previous times of the solar anchors:", err )
+        mode, position, setpoint, active_schedule_block, override = self._scheduledState( current_datetime )
 
-        # found a time block correspoding to current time
         if active_schedule_block is not None: 
+            # found a time block correspoding to current time
             print( "DEBUG: Found an applicable scheduled block.", ScheduleTimeBlock.toJson( active_schedule_block ) )
-            self.do_blinds_update( active_schedule_block._mode, active_schedule_block._position )
-            return 
-
-        # At this point, no time block was found, so we go to the default behaviour
-        print( "DEBUG: Using defaults. Mode=", self._blindsSchedule._default_mode.name, " Pos=", self._blindsSchedule._default_pos )
-        self.do_blinds_update( self._blindsSchedule._default_mode, self._blindsSchedule._default_pos )
+        elif override is not None:
+            print( "DEBUG: Using override.", ScheduleOverride.toDict( override )[ "start" ], "Mode=", mode.name, " Pos=", position )
+        else:
+            # no time block was found, so we go to the default behaviour
+            print( "DEBUG: Using defaults. Mode=", mode.name, " Pos=", position )
+        self.do_blinds_update( mode, position, current_datetime, setpoint )
         return 
 
+    '''
+    Scheduled state at dateTime, with the solar anchors as currently resolved. The time block of the minute is looked up 
+    in the override of the day if there is one, otherwise in the compiled weekly timeline of the schedule. Without a 
+    time block, the override replaces the defaults of the schedule on its days. 
+
+    Returns ( mode, position, setpoint, timeBlock, override ). timeBlock and override are None when not applicable.
+    '''
+    def _scheduledState( self, dateTime ):
+        override = self._blindsSchedule.overrideAt( dateTime )
+        if override is not None:
+            timeBlock = override.timeBlockAt( dateTime )
+        else:
+            timeBlock = self._blindsSchedule.timeBlockAt( dateTime )
+
+        if timeBlock is not None:
+            return timeBlock._mode, timeBlock._position, self._blockSetpoint( timeBlock, override ), timeBlock, override
+
+        if override is not None:
+            setpoint = override._setpoint if override._setpoint is not None else self._blindsSchedule._default_setpoint
+            return override._mode, override._position, setpoint, None, override
+
+        return self._blindsSchedule._default_mode, self._blindsSchedule._default_pos, self._blindsSchedule._default_setpoint, \
+                None, None
+
+    '''
+    Setpoint for a time block, falling back to the setpoint of its override and then to the schedule default when the 
+    block has none. None when none is set, the algorithms then use their default setpoint. 
+    '''
+    def _blockSetpoint( self, timeBlock, override=None ):
+        if timeBlock._setpoint is not None:
+            return timeBlock._setpoint
+        if override is not None and override._setpoint is not None:
+            return override._setpoint
+        return self._blindsSchedule._default_setpoint
+
 
     '''
     Perform update to motor and controls as needed.
+    current_datetime is the time of the update, read from the clock if not given.
+    setpoint is the desired internal temperature for ECO and BALANCED, the algorithm default if not given.
     '''
-    def do_blinds_update( self, target_mode, target_pos=None ):
+    def do_blinds_update( self, target_mode, target_pos=None, current_datetime=None, setpoint=None ):
+        if current_datetime is None:
+            current_datetime = self._clock.now( self._blindsSchedule._timezone )
+
+        if self._thermalController is not None and target_mode in SmartBlindsSystem.THERMAL_MODEL_MODES:
+            self._observeThermalConditions( current_datetime )
+
+        with ALGORITHM_SECONDS.labels( target_mode.name ).time():
+            position = self._compute_target_position( target_mode, target_pos, current_datetime, setpoint )
+
+        # update current mode 
+        self._currentMode = target_mode
+
+        # prevent unnecessary rotations, continuous algorithm outputs go through the deadband, rate limit and step quantization
+        plan = self._motionPlanner.plan( self._blinds.currentPosition, position, current_datetime, 
+                exact=target_mode in SmartBlindsSystem.EXACT_POSITION_MODES )
+
+        if plan.move:
+            self._blinds.rotateToPosition( plan.target_position, self._coalescer.cancelEvent )
+            if self._store is not None:
+                self._store.history.record( "move", { 
+                        "mode" : target_mode.name,
+                        "from" : plan.current_position,
+                        "to" : self._blinds.currentPosition,
+                        "steps" : plan.num_steps }, 
+                    event_time=current_datetime.timestamp() )
+        else:
+            print( "DEBUG: No rotation,", plan.reason )
+
+        if self._thermalController is not None:
+            # the tilt held until the next update, whichever mode set it
+            sample = self._thermalController.applied( self._blinds.currentPosition * ANGLE_POSITION_FACTOR )
+            if self._store is not None and sample is not None:
+                self._store.history.record( "thermal", sample, event_time=current_datetime.timestamp() )
+
+    '''
+    Give the thermal controller the conditions of this update, so that it learns from the change since the last one.
+    The sample is skipped when the weather is not available.
+    '''
+    def _observeThermalConditions( self, current_datetime ):
+        try:
+            cloud_cover, ext_temp = self._environment.get_weather( current_datetime )
+        except HttpClientException as err:
+            print( "WARNING: skipping the thermal sample, the weather is not available:", err )
+            return
+        self._thermalController.observe( current_datetime.timestamp(), self._temperatureSensor.getSample(), ext_temp, 
+                cloud_cover, self._environment.get_solar_angle( current_datetime ) )
+
+    '''
+    Compute the target position for the given mode at current_datetime. target_pos is returned as-is for BlindMode.MANUAL.
+    The solar angle and weather are looked up from the environment once and shared by the algorithms.
+    '''
+    def _compute_target_position( self, target_mode, target_pos, current_datetime, setpoint=None ):
         position = target_pos
 
         if target_mode == BlindMode.MANUAL:
@@ -464,28 +952,40 @@ class SmartBlindsSystem:
         # for other modes, calculate the correct target position
         elif target_mode == BlindMode.LIGHT:
             # convert angle to position
-            position = max_sunlight_algorithm() / ANGLE_POSITION_FACTOR
+            if self._glareAwareLight is not None:
+                position = self._glareAwareLight.tilt_angle( current_datetime ) / ANGLE_POSITION_FACTOR
+            else:
+                solar_angle = self._environment.get_solar_angle( current_datetime )
+                position = max_sunlight_algorithm( solar_angle ) / ANGLE_POSITION_FACTOR
 
         elif target_mode == BlindMode.DARK:
             # treat -100% as the DARK mode
             position = -100
 
         elif target_mode == BlindMode.ECO:
+            tilt_angle = None
+            if self._thermalController is not None:
+                tilt_angle = self._thermalController.tilt_angle( DESIRED_INTERNAL_TEMP if setpoint is None else setpoint )
+
+            if tilt_angle is None and self._predictiveHeatMgmt is not None:
+                tilt_angle = self._predictiveHeatMgmt.tilt_angle( self._temperatureSensor, current_datetime, 
+                        self._environment.get_forecast( current_datetime ), setpoint )
+
+            if tilt_angle is None:
+                solar_angle = self._environment.get_solar_angle( current_datetime )
+                weather = self._environment.get_weather( current_datetime )
+                tilt_angle = heat_mgmt_algorithm( self._temperatureSensor, weather, solar_angle, setpoint )
+
             # convert angle to position
-            position = heat_mgmt_algorithm( self._temperatureSensor ) / ANGLE_POSITION_FACTOR
+            position = tilt_angle / ANGLE_POSITION_FACTOR
 
         elif target_mode == BlindMode.BALANCED:
             # convert angle to position
-            position = composite_algorithm( self._temperatureSensor ) / ANGLE_POSITION_FACTOR
+            solar_angle = self._environment.get_solar_angle( current_datetime )
+            weather = self._environment.get_weather( current_datetime )
+            position = composite_algorithm( self._temperatureSensor, weather, solar_angle, setpoint ) / ANGLE_POSITION_FACTOR
 
-        # update current mode 
-        self._currentMode = target_mode
-
-        # prevent unnecessary rotations
-        if position != self._blinds._currentPosition:
-            self._blinds.rotateToPosition( position )
-        else:
-            print( "DEBUG: No rotation, position has not changed" )
+        return position
 
 # ---------- Custom Exception classes --------- #
 # Thrown when an position outside of [-100, 100] is given to rotateToPositions
@@ -18,8 +18,7 @@ from blinds.blinds_schedule import BlindMode, ScheduleTimeBlock
 '''
 Class to model the commands sent from the external app to control the blinds. These will generally fall into the form 
 of having a desired mode(from BlindMode), duration(in minutes), and position. Giving a duration of 0 will set the blinds
-to the given state until the end of the day. Commands with durations going beyond the end of the day will be truncated to
-end at the end of the day, returning to the scheduled behaviour. 
+to the given state until the end of the day. Commands may last past midnight, for up to MAX_DURATION minutes. 
 
 This class acts as an intermediate step before creating a schedule time block to represent the state. 
 '''
@@ -28,6 +27,9 @@ class BlindsCommand:
     _position = None
     _duration = None
 
+    # longest command, a week in minutes
+    MAX_DURATION = 7 * 24 * 60
+
     '''
     Constructor. Initializes a BlindsCommand object with mode and duration. Position is required only for BlindMode.MANUAL. 
     Validation is performed at the end to ensure that the generated object is valid. 
@@ -50,6 +52,8 @@ class BlindsCommand:
 
         if self._duration < 0: 
             raise InvalidBlindsCommandException( "duration must be at least 1(minute)")
+        elif self._duration > BlindsCommand.MAX_DURATION:
+            raise InvalidBlindsCommandException( "duration must be at most %d minutes" % BlindsCommand.MAX_DURATION )
 
         return True
 
@@ -63,7 +67,8 @@ class BlindsCommand:
     milliseconds will be ignored.
 
     Returns the schedule time block starting from the current time, and ending self._duration minutes later (except when duration
-    is 0), or at the end of the day if duration is 0 or longer than the time remaining in the day    
+    is 0), or at the end of the day if duration is 0. The time block crosses midnight when the command does. For commands 
+    longer than a day, the time block only gives the times of day, endDateTime gives the actual end of the command. 
     '''
     def toTimeBlock( self, currentTimeProvider=None ): 
         if currentTimeProvider is None:
@@ -74,26 +79,34 @@ class BlindsCommand:
 
         if ( self._duration == 0 ):
             endTime = ScheduleTimeBlock.END_OF_DAY
+
+            # check edge case of start and end at 23:59, which will be only case of true 0 duration
+            # In this case, there is 0 duration and thus no real time block, so we return None for consistency
+            if ( startTime == endTime ):
+                return None
         else:
-            # convert duration in minutes to hours + minutes
-            hourOffset = int( ( currentTime.minute + self._duration ) / 60 ) 
-            newHour = currentTime.hour + hourOffset
-            newMinutes = ( currentTime.minute + self._duration ) % 60
-
-            if ( newHour > 23 ):
-                endTime = ScheduleTimeBlock.END_OF_DAY
-            else:
-                endTime = datetime.time( newHour, newMinutes )
-        
-        # check edge case of start and end at 23:59, which will be only case of true 0 duration
-        # this will cause errors in the time block. In this case, there is 0 duration and thus no 
-        # real time block, so we return None for consistency
-        if ( startTime == endTime ):
-            return None
+            # convert duration in minutes to hours + minutes, wrapping around midnight
+            endMinutes = ( currentTime.hour * 60 + currentTime.minute + self._duration ) % ScheduleTimeBlock.MINUTES_PER_DAY
+            endTime = datetime.time( endMinutes // 60, endMinutes % 60 )
 
         return ScheduleTimeBlock( startTime, endTime, self._mode, self._position )
         
 
+    '''
+    Returns the datetime at which the command given at startDateTime ends: self._duration minutes later, or the following 
+    midnight when the duration is 0. Seconds are ignored, as for toTimeBlock. 
+    '''
+    def endDateTime( self, startDateTime ):
+        startDateTime = startDateTime.replace( second=0, microsecond=0 )
+        if self._duration == 0:
+            endDateTime = datetime.datetime.combine( startDateTime.date() + datetime.timedelta( days=1 ), datetime.time() )
+            if startDateTime.tzinfo is not None:
+                endDateTime = startDateTime.tzinfo.localize( endDateTime ) if hasattr( startDateTime.tzinfo, "localize" ) \
+                    else endDateTime.replace( tzinfo=startDateTime.tzinfo )
+            return endDateTime
+
+        return startDateTime + datetime.timedelta( minutes=self._duration )
+
     # ---------- Static Helper Methods for Serialization/Deserialization --------- #
     @staticmethod
     def toDict( command ):
@@ -2,7 +2,9 @@
 File for blinds schedule related code. 
 Contains classes: 
     BlindMode( Enum ): Enum type to represent the mode of the blinds during a given time block
+    SolarAnchor: class to represent a time of day relative to sunrise, solar noon or sunset
     ScheduleTimeBlock: class to represent a time block and the associated state of the blinds during that time
+    ScheduleOverride: class to represent a range of dates, such as a holiday or vacation, that replaces the weekly schedule
     BlindsSchedule: class to hold the scheduling mechanism, gives functions for serializaion and deserialization
 
 Also contains custom exception classes to provide more specific exceptions for scheduling. 
@@ -18,6 +20,7 @@ Author: Alex (Yin) Chen
 Creation Date: February 19, 2020
 '''
 
+from array import array
 from enum import Enum
 import json
 import datetime 
@@ -41,40 +44,120 @@ class BlindMode( Enum ):
     MANUAL = 4
     BALANCED = 5    
 
+'''
+Class representing a time of day relative to a solar event, written as the event with an optional offset in minutes, 
+ex. "sunrise+15", "sunset-30" or "solar_noon". 
+Anchors are resolved with the solar times of a day, a dictionary mapping the events to their time in minutes since 
+midnight. Resolved times are kept within the day. 
+'''
+class SolarAnchor:
+    # static constants for the solar events
+    SUNRISE = "sunrise"
+    SOLAR_NOON = "solar_noon"
+    SUNSET = "sunset"
+    EVENTS = ( SUNRISE, SOLAR_NOON, SUNSET )
+    # solar times used until the anchors are resolved for an actual day
+    NOMINAL_SOLAR_TIMES = { SUNRISE : 6 * 60, SOLAR_NOON : 12 * 60, SUNSET : 18 * 60 }
+
+    _ANCHOR_REGEX = re.compile( r"^(sunrise|solar_noon|sunset)(?:([+-])(\d+))?$" )
+
+    # private attributes
+    _event = None
+    _offset = 0
+
+    '''
+    Constructor for SolarAnchor. 
+
+    Arguments:
+    event - one of SolarAnchor.EVENTS
+
+    Keyword arguments:
+    offset - minutes after the event, negative for before it
+    '''
+    def __init__( self, event, offset=0 ):
+        if event not in SolarAnchor.EVENTS:
+            raise InvalidTimeBlockException( "solar event must be one of " + ", ".join( SolarAnchor.EVENTS ) )
+        if isinstance( offset, bool ) or not isinstance( offset, int ) or abs( offset ) >= ScheduleTimeBlock.MINUTES_PER_DAY:
+            raise InvalidTimeBlockException( "solar offset must be a whole number of minutes shorter than a day" )
+
+        self._event = event
+        self._offset = offset
+
+    '''
+    Returns the time of the anchor as a datetime.time given the solar times of a day
+    '''
+    def resolve( self, solarTimes ):
+        minute = min( max( solarTimes[ self._event ] + self._offset, 0 ), ScheduleTimeBlock.MINUTES_PER_DAY - 1 )
+        return datetime.time( minute // 60, minute % 60 )
+
+    '''
+    Parses an anchor like "sunset-30". Returns None when the string is not an anchor. 
+    '''
+    @staticmethod
+    def fromString( anchorStr ):
+        matches = SolarAnchor._ANCHOR_REGEX.match( anchorStr.strip() )
+        if not matches:
+            return None
+
+        offset = int( matches.group( 3 ) or 0 )
+        return SolarAnchor( matches.group( 1 ), -offset if matches.group( 2 ) == "-" else offset )
+
+    def __str__( self ):
+        if self._offset == 0:
+            return self._event
+        return "%s%+d" % ( self._event, self._offset )
+
+    def __eq__( self, other ):
+        return isinstance( other, SolarAnchor ) and self._event == other._event and self._offset == other._offset
+
 '''
 Class represeting the time block elements for the schedule. Contains a dictionary schedule mapping days of the week
 to a list of time blocks for that day. 
 A schedule consists of a default mode and position, indicating the state in which the blinds should take when there is no
 specified time block. Thus, time blocks constitute exceptions to the default. 
+A time block with an end before its start crosses midnight and ends on the next day, and a time block ending at its 
+start lasts 24 hours. 
+The start and end may be SolarAnchors instead of fixed times. _start and _end then hold the times the anchors resolved 
+to, for the nominal solar times until they are resolved for a day with resolveSolarAnchors. 
 '''
 class ScheduleTimeBlock:
     # public attributes
     # static constant for end of day 
     END_OF_DAY = datetime.time( 23, 59 )
+    MINUTES_PER_DAY = 24 * 60
+    # static constants for the setpoints, which only the temperature based modes use
+    SETPOINT_MODES = ( BlindMode.ECO, BlindMode.BALANCED )
+    MIN_SETPOINT = 5
+    MAX_SETPOINT = 35
 
     # private atttributes
     _start = None
     _end = None 
     _mode = None
     _position = None
+    _setpoint = None
+    _startAnchor = None
+    _endAnchor = None
     
     '''
     Constructor for ScheduleTimeBlock. Sets the values for the time block and the state of the blinds during it. 
     Validates the object after the sets. 
     
     Arguments:
-    start - a datetime.time object
-    end - a datetime.time object
+    start - a datetime.time object or a SolarAnchor
+    end - a datetime.time object or a SolarAnchor
     mode - a value from BlindMode
 
     Keyword arguments:
     position - a valid blind position, required if mode is manual but optional otherwise
+    setpoint - desired internal temperature in Celsius, only for ECO and BALANCED. The schedule default is used if not set.
     '''
-    def __init__( self, start, end, mode, position=None ):
-        self._start = start
-        self._end = end
+    def __init__( self, start, end, mode, position=None, setpoint=None ):
+        self._setStart( start )
+        self._setEnd( end )
         self._mode = mode
         self._position = position
+        self._setpoint = setpoint
 
         self.validate()
 
@@ -82,11 +165,11 @@ class ScheduleTimeBlock:
     Update function for changing internal values of a ScheduleTimeBlock. Also calls the 
     validate function to ensure that the object remains valid. 
     '''
-    def update( self, start=None, end=None, mode=None, position=None ):
+    def update( self, start=None, end=None, mode=None, position=None, setpoint=None ):
         if start is not None: 
-            self._start = start
+            self._setStart( start )
         if end is not None: 
-            self._end = end
+            self._setEnd( end )
         if mode is not None: 
             self._mode = mode 
 
@@ -94,16 +177,65 @@ class ScheduleTimeBlock:
         # however if the mode requires it, it will throw an error in validate if the position is not set. 
         # setting position to None when not given results in more consistent behaviour.
         self._position = position
+        # same for the setpoint, which is only used by some modes
+        self._setpoint = setpoint
 
         self.validate()
 
+    def _setStart( self, start ):
+        self._startAnchor = start if isinstance( start, SolarAnchor ) else None
+        self._start = start.resolve( SolarAnchor.NOMINAL_SOLAR_TIMES ) if self._startAnchor is not None else start
+
+    def _setEnd( self, end ):
+        self._endAnchor = end if isinstance( end, SolarAnchor ) else None
+        self._end = end.resolve( SolarAnchor.NOMINAL_SOLAR_TIMES ) if self._endAnchor is not None else end
+
+    '''
+    Returns whether the start or end of the time block is a SolarAnchor
+    '''
+    def hasSolarAnchors( self ):
+        return self._startAnchor is not None or self._endAnchor is not None
+
+    '''
+    Resolves the SolarAnchors of the time block with the solar times of a day, see SolarAnchor.resolve
+    '''
+    def resolveSolarAnchors( self, solarTimes ):
+        if self._startAnchor is not None:
+            self._start = self._startAnchor.resolve( solarTimes )
+        if self._endAnchor is not None:
+            self._end = self._endAnchor.resolve( solarTimes )
+
+    '''
+    Returns whether the time block crosses midnight, ending on the day after its start
+    '''
+    def crossesMidnight( self ):
+        return self._end <= self._start
+
+    '''
+    Returns the start of the time block in minutes since midnight
+    '''
+    def startMinute( self ):
+        return self._start.hour * 60 + self._start.minute
+
+    '''
+    Returns the length of the time block in minutes, up to a full day
+    '''
+    def durationMinutes( self ):
+        endMinute = self._end.hour * 60 + self._end.minute
+        return ( endMinute - self.startMinute() - 1 ) % ScheduleTimeBlock.MINUTES_PER_DAY + 1
+
     '''
     Checks whether the provided time is before, within, or after the ScheduleTimeBlock.
 
     Returns -1 if time is earlier than the start, 0 if it is between start and end, and 1 if 
     it is after the end. 
+    For a time block crossing midnight, times before the end are within its part on the next day, so 
+    such a block is never after the time. 
     '''
     def checkTime( self, time ): 
+        if self.crossesMidnight():
+            return 0 if time >= self._start or time < self._end else -1
+
         if time < self._start:
             return -1
         
@@ -124,15 +256,20 @@ class ScheduleTimeBlock:
             return "{}"
 
         jsonDict = dict()
-        jsonDict[ "start" ] = str( timeBlock._start )
-        jsonDict[ "end" ] = str( timeBlock._end )
+        # anchored times are kept as anchors, ex. "sunset-30"
+        jsonDict[ "start" ] = str( timeBlock._startAnchor or timeBlock._start )
+        jsonDict[ "end" ] = str( timeBlock._endAnchor or timeBlock._end )
         jsonDict[ "mode" ] = timeBlock._mode.name # get the name of the mode, rather than the ENUM value
         jsonDict[ "position" ] = timeBlock._position 
+        # only present when set, so blocks without a setpoint keep their original format
+        if timeBlock._setpoint is not None:
+            jsonDict[ "setpoint" ] = timeBlock._setpoint
 
         return jsonDict
 
     '''
     Converts a dictionary into a ScheduleTimeBlock object.
+    The start and end are times like "17:30" or solar anchors like "sunset-30". 
     Missing keys will raise InvalidTimeBlockException, otherwise the new ScheduleTimeBlock object will be returned. 
     The generated ScheduleTimeBlock will be validated during creation.
     '''
@@ -140,20 +277,30 @@ class ScheduleTimeBlock:
     def fromDict( timeBlockDict ):
         # produce more descriptive error for missing keys 
         try:
-            # temporary variable used for splitting the time string so we can create a proper datetime object
-            tempTimeList = timeBlockDict[ "start" ].split( ":" )
+            startTime = ScheduleTimeBlock.parseTime( timeBlockDict[ "start" ] )
+            endTime = ScheduleTimeBlock.parseTime( timeBlockDict[ "end" ] )
 
-            # 0 is index of hour, 1 is index of minute, we ignore seconds
-            startTime = datetime.time( int( tempTimeList[ 0 ] ), int( tempTimeList[ 1 ] ) )
-
-            tempTimeList = timeBlockDict[ "end" ].split( ":" )
-            endTime = datetime.time( int( tempTimeList[ 0 ] ), int( tempTimeList[ 1 ] ) )
-
-            return ScheduleTimeBlock( startTime, endTime, BlindMode[ timeBlockDict[ "mode" ] ], timeBlockDict[ "position" ] )
+            return ScheduleTimeBlock( startTime, endTime, BlindMode[ timeBlockDict[ "mode" ] ], timeBlockDict[ "position" ], 
+                                      timeBlockDict.get( "setpoint" ) )
 
         except KeyError as keyError:
             raise InvalidTimeBlockException( "Missing key in ScheduleTimeBlock json: " + str( keyError ) )
 
+    '''
+    Parses a time string like "17:30:00" into a datetime.time, or a solar anchor like "sunset-30" into a SolarAnchor
+    '''
+    @staticmethod
+    def parseTime( timeStr ):
+        anchor = SolarAnchor.fromString( timeStr )
+        if anchor is not None:
+            return anchor
+
+        # temporary variable used for splitting the time string so we can create a proper datetime object
+        tempTimeList = timeStr.split( ":" )
+
+        # 0 is index of hour, 1 is index of minute, we ignore seconds
+        return datetime.time( int( tempTimeList[ 0 ] ), int( tempTimeList[ 1 ] ) )
+
     '''
     Serialize the time block to JSON format. This is done by first generating a dictionary for the json.
     Returns the json dump for the dictionary generated from toDict
@@ -177,15 +324,14 @@ class ScheduleTimeBlock:
     '''
     Validates the contents of a schedule time block. Returns true when the time block is valid,
     throws InvalidTimeBlockException when invalid. 
-    Invalid blocks are blocks where the start time <= end time, or when the mode is BlindMode.manual without setting a position.
+    Invalid blocks are blocks without start or end times, or when the mode is BlindMode.manual without setting a position.
+    An end time before the start time is valid, the block then crosses midnight.
+    A setpoint is only valid for ECO and BALANCED, within MIN_SETPOINT and MAX_SETPOINT. 
     '''
     def validate( self ): 
-        if not ( isinstance( self._start, datetime.time ) and isinstance( self._start, datetime.time ) ):
+        if not ( isinstance( self._start, datetime.time ) and isinstance( self._end, datetime.time ) ):
             raise InvalidTimeBlockException( "start=%s, end=%s start and end times must be instances of datetime.time" % ( self._start, self._end ) )
 
-        if self._start >= self._end:
-            raise InvalidTimeBlockException( "start=%s, end=%s start time must be before the end time" % ( self._start, self._end ) )
-
         if not isinstance( self._mode, BlindMode ):
             raise InvalidTimeBlockException( "mode must be a value from the BlindMode enum" )
 
@@ -194,6 +340,11 @@ class ScheduleTimeBlock:
         elif self._mode == BlindMode.MANUAL and ( self._position > 100 or self._position < -100 ):
             raise InvalidTimeBlockException( "position must a value from -100 to 100" )
 
+        if self._setpoint is not None:
+            validateSetpoint( self._setpoint, InvalidTimeBlockException )
+            if self._mode not in ScheduleTimeBlock.SETPOINT_MODES:
+                raise InvalidTimeBlockException( "setpoint can only be specified when using BlindMode.ECO or BlindMode.BALANCED" )
+
         return True
 
     '''
@@ -204,7 +355,148 @@ class ScheduleTimeBlock:
         if not isinstance( other, ScheduleTimeBlock ):
             return False
         else:
-            return self._start == other._start and self._end == other._end and self._mode == other._mode and self._position == other._position 
+            return ( self._startAnchor or self._start ) == ( other._startAnchor or other._start ) \
+                and ( self._endAnchor or self._end ) == ( other._endAnchor or other._end ) \
+                and self._mode == other._mode and self._position == other._position and self._setpoint == other._setpoint
+
+'''
+Class representing an exception to the weekly schedule, such as a holiday or a vacation. 
+From its start date to its end date, inclusive, the time blocks of the override apply on every day instead of the 
+weekly schedule, and its mode and position apply outside of them. 
+A time block crossing midnight also covers the start of the first day of the override. 
+'''
+class ScheduleOverride:
+    # longest override in days, keeps the index of the overrides by date small
+    MAX_DAYS = 366
+
+    # private attributes
+    _start = None
+    _end = None
+    _name = None
+    _mode = None
+    _position = None
+    _setpoint = None
+    _timeBlocks = []
+    # compiled timeline of a day, the index into _timeBlocks of the time block active at each minute
+    _timeline = None
+
+    '''
+    Constructor for ScheduleOverride. Validates the object after the sets. 
+
+    Arguments:
+    start - first day of the override, a datetime.date object
+    end - last day of the override, a datetime.date object
+    mode - a value from BlindMode, used outside of the time blocks
+
+    Keyword arguments:
+    position - a valid blind position, required if mode is manual but optional otherwise
+    timeBlocks - list of ScheduleTimeBlocks applying on every day of the override
+    name - a description, ex. "Christmas"
+    setpoint - desired internal temperature in Celsius for ECO and BALANCED, for the mode and the time blocks without a 
+        setpoint of their own
+    '''
+    def __init__( self, start, end, mode, position=None, timeBlocks=None, name=None, setpoint=None ):
+        self._start = start
+        self._end = end
+        self._mode = mode
+        self._position = position
+        self._timeBlocks = BlindsSchedule.sortedTimeBlockList( timeBlocks or [] )
+        self._name = name
+        self._setpoint = setpoint
+
+        self.validate()
+        self.checkHasNoTimeConflicts()
+
+    '''
+    Validates the override. Returns True when valid, throws InvalidBlindsScheduleException when invalid. 
+    '''
+    def validate( self ):
+        if not ( isinstance( self._start, datetime.date ) and isinstance( self._end, datetime.date ) ):
+            raise InvalidBlindsScheduleException( "override start and end must be dates" )
+        if self._end < self._start:
+            raise InvalidBlindsScheduleException( "override end must not be before its start" )
+        if ( self._end - self._start ).days >= ScheduleOverride.MAX_DAYS:
+            raise InvalidBlindsScheduleException( "override must last at most %d days" % ScheduleOverride.MAX_DAYS )
+
+        if not isinstance( self._mode, BlindMode ): 
+            raise InvalidBlindsScheduleException( "override mode must be a value from the BlindMode enum" )
+        if self._mode == BlindMode.MANUAL and self._position is None: 
+            raise InvalidBlindsScheduleException( "override position must be specified when using BlindMode.MANUAL" )
+        elif self._mode == BlindMode.MANUAL and ( self._position > 100 or self._position < -100 ):
+            raise InvalidBlindsScheduleException( "override position must a value from -100 to 100" )
+
+        if self._setpoint is not None:
+            validateSetpoint( self._setpoint, InvalidBlindsScheduleException )
+
+        if not all( isinstance( timeBlock, ScheduleTimeBlock ) for timeBlock in self._timeBlocks ):
+            raise InvalidBlindsScheduleException( "override time blocks must be ScheduleTimeBlocks" )
+
+        return True
+
+    '''
+    Checks the time blocks of the override for conflicts and compiles the timeline of its days. 
+    Raises BlindSchedulingException when time blocks overlap. 
+    '''
+    def checkHasNoTimeConflicts( self ):
+        timeline = array( "h", [ BlindsSchedule.NO_TIME_BLOCK ] ) * ScheduleTimeBlock.MINUTES_PER_DAY
+        for index, timeBlock in enumerate( self._timeBlocks ):
+            markTimeBlock( timeline, timeBlock, 0, index, self._name or "override starting " + self._start.isoformat() )
+
+        self._timeline = timeline
+        return True
+
+    '''
+    Returns the days of the override
+    '''
+    def dates( self ):
+        return ( self._start + datetime.timedelta( days=day ) for day in range( ( self._end - self._start ).days + 1 ) )
+
+    '''
+    Returns the time block of the override active at dateTime, or None when the mode of the override applies
+    '''
+    def timeBlockAt( self, dateTime ):
+        index = self._timeline[ dateTime.hour * 60 + dateTime.minute ]
+        return self._timeBlocks[ index ] if index != BlindsSchedule.NO_TIME_BLOCK else None
+
+    '''
+    Returns a JSON-like dictionary representation of the ScheduleOverride
+    '''
+    @staticmethod
+    def toDict( override ):
+        jsonDict = dict()
+        jsonDict[ "start" ] = override._start.isoformat()
+        jsonDict[ "end" ] = override._end.isoformat()
+        if override._name is not None:
+            jsonDict[ "name" ] = override._name
+        jsonDict[ "mode" ] = override._mode.name
+        jsonDict[ "position" ] = override._position
+        if override._setpoint is not None:
+            jsonDict[ "setpoint" ] = override._setpoint
+        jsonDict[ "schedule" ] = list( map( lambda x : ScheduleTimeBlock.toDict( x ), override._timeBlocks ) )
+
+        return jsonDict
+
+    '''
+    Returns a ScheduleOverride based on the provided JSON-like dictionary. 
+    Raises InvalidBlindsScheduleException for missing keys and invalid dates. 
+    '''
+    @staticmethod
+    def fromDict( jsonDict ):
+        try:
+            start = datetime.date.fromisoformat( jsonDict[ "start" ] )
+            end = datetime.date.fromisoformat( jsonDict[ "end" ] )
+            timeBlocks = list( map( lambda x: ScheduleTimeBlock.fromDict( x ), jsonDict.get( "schedule", [] ) ) )
+
+            return ScheduleOverride( start, end, BlindMode[ jsonDict[ "mode" ] ], jsonDict.get( "position" ), timeBlocks, 
+                                     jsonDict.get( "name" ), jsonDict.get( "setpoint" ) )
+
+        except KeyError as error:
+            raise InvalidBlindsScheduleException( "Missing key in override json: " + str( error ) ) 
+        except ValueError as error:
+            raise InvalidBlindsScheduleException( "Invalid override date: " + str( error ) )
+
+    def __eq__( self, other ):
+        return isinstance( other, ScheduleOverride ) and ScheduleOverride.toDict( self ) == ScheduleOverride.toDict( other )
 
 '''
 Class for handling blinds scheduling to define a 
@@ -221,6 +513,8 @@ The general json format is:
 {
     "default_mode": one of {"LIGHT", "DARK", "ECO", "MANUAL"},
     "default_pos" [required only for default="custom"] : <int> position,
+    "default_setpoint" [optional] : <float> desired internal temperature in Celsius for ECO and BALANCED,
+    "overrides" [optional] : [ <override 1>, <override 2>, ... ],
     "schedule": {
         "sunday": [ <time block 1>, <time block 2>, ... ],
         "monday": [ <time block 1>, <time block 2>, ... ],
@@ -231,6 +525,19 @@ The general json format is:
         "saturday": [ <time block 1>, <time block 2>, ... ]
     }
 }
+
+Time blocks are listed under the day they start on. The schedule is compiled into a timeline of the week with the 
+time block active at every minute, so looking up the active time block does not depend on the number of time blocks. 
+The timeline is compiled when the conflicts are checked, so code that edits the time blocks in place must call 
+checkHasNoTimeConflicts again. 
+
+Time blocks may start or end at solar anchors like "sunset-30". These are resolved once per day with 
+resolveSolarAnchors, which sorts the time blocks, checks them for conflicts and compiles the timeline with the 
+resolved times. Until then, they are at nominal times (see SolarAnchor). 
+
+Overrides replace the weekly schedule on their dates (see ScheduleOverride). They are indexed by date when the 
+schedule is compiled, so finding the override of a day does not depend on the number of overrides. Overrides may 
+not overlap. 
 '''
 class BlindsSchedule:
     # class constants for days of the week, these values should NOT be changed
@@ -244,9 +551,14 @@ class BlindsSchedule:
 
     DAYS_OF_WEEK = [ MONDAY, TUESDAY, WEDNESDAY, THURSDAY, FRIDAY, SATURDAY, SUNDAY ]
 
+    MINUTES_PER_WEEK = len( DAYS_OF_WEEK ) * ScheduleTimeBlock.MINUTES_PER_DAY
+    # timeline value for minutes without a time block
+    NO_TIME_BLOCK = -1
+
     # object attributes describing the schedule
     _default_mode = None 
     _default_pos = None
+    _default_setpoint = None
     _timezone = get_localzone()
     _schedule = {
         SUNDAY : [],
@@ -257,22 +569,37 @@ class BlindsSchedule:
         FRIDAY : [],
         SATURDAY : []
     }
+    # compiled timeline, the index into _timelineBlocks of the time block active at each minute of the week
+    _timeline = None
+    _timelineBlocks = []
+    # day the solar anchors were last resolved for
+    _solarDate = None
+    # overrides of the weekly schedule, and the override of each date they cover
+    _overrides = []
+    _overrideIndex = {}
 
     '''
     Constructor for BlindsSchedule. Initializes it with the default mode and position, and a 
     schedule of time blocks if provided. 
     Calls self.validate at the end to ensure that the created object is valid.
     The schedule is also sorted and checked for conflicts.  
+    The default setpoint applies to the default mode and to the time blocks without a setpoint of their own. 
+    overrides is a list of ScheduleOverrides. 
     '''
-    def __init__( self, default_mode, default_pos=None, schedule=None, timezone=None ):
+    def __init__( self, default_mode, default_pos=None, schedule=None, timezone=None, default_setpoint=None, overrides=None ):
         self._default_mode = default_mode
         self._default_pos = default_pos
+        self._default_setpoint = default_setpoint
+        self._overrides = overrides if overrides is not None else []
 
         if timezone is not None:
             self._timezone = timezone
 
         if schedule is not None:
             self._schedule = schedule
+        else:
+            # use a fresh schedule, the class level one would otherwise be shared and mutated by all instances
+            self._schedule = { day : [] for day in BlindsSchedule.DAYS_OF_WEEK }
 
         # validate and checking for conflicts are separated to ensure that the time blocks can be sorted without error
         self.validate()
@@ -280,11 +607,13 @@ class BlindsSchedule:
         self.checkHasNoTimeConflicts()
 
     '''
-    Sort the schedule using sortedTimeBlockList
+    Sort the schedule and the time blocks of the overrides using sortedTimeBlockList
     '''
     def sortScheduleBlocks( self ):
         for day in BlindsSchedule.DAYS_OF_WEEK:
             self._schedule[ day ] = BlindsSchedule.sortedTimeBlockList( self._schedule[ day ] )
+        for override in self._overrides:
+            override._timeBlocks = BlindsSchedule.sortedTimeBlockList( override._timeBlocks )
 
     '''
     Validates the BlindsSchedule object. Returns True if the BlindsSchedule is properly defined, and throws exceptions otherwise. 
@@ -307,6 +636,9 @@ class BlindsSchedule:
         elif self._default_mode == BlindMode.MANUAL and ( self._default_pos > 100 or self._default_pos < -100 ):
             raise InvalidBlindsScheduleException( "default position must a value from -100 to 100" )
 
+        if self._default_setpoint is not None:
+            validateSetpoint( self._default_setpoint, InvalidBlindsScheduleException )
+
         # checks for _schedule being well formatted
         if not isinstance( self._schedule, dict ) or ( set( self._schedule.keys() ) != set( BlindsSchedule.DAYS_OF_WEEK ) ):
             raise InvalidBlindsScheduleException( "schedule must be a dictionary with keys being the days of the week and values being lists of ScheduleTimeBlocks" )
@@ -316,20 +648,120 @@ class BlindsSchedule:
             if not all( map( lambda x: isinstance( x, ScheduleTimeBlock ), timeBlockList ) ):
                 raise InvalidBlindsScheduleException( "schedule must be a dictionary with keys being the days of the week and values being lists of ScheduleTimeBlocks" )
 
+        if not isinstance( self._overrides, list ) or not all( isinstance( x, ScheduleOverride ) for x in self._overrides ):
+            raise InvalidBlindsScheduleException( "overrides must be a list of ScheduleOverrides" )
+
         return True
 
     '''
-    Checks for scheduling conflicts within a BlindsSchedule object. 
-    Will raise BlindSchedulingException when there conflicting time blocks on a given day. 
-    The should only be called after the time blocks for each day are sorted. 
+    Checks for scheduling conflicts within a BlindsSchedule object, compiles the timeline of the week and indexes the 
+    overrides by date. 
+    Will raise BlindSchedulingException when there are overlapping time blocks, including time blocks crossing 
+    midnight into the next day, or overlapping overrides. 
     Otherwise, returns True when there are no conflicts. 
     '''
     def checkHasNoTimeConflicts( self ):
-        for day in BlindsSchedule.DAYS_OF_WEEK: 
-            # checks for time conflicts
-            if BlindsSchedule.hasConflict( self._schedule[ day ] ):
-                raise BlindSchedulingException( "schedule has conflicting time blocks on " + day )
+        timeline = array( "h", [ BlindsSchedule.NO_TIME_BLOCK ] ) * BlindsSchedule.MINUTES_PER_WEEK
+        timelineBlocks = []
+
+        for dayIndex, day in enumerate( BlindsSchedule.DAYS_OF_WEEK ): 
+            for timeBlock in self._schedule[ day ]:
+                # a time block crossing midnight at the end of the week continues at the start of the week
+                markTimeBlock( timeline, timeBlock, dayIndex * ScheduleTimeBlock.MINUTES_PER_DAY, len( timelineBlocks ), day )
+                timelineBlocks.append( timeBlock )
+
+        # index the overrides by date
+        overrideIndex = dict()
+        for override in self._overrides:
+            override.checkHasNoTimeConflicts()
+            for date in override.dates():
+                if date in overrideIndex:
+                    raise BlindSchedulingException( "schedule has overlapping overrides on " + date.isoformat() )
+                overrideIndex[ date ] = override
+
+        self._timeline = timeline
+        self._timelineBlocks = timelineBlocks
+        self._overrideIndex = overrideIndex
+        return True
+
+    '''
+    Returns the override of the day of dateTime, or None when the weekly schedule applies. 
+    dateTime must be in the timezone of the schedule. 
+    '''
+    def overrideAt( self, dateTime ):
+        if self._timeline is None:
+            self.checkHasNoTimeConflicts()
+
+        return self._overrideIndex.get( dateTime.date() )
+
+    '''
+    Returns the time block of the weekly schedule active at dateTime, or None when the default applies. 
+    Overrides are not considered, see overrideAt. 
+    dateTime must be in the timezone of the schedule. 
+    '''
+    def timeBlockAt( self, dateTime ):
+        if self._timeline is None:
+            self.checkHasNoTimeConflicts()
+
+        minute = dateTime.weekday() * ScheduleTimeBlock.MINUTES_PER_DAY + dateTime.hour * 60 + dateTime.minute
+        index = self._timeline[ minute ]
+        return self._timelineBlocks[ index ] if index != BlindsSchedule.NO_TIME_BLOCK else None
+
+    '''
+    Returns whether any time block of the schedule has a SolarAnchor
+    '''
+    def hasSolarAnchors( self ):
+        return any( timeBlock.hasSolarAnchors() for day in BlindsSchedule.DAYS_OF_WEEK for timeBlock in self._schedule[ day ] ) \
+            or any( timeBlock.hasSolarAnchors() for override in self._overrides for timeBlock in override._timeBlocks )
+
+    '''
+    Resolves the solar anchors of the time blocks for the week around date, unless they are already resolved for date. 
+    Each day of the week is resolved with the solar times of its date from the day before date to 5 days after, so 
+    both the current day and time blocks crossing midnight from the day before use their actual solar times. 
+    The time blocks of overrides are resolved with the solar times of date. 
+
+    Arguments:
+    date - the current day, a datetime.date in the timezone of the schedule
+    solarTimesForDate - function giving the solar times of a datetime.date, see SolarAnchor
 
+    Returns True when the anchors were resolved. 
+    Raises BlindSchedulingException when the resolved time blocks conflict, the previous times are then kept for the day. 
+    '''
+    def resolveSolarAnchors( self, date, solarTimesForDate ):
+        if date == self._solarDate or not self.hasSolarAnchors():
+            return False
+
+        previousTimes = []
+        for dayIndex, day in enumerate( BlindsSchedule.DAYS_OF_WEEK ):
+            anchoredBlocks = [ timeBlock for timeBlock in self._schedule[ day ] if timeBlock.hasSolarAnchors() ]
+            if not anchoredBlocks:
+                continue
+
+            solarTimes = solarTimesForDate( date + datetime.timedelta( days=( dayIndex - date.weekday() + 1 ) % 7 - 1 ) )
+            for timeBlock in anchoredBlocks:
+                previousTimes.append( ( timeBlock, timeBlock._start, timeBlock._end ) )
+                timeBlock.resolveSolarAnchors( solarTimes )
+
+        anchoredBlocks = [ timeBlock for override in self._overrides for timeBlock in override._timeBlocks if timeBlock.hasSolarAnchors() ]
+        if anchoredBlocks:
+            solarTimes = solarTimesForDate( date )
+            for timeBlock in anchoredBlocks:
+                previousTimes.append( ( timeBlock, timeBlock._start, timeBlock._end ) )
+                timeBlock.resolveSolarAnchors( solarTimes )
+
+        self.sortScheduleBlocks()
+        try:
+            self.checkHasNoTimeConflicts()
+        except BlindSchedulingException:
+            for timeBlock, start, end in previousTimes:
+                timeBlock._start, timeBlock._end = start, end
+            self.sortScheduleBlocks()
+            self.checkHasNoTimeConflicts()
+            # not retried until the next day
+            self._solarDate = date
+            raise
+
+        self._solarDate = date
         return True
 
     '''
@@ -343,7 +775,8 @@ class BlindsSchedule:
     '''
     Checks for time block conflicts given a list of ScheduleTimeBlocks sorted by start time.
     A time conflict is defined as having time blocks with overlapping durations.
-    Assumes that all the time blocks are valid. 
+    Assumes that all the time blocks are valid. A time block crossing midnight conflicts with the blocks after its start, 
+    its part on the next day is checked by checkHasNoTimeConflicts. 
 
     Returns True if there is a conflict, false otherwise. 
     '''
@@ -351,7 +784,7 @@ class BlindsSchedule:
     def hasConflict( timeBlockList ): 
         lastTimeBlock = None
         for timeBlock in timeBlockList: 
-            if lastTimeBlock is not None and timeBlock._start < lastTimeBlock._end:
+            if lastTimeBlock is not None and ( lastTimeBlock.crossesMidnight() or timeBlock._start < lastTimeBlock._end ):
                 return True
             lastTimeBlock = timeBlock
 
@@ -433,7 +866,14 @@ class BlindsSchedule:
 
             jsonDict[ "default_pos" ] = schedule._default_pos
 
+            if schedule._default_setpoint is not None:
+                jsonDict[ "default_setpoint" ] = schedule._default_setpoint
+
             jsonDict[ "timezone" ] = BlindsSchedule.tzToGmtString( schedule._timezone )
+
+            # only present when there are overrides, so other schedules keep their original format
+            if schedule._overrides:
+                jsonDict[ "overrides" ] = list( map( lambda x : ScheduleOverride.toDict( x ), schedule._overrides ) )
             
             jsonDict[ "schedule" ] = dict() 
             for day in BlindsSchedule.DAYS_OF_WEEK: 
@@ -458,9 +898,10 @@ class BlindsSchedule:
 
             parsed_sched = jsonDict[ "schedule" ]
 
-            blindsSchedule = BlindsSchedule( default_mode, default_pos, timezone=tz )
+            blindsSchedule = BlindsSchedule( default_mode, default_pos, timezone=tz, default_setpoint=jsonDict.get( "default_setpoint" ) )
             for day in BlindsSchedule.DAYS_OF_WEEK:
                 blindsSchedule._schedule[ day ] = list( map( lambda x: ScheduleTimeBlock.fromDict( x ), parsed_sched[ day ] ) )
+            blindsSchedule._overrides = list( map( lambda x: ScheduleOverride.fromDict( x ), jsonDict.get( "overrides", [] ) ) )
 
             blindsSchedule.validate()
             blindsSchedule.sortScheduleBlocks()
@@ -492,6 +933,34 @@ class BlindsSchedule:
 
         return BlindsSchedule.fromDict( parsedDict )
 
+'''
+Marks the minutes of timeBlock in a timeline, with the time block starting on the day beginning at minute dayStart. 
+A time block running past the end of the timeline continues at its start. 
+Raises BlindSchedulingException, naming day, when the minutes are taken by another time block. 
+'''
+def markTimeBlock( timeline, timeBlock, dayStart, index, day ):
+    start = dayStart + timeBlock.startMinute()
+    end = start + timeBlock.durationMinutes()
+
+    segments = [ ( start, min( end, len( timeline ) ) ) ]
+    if end > len( timeline ):
+        segments.append( ( 0, end - len( timeline ) ) )
+
+    for segmentStart, segmentEnd in segments:
+        if timeline[ segmentStart:segmentEnd ].count( BlindsSchedule.NO_TIME_BLOCK ) != segmentEnd - segmentStart:
+            raise BlindSchedulingException( "schedule has conflicting time blocks on " + day )
+        timeline[ segmentStart:segmentEnd ] = array( "h", [ index ] ) * ( segmentEnd - segmentStart )
+
+'''
+Checks that a setpoint is a number between ScheduleTimeBlock.MIN_SETPOINT and ScheduleTimeBlock.MAX_SETPOINT, 
+raising exceptionClass otherwise. 
+'''
+def validateSetpoint( setpoint, exceptionClass ):
+    if isinstance( setpoint, bool ) or not isinstance( setpoint, ( int, float ) ):
+        raise exceptionClass( "setpoint must be a number" )
+    if setpoint < ScheduleTimeBlock.MIN_SETPOINT or setpoint > ScheduleTimeBlock.MAX_SETPOINT:
+        raise exceptionClass( "setpoint must a value from %s to %s" % ( ScheduleTimeBlock.MIN_SETPOINT, ScheduleTimeBlock.MAX_SETPOINT ) )
+
 # ---------- Custom Exception classes --------- #
 # Thrown when the BlindsSchedule object is invalid
 class InvalidBlindsScheduleException( Exception ):
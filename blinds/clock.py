@@ -0,0 +1,63 @@
+'''
+File for the clocks used by the smart blinds system. 
+Contains classes: 
+    SystemClock: reads the wall clock and sleeps in real time
+    SimulatedClock: clock that only moves when advanced, used to fast-forward the system in simulations and tests
+
+Author: ECE 492 Group 6
+Creation Date: October 19, 2026
+'''
+
+import datetime
+import time
+from pytz import utc
+
+'''
+Clock backed by the system time. This is the default clock of SmartBlindsSystem.
+'''
+class SystemClock:
+    '''
+    Returns the current datetime, in tz if given (same as datetime.datetime.now)
+    '''
+    def now( self, tz=None ):
+        return datetime.datetime.now( tz )
+
+    '''
+    Blocks for the given number of seconds
+    '''
+    def sleep( self, seconds ):
+        time.sleep( seconds )
+
+'''
+Clock for simulated time. Time only moves forward through advance or sleep, which return immediately. 
+
+Arguments:
+    start : a timezone aware datetime.datetime for the start of the simulation
+'''
+class SimulatedClock:
+    def __init__( self, start ):
+        if start.tzinfo is None:
+            raise ValueError( "start of a simulated clock must be timezone aware" )
+        self._now = start.astimezone( utc )
+
+    '''
+    Returns the simulated datetime, in tz if given. Without tz, a naive datetime in UTC is returned.
+    '''
+    def now( self, tz=None ):
+        if tz is None:
+            return self._now.replace( tzinfo=None )
+        return self._now.astimezone( tz )
+
+    '''
+    Moves the simulated time forward by seconds
+    '''
+    def advance( self, seconds ):
+        if seconds < 0:
+            raise ValueError( "simulated time can only move forward" )
+        self._now += datetime.timedelta( seconds=seconds )
+
+    '''
+    Sleeping on a simulated clock advances it without blocking
+    '''
+    def sleep( self, seconds ):
+        self.advance( seconds )
@@ -0,0 +1,184 @@
+'''
+File for the preemptible motion executor of the blinds.
+Contains classes:
+    MotionExecutor: moves the blinds through a stream of targets, always towards the latest one
+
+Author: ECE 492 Group 6
+Creation Date: October 19, 2026
+'''
+
+import collections
+import threading
+import time
+
+from metrics.metrics import REGISTRY
+
+# ---------- Metrics --------- #
+MOTION_TARGETS = REGISTRY.counter( "smartblinds_motion_targets",
+        "Targets given to the motion executor" )
+MOTION_START_SECONDS = REGISTRY.histogram( "smartblinds_motion_start_seconds",
+        "Time from a target given to the motion executor to the first step of the move to it" )
+# ---------- END OF Metrics --------- #
+
+'''
+Moves the blinds through a stream of target positions (ex. from a slider) from a thread of its own. A new target
+preempts the move in flight at the next step boundary and the move to it starts from there right away, so the blinds
+follow the stream without working through stale targets.
+
+Listeners are called with the events of the moves from a thread of their own, outside of the execution lock, so that a
+slow listener never holds up the motor. While the listeners are behind, a progress event replaces the queued progress
+event of the same move, so they get the latest progress rather than a backlog. The events:
+    { "type" : "progress", "target" : %, "position" : %, "steps" : steps done, "total_steps" : steps of the move }
+    { "type" : "done", "target" : %, "position" : % } once the latest target is reached
+    { "type" : "error", "target" : %, "message" : reason } if the move failed
+A progress event with 0 steps is sent right before the first step of a move.
+
+Arguments:
+    blinds : the Blinds to move
+    executionLock : lock held during the moves, shared with anything else moving the blinds
+'''
+class MotionExecutor:
+    def __init__( self, blinds, executionLock=None ):
+        self._blinds = blinds
+        self._executionLock = executionLock if executionLock is not None else threading.RLock()
+        self._condition = threading.Condition()
+        self._cancelEvent = threading.Event()
+        self._listeners = []
+        self._target = None
+        self._targetTime = None
+        self._thread = None
+        self._stopped = False
+
+        # events waiting for the listeners, and the thread calling them
+        self._eventCondition = threading.Condition()
+        self._events = collections.deque()
+        self._dispatcher = None
+
+    '''
+    Add a function called with every event
+    '''
+    def addListener( self, listener ):
+        with self._condition:
+            self._listeners.append( listener )
+
+    def removeListener( self, listener ):
+        with self._condition:
+            if listener in self._listeners:
+                self._listeners.remove( listener )
+
+    '''
+    Current position of the blinds as a rotational %
+    '''
+    @property
+    def currentPosition( self ):
+        return self._blinds.currentPosition
+
+    '''
+    Move the blinds to position, preempting the move in flight. The thread of the executor is started on first use.
+    Raises InvalidBlindPositionException if the position is not within [-100%, 100%].
+    '''
+    def setTarget( self, position ):
+        self._blinds.checkPosition( position )
+        MOTION_TARGETS.inc()
+
+        with self._condition:
+            self._target = position
+            self._targetTime = time.perf_counter()
+            self._cancelEvent.set()
+
+            if self._thread is None:
+                self._thread = threading.Thread( target=self._run, name="motion-executor", daemon=True )
+                self._thread.start()
+            self._condition.notify()
+
+    '''
+    Stop the move in flight and the thread of the executor
+    '''
+    def stop( self ):
+        with self._condition:
+            self._stopped = True
+            self._cancelEvent.set()
+            self._condition.notify()
+            thread = self._thread
+
+        if thread is not None:
+            thread.join()
+
+        with self._eventCondition:
+            self._eventCondition.notify()
+            dispatcher = self._dispatcher
+        if dispatcher is not None:
+            dispatcher.join()
+
+    def _run( self ):
+        while True:
+            with self._condition:
+                while self._target is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+
+                target, targetTime = self._target, self._targetTime
+                self._target = None
+                self._cancelEvent.clear()
+
+            def progress( stepsDone, totalSteps ):
+                if stepsDone == 0:
+                    MOTION_START_SECONDS.observe( time.perf_counter() - targetTime )
+                self._notify( { "type" : "progress", "target" : target, "position" : self._blinds.currentPosition,
+                        "steps" : stepsDone, "total_steps" : totalSteps } )
+
+            try:
+                with self._executionLock:
+                    self._blinds.rotateToPosition( target, self._cancelEvent, progress )
+            except Exception as err:
+                self._notify( { "type" : "error", "target" : target, "message" : str( err ) } )
+                continue
+
+            # a newer target is waiting otherwise
+            if not self._cancelEvent.is_set():
+                self._notify( { "type" : "done", "target" : target, "position" : self._blinds.currentPosition } )
+
+    '''
+    Queue an event for the listeners, never blocks on them
+    '''
+    def _notify( self, event ):
+        with self._eventCondition:
+            if self._events and isSupersededProgress( self._events[ -1 ], event ):
+                self._events[ -1 ] = event
+            else:
+                self._events.append( event )
+
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread( target=self._dispatch, name="motion-events", daemon=True )
+                self._dispatcher.start()
+            self._eventCondition.notify()
+
+    '''
+    Call the listeners with the queued events, until the executor is stopped and the queue is empty
+    '''
+    def _dispatch( self ):
+        while True:
+            with self._eventCondition:
+                while not self._events and not self._stopped:
+                    self._eventCondition.wait()
+                if not self._events:
+                    return
+                event = self._events.popleft()
+
+            with self._condition:
+                listeners = list( self._listeners )
+
+            for listener in listeners:
+                try:
+                    listener( event )
+                except Exception as err:
+                    print( "WARNING: motion executor listener failed:", err )
+
+'''
+True if event makes the queued event redundant: both are progress of the same move, and the queued event is not the 
+start of the move, which is kept to report when the motion started
+'''
+def isSupersededProgress( queued, event ):
+    return queued[ "type" ] == "progress" and event[ "type" ] == "progress" and queued[ "steps" ] > 0 and \
+            queued[ "target" ] == event[ "target" ]
@@ -0,0 +1,117 @@
+'''
+File for coalescing the requests that move the blinds.
+Contains classes:
+    RequestCoalescer: collapses bursts of requests into a single move to the latest target
+
+Author: ECE 492 Group 6
+Creation Date: October 19, 2026
+'''
+
+import threading
+import time
+
+from metrics.metrics import REGISTRY
+
+# ---------- Metrics --------- #
+REQUESTS_COALESCED = REGISTRY.counter( "smartblinds_requests_coalesced",
+        "Requests superseded by a newer request before their move finished" )
+# ---------- END OF Metrics --------- #
+
+'''
+Collapses bursts of requests that move the blinds (ex. from dragging a slider in the app) into a single move to the
+latest target, so that the blinds follow the latest request rather than working through every request of the burst.
+
+A request is a job, a function that moves the blinds and returns the response data. The first request of a burst waits
+for window seconds to collect the rest of the burst, and then runs the latest job. A request made while a job is
+running supersedes it: the running move is cancelled at the next step boundary through cancelEvent, and the latest job
+runs next. Every caller of the burst waits until no newer request is left, and gets the response of the final job.
+
+Jobs run under executionLock, which anything else moving the blinds (ex. the main loop) should hold as well.
+
+Arguments:
+    window : seconds to wait for more requests before the first move of a burst, 0 to move right away
+'''
+class RequestCoalescer:
+    def __init__( self, window=0 ):
+        self.window = window
+        # set while a newer request is waiting, moves given this event stop at the next step boundary
+        self.cancelEvent = threading.Event()
+        self.executionLock = threading.RLock()
+
+        self._lock = threading.Lock()
+        # latest job that was not started yet
+        self._pendingJob = None
+        # requests of the current burst that wait for the final job
+        self._waiting = []
+        # true while a caller runs the jobs of the burst
+        self._draining = False
+
+    '''
+    Run job, or a later job that supersedes it. Blocks until the final job of the burst has run.
+    Returns the response data of the final job, or raises its exception.
+    '''
+    def submit( self, job ):
+        request = _CoalescedRequest()
+        with self._lock:
+            if self._pendingJob is not None:
+                REQUESTS_COALESCED.inc()
+            self._pendingJob = job
+            self._waiting.append( request )
+
+            drain = not self._draining
+            if drain:
+                self._draining = True
+            else:
+                # stop the running move of an older request, if any
+                self.cancelEvent.set()
+
+        if drain:
+            self._drain()
+
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    '''
+    Run the latest job until there is no newer one, then hand its outcome to all waiting requests
+    '''
+    def _drain( self ):
+        if self.window > 0:
+            time.sleep( self.window )
+
+        result, error = None, None
+        while True:
+            with self._lock:
+                job = self._pendingJob
+                self._pendingJob = None
+                if job is None:
+                    waiting = self._waiting
+                    self._waiting = []
+                    self._draining = False
+                    break
+                self.cancelEvent.clear()
+
+            try:
+                with self.executionLock:
+                    result, error = job(), None
+            except Exception as err:
+                result, error = None, err
+
+            with self._lock:
+                if self._pendingJob is not None:
+                    REQUESTS_COALESCED.inc()
+
+        for request in waiting:
+            request.result = result
+            request.error = error
+            request.done.set()
+
+'''
+A request waiting for the final job of its burst
+'''
+class _CoalescedRequest:
+    def __init__( self ):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
@@ -4,6 +4,10 @@ Author: Sam Wu
 Contents: Map blind slat tilt angle to stepper motor steps and vice-versa
 """
  
+import bisect
+import math
+import numpy
+
 import controlalgorithm.max_sunlight_algorithm as max_sun
 import controlalgorithm.heat_mgmt_algorithm as heat_mgmt
 import controlalgorithm.composite_algorithm as comp_alg
@@ -15,17 +19,201 @@ from easydriver.easydriver import MicroStepResolution, StepDirection
 Constants
 
 ANGLE_POSITION_FACTOR: factor that maps angles to a position in percentage ranging from [-100%, 100%]
-NUM_STEPS_FACTOR: factor that is multiplied by the number of steps to get the actual angle, to overcome friction
+NUM_STEPS_FACTOR: motor angle per degree of slat tilt of the default linear calibration, used until a blind is calibrated
+MICROSTEP_ANGLE: motor angle of one eighth step, the unit used to account for the motor position
+MICROSTEPS_PER_STEP: number of eighth steps in one step of each resolution, coarsest first
+DEFAULT_ANGULAR_ACCURACY: default allowed error of the blind slat tilt angle after a move, in degrees
+DIRECTION_NAMES: names of the directions in a stored calibration table
 """
 ANGLE_POSITION_FACTOR = 90 / 100
 NUM_STEPS_FACTOR = 1.3
+MICROSTEP_ANGLE = 0.225
+MICROSTEPS_PER_STEP = {
+    MicroStepResolution.FULL_STEP: 8,
+    MicroStepResolution.HALF_STEP: 4,
+    MicroStepResolution.QUARTER_STEP: 2,
+    MicroStepResolution.EIGHTH_STEP: 1,
+}
+DEFAULT_ANGULAR_ACCURACY = 0.9
+DIRECTION_NAMES = {
+    StepDirection.FORWARD: "forward",
+    StepDirection.REVERSE: "reverse",
+}
+
+"""
+Map a blind slat tilt angle to the motor position in eighth steps, with the calibration of the blinds
+"""
+def tilt_angle_to_microsteps(tilt_angle):
+    return get_mapper().tilt_angle_to_microsteps(tilt_angle)
+
+"""
+Map a motor position in eighth steps to the blind slat tilt angle, with the calibration of the blinds
+"""
+def microsteps_to_tilt_angle(microsteps):
+    return get_mapper().microsteps_to_tilt_angle(microsteps)
+
+"""
+Coarsest resolution for which stopping at the nearest step keeps the tilt angle within accuracy degrees,
+with the calibration of the blinds
+"""
+def resolution_for_accuracy(accuracy):
+    return get_mapper().resolution_for_accuracy(accuracy)
 
 """
-Class to handle mapping of angle to steps and vice-versa
+Mapper with the calibration table in persistent data (see AngleStepMapper.load), loaded on first use.
+The module functions above go through it, so that they agree with the mapper of the blinds.
+"""
+def get_mapper():
+    global _calibrated_mapper
+    mapper = _calibrated_mapper
+    if mapper is None:
+        mapper = _calibrated_mapper = AngleStepMapper.load()
+    return mapper
+
+"""
+Drop the mapper of get_mapper, so that it is loaded again. Called when the calibration or the persistent data change.
+"""
+def reset_mapper():
+    global _calibrated_mapper
+    _calibrated_mapper = None
+
+"""
+Calibration of one blind: a piecewise-linear map of the slat tilt angle to the motor position, and the backlash
+of the slats for each direction of approach.
+The slats lag the motor when it reverses, so the motor position at which the slats reach an angle depends on
+the direction the angle is approached from. The table gives the positions when approached forward, and the
+backlash offset of a direction is added to them when approached in that direction.
+Positions beyond the first and last angle are extrapolated from the first and last segment.
+Inputs:
+    angles (list): tilt angles of the table in degrees, increasing
+    microsteps (list): motor positions in eighth steps at which the slats are at the angles, increasing
+    backlash (dict): StepDirection to offset in eighth steps, 0 for directions not given
+"""
+class CalibrationTable:
+    def __init__(self, angles, microsteps, backlash=None):
+        if len(angles) < 2 or len(angles) != len(microsteps):
+            raise ValueError("a calibration table needs a motor position for each of at least 2 angles")
+        if any(b <= a for a, b in zip(angles, angles[1:])) or any(b <= a for a, b in zip(microsteps, microsteps[1:])):
+            raise ValueError("the angles and motor positions of a calibration table must be increasing")
+
+        self.angles = [float(angle) for angle in angles]
+        self.microsteps = [float(position) for position in microsteps]
+        self.backlash = {direction: 0 for direction in StepDirection}
+        for direction, offset in (backlash or {}).items():
+            self.backlash[StepDirection(direction)] = int(offset)
+
+    """
+    Table of a blind where the slats tilt factor degrees less than the motor turns, over the full range and without
+    backlash
+    """
+    @classmethod
+    def linear(cls, factor=NUM_STEPS_FACTOR):
+        return cls([-90, 0, 90], [-90 * factor / MICROSTEP_ANGLE, 0, 90 * factor / MICROSTEP_ANGLE])
+
+    """
+    Create a table from its dictionary form, as stored in the persistent data
+    """
+    @classmethod
+    def from_dict(cls, table_dict):
+        names = {name: direction for direction, name in DIRECTION_NAMES.items()}
+        backlash = {names[name]: offset for name, offset in table_dict.get("backlash", {}).items()}
+        return cls(table_dict["angles"], table_dict["microsteps"], backlash)
+
+    def to_dict(self):
+        return {
+            "angles": self.angles,
+            "microsteps": self.microsteps,
+            "backlash": {DIRECTION_NAMES[direction]: offset for direction, offset in self.backlash.items()},
+        }
+
+"""
+Calibration used by blinds that were never calibrated
+"""
+DEFAULT_CALIBRATION = CalibrationTable.linear()
+
+"""
+Class to handle mapping of angle to steps and vice-versa.
+The calibration table is compiled into arrays when it is set: the slope and intercept of each segment for the
+tilt angle to motor position map, and the tilt angle of every eighth step within the table for the inverse map,
+so that lookups are a bisection or an index rather than an interpolation.
+Inputs:
+    calibration (CalibrationTable): calibration of the blind, the default linear calibration if None
 """
 class AngleStepMapper:
-    def __init__( self ):
-        pass
+    def __init__( self, calibration=None ):
+        self.calibration = calibration if calibration is not None else DEFAULT_CALIBRATION
+
+    """
+    Create a mapper with the calibration table recorded for the blind, or the default calibration if there is none
+    """
+    @classmethod
+    def load(cls):
+        table_dict = p_data.get_calibration()
+        return cls(CalibrationTable.from_dict(table_dict) if table_dict is not None else None)
+
+    @property
+    def calibration(self):
+        return self._calibration
+
+    @calibration.setter
+    def calibration(self, calibration):
+        angles = calibration.angles
+        microsteps = calibration.microsteps
+
+        # eighth steps per degree and motor position at 0 degrees of each segment
+        self._slopes = [(microsteps[i + 1] - microsteps[i]) / (angles[i + 1] - angles[i]) for i in range(len(angles) - 1)]
+        self._intercepts = [microsteps[i] - angles[i] * slope for i, slope in enumerate(self._slopes)]
+        # inner angles and positions of the table, bisected to find the segment of a lookup
+        self._angle_breaks = angles[1:-1]
+        self._microstep_breaks = microsteps[1:-1]
+
+        self._first_microstep = int(math.ceil(microsteps[0]))
+        positions = numpy.arange(self._first_microstep, int(math.floor(microsteps[-1])) + 1)
+        self._angle_by_microstep = numpy.interp(positions, microsteps, angles).tolist()
+
+        self._backlash = dict(calibration.backlash)
+        self._calibration = calibration
+
+    """
+    Exact motor position in eighth steps at which the slats are at a tilt angle, when approached in a direction
+    """
+    def exact_microsteps(self, tilt_angle, direction=StepDirection.FORWARD):
+        segment = bisect.bisect_right(self._angle_breaks, tilt_angle)
+        return tilt_angle * self._slopes[segment] + self._intercepts[segment] + self._backlash[direction]
+
+    """
+    Map a blind slat tilt angle to the closest motor position in eighth steps, when approached in a direction
+    """
+    def tilt_angle_to_microsteps(self, tilt_angle, direction=StepDirection.FORWARD):
+        return int(round(self.exact_microsteps(tilt_angle, direction)))
+
+    """
+    Map a motor position in eighth steps to the blind slat tilt angle, after a move in direction.
+    The direction of the last move is None when unknown, the slats are then taken to be as after a forward move.
+    """
+    def microsteps_to_tilt_angle(self, microsteps, direction=None):
+        position = microsteps - self._backlash[direction if direction is not None else StepDirection.FORWARD]
+        index = position - self._first_microstep
+        if index == int(index) and 0 <= index < len(self._angle_by_microstep):
+            return self._angle_by_microstep[int(index)]
+
+        segment = bisect.bisect_right(self._microstep_breaks, position)
+        return (position - self._intercepts[segment]) / self._slopes[segment]
+
+    """
+    Largest change of the slat tilt angle in one step of a resolution, anywhere in the table
+    """
+    def tilt_angle_per_step(self, resolution):
+        return MICROSTEPS_PER_STEP[resolution] / min(self._slopes)
+
+    """
+    Coarsest resolution for which stopping at the nearest step keeps the tilt angle within accuracy degrees
+    """
+    def resolution_for_accuracy(self, accuracy):
+        for resolution in MICROSTEPS_PER_STEP:
+            if self.tilt_angle_per_step(resolution) / 2 <= accuracy:
+                return resolution
+        return MicroStepResolution.EIGHTH_STEP
 
     """
     Map motor step resolution to angle
@@ -51,7 +239,7 @@ class AngleStepMapper:
         direction (int): FORWARD/CW = 0, REVERSE/CCW = 1 (from easydriver.easydriver StepDirection class)
     """
     def map_angle_to_step(self, tilt_angle, step_resolution):
-        motor_position = p_data.get_motor_position()
+        motor_position = self.microsteps_to_tilt_angle(p_data.get_motor_microsteps(), p_data.get_motor_direction())
 
         # change in angle = desired tilt angle - motor position
         angle_change = tilt_angle - motor_position
@@ -87,3 +275,78 @@ class AngleStepMapper:
             tilt_angle *= -1
 
         return tilt_angle
+
+    """
+    Plan a move of the motor to a blind slat tilt angle, choosing the resolution per step to minimize the move time.
+    The driver takes the same time for a step at any resolution, so the fastest move is the one with the fewest
+    steps: the target is the motor position within the accuracy reached in the fewest steps, and the move is
+    made in full steps where possible and finer steps only where needed.
+    The target includes the backlash of the direction of the move, so the slats land on the angle in one move.
+    The motor doesn't move if the slats are already within the accuracy.
+    Inputs:
+        current_microsteps (int): current motor position in eighth steps
+        tilt_angle (float): the desired blind slat tilt angle
+        accuracy (float): allowed error of the tilt angle in degrees, 0 for the closest eighth step
+        last_direction (int): direction of the move to the current position, None if unknown
+    Output:
+        target_microsteps (int): motor position in eighth steps after the move
+        segments (list): (resolution, num_steps, direction) moves to issue to the motor driver in order
+    """
+    def plan_move(self, current_microsteps, tilt_angle, accuracy=DEFAULT_ANGULAR_ACCURACY, last_direction=None):
+        current_angle = self.microsteps_to_tilt_angle(current_microsteps, last_direction)
+        if abs(tilt_angle - current_angle) <= accuracy:
+            return current_microsteps, []
+
+        direction = StepDirection.FORWARD if tilt_angle > current_angle else StepDirection.REVERSE
+        exact = self.exact_microsteps(tilt_angle, direction)
+        low = math.ceil(self.exact_microsteps(tilt_angle - accuracy, direction))
+        high = math.floor(self.exact_microsteps(tilt_angle + accuracy, direction))
+
+        # positions within the accuracy on the grid of each resolution, closest to the exact position, that are
+        # reached by moving in the direction
+        candidates = []
+        for microsteps in MICROSTEPS_PER_STEP.values():
+            candidate = int(round(exact / microsteps)) * microsteps
+            if low <= candidate <= high and (candidate > current_microsteps) == (direction == StepDirection.FORWARD):
+                candidates.append(candidate)
+        if not candidates:
+            candidates.append(int(round(exact)))
+
+        target_microsteps = min(candidates, key=lambda candidate: (
+            sum(num_steps for _, num_steps, _ in self.decompose_move(current_microsteps, candidate)),
+            abs(candidate - exact)))
+        return target_microsteps, self.decompose_move(current_microsteps, target_microsteps)
+
+    """
+    Split a move between two motor positions into segments of the coarsest possible resolution.
+    A step of a resolution is only taken from a position aligned to it, since the driver translator changes
+    resolution without moving, so the move is fine steps up to alignment, then coarse steps, then fine steps.
+    Inputs:
+        current_microsteps (int): current motor position in eighth steps
+        target_microsteps (int): target motor position in eighth steps
+    Output:
+        segments (list): (resolution, num_steps, direction), consecutive steps of the same resolution are merged
+    """
+    def decompose_move(self, current_microsteps, target_microsteps):
+        direction = StepDirection.FORWARD if target_microsteps >= current_microsteps else StepDirection.REVERSE
+        sign = 1 if direction == StepDirection.FORWARD else -1
+
+        segments = []
+        position = current_microsteps
+        while position != target_microsteps:
+            remaining = abs(target_microsteps - position)
+            for resolution, microsteps in MICROSTEPS_PER_STEP.items():
+                if microsteps <= remaining and position % microsteps == 0:
+                    break
+
+            # finer steps are only needed one at a time until the position is aligned to a coarser resolution
+            num_steps = remaining // microsteps if resolution == MicroStepResolution.FULL_STEP else 1
+            if segments and segments[-1][0] == resolution:
+                segments[-1] = (resolution, segments[-1][1] + num_steps, direction)
+            else:
+                segments.append((resolution, num_steps, direction))
+            position += sign * num_steps * microsteps
+
+        return segments
+
+_calibrated_mapper = None
@@ -0,0 +1,121 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Guided calibration of the blinds, recording the calibration table of the angle step mapper.
+The slats are jogged with the motor to a series of reference tilt angles in increasing order, always approaching
+forward, and the motor position is recorded at each angle. The backlash is then measured by reversing the motor
+until the slats start to move. See scripts/calibrate_blinds.py for the interactive version.
+"""
+
+from controlalgorithm.angle_step_mapper import AngleStepMapper, CalibrationTable, MICROSTEPS_PER_STEP
+from easydriver.easydriver import MicroStepResolution, StepDirection
+
+"""
+Constants
+
+CALIBRATION_ANGLES: default reference tilt angles in degrees, in the order they are recorded
+"""
+CALIBRATION_ANGLES = (-90, -60, -30, 0, 30, 60, 90)
+
+"""
+Guided calibration of one blind.
+The motor position is counted in eighth steps from where the routine starts. The table is shifted so that the
+horizontal position is close to 0, by whole full steps so the count stays aligned with the motor steps.
+Usage:
+    routine.jog(steps) until the slats are at routine.next_angle, approaching forward, then routine.record()
+    once all angles are recorded, routine.jog(-steps) until the slats start to move, then routine.record_backlash()
+    routine.table() and routine.motor_microsteps give the calibration and the position to store
+Inputs:
+    driver (EasyDriver): motor driver of the blinds
+    angles (list): reference tilt angles in degrees
+    resolution (MicroStepResolution): resolution of the jogs
+"""
+class CalibrationRoutine:
+    def __init__(self, driver, angles=CALIBRATION_ANGLES, resolution=MicroStepResolution.EIGHTH_STEP):
+        if len(angles) < 2:
+            raise ValueError("at least 2 reference angles are needed")
+
+        self.driver = driver
+        self.angles = sorted(angles)
+        self.resolution = resolution
+        self.position = 0
+        self.direction = None
+        self.backlash = None
+        self._recorded = []
+        # position where the motor last changed direction
+        self._reversal_position = 0
+
+    """
+    Reference angle to bring the slats to next, None once all angles are recorded
+    """
+    @property
+    def next_angle(self):
+        if len(self._recorded) == len(self.angles):
+            return None
+        return self.angles[len(self._recorded)]
+
+    """
+    Move the motor by a number of steps of the resolution, forward if positive and in reverse if negative
+    """
+    def jog(self, steps):
+        if steps == 0:
+            return
+
+        direction = StepDirection.FORWARD if steps > 0 else StepDirection.REVERSE
+        if direction != self.direction:
+            self._reversal_position = self.position
+            self.direction = direction
+
+        self.driver.microstep_resolution = self.resolution
+        self.driver.step(steps=abs(steps), direction=direction)
+        self.position += steps * MICROSTEPS_PER_STEP[self.resolution]
+
+    """
+    Record the motor position of the slats at the next reference angle.
+    The angle must be approached forward, the direction the table is recorded in.
+    """
+    def record(self):
+        if self.next_angle is None:
+            raise ValueError("all reference angles are already recorded")
+        if self.direction != StepDirection.FORWARD:
+            raise ValueError("the slats must be brought to the reference angle moving forward")
+        if self._recorded and self.position <= self._recorded[-1][1]:
+            raise ValueError("the motor position must increase with the reference angle")
+
+        self._recorded.append((self.next_angle, self.position))
+
+    """
+    Record the backlash, once the slats just started to move after reversing from the last reference angle
+    """
+    def record_backlash(self):
+        if self.next_angle is not None:
+            raise ValueError("the reference angles must be recorded before the backlash")
+        if self.direction != StepDirection.REVERSE:
+            raise ValueError("the motor must be reversed to measure the backlash")
+
+        self.backlash = self.position - self._reversal_position
+
+    """
+    Calibration table of the recorded angles and backlash
+    """
+    def table(self):
+        if self.next_angle is not None:
+            raise ValueError("the reference angles are not all recorded yet")
+
+        offset = self._horizontal_offset()
+        backlash = {StepDirection.REVERSE: self.backlash} if self.backlash is not None else None
+        return CalibrationTable([angle for angle, _ in self._recorded],
+                                [position - offset for _, position in self._recorded], backlash)
+
+    """
+    Current motor position in the frame of the table
+    """
+    @property
+    def motor_microsteps(self):
+        return self.position - self._horizontal_offset()
+
+    def _horizontal_offset(self):
+        unshifted = AngleStepMapper(CalibrationTable([angle for angle, _ in self._recorded],
+                                                     [position for _, position in self._recorded]))
+        full_step = MICROSTEPS_PER_STEP[MicroStepResolution.FULL_STEP]
+        return int(round(unshifted.exact_microsteps(0) / full_step)) * full_step
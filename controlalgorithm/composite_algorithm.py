@@ -23,15 +23,22 @@ solar_weight (float): weighting for the tilt angle determined by the max sunligh
 
 Inputs:
 tempsensor (TemperatureSensor): an object that handles the internal temp measurement for act_int_temp
+weather (tuple): (cloud_cover, ext_temp), read from persistent data if not given
+solar_angle (float): angle of the sun, looked up once for the current time if not given
+des_int_temp (float): desired internal temperature (setpoint) in Celsius, the default setpoint if not given
 
 Output:
 tilt_angle_final (float): final tilt angle for maximum convenience and efficiency
 """
-def composite_algorithm(tempsensor):
-    tilt_angle_sunlight = max_sun.max_sunlight_algorithm() 
-    tilt_angle_heat = heat_mgmt.heat_mgmt_algorithm(tempsensor) 
+def composite_algorithm(tempsensor, weather=None, solar_angle=None, des_int_temp=None):
+    # look up the solar angle once, it is shared by both algorithms and the weighting
+    if solar_angle is None:
+        solar_angle = max_sun.get_solar_angle()
 
-    solar_angle_weight = heat_mgmt.get_solar_angle_weight()
+    tilt_angle_sunlight = max_sun.max_sunlight_algorithm(solar_angle) 
+    tilt_angle_heat = heat_mgmt.heat_mgmt_algorithm(tempsensor, weather, solar_angle, des_int_temp) 
+
+    solar_angle_weight = heat_mgmt.get_solar_angle_weight(solar_angle)
     heat_weight = 1 - solar_angle_weight
 
     tilt_angle_final = tilt_angle_sunlight * solar_angle_weight + tilt_angle_heat * heat_weight
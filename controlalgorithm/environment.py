@@ -0,0 +1,33 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Sources of the environment inputs (solar angle and weather) for the control algorithms.
+SmartBlindsSystem looks these up once per tick and passes them to the algorithms,
+which lets simulations substitute precomputed or synthetic inputs.
+"""
+
+import controlalgorithm.max_sunlight_algorithm as max_sun
+import controlalgorithm.persistent_data as p_data
+
+"""
+Environment backed by pvlib for the solar angle and the cached DarkSky weather in persistent data
+"""
+class LiveEnvironment:
+    """
+    Solar angle (apparent elevation in degrees) at date_time
+    """
+    def get_solar_angle(self, date_time):
+        return max_sun.get_solar_angle(date_time)
+
+    """
+    Weather as (cloud_cover_percentage, ext_temp_celsius). The cache in persistent data
+    is refreshed based on the wall clock, so date_time is not used.
+    """
+    def get_weather(self, date_time):
+        return p_data.get_cloud_cover_percentage_and_ext_temp()
+
+    """
+    Hourly WeatherForecast, None if not available. Refreshed with the weather cache, so date_time is not used.
+    """
+    def get_forecast(self, date_time):
+        return p_data.get_weather_forecast()
@@ -0,0 +1,126 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Glare aware sunlight algorithm.
+Instead of pointing the slats at the sun, the slats are tilted just far enough to cut off the direct sunlight on
+the window, which lets in as much daylight as possible without glare. The cutoff depends on the position of the sun
+relative to the window (its azimuth) and on the width and spacing of the slats. When the sun is not on the
+facade of the window, there is no glare and the slats stay open.
+
+The tilt angles are computed for every minute of a day at once from the daily solar position table, so each tick
+is a lookup.
+"""
+
+from collections import OrderedDict
+import threading
+
+import numpy
+
+import controlalgorithm.user_defined_exceptions as exceptions
+
+"""
+Constants
+
+OPEN_TILT_ANGLE: tilt angle when there is no direct sunlight on the window
+"""
+OPEN_TILT_ANGLE = 0.0
+
+"""
+Geometry of a window and its blinds
+
+Attributes:
+    azimuth (float): direction the window faces in degrees, clockwise from north (ex. 180 for south)
+    slat_width (float): width of a slat
+    slat_spacing (float): vertical distance between two slats, in the same unit as the width
+"""
+class WindowGeometry:
+    def __init__(self, azimuth, slat_width, slat_spacing):
+        if not 0 <= azimuth < 360:
+            raise exceptions.InputError("WindowGeometry()", "Window azimuth must be between 0 and 360 degrees")
+        if slat_width <= 0 or slat_spacing <= 0:
+            raise exceptions.InputError("WindowGeometry()", "Slat width and spacing must be positive")
+
+        self.azimuth = azimuth
+        self.slat_width = slat_width
+        self.slat_spacing = slat_spacing
+
+"""
+Glare free tilt angles for solar positions, vectorized
+
+The sun is projected on the vertical plane perpendicular to the window, which gives the profile angle p.
+The slats block the direct sunlight when they are tilted at least arcsin(spacing * cos(p) / width) away from
+the direction of the sunlight (a tilt of -p). The most open of these tilt angles is used: horizontal when
+the sun is high enough for horizontal slats to block it, the cutoff above -p otherwise.
+
+Inputs:
+    elevation (numpy.ndarray): apparent solar elevation in degrees
+    azimuth (numpy.ndarray): solar azimuth in degrees, clockwise from north
+    window (WindowGeometry): the window
+
+Output:
+    numpy.ndarray of tilt angles in degrees, OPEN_TILT_ANGLE where the sun is not on the facade
+"""
+def glare_free_tilt_angles(elevation, azimuth, window):
+    elevation = numpy.radians(numpy.asarray(elevation, dtype=float))
+    relative_azimuth = numpy.radians(numpy.asarray(azimuth, dtype=float) - window.azimuth)
+
+    facing = numpy.cos(relative_azimuth)
+    # sun grazing the facade within rounding counts as not on it
+    on_facade = (elevation > 0) & (facing > 1e-9)
+
+    profile_angle = numpy.degrees(numpy.arctan2(numpy.sin(elevation), numpy.cos(elevation) * facing))
+    cutoff = numpy.degrees(numpy.arcsin(numpy.clip(
+        window.slat_spacing * numpy.cos(numpy.radians(profile_angle)) / window.slat_width, 0, 1)))
+
+    tilt_angle = numpy.clip(cutoff - profile_angle, 0, 90)
+    return numpy.where(on_facade, tilt_angle, OPEN_TILT_ANGLE)
+
+"""
+Glare aware replacement of the max sunlight algorithm for a window.
+The tilt angles of a day are computed on first use and cached.
+
+Arguments:
+    window (WindowGeometry): the window of the blinds
+    solar_table (SolarTable): solar positions, for the location in persistent data if not given
+    cache_size (int): number of days kept
+"""
+class GlareAwareLight:
+    def __init__(self, window, solar_table=None, cache_size=2):
+        self.window = window
+        self._solar_table = solar_table
+        self._cache_size = cache_size
+        self._tilt_angles = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def solar_table(self):
+        if self._solar_table is None:
+            from controlalgorithm.solar_table import SolarTable
+            self._solar_table = SolarTable.from_persistent_data()
+        return self._solar_table
+
+    """
+    Tilt angles for every minute of a day
+    """
+    def tilt_angles_for_date(self, date):
+        with self._lock:
+            tilt_angles = self._tilt_angles.get(date)
+            if tilt_angles is not None:
+                return tilt_angles
+
+        daily_table = self.solar_table.for_date(date)
+        tilt_angles = glare_free_tilt_angles(daily_table.elevation, daily_table.azimuth, self.window)
+
+        with self._lock:
+            self._tilt_angles[date] = tilt_angles
+            while len(self._tilt_angles) > self._cache_size:
+                self._tilt_angles.popitem(last=False)
+        return tilt_angles
+
+    """
+    Tilt angle at date_time. Naive datetimes are assumed to be in the solar table timezone.
+    """
+    def tilt_angle(self, date_time):
+        if date_time.tzinfo is not None:
+            date_time = date_time.astimezone(self.solar_table.tz)
+        return float(self.tilt_angles_for_date(date_time.date())[date_time.hour * 60 + date_time.minute])
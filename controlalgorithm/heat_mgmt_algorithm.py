@@ -6,6 +6,7 @@ Contents: Algorithm for obtaining the optimal tilt angle for minimum power consu
 
 import datetime
 import dotenv
+import numpy
 import os
 import requests
 import sys
@@ -13,6 +14,17 @@ import sys
 import controlalgorithm.max_sunlight_algorithm as max_sun
 import controlalgorithm.persistent_data as p_data
 import controlalgorithm.user_defined_exceptions as exceptions
+from controlalgorithm.heat_mgmt_table import HeatMgmtTable, DEFAULT_TABLE_FILE, TEMP_RANGES, CLOUD_COVERS, EQUILIBRIUM_INDEX
+from metrics.metrics import REGISTRY
+
+SENSOR_READ_SECONDS = REGISTRY.histogram("smartblinds_sensor_read_seconds", "Latency of an internal temperature sensor read")
+HEAT_MGMT_PLANS = REGISTRY.counter("smartblinds_heat_mgmt_plans", "Predictive heat management plans computed")
+
+"""
+Constants
+
+DESIRED_INTERNAL_TEMP: desired internal temperature in Celsius when no setpoint is given
+"""
 
 """
 API Keys and Endpoints
@@ -21,100 +33,49 @@ dotenv.load_dotenv()
 DARKSKY_API_KEY = os.getenv("DARKSKY_API_KEY")
 DARKSKY_URL = "https://api.darksky.net/forecast/{DARKSKY_API_KEY}/{lat},{lon}"
 
+DESIRED_INTERNAL_TEMP = float(os.getenv("DESIRED_INTERNAL_TEMP", "22"))
+
+"""
+Decision table of the algorithm, loaded once from HEAT_MGMT_TABLE_FILE or the default data file
+"""
+TABLE = HeatMgmtTable.load(os.getenv("HEAT_MGMT_TABLE_FILE") or DEFAULT_TABLE_FILE)
+
 """
 Define a standard for temperature ranges
 in Celsius
 """
 def temp_to_temp_range(temp):
-    if temp >= 6:
-        temp_range = "hot"
-    elif temp > 0 and temp < 6:
-        temp_range = "warm"
-    elif temp > -6 and temp < 0:
-        temp_range = "cool"
-    elif temp <= -6:
-        temp_range = "cold"
-    else:
-        temp_range = "equilibrium" #algorithm should do nothing
-    return temp_range
+    return TEMP_RANGES[TABLE.temp_range_index(temp)]
 
 """
 Define a standard for cloud coverage percentages
 ranging from 0% to 100%
 """
 def cover_percentage_to_cloud_cover(cloud_cover_percentage):
-    if cloud_cover_percentage >= 0 and cloud_cover_percentage < 25:
-        cloud_cover = "clear"
-    elif cloud_cover_percentage >= 25 and cloud_cover_percentage < 50:
-        cloud_cover = "partly cloudy"
-    elif cloud_cover_percentage >= 50 and cloud_cover_percentage < 75:
-        cloud_cover = "cloudy"
-    elif cloud_cover_percentage >= 75 and cloud_cover_percentage <= 100:
-        cloud_cover = "overcast"
-    else:
-        raise exceptions.InputError("cover_percentage_to_cloud_cover()", "Cloud Cover Percentage must be between 0 and 100 percent inclusive")
-    return cloud_cover
+    return CLOUD_COVERS[TABLE.cloud_cover_index(cloud_cover_percentage)]
 
 """
-Define dictionary to map 
+Map
 external temperature vs desired internal temperature and cloud cover
 to tilt angle
 """
 def evd_cc_to_tilt_angle(evd, cc):
-    mapping = {
-        ("hot", "clear"): 70,
-        ("hot", "partly cloudy"): 65,
-        ("hot", "cloudy"): -30,
-        ("hot", "overcast"): -25,
-        ("warm", "clear"): 65,
-        ("warm", "partly cloudy"): 60,
-        ("warm", "cloudy"): -35,
-        ("warm", "overcast"): -30,
-        ("cool", "clear"): -15,
-        ("cool", "partly cloudy"): -20,
-        ("cool", "cloudy"): 41,
-        ("cool", "overcast"): 46,
-        ("cold", "clear"): -10,
-        ("cold", "partly cloudy"): -15,
-        ("cold", "cloudy"): 46,
-        ("cold", "overcast"): 51,
-    }
-    return mapping[evd, cc]
-
-"""
-Define dictionary to map
+    return TABLE.evd_cc_tilt_angle(TEMP_RANGES.index(evd), CLOUD_COVERS.index(cc))
+
+"""
+Map
 external temperature vs desired internal temperature
 and actual internal temperature vs desired internal temperature 
 to tilt angle
 """
 def evd_avd_to_tilt_angle(evd, avd):
-    mapping = {
-        ("hot", "hot"): 80,
-        ("hot", "warm"): 75,
-        ("hot", "cool"): -5,
-        ("hot", "cold"): 0,
-        ("warm", "hot"): 75,
-        ("warm", "warm"): 70,
-        ("warm", "cool"): -10,
-        ("warm", "cold"): 0,
-        ("cool", "hot"): 70,
-        ("cool", "warm"): 65,
-        ("cool", "cool"): -15,
-        ("cool", "cold"): -10,
-        ("cold", "hot"): 65,
-        ("cold", "warm"): 60,
-        ("cold", "cool"): -20,
-        ("cold", "cold"): -15,
-        ("equilibrium", "hot"): 70,
-        ("equilibrium", "warm"): 70,
-        ("equilibrium", "cool"): -10,
-        ("equilibrium", "cold"): -10,
-    }
-    return mapping[evd, avd]
+    return TABLE.evd_avd_tilt_angle(TEMP_RANGES.index(evd), TEMP_RANGES.index(avd))
 
 # formula to determine the weight for cloud cover in the algorithm based on angle of the sun
-def get_solar_angle_weight():
-    solar_angle = max_sun.get_solar_angle()
+# the solar angle is looked up for the current time if not given
+def get_solar_angle_weight(solar_angle=None):
+    if solar_angle is None:
+        solar_angle = max_sun.get_solar_angle()
     if solar_angle <= 0:
         weight = 0
     else:
@@ -132,42 +93,218 @@ solar_weight (float): weighting for the tilt angle determined by the cloud cover
 
 Inputs:
 tempsensor (TemperatureSensor): an object that handles the internal temp measurement for act_int_temp
+weather (tuple): (cloud_cover, ext_temp), read from persistent data if not given
+solar_angle (float): angle of the sun, looked up for the current time if not given
+des_int_temp (float): desired internal temperature (setpoint) in Celsius, DESIRED_INTERNAL_TEMP if not given
 
 Output:
 tilt_angle_final (float): final tilt angle for maximum energy efficiency
 """
-def heat_mgmt_algorithm(tempsensor):
-    cloud_cover_percentage, ext_temp = p_data.get_cloud_cover_percentage_and_ext_temp()
-    act_int_temp = tempsensor.getSample()
-    des_int_temp = 22
+def heat_mgmt_algorithm(tempsensor, weather=None, solar_angle=None, des_int_temp=None):
+    if weather is None:
+        weather = p_data.get_cloud_cover_percentage_and_ext_temp()
+    cloud_cover_percentage, ext_temp = weather
+    with SENSOR_READ_SECONDS.time():
+        act_int_temp = tempsensor.getSample()
+    # thresholds precomputed for the setpoint
+    setpoint_table = TABLE.for_setpoint(DESIRED_INTERNAL_TEMP if des_int_temp is None else des_int_temp)
 
-    ext_vs_des = temp_to_temp_range(ext_temp - des_int_temp)
-    act_int_vs_des_int = temp_to_temp_range(act_int_temp - des_int_temp)
-    cloud_cover = cover_percentage_to_cloud_cover(cloud_cover_percentage)
+    ext_vs_des = setpoint_table.temp_range_index(ext_temp)
+    act_int_vs_des_int = setpoint_table.temp_range_index(act_int_temp)
+    cloud_cover = TABLE.cloud_cover_index(cloud_cover_percentage)
 
-    solar_angle_weight = get_solar_angle_weight()
+    solar_angle_weight = get_solar_angle_weight(solar_angle)
     temp_weight = 1 - solar_angle_weight
 
-    if ext_vs_des == "equilibrium":
+    if ext_vs_des == EQUILIBRIUM_INDEX:
         tilt_angle_cc = 0
         solar_angle_weight = 0
         temp_weight = 1
         print("ext vs des is equilibrium. do nothing")
     else:
-        tilt_angle_cc = evd_cc_to_tilt_angle(ext_vs_des, cloud_cover)
+        tilt_angle_cc = TABLE.evd_cc_tilt_angle(ext_vs_des, cloud_cover)
 
-    if act_int_vs_des_int == "equilibrium":
+    if act_int_vs_des_int == EQUILIBRIUM_INDEX:
         tilt_angle_temp = 0
         solar_angle_weight = 1
         temp_weight = 0
         print("act int vs des int is equilibrium. do nothing")
     else:
-        tilt_angle_temp = evd_avd_to_tilt_angle(ext_vs_des, act_int_vs_des_int)
+        tilt_angle_temp = TABLE.evd_avd_tilt_angle(ext_vs_des, act_int_vs_des_int)
 
-    if ext_vs_des == "equilibrium" and act_int_vs_des_int == "equilibrium":
+    if ext_vs_des == EQUILIBRIUM_INDEX and act_int_vs_des_int == EQUILIBRIUM_INDEX:
         print("all temp differences at equilibrium. no need to change tilt angle")
         return 0 
 
     tilt_angle_final = tilt_angle_cc * solar_angle_weight + tilt_angle_temp * temp_weight
     return tilt_angle_final
- 
\ No newline at end of file
+ 
+"""
+Vectorized get_solar_angle_weight
+"""
+def solar_angle_weights(solar_angle):
+    solar_angle = numpy.asarray(solar_angle, dtype=float)
+    return numpy.where(solar_angle > 0, solar_angle / 90, 0.0)
+
+"""
+Tilt angles of the algorithm from the category indices and solar angle weights, with numpy broadcasting
+"""
+def _tilt_angles(evd, cc, solar_angle_weight, avd):
+    solar_angle_weight = numpy.where(evd == EQUILIBRIUM_INDEX, 0.0, solar_angle_weight)
+    solar_angle_weight = numpy.where(avd == EQUILIBRIUM_INDEX, 1.0, solar_angle_weight)
+    return TABLE.evd_cc[evd, cc] * solar_angle_weight + TABLE.evd_avd[evd, avd] * (1 - solar_angle_weight)
+
+"""
+Vectorized heat_mgmt_algorithm: the tilt angles for arrays of conditions in a single pass.
+The arrays are broadcast against each other.
+
+Inputs:
+ext_temp (numpy.ndarray): external temperatures in Celsius
+cloud_cover_percentage (numpy.ndarray): cloud coverage in percentage
+solar_angle (numpy.ndarray): angles of the sun
+act_int_temp (numpy.ndarray): actual internal temperatures in Celsius
+des_int_temp (float): desired internal temperature in Celsius, DESIRED_INTERNAL_TEMP if not given
+
+Output:
+numpy.ndarray of tilt angles, same as heat_mgmt_algorithm for each set of conditions
+"""
+def heat_mgmt_tilt_angles(ext_temp, cloud_cover_percentage, solar_angle, act_int_temp, des_int_temp=None):
+    setpoint_table = TABLE.for_setpoint(DESIRED_INTERNAL_TEMP if des_int_temp is None else des_int_temp)
+    return _tilt_angles(setpoint_table.temp_range_indices(ext_temp),
+                        TABLE.cloud_cover_indices(cloud_cover_percentage),
+                        solar_angle_weights(solar_angle),
+                        setpoint_table.temp_range_indices(act_int_temp))
+
+"""
+Precomputed tilt angles for every minute of a window
+
+Attributes:
+    start (float): UNIX time of the first minute of the plan
+    fetched_at (float): fetch time of the forecast the plan was computed from
+    setpoint (float): desired internal temperature the plan was computed for
+    angles (numpy.ndarray): tilt angles indexed by [internal temperature range index, minute]
+"""
+class HeatMgmtPlan:
+    def __init__(self, start, fetched_at, setpoint, angles):
+        self.start = start
+        self.fetched_at = fetched_at
+        self.setpoint = setpoint
+        self.angles = angles
+
+    @property
+    def minutes(self):
+        return self.angles.shape[1]
+
+    """
+    Minute index of a UNIX time in the plan, None if the time is outside the plan
+    """
+    def minute_index(self, timestamp):
+        index = int((timestamp - self.start) // 60)
+        return index if 0 <= index < self.minutes else None
+
+"""
+Predictive mode of the heat management algorithm.
+
+The reactive algorithm follows the current weather, but the thermal load of a room lags the weather.
+The predictive mode uses the forecast weather and solar angle lead_minutes ahead instead. Whenever a new
+forecast arrives, the tilt angles for the next horizon_hours are computed in one vectorized pass, for every
+internal temperature range. Each tick is then a lookup by minute and by the range of the measured internal
+temperature, which gives the same angle as the algorithm would for those conditions.
+A plan is kept per setpoint, so schedule blocks with different setpoints each get their own plan.
+
+Arguments:
+    horizon_hours (float): length of a plan
+    lead_minutes (int): how far ahead the forecast conditions are taken
+    solar_table (SolarTable): solar positions, for the location in persistent data if not given
+    des_int_temp (float): desired internal temperature in Celsius when no setpoint is given
+"""
+class PredictiveHeatMgmt:
+    def __init__(self, horizon_hours=12, lead_minutes=60, solar_table=None, des_int_temp=None):
+        self.horizon_minutes = int(horizon_hours * 60)
+        self.lead_minutes = lead_minutes
+        self.des_int_temp = DESIRED_INTERNAL_TEMP if des_int_temp is None else des_int_temp
+        self._solar_table = solar_table
+        self._plans = {}
+        self._plan = None
+
+    @property
+    def solar_table(self):
+        if self._solar_table is None:
+            from controlalgorithm.solar_table import SolarTable
+            self._solar_table = SolarTable.from_persistent_data()
+        return self._solar_table
+
+    """
+    The plan used by the last tilt_angle(), None before the first one
+    """
+    @property
+    def plan(self):
+        return self._plan
+
+    """
+    Compute the plan for the horizon starting at the minute of start
+
+    Inputs:
+        forecast (WeatherForecast): the forecast
+        start (datetime): start of the plan. Naive datetimes are assumed to be in the solar table timezone.
+        des_int_temp (float): setpoint of the plan, the default setpoint if not given
+
+    Output:
+        HeatMgmtPlan
+    """
+    def compute_plan(self, forecast, start, des_int_temp=None):
+        setpoint = self.des_int_temp if des_int_temp is None else des_int_temp
+        if start.tzinfo is None:
+            start = self.solar_table.tz.localize(start)
+        start = start.replace(second=0, microsecond=0)
+        start_timestamp = start.timestamp()
+
+        # conditions lead_minutes ahead of each minute of the plan
+        minutes = numpy.arange(self.horizon_minutes)
+        times = start_timestamp + (minutes + self.lead_minutes) * 60
+        cloud_cover_percentage, ext_temp = forecast.at(times)
+        solar_angle = self.solar_table.elevations(start + datetime.timedelta(minutes=self.lead_minutes), self.horizon_minutes)
+
+        evd = TABLE.for_setpoint(setpoint).temp_range_indices(ext_temp)
+        cc = TABLE.cloud_cover_indices(cloud_cover_percentage)
+        weights = solar_angle_weights(solar_angle)
+        avd = numpy.arange(len(TEMP_RANGES))[:, None]
+
+        HEAT_MGMT_PLANS.inc()
+        return HeatMgmtPlan(start_timestamp, forecast.fetched_at, setpoint,
+                            _tilt_angles(evd[None, :], cc[None, :], weights[None, :], avd))
+
+    """
+    Tilt angle for date_time from the plan, recomputing the plan for a new forecast or when date_time is past its end
+
+    Inputs:
+        tempsensor (TemperatureSensor): internal temperature
+        date_time (datetime): time of the tick
+        forecast (WeatherForecast): the latest forecast, may be None
+        des_int_temp (float): setpoint, the default setpoint if not given
+
+    Output:
+        tilt angle (float), None without a forecast covering date_time. The reactive algorithm should be used then.
+    """
+    def tilt_angle(self, tempsensor, date_time, forecast, des_int_temp=None):
+        if date_time.tzinfo is None:
+            date_time = self.solar_table.tz.localize(date_time)
+        timestamp = date_time.timestamp()
+        if forecast is None or forecast.end < timestamp:
+            return None
+
+        setpoint = self.des_int_temp if des_int_temp is None else des_int_temp
+        plan = self._plans.get(setpoint)
+        index = plan.minute_index(timestamp) if plan is not None else None
+        if index is None or plan.fetched_at != forecast.fetched_at:
+            # plans of an older forecast are outdated for every setpoint
+            self._plans = {key: other for key, other in self._plans.items() if other.fetched_at == forecast.fetched_at}
+            plan = self.compute_plan(forecast, date_time, setpoint)
+            self._plans[setpoint] = plan
+            index = 0
+        self._plan = plan
+
+        with SENSOR_READ_SECONDS.time():
+            act_int_temp = tempsensor.getSample()
+        avd = TABLE.for_setpoint(setpoint).temp_range_index(act_int_temp)
+        return float(plan.angles[avd, index])
@@ -0,0 +1,186 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Decision table of the heat management algorithm, loaded once from a JSON data file.
+The temperature range and cloud cover categories become integer indices, and the tilt angles become
+arrays indexed by them, so that each decision is a few comparisons and an array lookup.
+
+Data file format (see heat_mgmt_table.json):
+    temp_thresholds: temperature differences in Celsius. A difference is hot from "hot" up, cold from "cold" down,
+        equilibrium within +/- "equilibrium" and warm or cool in between.
+    cloud_cover_thresholds: the cloud cover percentages where partly cloudy, cloudy and overcast start
+    evd_cc_tilt_angles: tilt angle by external vs desired temperature range and cloud cover
+    evd_avd_tilt_angles: tilt angle by external vs desired and actual vs desired temperature range
+Missing combinations have a tilt angle of 0.
+"""
+
+from bisect import bisect_right
+import json
+import os
+import threading
+
+import numpy
+
+import controlalgorithm.user_defined_exceptions as exceptions
+
+"""
+Constants
+
+TEMP_RANGES, CLOUD_COVERS: the categories, in the order of their indices
+EQUILIBRIUM_INDEX: index of the equilibrium temperature range
+DEFAULT_TABLE_FILE: data file shipped with the algorithm
+"""
+TEMP_RANGES = ("hot", "warm", "cool", "cold", "equilibrium")
+CLOUD_COVERS = ("clear", "partly cloudy", "cloudy", "overcast")
+HOT_INDEX, WARM_INDEX, COOL_INDEX, COLD_INDEX, EQUILIBRIUM_INDEX = range(len(TEMP_RANGES))
+DEFAULT_TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "heat_mgmt_table.json")
+
+"""
+Compiled decision table
+
+Attributes:
+    hot_threshold, cold_threshold, equilibrium_band (float): temperature range thresholds
+    cloud_cover_thresholds (tuple): increasing cloud cover percentages where each category after clear starts
+    evd_cc (numpy.ndarray): tilt angles indexed by [external vs desired range, cloud cover]
+    evd_avd (numpy.ndarray): tilt angles indexed by [external vs desired range, actual vs desired range]
+"""
+class HeatMgmtTable:
+    def __init__(self, hot_threshold, cold_threshold, equilibrium_band, cloud_cover_thresholds, evd_cc, evd_avd):
+        if not (cold_threshold < -equilibrium_band <= 0 <= equilibrium_band < hot_threshold):
+            raise exceptions.InputError("HeatMgmtTable()", "Temperature thresholds must satisfy cold < -equilibrium <= 0 <= equilibrium < hot")
+        if len(cloud_cover_thresholds) != len(CLOUD_COVERS) - 1 or list(cloud_cover_thresholds) != sorted(cloud_cover_thresholds):
+            raise exceptions.InputError("HeatMgmtTable()", "Cloud cover thresholds must be {} increasing percentages".format(len(CLOUD_COVERS) - 1))
+
+        self.hot_threshold = hot_threshold
+        self.cold_threshold = cold_threshold
+        self.equilibrium_band = equilibrium_band
+        self.cloud_cover_thresholds = tuple(cloud_cover_thresholds)
+        self.evd_cc = numpy.asarray(evd_cc, dtype=float)
+        self.evd_avd = numpy.asarray(evd_avd, dtype=float)
+        # plain nested tuples are faster than numpy for single lookups
+        self._evd_cc_rows = tuple(tuple(row) for row in self.evd_cc.tolist())
+        self._evd_avd_rows = tuple(tuple(row) for row in self.evd_avd.tolist())
+        self._setpoint_tables = {}
+        self._setpoint_tables_lock = threading.Lock()
+
+    """
+    Compile a table from its dictionary form (the parsed data file)
+    """
+    @staticmethod
+    def from_dict(table_dict):
+        evd_cc = numpy.zeros((len(TEMP_RANGES), len(CLOUD_COVERS)))
+        evd_avd = numpy.zeros((len(TEMP_RANGES), len(TEMP_RANGES)))
+        try:
+            for evd, row in table_dict["evd_cc_tilt_angles"].items():
+                for cc, tilt_angle in row.items():
+                    evd_cc[TEMP_RANGES.index(evd), CLOUD_COVERS.index(cc)] = tilt_angle
+            for evd, row in table_dict["evd_avd_tilt_angles"].items():
+                for avd, tilt_angle in row.items():
+                    evd_avd[TEMP_RANGES.index(evd), TEMP_RANGES.index(avd)] = tilt_angle
+            thresholds = table_dict["temp_thresholds"]
+            return HeatMgmtTable(thresholds["hot"], thresholds["cold"], thresholds.get("equilibrium", 0),
+                                 table_dict["cloud_cover_thresholds"], evd_cc, evd_avd)
+        except (KeyError, ValueError) as err:
+            raise exceptions.InputError("HeatMgmtTable.from_dict()", "Invalid heat management table: {}".format(err))
+
+    """
+    Load and compile a table from a JSON data file
+    """
+    @staticmethod
+    def load(path=DEFAULT_TABLE_FILE):
+        with open(path, "r") as fp:
+            return HeatMgmtTable.from_dict(json.load(fp))
+
+    """
+    Index into TEMP_RANGES of a temperature difference
+    """
+    def temp_range_index(self, temp):
+        if temp >= self.hot_threshold:
+            return HOT_INDEX
+        if temp > self.equilibrium_band:
+            return WARM_INDEX
+        if temp <= self.cold_threshold:
+            return COLD_INDEX
+        if temp < -self.equilibrium_band:
+            return COOL_INDEX
+        return EQUILIBRIUM_INDEX
+
+    """
+    Index into CLOUD_COVERS of a cloud cover percentage, which must be between 0 and 100 inclusive
+    """
+    def cloud_cover_index(self, cloud_cover_percentage):
+        if not 0 <= cloud_cover_percentage <= 100:
+            raise exceptions.InputError("cover_percentage_to_cloud_cover()", "Cloud Cover Percentage must be between 0 and 100 percent inclusive")
+        return bisect_right(self.cloud_cover_thresholds, cloud_cover_percentage)
+
+    """
+    Vectorized temp_range_index
+    """
+    def temp_range_indices(self, temp):
+        temp = numpy.asarray(temp, dtype=float)
+        return numpy.select([temp >= self.hot_threshold, temp > self.equilibrium_band,
+                             temp <= self.cold_threshold, temp < -self.equilibrium_band],
+                            [HOT_INDEX, WARM_INDEX, COLD_INDEX, COOL_INDEX], default=EQUILIBRIUM_INDEX)
+
+    """
+    Vectorized cloud_cover_index. Percentages are clipped to [0, 100] instead of raising.
+    """
+    def cloud_cover_indices(self, cloud_cover_percentage):
+        cloud_cover_percentage = numpy.clip(numpy.asarray(cloud_cover_percentage, dtype=float), 0, 100)
+        return numpy.searchsorted(self.cloud_cover_thresholds, cloud_cover_percentage, side="right")
+
+    """
+    Get the table of absolute temperature thresholds for a setpoint, computed on first use
+    """
+    def for_setpoint(self, setpoint):
+        setpoint_table = self._setpoint_tables.get(setpoint)
+        if setpoint_table is None:
+            with self._setpoint_tables_lock:
+                setpoint_table = self._setpoint_tables.setdefault(setpoint, SetpointTable(self, setpoint))
+        return setpoint_table
+
+    def evd_cc_tilt_angle(self, evd, cc):
+        return self._evd_cc_rows[evd][cc]
+
+    def evd_avd_tilt_angle(self, evd, avd):
+        return self._evd_avd_rows[evd][avd]
+
+"""
+Temperature range thresholds of a HeatMgmtTable shifted by a setpoint, so that absolute temperatures
+are classified without computing their difference to the setpoint first.
+Created through HeatMgmtTable.for_setpoint.
+
+Attributes:
+    table (HeatMgmtTable): the table
+    setpoint (float): desired internal temperature in Celsius
+"""
+class SetpointTable:
+    def __init__(self, table, setpoint):
+        self.table = table
+        self.setpoint = setpoint
+        self.hot_temp = setpoint + table.hot_threshold
+        self.warm_temp = setpoint + table.equilibrium_band
+        self.cool_temp = setpoint - table.equilibrium_band
+        self.cold_temp = setpoint + table.cold_threshold
+
+    """
+    Index into TEMP_RANGES of a temperature compared to the setpoint
+    """
+    def temp_range_index(self, temp):
+        if temp >= self.hot_temp:
+            return HOT_INDEX
+        if temp > self.warm_temp:
+            return WARM_INDEX
+        if temp <= self.cold_temp:
+            return COLD_INDEX
+        if temp < self.cool_temp:
+            return COOL_INDEX
+        return EQUILIBRIUM_INDEX
+
+    """
+    Vectorized temp_range_index
+    """
+    def temp_range_indices(self, temp):
+        temp = numpy.asarray(temp, dtype=float)
+        return numpy.select([temp >= self.hot_temp, temp > self.warm_temp, temp <= self.cold_temp, temp < self.cool_temp],
+                            [HOT_INDEX, WARM_INDEX, COLD_INDEX, COOL_INDEX], default=EQUILIBRIUM_INDEX)
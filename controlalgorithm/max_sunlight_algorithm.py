@@ -10,41 +10,31 @@ import os
 import pandas
 import pvlib.solarposition
 import requests
-from pytz import timezone
 import controlalgorithm.persistent_data as p_data
+from controlalgorithm.solar_table import timezone_from_adjustment
 import controlalgorithm.user_defined_exceptions as exceptions
 
 """
 Given a lat/lon, get the solar angle from pvlib.solarposition
-"""
-def get_solar_angle():
-    lat, lon, timezone_adjustment = p_data.get_lat_lon()
-    
-    # Etc/GMT convention has opposite sign from GMT convention
-    sign = "-" if timezone_adjustment >= 0 else "+" 
-    tz = timezone(f"Etc/GMT{sign}{abs(timezone_adjustment)}")
-
-    date_time = datetime.datetime.now(tz)
-    # create data frame for date
-    date_data_frame = pandas.DataFrame({
-        "year": [date_time.year],
-        "month": [date_time.month],
-        "day": [date_time.day],
-        "hour": [date_time.hour],
-        "minute": [date_time.minute]
-    })
 
-    # returns datetime objects
-    date_data_frame['Timestamp'] = date_data_frame.apply(lambda row: datetime.datetime(row.year, row.month, row.day, row.hour), axis=1)
+Inputs:
+date_time (datetime): time to get the solar angle for, defaults to now. Naive datetimes are taken
+to be in the local time of the location.
 
-    # convert to pandas timestamps
-    date_data_frame['Timestamp'] = pandas.to_datetime(date_data_frame.Timestamp)
+Output:
+solar_angle (float): apparent elevation of the sun in degrees
+"""
+def get_solar_angle(date_time=None):
+    lat, lon, timezone_adjustment = p_data.get_lat_lon()
+    tz = timezone_from_adjustment(timezone_adjustment)
 
-    # create a DatetimeIndex and assign it to the DataFrame
-    date_data_frame.index = pandas.DatetimeIndex(date_data_frame.Timestamp)
+    if date_time is None:
+        date_time = datetime.datetime.now(tz)
+    elif date_time.tzinfo is None:
+        date_time = tz.localize(date_time)
 
-    # get solar position data as a DataFrame
-    solar_position = pvlib.solarposition.get_solarposition(date_data_frame.index, lat, lon)
+    # get solar position data as a DataFrame, the index must be timezone aware since pvlib assumes UTC otherwise
+    solar_position = pvlib.solarposition.get_solarposition(pandas.DatetimeIndex([date_time]), lat, lon)
 
     # get the apparent elevation of the sun from solar position
     solar_angle = solar_position.iloc[0]['apparent_elevation']    
@@ -54,13 +44,14 @@ def get_solar_angle():
 Determine the optimal tilt angle for maximum sunlight for the user's convenience
 
 Inputs:
-solar_angle (float): angle of the sun
+solar_angle (float): angle of the sun, looked up for the current time if not given
 
 Output:
 tilt_angle (float): angle to tilt the blinds for max sunlight
 """
-def max_sunlight_algorithm():
-    solar_angle = get_solar_angle()
+def max_sunlight_algorithm(solar_angle=None):
+    if solar_angle is None:
+        solar_angle = get_solar_angle()
     
     if (solar_angle > 90 or solar_angle < -90):
         raise exceptions.InputError("get_solar_angle()", "Solar Angle may only be between -90 and 90 degrees inclusive")
@@ -0,0 +1,259 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Motion planner deciding whether and how far the blinds should move for a new target position.
+Minimizes total step travel and motor-on time with a deadband, hysteresis on direction reversals,
+rate limiting and quantization of moves to whole motor steps.
+"""
+
+import numpy
+
+from controlalgorithm.angle_step_mapper import AngleStepMapper, ANGLE_POSITION_FACTOR
+from easydriver.easydriver import MicroStepResolution
+from metrics.metrics import REGISTRY
+
+"""
+Constants
+
+MOTOR_POWER_WATTS: approximate electrical power drawn while the motor is energized (12V supply, ~0.5A per phase)
+MOTOR_WAKEUP_SECONDS: time the driver is enabled before the first step of a move
+DEFAULT_STEP_SPEED: steps per second, same as the EasyDriver default
+"""
+MOTOR_POWER_WATTS = 6.0
+MOTOR_WAKEUP_SECONDS = 1 / 1000
+DEFAULT_STEP_SPEED = 30
+
+"""
+Reasons for a plan's decision
+"""
+REASON_MOVE = "move"
+REASON_RATE_LIMITED = "rate limited"
+REASON_RATE_LIMITED_WAIT = "waiting for rate limit"
+REASON_NO_CHANGE = "no change"
+REASON_SUB_STEP = "smaller than one step"
+REASON_DEADBAND = "within deadband"
+REASON_HYSTERESIS = "within hysteresis"
+
+PLANNER_DECISIONS = REGISTRY.counter("smartblinds_planner_decisions", "Motion planner decisions by reason", labelnames=("reason",))
+PLANNER_STEPS = REGISTRY.counter("smartblinds_planner_steps", "Motor steps in planned moves")
+PLANNER_ENERGY_JOULES = REGISTRY.counter("smartblinds_planner_energy_joules", "Estimated motor energy of planned moves")
+
+"""
+Result of planning a single move
+
+Attributes:
+    current_position (float): position before the move, in percent
+    requested_position (float): position asked for, in percent
+    target_position (float): position to rotate to, in percent. Equal to current_position when not moving
+    num_steps (int): estimated motor steps for the move
+    motor_seconds (float): estimated time the motor is energized
+    energy_joules (float): estimated energy used by the move
+    reason (string): why the plan moves or not
+"""
+class MotionPlan:
+    def __init__(self, current_position, requested_position, target_position, num_steps, motor_seconds, energy_joules, reason):
+        self.current_position = current_position
+        self.requested_position = requested_position
+        self.target_position = target_position
+        self.num_steps = num_steps
+        self.motor_seconds = motor_seconds
+        self.energy_joules = energy_joules
+        self.reason = reason
+
+    @property
+    def move(self):
+        return self.reason in (REASON_MOVE, REASON_RATE_LIMITED)
+
+"""
+Plans moves of the blinds.
+
+Small drifts of a continuous target are not followed individually: the planner compares the new target
+with where the blinds actually are, so drifts accumulate until they exceed the deadband and are then
+executed as a single batched move.
+
+Arguments:
+    step_resolution (MicroStepResolution): resolution used for the moves, sets the quantum of a move
+    deadband (float): minimum change in percent for non-exact moves
+    hysteresis (float): additional change in percent required to reverse the direction of the last move
+    max_rate (float): maximum change in percent per minute for non-exact moves, None or 0 for no limit
+    speed (float): motor speed in steps per second, used for the estimates
+    mapper (AngleStepMapper): calibration used for the step angle of the resolution and the steps of a move
+"""
+class MotionPlanner:
+    def __init__(self, step_resolution=MicroStepResolution.FULL_STEP, deadband=0, hysteresis=0, max_rate=None,
+                 speed=DEFAULT_STEP_SPEED, mapper=None):
+        if deadband < 0 or hysteresis < 0:
+            raise ValueError("deadband and hysteresis must not be negative")
+
+        self.deadband = deadband
+        self.hysteresis = hysteresis
+        self.max_rate = max_rate if max_rate else None
+        self.speed = speed
+        self._mapper = mapper if mapper is not None else AngleStepMapper()
+        self.step_resolution = step_resolution
+
+        self._last_direction = 0
+        self._last_move_time = None
+
+        # running totals since the planner was created
+        self.stats = {
+            "moves": 0,
+            "skipped": 0,
+            "steps": 0,
+            "motor_seconds": 0.0,
+            "energy_joules": 0.0,
+        }
+
+    """
+    Resolution of the moves. Setting it updates the position quantum.
+    """
+    @property
+    def step_resolution(self):
+        return self._step_resolution
+
+    @step_resolution.setter
+    def step_resolution(self, resolution):
+        self._step_resolution = resolution
+        self._quantum = self._mapper.tilt_angle_per_step(resolution) / ANGLE_POSITION_FACTOR
+
+    """
+    Smallest possible move in percent, one motor step
+    """
+    @property
+    def position_quantum(self):
+        return self._quantum
+
+    """
+    Estimate the number of steps, motor-on time and energy for a move between two positions.
+    The steps are the exact difference between the motor positions, in the coarsest steps the mapper can use.
+
+    Output:
+        (num_steps, motor_seconds, energy_joules)
+    """
+    def estimate(self, current_position, target_position):
+        segments = self._mapper.decompose_move(self._mapper.tilt_angle_to_microsteps(current_position * ANGLE_POSITION_FACTOR),
+                                               self._mapper.tilt_angle_to_microsteps(target_position * ANGLE_POSITION_FACTOR))
+        num_steps = sum(steps for _, steps, _ in segments)
+        if num_steps == 0:
+            return 0, 0.0, 0.0
+
+        motor_seconds = MOTOR_WAKEUP_SECONDS + num_steps / self.speed
+        return num_steps, motor_seconds, motor_seconds * MOTOR_POWER_WATTS
+
+    """
+    Plan a move from current_position towards requested_position.
+
+    Inputs:
+        current_position (float): current position in percent
+        requested_position (float): desired position in percent
+        now (datetime): time of the request, required for rate limiting
+        exact (bool): for explicit user requests (ex. manual positions). Exact moves go to the requested position
+            as-is and skip only when it is within half a step of the current position. The deadband, hysteresis
+            and rate limit only apply to non-exact moves.
+
+    Output:
+        MotionPlan
+    """
+    def plan(self, current_position, requested_position, now=None, exact=False):
+        target_position, reason = self._decide(current_position, requested_position, now, exact)
+
+        if reason in (REASON_MOVE, REASON_RATE_LIMITED):
+            num_steps, motor_seconds, energy_joules = self.estimate(current_position, target_position)
+            self._record_move(current_position, target_position, now, num_steps, motor_seconds, energy_joules)
+        else:
+            target_position = current_position
+            num_steps, motor_seconds, energy_joules = 0, 0.0, 0.0
+            self.stats["skipped"] += 1
+
+        PLANNER_DECISIONS.labels(reason).inc()
+        return MotionPlan(current_position, requested_position, target_position, num_steps, motor_seconds, energy_joules, reason)
+
+    """
+    Estimate the moves for a sequence of requests, one per update, without changing the state of the planner.
+    Each update is decided as plan() would, starting from the current state of the planner.
+
+    Inputs:
+        current_position (float): position before the first update, in percent
+        requested_positions (sequence of float): requested position of each update
+        exact (sequence of bool): whether each request is exact, see plan()
+        times (sequence of datetime): time of each update, for rate limiting
+
+    Output:
+        (positions, totals): numpy.ndarray of the position held after each update, and a dictionary of the
+        number of moves, steps, motor_seconds and energy_joules
+    """
+    def preview(self, current_position, requested_positions, exact, times):
+        planner = MotionPlanner(self.step_resolution, self.deadband, self.hysteresis, self.max_rate, self.speed, self._mapper)
+        planner._last_direction = self._last_direction
+        planner._last_move_time = self._last_move_time
+
+        positions = numpy.empty(len(requested_positions))
+        totals = {"moves": 0, "steps": 0, "motor_seconds": 0.0, "energy_joules": 0.0}
+        position = current_position
+        for index, (requested_position, is_exact, now) in enumerate(zip(requested_positions, exact, times)):
+            target_position, reason = planner._decide(position, float(requested_position), now, is_exact)
+            if reason in (REASON_MOVE, REASON_RATE_LIMITED):
+                num_steps, motor_seconds, energy_joules = planner.estimate(position, target_position)
+                planner._update_state(position, target_position, now)
+                totals["moves"] += 1
+                totals["steps"] += num_steps
+                totals["motor_seconds"] += motor_seconds
+                totals["energy_joules"] += energy_joules
+                position = target_position
+            positions[index] = position
+
+        return positions, totals
+
+    def _decide(self, current_position, requested_position, now, exact):
+        if exact:
+            reason = REASON_NO_CHANGE if abs(requested_position - current_position) < self._quantum / 2 else REASON_MOVE
+            return requested_position, reason
+        return self._plan_continuous(current_position, requested_position, now)
+
+    def _plan_continuous(self, current_position, requested_position, now):
+        change = requested_position - current_position
+        if change == 0:
+            return current_position, REASON_NO_CHANGE
+
+        # quantize relative to the current position so that every move is a whole number of steps
+        quantum = self.position_quantum
+        num_quanta = int(round(change / quantum))
+        if num_quanta == 0:
+            return current_position, REASON_SUB_STEP
+
+        direction = 1 if change > 0 else -1
+        threshold = self.deadband
+        if self._last_direction and direction != self._last_direction:
+            threshold += self.hysteresis
+
+        if abs(change) < threshold:
+            return current_position, REASON_HYSTERESIS if abs(change) >= self.deadband else REASON_DEADBAND
+
+        reason = REASON_MOVE
+        if self.max_rate is not None and now is not None and self._last_move_time is not None:
+            elapsed_minutes = max(0.0, (now - self._last_move_time).total_seconds() / 60)
+            max_quanta = int(self.max_rate * elapsed_minutes / quantum)
+            if max_quanta < abs(num_quanta):
+                if max_quanta == 0:
+                    return current_position, REASON_RATE_LIMITED_WAIT
+                num_quanta = direction * max_quanta
+                reason = REASON_RATE_LIMITED
+
+        target_position = current_position + num_quanta * quantum
+        return max(-100, min(100, target_position)), reason
+
+    def _update_state(self, current_position, target_position, now):
+        if target_position != current_position:
+            self._last_direction = 1 if target_position > current_position else -1
+        self._last_move_time = now
+
+    def _record_move(self, current_position, target_position, now, num_steps, motor_seconds, energy_joules):
+        self._update_state(current_position, target_position, now)
+
+        self.stats["moves"] += 1
+        self.stats["steps"] += num_steps
+        self.stats["motor_seconds"] += motor_seconds
+        self.stats["energy_joules"] += energy_joules
+
+        PLANNER_STEPS.inc(num_steps)
+        PLANNER_ENERGY_JOULES.inc(energy_joules)
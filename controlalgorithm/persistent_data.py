@@ -3,20 +3,43 @@ Date: Feb 20, 2020
 Author: Sam Wu
 Contents: Store persistent data from API calls
 Location (lat/lon)
-Cloud Cover Percentage
-External Temp
+Cloud Cover Percentage (in the store)
+External Temp (in the store)
+Motor position (in the position journal)
+Calibration table of the blinds
 """
 
-import datetime
+import contextlib
 import dotenv
 import json
 import os
 import pandas
 import pvlib.solarposition
-import requests
+import shutil
 import sys
+import tempfile
+import threading
+import time
 
 import controlalgorithm.user_defined_exceptions as exceptions
+import httpclient.client as http_client
+from controlalgorithm.position_journal import PositionJournal, fsync_directory
+from controlalgorithm.weather_forecast import WeatherForecast
+from easydriver.easydriver import StepDirection
+from metrics.metrics import REGISTRY
+import storage.store as store
+
+"""
+Metrics for the external API calls and the weather cache
+"""
+GEOCODE_FETCH_SECONDS = REGISTRY.histogram("smartblinds_geocode_fetch_seconds", "Latency of the geocoding API call")
+WEATHER_FETCH_SECONDS = REGISTRY.histogram("smartblinds_weather_fetch_seconds", "Latency of the weather API call")
+WEATHER_CACHE_REQUESTS = REGISTRY.counter("smartblinds_weather_cache_requests", "Weather lookups by cache result", labelnames=("result",))
+
+# weather readings are fetched again once they are this old
+WEATHER_CACHE_SECONDS = 10 * 60
+# the last hourly forecast, decoded once rather than on every tick
+_weather_forecast = None
 
 """
 Path pointing to the directory where the persistent_data json file is read/written
@@ -26,6 +49,47 @@ For tests, will be tests folder
 # persistent_data_path = os.path.join(os.path.dirname(__file__), "..")
 persistent_data_path = os.path.dirname(os.path.abspath( __file__ ))
 persistent_data_file = os.path.join(persistent_data_path, "..", "persistent_data.json")
+# append-only journal of the motor position, see controlalgorithm/position_journal.py
+position_journal_file = os.path.join(persistent_data_path, "..", "position_journal.log")
+_position_journal = None
+_position_journal_lock = threading.Lock()
+
+"""
+Temporarily use a copy of the persistent data file and an empty store in a temporary directory,
+so that simulations and benchmarks never modify the real persistent data.
+Yields the path of the copy, which is deleted on exit.
+"""
+@contextlib.contextmanager
+def isolated_persistent_data():
+    global persistent_data_file, position_journal_file, _position_journal, _weather_forecast
+    original_file = persistent_data_file
+    original_forecast = _weather_forecast
+    original_journal_file = position_journal_file
+    original_journal = _position_journal
+    temp_dir = tempfile.mkdtemp(prefix="smartblinds-")
+    try:
+        persistent_data_file = os.path.join(temp_dir, "persistent_data.json")
+        if os.path.isfile(original_file):
+            shutil.copyfile(original_file, persistent_data_file)
+        if original_journal is not None:
+            original_journal.sync()
+        position_journal_file = os.path.join(temp_dir, "position_journal.log")
+        if os.path.isfile(original_journal_file):
+            shutil.copyfile(original_journal_file, position_journal_file)
+        _position_journal = None
+        _weather_forecast = None
+        reset_mapper()
+        with store.isolated_store():
+            yield persistent_data_file
+    finally:
+        if _position_journal is not None:
+            _position_journal.close()
+        persistent_data_file = original_file
+        position_journal_file = original_journal_file
+        _position_journal = original_journal
+        _weather_forecast = original_forecast
+        reset_mapper()
+        shutil.rmtree(temp_dir, ignore_errors=True)
 
 """
 API Keys and Endpoints
@@ -64,8 +128,8 @@ def get_lat_lon():
 
         OPENCAGE_URL = "https://api.opencagedata.com/geocode/v1/json?key={}&q={}&pretty=1".format(OPENCAGE_API_KEY, place_name)
         # print(OPENCAGE_URL)
-        loc_req = requests.get(url = OPENCAGE_URL)
-        geodata = loc_req.json()
+        with GEOCODE_FETCH_SECONDS.time():
+            geodata = http_client.get_client().get_json(OPENCAGE_URL)
 
         lat = geodata["results"][0]["geometry"]["lat"]
         lon = geodata["results"][0]["geometry"]["lng"]
@@ -76,8 +140,7 @@ def get_lat_lon():
         persistent_data_dict["timezone_adjustment"] = timezone_adjustment
         
         # save data as json file
-        with open(persistent_data_file, "w") as fp:
-            json.dump(persistent_data_dict, fp, indent=4)
+        _write_persistent_data(persistent_data_dict)
     return lat, lon, timezone_adjustment
 
 # Convert Fahrenheit to Celsius
@@ -89,84 +152,201 @@ def fahrenheit_to_celsius(fahrenheit):
 Given a lat/lon and timezone_adjustment factor,
 get the cloud coverage in terms of a percentage from DarkSky
 and the external temperature in Celsius from DarkSky
-Then put the values in persistent_data json file
+Then put the values and the hourly forecast in the weather cache of the store
 """
 def update_cloud_cover_percentage_and_ext_temp(lat, lon, timezone_adjustment):
-    with open(persistent_data_file, "r+") as fp:
-        persistent_data_dict = json.load(fp)
-        
-    # UTC +0 time (7 hours ahead of MST -7) [MST = UTC - 7]
-    date_time = datetime.datetime.today()
-
+    global _weather_forecast
     DARKSKY_URL = "https://api.darksky.net/forecast/{}/{},{}".format(DARKSKY_API_KEY, lat, lon)
     # print(DARKSKY_URL)
-    weather_req = requests.get(url = DARKSKY_URL)
-    weather_data = weather_req.json()
+    # the response cache also covers DarkSky outages, with the last reading until it is a few hours old
+    with WEATHER_FETCH_SECONDS.time():
+        weather_data = http_client.get_client().get_json(DARKSKY_URL, cache_ttl=WEATHER_CACHE_SECONDS)
 
     cloud_cover_percentage = weather_data["currently"]["cloudCover"] * 100
     ext_temp_farenheit = weather_data["currently"]["temperature"]
     ext_temp_celsius = fahrenheit_to_celsius(ext_temp_farenheit)
 
-    persistent_data_dict["minute"] = date_time.minute # for timestamp/polling purposes
-    persistent_data_dict["cloud_cover_percentage"] = cloud_cover_percentage
-    persistent_data_dict["ext_temp_celsius"] = ext_temp_celsius
-
-    with open(persistent_data_file, "w") as fp:
-        json.dump(persistent_data_dict, fp, indent=4)
+    fetched_at = time.time()
+    store.get_store().weather.save(lat, lon, cloud_cover_percentage, ext_temp_celsius, fetched_at=fetched_at)
+    if "hourly" in weather_data:
+        _weather_forecast = WeatherForecast.from_darksky(weather_data, fetched_at)
+        store.get_store().weather.save_forecast(lat, lon, _weather_forecast.to_dict(), fetched_at=fetched_at)
     return cloud_cover_percentage, ext_temp_celsius
 
 """
 Get the cloud coverage in terms of a percentage
 and the external temperature in Celsius
-from persistent_data json file
+from the weather cache of the store, refreshing it when the cached values are older than 10 minutes
 """
 def get_cloud_cover_percentage_and_ext_temp():
     lat, lon, timezone_adjustment = get_lat_lon()
 
-    with open(persistent_data_file, "r+") as fp:
-        persistent_data_dict = json.load(fp)
+    cached = store.get_store().weather.latest(lat, lon, WEATHER_CACHE_SECONDS)
+    if cached is not None:
+        WEATHER_CACHE_REQUESTS.labels("hit").inc()
+        return cached
 
-    # if persistent_data already has cloud cover and ext temp values
-    if "minute" in persistent_data_dict:
-        # UTC +0 time (7 hours ahead of MST -7) [MST = UTC - 7]
-        date_time = datetime.datetime.today()
-        # if it has been 10 minutes, do an update of the values
-        if date_time.minute % 10 == 0:
-            cloud_cover_percentage, ext_temp_celsius = update_cloud_cover_percentage_and_ext_temp(lat, lon, timezone_adjustment)    
+    WEATHER_CACHE_REQUESTS.labels("miss").inc()
+    return update_cloud_cover_percentage_and_ext_temp(lat, lon, timezone_adjustment)
 
-        # otherwise just get the existing values
-        else:
-            cloud_cover_percentage = persistent_data_dict["cloud_cover_percentage"]
-            ext_temp_celsius = persistent_data_dict["ext_temp_celsius"]
+"""
+Get the hourly weather forecast, refreshed together with the current weather when it is older than 10 minutes.
+Returns None if no forecast is available.
+"""
+def get_weather_forecast():
+    global _weather_forecast
+    now = time.time()
+    if _weather_forecast is not None and now - _weather_forecast.fetched_at < WEATHER_CACHE_SECONDS:
+        return _weather_forecast
 
-    # otherwise cloud cover and ext temp values not in persistent_data
+    lat, lon, timezone_adjustment = get_lat_lon()
+    forecast_dict = store.get_store().weather.latest_forecast(lat, lon, WEATHER_CACHE_SECONDS, now=now)
+    if forecast_dict is not None:
+        _weather_forecast = WeatherForecast.from_dict(forecast_dict)
     else:
-        cloud_cover_percentage, ext_temp_celsius = update_cloud_cover_percentage_and_ext_temp(lat, lon, timezone_adjustment)    
-    return cloud_cover_percentage, ext_temp_celsius
+        update_cloud_cover_percentage_and_ext_temp(lat, lon, timezone_adjustment)
+    return _weather_forecast
 
 """
-Read and return the motor position (constrained from -90 to 90 in degrees)
+Get the position journal, opening it on first use.
+Opening recovers the position and compacts the journal. Without a journal, the position is taken from
+the persistent data file, where it was kept before the journal.
 """
-def get_motor_position():
+def get_position_journal():
+    global _position_journal
+    with _position_journal_lock:
+        if _position_journal is None:
+            journal = PositionJournal(position_journal_file)
+            state = journal.open(default_position=_get_legacy_motor_microsteps())
+            if state.interrupted:
+                print("WARNING: the last move of the blinds was interrupted between motor positions {} and {}, "
+                      "calibrate the blinds".format(state.position, state.target))
+            _position_journal = journal
+        return _position_journal
+
+def _get_legacy_motor_microsteps():
     with open(persistent_data_file, "r+") as fp:
         persistent_data_dict = json.load(fp)
 
-    if "motor_position" not in persistent_data_dict:
-        persistent_data_dict["motor_position"] = 0
-    
-    return persistent_data_dict["motor_position"]
+    if "motor_microsteps" in persistent_data_dict:
+        return int(persistent_data_dict["motor_microsteps"])
+
+    # the legacy position was stored in degrees with the linear mapping used before calibration tables
+    from controlalgorithm.angle_step_mapper import AngleStepMapper
+    return AngleStepMapper().tilt_angle_to_microsteps(persistent_data_dict.get("motor_position", 0))
+
+"""
+Read and return the motor position in eighth steps from the horizontal position.
+This integer count is the canonical position of the blinds, the tilt angle and percentage are derived from it.
+"""
+def get_motor_microsteps():
+    return get_position_journal().position
+
+"""
+Direction (StepDirection) of the last move of the motor, None if unknown
+"""
+def get_motor_direction():
+    direction = get_position_journal().state.direction
+    if direction is None:
+        return None
+    return StepDirection.FORWARD if direction > 0 else StepDirection.REVERSE
+
+"""
+Update the motor position in eighth steps without a move (ex. calibration). The update is durable on return.
+The direction (StepDirection) the position was last approached from is kept if given.
+"""
+def set_motor_microsteps(microsteps, direction=None):
+    journal = get_position_journal()
+    journal.commit(int(microsteps), _journal_direction(direction))
+    journal.sync()
+    return journal.position
+
+"""
+Record the start of a move of the motor, before the first step
+"""
+def begin_motor_move(start_microsteps, target_microsteps):
+    get_position_journal().begin(int(start_microsteps), int(target_microsteps))
+
+"""
+Record the motor position reached during a move
+"""
+def record_motor_progress(microsteps):
+    get_position_journal().progress(int(microsteps))
+
+"""
+Record the end of a move of the motor in direction (StepDirection)
+"""
+def commit_motor_move(microsteps, direction=None):
+    get_position_journal().commit(int(microsteps), _journal_direction(direction))
+
+def _journal_direction(direction):
+    if direction is None:
+        return None
+    return 1 if direction == StepDirection.FORWARD else -1
+
+"""
+Make the recorded motor position durable
+"""
+def sync_motor_position():
+    get_position_journal().sync()
+
+"""
+Read and return the motor position (constrained from -90 to 90 in degrees), derived from the position in steps
+with the calibration of the blinds
+"""
+def get_motor_position():
+    from controlalgorithm.angle_step_mapper import get_mapper
+    return get_mapper().microsteps_to_tilt_angle(get_motor_microsteps(), get_motor_direction())
     
 """
-Update the motor position (constrained from -90 to 90 in degrees)
+Update the motor position (constrained from -90 to 90 in degrees), stored as the closest position in steps
+with the calibration of the blinds
 """
 def set_motor_position(angle):
-    with open(persistent_data_file, "r+") as fp:
+    from controlalgorithm.angle_step_mapper import get_mapper
+    mapper = get_mapper()
+    return mapper.microsteps_to_tilt_angle(set_motor_microsteps(mapper.tilt_angle_to_microsteps(angle)))
+
+"""
+Drop the cached mapper of the calibration, see angle_step_mapper.get_mapper
+"""
+def reset_mapper():
+    from controlalgorithm.angle_step_mapper import reset_mapper as reset_calibrated_mapper
+    reset_calibrated_mapper()
+
+"""
+Read and return the calibration table of the blinds as a dictionary (see AngleStepMapper), None if not calibrated
+"""
+def get_calibration():
+    if not os.path.isfile(persistent_data_file):
+        return None
+    with open(persistent_data_file, "r") as fp:
         persistent_data_dict = json.load(fp)
+    return persistent_data_dict.get("calibration")
 
-    persistent_data_dict["motor_position"] = angle
+"""
+Update the calibration table of the blinds, given as a dictionary
+"""
+def set_calibration(calibration_dict):
+    persistent_data_dict = dict()
+    if os.path.isfile(persistent_data_file):
+        with open(persistent_data_file, "r") as fp:
+            persistent_data_dict = json.load(fp)
+
+    persistent_data_dict["calibration"] = calibration_dict
+    _write_persistent_data(persistent_data_dict)
 
-    with open(persistent_data_file, "w") as fp:
+    reset_mapper()
+
+"""
+Replace the persistent data file with persistent_data_dict. The data is written to a temporary file that is renamed
+over the file, so a crash leaves either the old or the new data.
+"""
+def _write_persistent_data(persistent_data_dict):
+    temp_file = persistent_data_file + ".tmp"
+    with open(temp_file, "w") as fp:
         json.dump(persistent_data_dict, fp, indent=4)
-    
-    return persistent_data_dict["motor_position"]
-    
\ No newline at end of file
+        fp.flush()
+        os.fsync(fp.fileno())
+    os.replace(temp_file, persistent_data_file)
+    fsync_directory(os.path.dirname(os.path.abspath(persistent_data_file)))
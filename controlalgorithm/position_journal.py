@@ -0,0 +1,288 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Append-only journal of the motor position.
+Each move appends an intent record before the motor starts, progress records during long moves and
+a commit record at the end, so that the position survives a power cut at any point. The journal is
+only ever appended to, except for compaction which atomically replaces it with a single record.
+
+Records are JSON objects, one per line:
+    {"type": "intent", "seq": 7, "start": 0, "target": 520}
+    {"type": "progress", "seq": 7, "position": 256}
+    {"type": "commit", "seq": 7, "position": 520, "direction": 1}
+Positions are motor positions in eighth steps. The direction of the last move, 1 towards higher positions and -1
+towards lower ones, is kept with the commit since the backlash of the slats depends on it. It is left out when
+unknown (ex. after a calibration). A line cut short by a power cut is ignored.
+"""
+
+import json
+import os
+import threading
+import time
+
+from metrics.metrics import REGISTRY
+
+"""
+Record types
+"""
+RECORD_INTENT = "intent"
+RECORD_PROGRESS = "progress"
+RECORD_COMMIT = "commit"
+
+JOURNAL_RECORDS = REGISTRY.counter("smartblinds_position_journal_records", "Records appended to the position journal", labelnames=("type",))
+JOURNAL_SYNC_SECONDS = REGISTRY.histogram("smartblinds_position_journal_sync_seconds", "Duration of a position journal fsync")
+
+"""
+Position recovered from a journal
+
+Attributes:
+    position (int): the last known motor position in eighth steps
+    interrupted (bool): true if the last move has no commit record. The motor is then somewhere between
+        position (the last durable progress) and target, and the blinds should be calibrated.
+    target (int): target of the interrupted move, None if not interrupted
+    records (int): number of valid records read
+    direction (int): direction of the last move, 1 or -1, None if unknown
+    sequence (int): sequence number of the last move, new moves continue from it
+"""
+class JournalState:
+    def __init__(self, position, interrupted=False, target=None, records=0, direction=None, sequence=0):
+        self.position = position
+        self.interrupted = interrupted
+        self.target = target
+        self.records = records
+        self.direction = direction
+        self.sequence = sequence
+
+"""
+Read a journal and return the position it records
+
+Inputs:
+    path (string): journal file
+
+Output:
+    JournalState, None if the journal is missing or has no records
+"""
+def recover(path):
+    if not os.path.isfile(path):
+        return None
+
+    state = None
+    records = 0
+    sequence = 0
+    with open(path, "r") as fp:
+        for line in fp:
+            # a record is only valid once its newline is written
+            if not line.endswith("\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+
+            records += 1
+            sequence = max(sequence, record.get("seq", 0))
+            record_type = record.get("type")
+            if record_type == RECORD_COMMIT:
+                state = JournalState(record["position"], direction=record.get("direction"))
+            elif record_type == RECORD_INTENT:
+                state = JournalState(record["start"], interrupted=True, target=record["target"],
+                                     direction=_direction(record["start"], record["target"]))
+            elif record_type == RECORD_PROGRESS and state is not None and state.interrupted:
+                state = JournalState(record["position"], interrupted=True, target=state.target, direction=state.direction)
+
+    if state is None:
+        return None
+    state.records = records
+    state.sequence = sequence
+    return state
+
+"""
+Append-only journal of the motor position.
+
+fsyncs are batched: the intent record of a move is synced before the motor starts, which also makes
+the commit of the previous move durable. Progress and commit records are only synced when sync_interval
+seconds have passed since the last sync, or on sync()/close(). One move therefore costs a single fsync.
+
+Arguments:
+    path (string): journal file
+    sync_interval (float): minimum seconds between fsyncs of progress and commit records
+    compact_records (int): the journal is compacted when it grows past this number of records
+"""
+class PositionJournal:
+    def __init__(self, path, sync_interval=1.0, compact_records=10000):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.compact_records = compact_records
+
+        self._lock = threading.Lock()
+        self._fp = None
+        self._dirty = False
+        self._last_sync = 0.0
+        self._records = 0
+        self._sequence = 0
+        self._state = None
+
+    """
+    Recover the position from the journal and compact it to a single commit record.
+    Called once on startup, before any other method.
+
+    Inputs:
+        default_position (int): position used if the journal doesn't exist yet (ex. migrated from an older store)
+
+    Output:
+        JournalState
+    """
+    def open(self, default_position=0):
+        with self._lock:
+            state = recover(self.path)
+            if state is None:
+                state = JournalState(default_position)
+
+            self._state = state
+            self._sequence = state.sequence
+            self._compact()
+            return state
+
+    """
+    The last known motor position in eighth steps
+    """
+    @property
+    def position(self):
+        return self._state.position
+
+    """
+    State recovered on open, or the current state after later moves
+    """
+    @property
+    def state(self):
+        return self._state
+
+    """
+    Record the start of a move. The record is synced before returning, so the motor can start.
+    """
+    def begin(self, start, target):
+        with self._lock:
+            self._sequence += 1
+            self._append({"type": RECORD_INTENT, "seq": self._sequence, "start": start, "target": target})
+            self._sync()
+            self._state = JournalState(start, interrupted=True, target=target, direction=_direction(start, target))
+
+    """
+    Record the position reached during a move
+    """
+    def progress(self, position):
+        with self._lock:
+            self._append({"type": RECORD_PROGRESS, "seq": self._sequence, "position": position})
+            self._state = JournalState(position, interrupted=True, target=self._state.target,
+                                       direction=self._state.direction)
+            self._sync_if_due()
+
+    """
+    Record the end of a move, or a position set without a move (ex. calibration)
+
+    Inputs:
+        position (int): motor position in eighth steps
+        direction (int): direction of the move to the position, 1 or -1, None if unknown
+    """
+    def commit(self, position, direction=None):
+        with self._lock:
+            self._append(_commit_record(self._sequence, position, direction))
+            self._state = JournalState(position, direction=direction)
+            self._sync_if_due()
+
+            if self._records >= self.compact_records:
+                self._compact()
+
+    """
+    Make all appended records durable
+    """
+    def sync(self):
+        with self._lock:
+            if self._dirty:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._fp is not None:
+                if self._dirty:
+                    self._sync()
+                self._fp.close()
+                self._fp = None
+
+    def _append(self, record):
+        if self._fp is None:
+            self._fp = open(self.path, "a")
+
+        # hand the record to the OS right away, so only a power cut (not a crash of the process) can lose it
+        self._fp.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._fp.flush()
+        self._dirty = True
+        self._records += 1
+        JOURNAL_RECORDS.labels(record["type"]).inc()
+
+    def _sync(self):
+        with JOURNAL_SYNC_SECONDS.time():
+            os.fsync(self._fp.fileno())
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def _sync_if_due(self):
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            self._sync()
+
+    """
+    Replace the journal with a single commit record of the current position.
+    The new journal is written to a temporary file and renamed over the old one, so a power cut
+    leaves either the old or the new journal.
+    """
+    def _compact(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+        if self._state.interrupted:
+            # keep the interrupted move so that it is still reported until the next move
+            record = {"type": RECORD_INTENT, "seq": self._sequence, "start": self._state.position, "target": self._state.target}
+        else:
+            record = _commit_record(self._sequence, self._state.position, self._state.direction)
+
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as fp:
+            fp.write(json.dumps(record, separators=(",", ":")) + "\n")
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(temp_path, self.path)
+        fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+
+        self._records = 1
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+"""
+Direction of a move between two positions, 1 or -1, None if the positions are the same
+"""
+def _direction(start, target):
+    if target == start:
+        return None
+    return 1 if target > start else -1
+
+def _commit_record(sequence, position, direction):
+    record = {"type": RECORD_COMMIT, "seq": sequence, "position": position}
+    if direction is not None:
+        record["direction"] = direction
+    return record
+
+"""
+Make a rename in a directory durable, where the platform allows it
+"""
+def fsync_directory(directory):
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
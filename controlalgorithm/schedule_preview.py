@@ -0,0 +1,106 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Vectorized preview of the positions the control algorithms give for a timeline of modes.
+Every minute of the timeline is computed in one numpy pass per algorithm instead of one algorithm call per tick.
+"""
+
+import numpy
+
+import controlalgorithm.heat_mgmt_algorithm as heat_mgmt
+from controlalgorithm.angle_step_mapper import ANGLE_POSITION_FACTOR
+from controlalgorithm.glare_algorithm import glare_free_tilt_angles
+
+"""
+Names of the modes, same as the BlindMode names
+"""
+MODE_LIGHT = "LIGHT"
+MODE_DARK = "DARK"
+MODE_ECO = "ECO"
+MODE_MANUAL = "MANUAL"
+MODE_BALANCED = "BALANCED"
+
+"""
+Position of the DARK mode
+"""
+DARK_POSITION = -100
+
+"""
+Target positions for every minute of a timeline of modes. Same as the algorithms of the modes give for the
+conditions of each minute, see SmartBlindsSystem._compute_target_position.
+All arrays have one entry per minute.
+
+Inputs:
+    modes (numpy.ndarray): mode name of each minute
+    positions (numpy.ndarray): position of each minute for MANUAL, ignored for the other modes
+    setpoints (numpy.ndarray): desired internal temperature for ECO and BALANCED, nan for the default setpoint
+    solar_angle (numpy.ndarray): apparent solar elevation in degrees
+    cloud_cover_percentage (numpy.ndarray): cloud coverage in percentage
+    ext_temp (numpy.ndarray): external temperature in Celsius
+    act_int_temp (numpy.ndarray): actual internal temperature in Celsius
+    solar_azimuth (numpy.ndarray): solar azimuth in degrees, only required with a window
+    window (WindowGeometry): when given, LIGHT is glare aware for this window
+    eco_conditions (tuple): (cloud_cover_percentage, ext_temp, solar_angle) arrays used by ECO instead of the
+        conditions of each minute, for the predictive heat management
+
+Output:
+    numpy.ndarray of target positions in percent
+"""
+def preview_positions(modes, positions, setpoints, solar_angle, cloud_cover_percentage, ext_temp, act_int_temp,
+                      solar_azimuth=None, window=None, eco_conditions=None):
+    modes = numpy.asarray(modes)
+    setpoints = numpy.asarray(setpoints, dtype=float)
+    solar_angle = numpy.asarray(solar_angle, dtype=float)
+    tilt_angles = numpy.zeros(len(modes))
+
+    light = modes == MODE_LIGHT
+    if light.any():
+        if window is not None:
+            tilt_angles[light] = glare_free_tilt_angles(solar_angle[light], numpy.asarray(solar_azimuth)[light], window)
+        else:
+            tilt_angles[light] = -solar_angle[light]
+
+    eco = modes == MODE_ECO
+    if eco.any():
+        eco_cloud_cover, eco_ext_temp, eco_solar_angle = eco_conditions if eco_conditions is not None \
+            else (cloud_cover_percentage, ext_temp, solar_angle)
+        tilt_angles[eco] = _heat_mgmt_tilt_angles(eco, setpoints, eco_ext_temp, eco_cloud_cover, eco_solar_angle, act_int_temp)
+
+    balanced = modes == MODE_BALANCED
+    if balanced.any():
+        heat_tilt_angles = _heat_mgmt_tilt_angles(balanced, setpoints, ext_temp, cloud_cover_percentage, solar_angle,
+                                                  act_int_temp)
+        solar_angle_weight = heat_mgmt.solar_angle_weights(solar_angle[balanced])
+        tilt_angles[balanced] = -solar_angle[balanced] * solar_angle_weight + heat_tilt_angles * (1 - solar_angle_weight)
+
+    result = tilt_angles / ANGLE_POSITION_FACTOR
+    result[modes == MODE_DARK] = DARK_POSITION
+    manual = modes == MODE_MANUAL
+    result[manual] = numpy.asarray(positions, dtype=float)[manual]
+    return numpy.clip(result, -100, 100)
+
+"""
+Heat management tilt angles of the minutes in mask, one vectorized pass per distinct setpoint
+"""
+def _heat_mgmt_tilt_angles(mask, setpoints, ext_temp, cloud_cover_percentage, solar_angle, act_int_temp):
+    conditions = [numpy.broadcast_to(numpy.asarray(value, dtype=float), mask.shape)[mask]
+                  for value in (ext_temp, cloud_cover_percentage, solar_angle, act_int_temp)]
+    setpoints = setpoints[mask]
+    tilt_angles = numpy.zeros(len(setpoints))
+    for setpoint in numpy.unique(setpoints):
+        selected = numpy.isnan(setpoints) if numpy.isnan(setpoint) else setpoints == setpoint
+        tilt_angles[selected] = heat_mgmt.heat_mgmt_tilt_angles(*(value[selected] for value in conditions),
+                                                                des_int_temp=None if numpy.isnan(setpoint) else setpoint)
+    return tilt_angles
+
+"""
+Indices of the minutes where the mode or the position changes, including the first minute.
+A timeline of one entry per index is the compressed form of the full timeline.
+"""
+def change_indices(modes, positions):
+    modes = numpy.asarray(modes)
+    positions = numpy.asarray(positions)
+    if len(modes) == 0:
+        return numpy.zeros(0, dtype=int)
+    changed = (modes[1:] != modes[:-1]) | (positions[1:] != positions[:-1])
+    return numpy.concatenate(([0], numpy.flatnonzero(changed) + 1))
@@ -0,0 +1,193 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Precomputed daily solar position tables.
+The solar elevation and azimuth are computed for every minute of a day in one vectorized pvlib call,
+so that the solar angle can be looked up instead of calling pvlib on every tick.
+"""
+
+from collections import OrderedDict
+import datetime
+import threading
+
+import numpy
+import pandas
+import pvlib.solarposition
+from pytz import timezone
+
+"""
+Constants
+
+MINUTES_PER_DAY: number of entries in a daily table
+SUNRISE_ELEVATION: apparent elevation of the center of the sun at sunrise and sunset, with its upper edge on the horizon
+SUNRISE, SOLAR_NOON, SUNSET: names of the solar events of a day
+"""
+MINUTES_PER_DAY = 24 * 60
+SUNRISE_ELEVATION = -0.267
+SUNRISE = "sunrise"
+SOLAR_NOON = "solar_noon"
+SUNSET = "sunset"
+
+"""
+Get the fixed offset timezone for a timezone adjustment in hours (as stored in persistent data)
+"""
+def timezone_from_adjustment(timezone_adjustment):
+    # Etc/GMT convention has opposite sign from GMT convention
+    sign = "-" if timezone_adjustment >= 0 else "+"
+    return timezone(f"Etc/GMT{sign}{abs(timezone_adjustment)}")
+
+"""
+Solar position for every minute of a single day, in the timezone of the table
+
+Attributes:
+    date (datetime.date): the day the table is for
+    tz (tzinfo): timezone in which the minutes of the day are counted
+    elevation (numpy.ndarray): apparent solar elevation in degrees per minute of day
+    azimuth (numpy.ndarray): solar azimuth in degrees (clockwise from north) per minute of day
+"""
+class DailySolarTable:
+    def __init__(self, date, tz, elevation, azimuth):
+        self.date = date
+        self.tz = tz
+        self.elevation = elevation
+        self.azimuth = azimuth
+        self._solar_events = None
+
+    """
+    Minute of day index for a datetime. Naive datetimes are assumed to already be in the table timezone.
+    """
+    def minute_index(self, date_time):
+        if date_time.tzinfo is not None:
+            date_time = date_time.astimezone(self.tz)
+        return date_time.hour * 60 + date_time.minute
+
+    def elevation_at(self, date_time):
+        return float(self.elevation[self.minute_index(date_time)])
+
+    def azimuth_at(self, date_time):
+        return float(self.azimuth[self.minute_index(date_time)])
+
+    """
+    Sunrise, solar noon and sunset of the day, computed once per table
+
+    Sunrise is the first minute with the sun up and sunset the first minute after the last one with the sun up.
+    During polar day they are the start and end of the day, during polar night both are at solar noon.
+
+    Output:
+        dictionary of SUNRISE, SOLAR_NOON and SUNSET to aware datetimes in the table timezone
+    """
+    def solar_events(self):
+        if self._solar_events is None:
+            solar_noon = int(numpy.argmax(self.elevation))
+            sun_up = numpy.flatnonzero(self.elevation > SUNRISE_ELEVATION)
+            sunrise, sunset = (int(sun_up[0]), int(sun_up[-1]) + 1) if len(sun_up) else (solar_noon, solar_noon)
+
+            start = self.tz.localize(datetime.datetime(self.date.year, self.date.month, self.date.day))
+            self._solar_events = {event: start + datetime.timedelta(minutes=minute)
+                                  for event, minute in ((SUNRISE, sunrise), (SOLAR_NOON, solar_noon), (SUNSET, sunset))}
+        return self._solar_events
+
+"""
+Compute the solar position table for a day
+
+Inputs:
+    lat (float), lon (float): location
+    date (datetime.date): the day
+    tz (tzinfo): a fixed offset timezone the day is counted in
+
+Output:
+    DailySolarTable
+"""
+def compute_daily_solar_table(lat, lon, date, tz):
+    start = tz.localize(datetime.datetime(date.year, date.month, date.day))
+    times = pandas.date_range(start=start, periods=MINUTES_PER_DAY, freq="min")
+    solar_position = pvlib.solarposition.get_solarposition(times, lat, lon)
+
+    return DailySolarTable(date, tz,
+                           solar_position["apparent_elevation"].to_numpy(),
+                           solar_position["azimuth"].to_numpy())
+
+"""
+Solar position lookup for a location, backed by daily tables that are computed once and cached.
+
+Arguments:
+    lat (float), lon (float): location
+    tz (tzinfo): fixed offset timezone used to split days (see timezone_from_adjustment)
+    cache_size (int): number of daily tables kept
+"""
+class SolarTable:
+    def __init__(self, lat, lon, tz, cache_size=8):
+        self.lat = lat
+        self.lon = lon
+        self.tz = tz
+        self._cache_size = cache_size
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    """
+    Create a solar table for the location stored in persistent data
+    """
+    @staticmethod
+    def from_persistent_data():
+        import controlalgorithm.persistent_data as p_data
+        lat, lon, timezone_adjustment = p_data.get_lat_lon()
+        return SolarTable(lat, lon, timezone_from_adjustment(timezone_adjustment))
+
+    """
+    Get the table for a day, computing it if it is not cached
+    """
+    def for_date(self, date):
+        with self._lock:
+            table = self._tables.get(date)
+            if table is not None:
+                self._tables.move_to_end(date)
+                return table
+
+        table = compute_daily_solar_table(self.lat, self.lon, date, self.tz)
+
+        with self._lock:
+            self._tables[date] = table
+            while len(self._tables) > self._cache_size:
+                self._tables.popitem(last=False)
+        return table
+
+    """
+    Get the table for the day containing date_time. Naive datetimes are assumed to be in the table timezone.
+    """
+    def for_datetime(self, date_time):
+        if date_time.tzinfo is not None:
+            date_time = date_time.astimezone(self.tz)
+        return self.for_date(date_time.date())
+
+    def elevation_at(self, date_time):
+        return self.for_datetime(date_time).elevation_at(date_time)
+
+    def azimuth_at(self, date_time):
+        return self.for_datetime(date_time).azimuth_at(date_time)
+
+    """
+    Solar elevation for every minute of a window, which may span several days
+
+    Inputs:
+        start (datetime): first minute of the window. Naive datetimes are assumed to be in the table timezone.
+        minutes (int): length of the window
+
+    Output:
+        numpy.ndarray of the apparent solar elevation in degrees per minute
+    """
+    def elevations(self, start, minutes):
+        return self._window(start, minutes, "elevation")
+
+    """
+    Solar azimuth for every minute of a window, see elevations
+    """
+    def azimuths(self, start, minutes):
+        return self._window(start, minutes, "azimuth")
+
+    def _window(self, start, minutes, attribute):
+        if start.tzinfo is not None:
+            start = start.astimezone(self.tz)
+        index = start.hour * 60 + start.minute
+        days = (index + minutes + MINUTES_PER_DAY - 1) // MINUTES_PER_DAY
+        tables = [getattr(self.for_date(start.date() + datetime.timedelta(days=day)), attribute) for day in range(days)]
+        return numpy.concatenate(tables)[index:index + minutes]
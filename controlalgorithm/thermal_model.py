@@ -0,0 +1,254 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Closed loop thermal model of the room, learned from how the internal temperature responds to the
+weather, the sun and the tilt of the blinds.
+    ThermalModel: linear model of the rate of change of the internal temperature, updated online by recursive
+        least squares and trainable offline from recorded samples in a single least squares solve
+    ThermalController: feeds the model with the observations of each tick and picks the tilt angle whose
+        predicted temperature is closest to the setpoint
+
+The model is
+    rate (Celsius per hour) = theta . [1, ext_temp - int_temp, sun, sun * openness, openness]
+where sun = max(sin(solar angle), 0) * (1 - cloud cover) is the strength of the sunlight and openness = cos(tilt angle)
+is how far the slats are open. The model has a fixed number of parameters, so an update and a decision take
+the same time and memory no matter how long the system has been running.
+"""
+
+import numpy
+
+from metrics.metrics import REGISTRY
+
+"""
+Constants
+
+NUM_FEATURES: number of model parameters
+DEFAULT_FORGETTING_FACTOR: weight of the past in each online update, older samples fade out as the room
+    and the seasons change (0.999 is a time constant of about 1000 ticks)
+DEFAULT_INITIAL_COVARIANCE: initial uncertainty of the parameters of an untrained model
+DEFAULT_REGULARIZATION: ridge term of the offline training, keeps the solve well conditioned
+DEFAULT_HORIZON_MINUTES: how far ahead the controller predicts the internal temperature
+DEFAULT_MIN_SAMPLES: samples the model needs before the controller uses it
+MAX_SAMPLE_GAP_MINUTES: longer gaps between samples (ex. a restart) are not used for learning
+CANDIDATE_TILT_ANGLES: tilt angles the controller chooses from
+"""
+NUM_FEATURES = 5
+DEFAULT_FORGETTING_FACTOR = 0.999
+DEFAULT_INITIAL_COVARIANCE = 1000.0
+DEFAULT_REGULARIZATION = 1e-3
+DEFAULT_HORIZON_MINUTES = 30
+DEFAULT_MIN_SAMPLES = 60
+MAX_SAMPLE_GAP_MINUTES = 15
+CANDIDATE_TILT_ANGLES = numpy.arange(-90, 91, 5, dtype=float)
+
+THERMAL_MODEL_UPDATES = REGISTRY.counter("smartblinds_thermal_model_updates", "Online updates of the thermal model")
+THERMAL_MODEL_ERROR = REGISTRY.histogram("smartblinds_thermal_model_abs_error",
+                                         "Absolute error of the predicted internal temperature rate in Celsius per hour",
+                                         buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5))
+
+"""
+Features of the thermal model, vectorized over any of the arguments
+
+Inputs:
+    ext_temp, int_temp (float or numpy.ndarray): external and internal temperatures in Celsius
+    cloud_cover_percentage (float or numpy.ndarray): cloud cover in percent
+    solar_angle (float or numpy.ndarray): solar elevation in degrees
+    tilt_angle (float or numpy.ndarray): tilt angle of the slats in degrees
+
+Output:
+    numpy.ndarray of features, with the feature as the last axis
+"""
+def thermal_features(ext_temp, int_temp, cloud_cover_percentage, solar_angle, tilt_angle):
+    ext_temp, int_temp, cloud_cover_percentage, solar_angle, tilt_angle = numpy.broadcast_arrays(
+        *(numpy.asarray(value, dtype=float) for value in (ext_temp, int_temp, cloud_cover_percentage, solar_angle, tilt_angle)))
+    sun = numpy.clip(numpy.sin(numpy.radians(solar_angle)), 0, None) * (1 - numpy.clip(cloud_cover_percentage, 0, 100) / 100)
+    openness = numpy.cos(numpy.radians(tilt_angle))
+    return numpy.stack([numpy.ones_like(sun), ext_temp - int_temp, sun, sun * openness, openness], axis=-1)
+
+"""
+Training samples from recorded history, in a single vectorized pass
+
+Inputs:
+    records (list): "thermal" history records, dictionaries with the time and the data of ThermalController.applied,
+        in any order
+
+Output:
+    (features, rates): features of each sample and the observed rate of change of the internal temperature in
+    Celsius per hour until the next sample. Pairs of samples further apart than MAX_SAMPLE_GAP_MINUTES are left out.
+"""
+def samples_from_history(records):
+    records = sorted(records, key=lambda record: record["time"])
+    if len(records) < 2:
+        return numpy.zeros((0, NUM_FEATURES)), numpy.zeros(0)
+
+    times = numpy.array([record["time"] for record in records], dtype=float)
+    columns = {key: numpy.array([record["data"][key] for record in records], dtype=float)
+               for key in ("int_temp", "ext_temp", "cloud_cover", "solar_angle", "tilt_angle")}
+
+    hours = numpy.diff(times) / 3600
+    valid = (hours > 0) & (hours <= MAX_SAMPLE_GAP_MINUTES / 60)
+    features = thermal_features(columns["ext_temp"][:-1], columns["int_temp"][:-1], columns["cloud_cover"][:-1],
+                                columns["solar_angle"][:-1], columns["tilt_angle"][:-1])
+    rates = numpy.diff(columns["int_temp"])[valid] / hours[valid]
+    return features[valid], rates
+
+"""
+Linear model of the rate of change of the internal temperature, see the module description.
+
+Arguments:
+    forgetting_factor (float): weight of the past in each online update, 1 to never forget
+    initial_covariance (float): initial uncertainty of the parameters
+
+Attributes:
+    theta (numpy.ndarray): model parameters
+    covariance (numpy.ndarray): covariance of the parameters, scaled by the noise
+    samples (int): samples the model has learned from
+"""
+class ThermalModel:
+    def __init__(self, forgetting_factor=DEFAULT_FORGETTING_FACTOR, initial_covariance=DEFAULT_INITIAL_COVARIANCE):
+        self.forgetting_factor = forgetting_factor
+        self.initial_covariance = initial_covariance
+        self.theta = numpy.zeros(NUM_FEATURES)
+        self.covariance = numpy.eye(NUM_FEATURES) * initial_covariance
+        self.samples = 0
+
+    """
+    Predicted rate of change of the internal temperature in Celsius per hour, vectorized over the features
+    """
+    def predict(self, features):
+        return numpy.asarray(features, dtype=float) @ self.theta
+
+    """
+    Recursive least squares update with a single sample. Constant time and memory.
+
+    Inputs:
+        features (numpy.ndarray): features of the sample
+        rate (float): observed rate of change of the internal temperature in Celsius per hour
+
+    Output:
+        prediction error of the model before the update
+    """
+    def update(self, features, rate):
+        features = numpy.asarray(features, dtype=float)
+        covariance_features = self.covariance @ features
+        gain = covariance_features / (self.forgetting_factor + features @ covariance_features)
+        error = rate - features @ self.theta
+
+        self.theta = self.theta + gain * error
+        self.covariance = (self.covariance - numpy.outer(gain, covariance_features)) / self.forgetting_factor
+        self.samples += 1
+        THERMAL_MODEL_UPDATES.inc()
+        THERMAL_MODEL_ERROR.observe(abs(error))
+        return error
+
+    """
+    Train the model from scratch on a batch of samples, with a regularized least squares solve.
+    The covariance is set as if the samples had been learned online, so online updates carry on from there.
+
+    Inputs:
+        features (numpy.ndarray): features of each sample, one row per sample
+        rates (numpy.ndarray): observed rates of change of the internal temperature in Celsius per hour
+        regularization (float): ridge term added to the normal equations
+    """
+    def fit(self, features, rates, regularization=DEFAULT_REGULARIZATION):
+        features = numpy.asarray(features, dtype=float).reshape(-1, NUM_FEATURES)
+        rates = numpy.asarray(rates, dtype=float)
+        if len(features) == 0:
+            return
+
+        normal_matrix = features.T @ features + numpy.eye(NUM_FEATURES) * (regularization + 1 / self.initial_covariance)
+        self.theta = numpy.linalg.solve(normal_matrix, features.T @ rates)
+        self.covariance = numpy.linalg.inv(normal_matrix)
+        self.samples = len(features)
+
+"""
+Controller closing the loop around a ThermalModel.
+
+Each tick, observe() gives the current conditions. The rate of change of the internal temperature since the
+previous tick is learned, with the conditions and the tilt angle of the previous tick. tilt_angle() then picks the
+tilt angle whose predicted internal temperature horizon_minutes ahead is closest to the setpoint, and applied()
+records the tilt angle the blinds hold until the next tick.
+
+Arguments:
+    model (ThermalModel): the model, a new untrained one if not given
+    horizon_minutes (float): how far ahead the internal temperature is predicted
+    min_samples (int): samples the model needs before tilt_angle() uses it
+"""
+class ThermalController:
+    def __init__(self, model=None, horizon_minutes=DEFAULT_HORIZON_MINUTES, min_samples=DEFAULT_MIN_SAMPLES):
+        self.model = model if model is not None else ThermalModel()
+        self.horizon_hours = horizon_minutes / 60
+        self.min_samples = min_samples
+        # conditions of the current tick, and features and time of the last applied tilt angle
+        self._conditions = None
+        self._pending = None
+        self._tilt_angle = 0.0
+
+    @property
+    def ready(self):
+        return self.model.samples >= self.min_samples
+
+    """
+    Observe the conditions of a tick, and learn from the temperature change since the previous tick
+
+    Inputs:
+        timestamp (float): UNIX time of the tick
+        int_temp, ext_temp (float): internal and external temperatures in Celsius
+        cloud_cover_percentage (float): cloud cover in percent
+        solar_angle (float): solar elevation in degrees
+    """
+    def observe(self, timestamp, int_temp, ext_temp, cloud_cover_percentage, solar_angle):
+        if self._pending is not None:
+            last_timestamp, last_int_temp, features = self._pending
+            hours = (timestamp - last_timestamp) / 3600
+            if 0 < hours <= MAX_SAMPLE_GAP_MINUTES / 60:
+                self.model.update(features, (int_temp - last_int_temp) / hours)
+            self._pending = None
+
+        self._conditions = (timestamp, int_temp, ext_temp, cloud_cover_percentage, solar_angle)
+
+    """
+    Tilt angle that brings the internal temperature closest to the setpoint over the horizon.
+    Between tilt angles with the same prediction, the one closest to the current tilt angle is chosen.
+
+    Inputs:
+        setpoint (float): desired internal temperature in Celsius
+
+    Output:
+        tilt angle (float), None before the model is trained or before the first observation
+    """
+    def tilt_angle(self, setpoint):
+        if not self.ready or self._conditions is None:
+            return None
+
+        _, int_temp, ext_temp, cloud_cover_percentage, solar_angle = self._conditions
+        features = thermal_features(ext_temp, int_temp, cloud_cover_percentage, solar_angle, CANDIDATE_TILT_ANGLES)
+        deviation = numpy.abs(int_temp + self.model.predict(features) * self.horizon_hours - setpoint)
+        # tiny tie breaker, below the precision of any prediction
+        deviation += numpy.abs(CANDIDATE_TILT_ANGLES - self._tilt_angle) * 1e-9
+        return float(CANDIDATE_TILT_ANGLES[numpy.argmin(deviation)])
+
+    """
+    Record the tilt angle the blinds hold after the current tick. A tick without an observation drops the sample of the
+    previous one, as the conditions in between are unknown.
+
+    Output:
+        the sample as a dictionary for the history, None without an observation this tick
+    """
+    def applied(self, tilt_angle):
+        self._tilt_angle = tilt_angle
+        if self._conditions is None:
+            # the temperature change to the next observation doesn't follow from the last one anymore
+            self._pending = None
+            return None
+
+        timestamp, int_temp, ext_temp, cloud_cover_percentage, solar_angle = self._conditions
+        self._pending = (timestamp, int_temp, thermal_features(ext_temp, int_temp, cloud_cover_percentage, solar_angle, tilt_angle))
+        self._conditions = None
+        return {
+            "int_temp": int_temp,
+            "ext_temp": ext_temp,
+            "cloud_cover": cloud_cover_percentage,
+            "solar_angle": solar_angle,
+            "tilt_angle": tilt_angle,
+        }
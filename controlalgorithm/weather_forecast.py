@@ -0,0 +1,73 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Hourly weather forecast kept as arrays, so that the weather at many future times can be
+interpolated in a single vectorized call
+"""
+
+import numpy
+
+import controlalgorithm.user_defined_exceptions as exceptions
+
+"""
+Hourly forecast of the weather at a location
+
+Attributes:
+    fetched_at (float): UNIX time the forecast was fetched at
+    times (numpy.ndarray): UNIX times of the forecast points, increasing
+    cloud_cover_percentage (numpy.ndarray): forecast cloud cover in percent per point
+    ext_temp_celsius (numpy.ndarray): forecast external temperature in Celsius per point
+"""
+class WeatherForecast:
+    def __init__(self, fetched_at, times, cloud_cover_percentage, ext_temp_celsius):
+        self.fetched_at = fetched_at
+        self.times = numpy.asarray(times, dtype=float)
+        self.cloud_cover_percentage = numpy.asarray(cloud_cover_percentage, dtype=float)
+        self.ext_temp_celsius = numpy.asarray(ext_temp_celsius, dtype=float)
+        if len(self.times) == 0:
+            raise exceptions.InputError("WeatherForecast()", "A forecast needs at least one point")
+
+    """
+    Create a forecast from the hourly block of a DarkSky response (temperatures in Fahrenheit)
+    """
+    @staticmethod
+    def from_darksky(weather_data, fetched_at):
+        hourly = weather_data["hourly"]["data"]
+        return WeatherForecast(fetched_at,
+                               [point["time"] for point in hourly],
+                               [point["cloudCover"] * 100 for point in hourly],
+                               [(point["temperature"] - 32) / 1.8 for point in hourly])
+
+    def to_dict(self):
+        return {
+            "fetched_at": self.fetched_at,
+            "times": self.times.tolist(),
+            "cloud_cover_percentage": self.cloud_cover_percentage.tolist(),
+            "ext_temp_celsius": self.ext_temp_celsius.tolist(),
+        }
+
+    @staticmethod
+    def from_dict(forecast_dict):
+        return WeatherForecast(forecast_dict["fetched_at"], forecast_dict["times"],
+                               forecast_dict["cloud_cover_percentage"], forecast_dict["ext_temp_celsius"])
+
+    """
+    UNIX time of the last forecast point
+    """
+    @property
+    def end(self):
+        return float(self.times[-1])
+
+    """
+    Weather at the given times, linearly interpolated between the forecast points.
+    Times outside the forecast get the weather of the first or last point.
+
+    Inputs:
+        times (numpy.ndarray): UNIX times
+
+    Output:
+        (cloud_cover_percentage, ext_temp_celsius) arrays
+    """
+    def at(self, times):
+        return (numpy.interp(times, self.times, self.cloud_cover_percentage),
+                numpy.interp(times, self.times, self.ext_temp_celsius))
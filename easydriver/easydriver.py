@@ -4,10 +4,23 @@ Author: Ishaat Chowdhury
 Contents: Software Driver for SparkFun EasyDriver Motor Controller Board
 """
 
-from gpiozero import Device, GPIOPinMissing
+from gpiozero import Device, GPIOPinMissing, PinPWMUnsupported
 from enum import IntEnum
+from metrics.metrics import REGISTRY
+import contextlib
+import threading
 import time
 
+# Metrics for motor activity
+STEPS_TOTAL = REGISTRY.counter("smartblinds_motor_steps", "Number of steps issued to the motor", labelnames=("direction",))
+MOVE_SECONDS = REGISTRY.histogram("smartblinds_motor_move_seconds", "Duration of a motor move")
+ENERGIZED_SECONDS = REGISTRY.counter("smartblinds_motor_energized_seconds", "Time the motor driver is enabled",
+                                     labelnames=("state",))
+WAKEUPS_TOTAL = REGISTRY.counter("smartblinds_motor_wakeups", "Number of times the motor driver is enabled from off")
+
+# Frequency of the PWM on the enable pin in reduced power
+REDUCED_PWM_FREQUENCY = 1000
+
 """Encapsulates microstep resolution of EasyDriver board
 """
 class MicroStepResolution(IntEnum):
@@ -27,6 +40,50 @@ class StepDirection(IntEnum):
 class PowerState(IntEnum):
     OFF = 0
     ON = 1
+    REDUCED = 2
+
+"""Power policy of the driver after a move.
+The driver stays fully enabled for hold_seconds after the last move, so that the next move skips the wakeup and the
+position is held. It then stays enabled with reduced power for reduced_seconds, and is disabled after that.
+The EasyDriver has no current control input, so reduced power is a PWM of the enable pin with duty reduced_duty.
+It needs a pin factory with PWM, the driver stays fully enabled instead without one.
+The default policy disables the driver right after every move.
+
+Arguments:
+    hold_seconds{float} -- time fully enabled after the last move
+    reduced_seconds{float} -- time with reduced power after the hold
+    reduced_duty{float} -- fraction of the time the driver is enabled in reduced power
+
+Raises:
+    ValueError: negative times or a duty outside of (0, 1)
+"""
+class PowerPolicy:
+    def __init__(self, hold_seconds=0, reduced_seconds=0, reduced_duty=0.5):
+        if hold_seconds < 0 or reduced_seconds < 0:
+            raise ValueError("hold_seconds and reduced_seconds must not be negative")
+        if not 0 < reduced_duty < 1:
+            raise ValueError("reduced_duty must be between 0 and 1")
+
+        self.hold_seconds = hold_seconds
+        self.reduced_seconds = reduced_seconds
+        self.reduced_duty = reduced_duty
+
+    """Power state the policy gives idle_seconds after the last move
+    """
+    def state_after(self, idle_seconds):
+        if idle_seconds < self.hold_seconds:
+            return PowerState.ON
+        if idle_seconds < self.hold_seconds + self.reduced_seconds:
+            return PowerState.REDUCED
+        return PowerState.OFF
+
+    """Seconds after the last move until the next change of state, None when disabled
+    """
+    def next_change(self, idle_seconds):
+        for change in (self.hold_seconds, self.hold_seconds + self.reduced_seconds):
+            if idle_seconds < change:
+                return change
+        return None
 
 """Class provides software control of SparkFun EasyDriver Motor Controller Board
 """
@@ -39,6 +96,7 @@ class EasyDriver(Device):
         ms1_pin{int, string} -- Pin to control MS1 GPIO signal on board
         ms2_pin{int, string} -- Pin to control MS2 GPIO signal on board
         enable_pin{int, string} -- Pin to control ENABLE GPIO signal on board
+        power_policy{PowerPolicy} -- power of the driver between moves, disabled after every move by default
     
     Raises:
         GPIOPinMissing: No Step Pin Given
@@ -53,7 +111,8 @@ class EasyDriver(Device):
             ms1_pin=None, 
             ms2_pin=None, 
             enable_pin=None, 
-            microstep_resolution=MicroStepResolution.FULL_STEP, **kwargs):
+            microstep_resolution=MicroStepResolution.FULL_STEP, 
+            power_policy=None, **kwargs):
         super().__init__(**kwargs)
 
         # Init pins to None, useful in self.close()
@@ -63,6 +122,18 @@ class EasyDriver(Device):
         self._ms2_pin = None
         self._enable_pin = None
 
+        # Power policy state. Moves and the power timer are serialized by the lock, the generation invalidates
+        # timers scheduled before the last move
+        self._lock = threading.RLock()
+        self._power_timer = None
+        self._power_generation = 0
+        self._streams = 0
+        self._last_move_end = None
+        self._power_state = None
+        self._energized_since = None
+        self._energized_seconds = 0.0
+        self.power_policy = power_policy if power_policy is not None else PowerPolicy()
+
         # Check if any pins are missing
         if step_pin is None:
             raise GPIOPinMissing("No Step Pin Given")
@@ -193,19 +264,63 @@ class EasyDriver(Device):
     def power_state(self):
         return self._power_state
 
-    """Set's new power state of driver
+    """Set's new power state of driver.
+    The energized time is accounted by state.
 
     Arguments:
         state {PowerState} - new power state of driver
     """
     @power_state.setter
     def power_state(self, state):
-        self._power_state = state
-        if state == PowerState.OFF:
-            self._enable_pin.state = 1
-        elif state == PowerState.ON:
-            self._enable_pin.state = 0
-            time.sleep(1/1000) # Maximum Wakeup Time (1.0 ms) - see Datasheet
+        with self._lock:
+            previous = self._power_state
+            now = time.monotonic()
+            if self._energized_since is not None:
+                self._energized_seconds += now - self._energized_since
+                ENERGIZED_SECONDS.labels(previous.name).inc(now - self._energized_since)
+            self._energized_since = now if state != PowerState.OFF else None
+
+            if state == PowerState.REDUCED and not self._set_reduced_power():
+                # without PWM the driver stays fully enabled until it is disabled
+                state = PowerState.ON
+            self._power_state = state
+
+            if state == PowerState.OFF:
+                self._clear_pwm()
+                self._enable_pin.state = 1
+            elif state == PowerState.ON:
+                self._clear_pwm()
+                self._enable_pin.state = 0
+                if previous == PowerState.OFF:
+                    WAKEUPS_TOTAL.inc()
+                if previous != PowerState.ON:
+                    # also out of reduced power, the driver may be in the off phase of the PWM
+                    time.sleep(1/1000) # Maximum Wakeup Time (1.0 ms) - see Datasheet
+
+    def _set_reduced_power(self):
+        try:
+            self._enable_pin.frequency = REDUCED_PWM_FREQUENCY
+        except PinPWMUnsupported:
+            return False
+        # the enable pin is active low
+        self._enable_pin.state = 1 - self.power_policy.reduced_duty
+        return True
+
+    def _clear_pwm(self):
+        if self._enable_pin.frequency is not None:
+            self._enable_pin.frequency = None
+
+    """Total time the driver has been enabled, in seconds
+
+    Returns:
+        float -- energized time, including the current period
+    """
+    @property
+    def energized_seconds(self):
+        with self._lock:
+            if self._energized_since is None:
+                return self._energized_seconds
+            return self._energized_seconds + time.monotonic() - self._energized_since
 
     """Get's direction of driver
     
@@ -268,15 +383,87 @@ class EasyDriver(Device):
         direction {StepDirection} -- direction to step in
     """
     def step(self, steps=1, direction=StepDirection.FORWARD):
-        self.power_state = PowerState.ON
-        self.direction = direction
-        for _ in range(steps):
-            self._step_once()
-        self.power_state = PowerState.OFF
+        with MOVE_SECONDS.time(), self._lock:
+            self._power_generation += 1
+            self.power_state = PowerState.ON
+            self.direction = direction
+            for _ in range(steps):
+                self._step_once()
+            if self._streams == 0:
+                self._end_move()
+
+        STEPS_TOTAL.labels(StepDirection(direction).name).inc(steps)
+
+    """Stream the moves made inside the context back to back. The driver is enabled once for all of them and the
+    power policy only applies after the last one, ex. for the segments of a move at different resolutions.
+
+    Yields:
+        EasyDriver -- the driver
+    """
+    @contextlib.contextmanager
+    def stream(self):
+        with self._lock:
+            self._streams += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._streams -= 1
+                if self._streams == 0 and self._power_state != PowerState.OFF:
+                    self._end_move()
+
+    """Apply the power policy for idle_seconds after the last move
+
+    Arguments:
+        idle_seconds {float} -- time since the last move, measured from the end of the last move if not given
+    """
+    def apply_power_policy(self, idle_seconds=None):
+        with self._lock:
+            if self._streams or self._last_move_end is None:
+                return
+            if idle_seconds is None:
+                idle_seconds = time.monotonic() - self._last_move_end
+            state = self.power_policy.state_after(idle_seconds)
+            if state != self._power_state:
+                self.power_state = state
+
+    def _end_move(self):
+        self._last_move_end = time.monotonic()
+        self._cancel_power_timer()
+        self.apply_power_policy(0)
+        self._schedule_power_change(0)
+
+    def _schedule_power_change(self, idle_seconds):
+        change = self.power_policy.next_change(idle_seconds)
+        if change is None:
+            return
+        self._power_timer = threading.Timer(change - idle_seconds, self._on_power_timer, args=(self._power_generation,))
+        self._power_timer.daemon = True
+        self._power_timer.start()
+
+    def _on_power_timer(self, generation):
+        with self._lock:
+            # a move or closing the driver since the timer was scheduled cancels it
+            if generation != self._power_generation:
+                return
+            idle_seconds = time.monotonic() - self._last_move_end
+            self.apply_power_policy(idle_seconds)
+            self._schedule_power_change(idle_seconds)
+
+    def _cancel_power_timer(self):
+        if self._power_timer is not None:
+            self._power_timer.cancel()
+            self._power_timer = None
 
     """Cleanup driver's resources
     """
     def close(self):
+        with self._lock:
+            self._power_generation += 1
+            self._cancel_power_timer()
+            if self._enable_pin is not None and self._power_state not in (None, PowerState.OFF):
+                self.power_state = PowerState.OFF
+
         super().close()
 
         self.pin_factory.release_all(self)
@@ -0,0 +1,187 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Memory mapped GPIO pin factory for the EasyDriver.
+Pins are driven by writing the GPIO set and clear registers of the BCM283x through an mmap of /dev/gpiomem,
+so an edge is a single register write instead of a call through RPi.GPIO.
+The factory plugs into gpiozero like any other pin factory:
+
+    driver = EasyDriver(step_pin=20, ..., pin_factory=GPIOMemFactory())
+"""
+
+import mmap
+import os
+import threading
+import time
+
+from gpiozero import PinInvalidFunction, PinInvalidPin, PinSetInput
+from gpiozero.pins import Factory, Pin
+
+"""
+Constants
+
+GPIOMEM_PATH: device exposing the GPIO registers, readable and writable by the gpio group without root
+GPIOMEM_SIZE: size of the mapped register block in bytes
+NUM_PINS: number of GPIO pins of the BCM283x
+GPFSEL0, GPSET0, GPCLR0, GPLEV0: 32-bit word offsets of the first function select, set, clear and level registers
+"""
+GPIOMEM_PATH = "/dev/gpiomem"
+GPIOMEM_SIZE = 4096
+NUM_PINS = 54
+GPFSEL0 = 0x00 // 4
+GPSET0 = 0x1C // 4
+GPCLR0 = 0x28 // 4
+GPLEV0 = 0x34 // 4
+
+"""
+Pin functions by the 3 bits of their function select field
+"""
+FUNCTIONS = {0b000: "input", 0b001: "output", 0b100: "alt0", 0b101: "alt1", 0b110: "alt2", 0b111: "alt3",
+             0b011: "alt4", 0b010: "alt5"}
+FUNCTION_BITS = {"input": 0b000, "output": 0b001}
+
+"""Mapping of /dev/gpiomem
+
+Arguments:
+    path{string} -- device to map
+"""
+class GPIOMemoryMap:
+    def __init__(self, path=GPIOMEM_PATH):
+        fd = os.open(path, os.O_RDWR | os.O_SYNC)
+        try:
+            self._map = mmap.mmap(fd, GPIOMEM_SIZE, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        finally:
+            os.close(fd)
+        # registers are 32-bit words
+        self.registers = memoryview(self._map).cast("I")
+
+    """Unmap the registers
+    """
+    def close(self):
+        self.registers.release()
+        self._map.close()
+
+"""Registers of a mock memory region. Writes to the set and clear registers update the level registers
+like the hardware does, and every write is counted.
+"""
+class MockGPIORegisters:
+    def __init__(self):
+        self._words = [0] * (GPIOMEM_SIZE // 4)
+        self.writes = 0
+
+    def __getitem__(self, index):
+        return self._words[index]
+
+    def __setitem__(self, index, value):
+        self.writes += 1
+        if GPSET0 <= index < GPSET0 + 2:
+            self._words[GPLEV0 + index - GPSET0] |= value
+        elif GPCLR0 <= index < GPCLR0 + 2:
+            self._words[GPLEV0 + index - GPCLR0] &= ~value & 0xFFFFFFFF
+        else:
+            self._words[index] = value
+
+"""Stand-in for GPIOMemoryMap for testing without the hardware
+"""
+class MockGPIOMemory:
+    def __init__(self):
+        self.registers = MockGPIORegisters()
+
+    def close(self):
+        pass
+
+"""Pin factory writing the GPIO registers directly
+
+Arguments:
+    memory{GPIOMemoryMap, MockGPIOMemory} -- memory region of the registers, /dev/gpiomem is mapped if not given
+"""
+class GPIOMemFactory(Factory):
+    def __init__(self, memory=None):
+        super().__init__()
+        self._memory = memory if memory is not None else GPIOMemoryMap()
+        self.registers = self._memory.registers
+        self.pins = {}
+        # function select registers are shared by 10 pins and updated by read-modify-write
+        self.function_lock = threading.Lock()
+
+    """Get the pin for a GPIO number, ex. 20 or "GPIO20"
+
+    Returns:
+        GPIOMemPin -- the same instance for every call with the same pin
+    """
+    def pin(self, spec):
+        try:
+            number = int(str(spec).upper().replace("GPIO", "").replace("BCM", ""))
+        except ValueError:
+            raise PinInvalidPin("Invalid pin {!r}".format(spec))
+        if not 0 <= number < NUM_PINS:
+            raise PinInvalidPin("Invalid pin {!r}".format(spec))
+
+        pin = self.pins.get(number)
+        if pin is None:
+            pin = GPIOMemPin(self, number)
+            self.pins[number] = pin
+        return pin
+
+    def ticks(self):
+        return time.monotonic()
+
+    def ticks_diff(self, later, earlier):
+        return later - earlier
+
+    """Release the pins and unmap the registers
+    """
+    def close(self):
+        for pin in self.pins.values():
+            pin.close()
+        self.pins.clear()
+        self._memory.close()
+
+"""GPIO pin of a GPIOMemFactory. Only the input and output functions are supported.
+"""
+class GPIOMemPin(Pin):
+    def __init__(self, factory, number):
+        super().__init__()
+        self.factory = factory
+        self.number = number
+        self._registers = factory.registers
+        self._mask = 1 << (number % 32)
+        self._set_register = GPSET0 + number // 32
+        self._clear_register = GPCLR0 + number // 32
+        self._level_register = GPLEV0 + number // 32
+        self._function_register = GPFSEL0 + number // 10
+        self._function_shift = (number % 10) * 3
+        self._function = self._get_function()
+
+    def __repr__(self):
+        return "GPIO{}".format(self.number)
+
+    def _get_function(self):
+        return FUNCTIONS[(self._registers[self._function_register] >> self._function_shift) & 0b111]
+
+    def _set_function(self, value):
+        if value not in FUNCTION_BITS:
+            raise PinInvalidFunction("Invalid function {!r} for pin {!r}".format(value, self))
+        with self.factory.function_lock:
+            word = self._registers[self._function_register] & ~(0b111 << self._function_shift)
+            self._registers[self._function_register] = word | (FUNCTION_BITS[value] << self._function_shift)
+        self._function = value
+
+    def _get_state(self):
+        return 1 if self._registers[self._level_register] & self._mask else 0
+
+    def _set_state(self, value):
+        if self._function != "output":
+            raise PinSetInput("Cannot set the state of input pin {!r}".format(self))
+        self._registers[self._set_register if value else self._clear_register] = self._mask
+
+    """Set the level before switching to output, so that the pin never outputs the previous level
+    """
+    def output_with_state(self, state):
+        self._registers[self._set_register if state else self._clear_register] = self._mask
+        self.function = "output"
+
+    """Return the pin to an input, as RPi.GPIO does on cleanup
+    """
+    def close(self):
+        self.function = "input"
@@ -0,0 +1,345 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Shared HTTP client for the external APIs (geocoding and weather).
+    HttpClient: keep-alive connection pool with strict timeouts, bounded retries with exponential backoff,
+        a circuit breaker per host and a cache of JSON responses
+    CircuitBreaker: stops calling a host after consecutive failures, until a cool down has passed
+    ResponseCache: bounded cache of responses with a time to live, also used to serve stale responses
+        when a host is failing
+"""
+
+import collections
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics.metrics import REGISTRY
+
+"""
+Constants
+
+DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT: seconds to connect and to wait for each read of the response
+DEFAULT_RETRIES: retries after the first attempt, for connection errors, timeouts and retryable status codes
+DEFAULT_BACKOFF: seconds before the first retry, doubled for each following retry
+DEFAULT_FAILURE_THRESHOLD: consecutive failed calls that open the circuit of a host
+DEFAULT_RESET_TIMEOUT: seconds the circuit stays open before a trial call is let through
+DEFAULT_POOL_SIZE: connections kept alive per host
+DEFAULT_CACHE_ENTRIES: responses kept in the cache
+DEFAULT_STALE_SECONDS: how long past its time to live a cached response may be served when its host is failing
+RETRY_STATUS_CODES: status codes that are retried, all other error codes fail right away
+"""
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 60
+DEFAULT_POOL_SIZE = 2
+DEFAULT_CACHE_ENTRIES = 64
+DEFAULT_STALE_SECONDS = 6 * 60 * 60
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+"""
+Circuit breaker states
+"""
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half-open"
+
+HTTP_REQUESTS = REGISTRY.counter("smartblinds_http_requests", "Outgoing HTTP requests by host and result", labelnames=("host", "result"))
+HTTP_REQUEST_SECONDS = REGISTRY.histogram("smartblinds_http_request_seconds", "Latency of outgoing HTTP requests", labelnames=("host",))
+HTTP_CACHE_REQUESTS = REGISTRY.counter("smartblinds_http_cache_requests", "HTTP response cache lookups by result", labelnames=("result",))
+HTTP_CIRCUIT_TRANSITIONS = REGISTRY.counter("smartblinds_http_circuit_transitions", "Circuit breaker state changes by host and new state",
+                                            labelnames=("host", "state"))
+
+"""
+Circuit breaker for a single host.
+
+Closed: calls go through. failure_threshold consecutive failures open the circuit.
+Open: calls fail right away, for reset_timeout seconds.
+Half-open: a single trial call goes through, its success closes the circuit and its failure opens it again.
+
+Arguments:
+    failure_threshold (int): consecutive failures that open the circuit
+    reset_timeout (float): seconds before an open circuit lets a trial call through
+    clock (function): monotonic time source in seconds
+"""
+class CircuitBreaker:
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT, clock=time.monotonic, name=""):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CIRCUIT_CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == CIRCUIT_OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return CIRCUIT_HALF_OPEN
+            return self._state
+
+    """
+    Check if a call may go through. In the half-open state, only one caller is let through at a time.
+    """
+    def allow(self):
+        with self._lock:
+            if self._state == CIRCUIT_CLOSED:
+                return True
+            if self._state == CIRCUIT_OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._set_state(CIRCUIT_HALF_OPEN)
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            if self._state != CIRCUIT_CLOSED:
+                self._set_state(CIRCUIT_CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == CIRCUIT_HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+                if self._state != CIRCUIT_OPEN:
+                    self._set_state(CIRCUIT_OPEN)
+
+    def _set_state(self, state):
+        self._state = state
+        HTTP_CIRCUIT_TRANSITIONS.labels(self.name, state).inc()
+
+"""
+Bounded cache of responses, least recently used first out.
+Entries are fresh for their time to live and may then be served as stale for stale_seconds more.
+
+Arguments:
+    max_entries (int): entries kept in the cache
+    stale_seconds (float): seconds past the time to live that an entry is kept
+    clock (function): monotonic time source in seconds
+"""
+class ResponseCache:
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES, stale_seconds=DEFAULT_STALE_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (value, expires_at)
+        self._entries = collections.OrderedDict()
+
+    """
+    Get a cached value
+
+    Inputs:
+        key: cache key
+        allow_stale (bool): also return entries past their time to live
+
+    Output:
+        the cached value, None if there is no usable entry
+    """
+    def get(self, key, allow_stale=False):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            now = self._clock()
+            if now >= expires_at + self.stale_seconds:
+                del self._entries[key]
+                return None
+            if now >= expires_at and not allow_stale:
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, self._clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+"""
+HTTP client shared by the calls to the external APIs.
+
+A single requests.Session keeps connections alive between calls, so only the first call to a host pays for the
+TCP and TLS handshakes. Every request has connect and read timeouts, so a call can never block the main loop for
+longer than (retries + 1) * (connect_timeout + read_timeout) plus the backoff.
+
+Arguments:
+    connect_timeout, read_timeout (float): timeouts of each attempt in seconds
+    retries (int): retries after the first attempt
+    backoff (float): seconds before the first retry, doubled for each following retry, with jitter
+    failure_threshold (int), reset_timeout (float): circuit breaker settings, one circuit per host
+    pool_size (int): connections kept alive per host
+    cache (ResponseCache): cache of responses, a new one by default
+    sleep (function): used to wait between retries
+    clock (function): monotonic time source for the circuit breakers
+"""
+class HttpClient:
+    def __init__(self, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT, retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT,
+                 pool_size=DEFAULT_POOL_SIZE, cache=None, sleep=time.sleep, clock=time.monotonic):
+        if retries < 0:
+            raise ValueError("retries must not be negative")
+
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.cache = cache if cache is not None else ResponseCache(clock=clock)
+        self._sleep = sleep
+        self._clock = clock
+
+        # retries are done here rather than by urllib3, so that the circuit breaker sees every failure
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+
+    """
+    Get the circuit breaker of a host
+    """
+    def breaker(self, host):
+        with self._breakers_lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout, clock=self._clock, name=host)
+                self._breakers[host] = breaker
+            return breaker
+
+    """
+    GET a URL and decode its JSON response
+
+    Inputs:
+        url (string): URL to get
+        params (dict): query parameters
+        cache_ttl (float): seconds to cache the response for, 0 to not use the cache.
+            A cached response past its time to live is still returned when the host is failing.
+
+    Output:
+        the decoded JSON response
+
+    Raises:
+        HttpClientException if the request failed after all retries or its response is not valid JSON, and no cached
+            response is available
+        CircuitOpenException if the circuit of the host is open and no cached response is available
+    """
+    def get_json(self, url, params=None, cache_ttl=0):
+        key = (url, tuple(sorted(params.items())) if params else ())
+        if cache_ttl:
+            cached = self.cache.get(key)
+            if cached is not None:
+                HTTP_CACHE_REQUESTS.labels("hit").inc()
+                return cached
+            HTTP_CACHE_REQUESTS.labels("miss").inc()
+
+        try:
+            response = self._get(url, params)
+            try:
+                data = response.json()
+            except ValueError as err:
+                raise HttpClientException("invalid JSON from {}: {}".format(urlsplit(url).netloc, err))
+        except HttpClientException:
+            stale = self.cache.get(key, allow_stale=True) if cache_ttl else None
+            if stale is None:
+                raise
+            HTTP_CACHE_REQUESTS.labels("stale").inc()
+            return stale
+
+        if cache_ttl:
+            self.cache.put(key, data, cache_ttl)
+        return data
+
+    def _get(self, url, params):
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            HTTP_REQUESTS.labels(host, "circuit open").inc()
+            raise CircuitOpenException("circuit open for {}".format(host))
+
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                # exponential backoff with jitter, so that retries of several clients don't line up
+                self._sleep(self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+
+            try:
+                with HTTP_REQUEST_SECONDS.labels(host).time():
+                    response = self._session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as err:
+                HTTP_REQUESTS.labels(host, "timeout" if isinstance(err, requests.Timeout) else "connection error").inc()
+                error = err
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES:
+                HTTP_REQUESTS.labels(host, str(response.status_code)).inc()
+                error = requests.HTTPError("{} for {}".format(response.status_code, url), response=response)
+                continue
+
+            HTTP_REQUESTS.labels(host, str(response.status_code)).inc()
+            if response.status_code >= 400:
+                # the host is reachable, the request itself is wrong. Retrying won't help and the circuit stays closed.
+                breaker.record_success()
+                raise HttpClientException("{} for {}".format(response.status_code, url))
+
+            breaker.record_success()
+            return response
+
+        breaker.record_failure()
+        raise HttpClientException("GET {} failed after {} attempts: {}".format(url, self.retries + 1, error))
+
+    def close(self):
+        self._session.close()
+
+"""
+Client shared by the whole process
+"""
+_client = None
+_client_lock = threading.Lock()
+
+"""
+Get the shared client, created on first use
+"""
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+# ---------- Custom Exception classes --------- #
+# Thrown when a request fails after all retries, or with a non retryable error status
+class HttpClientException( Exception ):
+    pass
+
+# Thrown without a request when the circuit breaker of the host is open
+class CircuitOpenException( HttpClientException ):
+    pass
+
+# ---------- END OF Custom Exception classes --------- #
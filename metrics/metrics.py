@@ -0,0 +1,284 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Low overhead metrics registry (counters and fixed bucket histograms)
+that can be rendered in the Prometheus text exposition format
+"""
+
+from bisect import bisect_left
+import threading
+import time
+
+"""
+Default histogram buckets in seconds. Covers everything from a single GPIO edge
+up to a long motor move.
+"""
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+"""Content type of the text exposition format
+"""
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+"""Escape a label value for the text exposition format
+"""
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"")
+
+"""Format a number for the text exposition format
+"""
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+"""Format a label set as {name="value",...}, or an empty string when there are no labels
+"""
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = ["{}=\"{}\"".format(name, _escape_label_value(value)) for name, value in zip(labelnames, labelvalues)]
+    if extra is not None:
+        pairs.append("{}=\"{}\"".format(extra[0], _escape_label_value(extra[1])))
+    if not pairs:
+        return ""
+    return "{" + ",".join(pairs) + "}"
+
+"""Times a block of code and passes the elapsed seconds to a callback.
+Usable both as a context manager and as a decorator.
+"""
+class _Timer:
+    def __init__(self, callback):
+        self._callback = callback
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._callback(time.perf_counter() - self._start)
+        return False
+
+    def __call__(self, fxn):
+        def timed(*args, **kwargs):
+            with _Timer(self._callback):
+                return fxn(*args, **kwargs)
+        return timed
+
+"""Base class for all metrics. Handles labels and child lookup.
+
+Arguments:
+    name {string} -- metric name
+    documentation {string} -- help text for the metric
+    labelnames {tuple} -- names of the labels for the metric
+"""
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+
+        # Unlabelled metrics act as their own single child
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    """Get the child metric for the given label values
+
+    Returns:
+        child metric with inc()/observe() bound to the label values
+    """
+    def labels(self, *labelvalues, **labelkwargs):
+        if labelkwargs:
+            labelvalues = tuple(labelkwargs[name] for name in self.labelnames)
+        labelvalues = tuple(str(value) for value in labelvalues)
+
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError("Incorrect label count for metric " + self.name)
+
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(labelvalues, self._new_child())
+        return child
+
+    def _unlabelled(self):
+        if self.labelnames:
+            raise ValueError("Metric " + self.name + " requires labels")
+        return self._children[()]
+
+    def _new_child(self):
+        raise NotImplementedError()
+
+    """Render the metric in the text exposition format
+
+    Returns:
+        list - lines of text for the metric
+    """
+    def render(self):
+        lines = [
+            "# HELP {} {}".format(self.name, self.documentation.replace("\\", "\\\\").replace("\n", "\\n")),
+            "# TYPE {} {}".format(self.name, self.type_name),
+        ]
+        # snapshot, labels() may add children from other threads
+        with self._lock:
+            children = list(self._children.items())
+        for labelvalues, child in sorted(children):
+            lines.extend(self._render_child(labelvalues, child))
+        return lines
+
+    def _render_child(self, labelvalues, child):
+        raise NotImplementedError()
+
+"""Single counter value
+"""
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        if amount < 0:
+            raise ValueError("Counters can only be incremented by non-negative amounts")
+        with self._lock:
+            self.value += amount
+
+"""Monotonically increasing counter
+"""
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._unlabelled().inc(amount)
+
+    @property
+    def value(self):
+        return self._unlabelled().value
+
+    def _render_child(self, labelvalues, child):
+        return ["{}_total{} {}".format(self.name, _format_labels(self.labelnames, labelvalues), _format_value(child.value))]
+
+"""Single histogram with fixed buckets
+"""
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        # one extra slot for the +Inf bucket
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self.observe)
+
+"""Histogram with fixed upper bound buckets
+
+Arguments:
+    buckets {tuple} -- sorted bucket upper bounds, +Inf is always added
+"""
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(float(bucket) for bucket in buckets if bucket != float("inf")))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._unlabelled().observe(value)
+
+    def time(self):
+        return self._unlabelled().time()
+
+    @property
+    def count(self):
+        return self._unlabelled().count
+
+    @property
+    def sum(self):
+        return self._unlabelled().sum
+
+    def _render_child(self, labelvalues, child):
+        lines = []
+        cumulative = 0
+        upper_bounds = self.buckets + (float("inf"),)
+        for upper_bound, bucket_count in zip(upper_bounds, child.bucket_counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, labelvalues, extra=("le", _format_value(upper_bound)))
+            lines.append("{}_bucket{} {}".format(self.name, labels, cumulative))
+
+        labels = _format_labels(self.labelnames, labelvalues)
+        lines.append("{}_sum{} {}".format(self.name, labels, _format_value(child.sum)))
+        lines.append("{}_count{} {}".format(self.name, labels, child.count))
+        return lines
+
+"""Collection of metrics rendered together.
+Metrics are created with get-or-create semantics so that modules can declare them at import time.
+"""
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError("Metric " + name + " already registered with a different type or labels")
+            return metric
+
+    """Get or create a counter
+
+    Returns:
+        Counter -- the registered counter
+    """
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    """Get or create a histogram
+
+    Returns:
+        Histogram -- the registered histogram
+    """
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    """Get a registered metric by name, None if it does not exist
+    """
+    def get(self, name):
+        return self._metrics.get(name)
+
+    """Render all metrics in the text exposition format
+
+    Returns:
+        string -- metrics text
+    """
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+"""Default registry used throughout the system and exposed on METRICS_ROUTE
+"""
+REGISTRY = MetricsRegistry()
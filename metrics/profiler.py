@@ -0,0 +1,198 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Opt-in cProfile hook for main loop iterations and API requests.
+Profiles are written to a rotating directory and can be summarized by cumulative time.
+"""
+
+import cProfile
+import datetime
+import os
+import pstats
+import threading
+
+"""Captures cProfile output for the next N main loop iterations or API requests.
+
+When not armed, profile()/start() only cost a dictionary lookup, so the hook can stay
+in place permanently.
+
+Arguments:
+    output_dir {string} -- directory where .prof files are written
+    max_files {int} -- number of .prof files kept, oldest are deleted first
+"""
+class IterationProfiler:
+    # Profiling targets
+    ITERATIONS = "iterations"
+    REQUESTS = "requests"
+    TARGETS = (ITERATIONS, REQUESTS)
+
+    FILE_EXTENSION = ".prof"
+
+    def __init__(self, output_dir, max_files=20):
+        self._output_dir = output_dir
+        self._max_files = max_files
+        self._lock = threading.Lock()
+
+        # Only one cProfile can be active at a time, so profiles are never nested or concurrent
+        self._active_lock = threading.Lock()
+        self._remaining = {target: 0 for target in IterationProfiler.TARGETS}
+        self._sequence = 0
+
+    @property
+    def output_dir(self):
+        return self._output_dir
+
+    """Arm the profiler for the next count iterations or requests
+
+    Arguments:
+        count {int} -- number of iterations/requests to profile, 0 disarms
+        target {string} -- one of IterationProfiler.TARGETS
+    """
+    def arm(self, count, target=ITERATIONS):
+        if target not in IterationProfiler.TARGETS:
+            raise ValueError("Profiling target must be one of " + ", ".join(IterationProfiler.TARGETS))
+        if count < 0:
+            raise ValueError("Profiling count must not be negative")
+
+        with self._lock:
+            self._remaining[target] = int(count)
+
+    """Number of remaining iterations/requests to profile for each target
+
+    Returns:
+        dict -- target to remaining count
+    """
+    def status(self):
+        with self._lock:
+            return dict(self._remaining)
+
+    """Start profiling for the target if it is armed.
+
+    Returns:
+        tuple -- opaque handle to pass to stop(), None if nothing is being profiled
+    """
+    def start(self, target, label):
+        if not self._remaining[target]:
+            return None
+
+        if not self._active_lock.acquire(blocking=False):
+            # another iteration/request is currently profiled, skip this one
+            return None
+
+        with self._lock:
+            if not self._remaining[target]:
+                self._active_lock.release()
+                return None
+            self._remaining[target] -= 1
+            self._sequence += 1
+            sequence = self._sequence
+
+        profile = cProfile.Profile()
+        profile.enable()
+        return (profile, target, label, sequence)
+
+    """Stop profiling and write the result to the output directory
+
+    Arguments:
+        handle {tuple} -- value returned by start(), None is ignored
+
+    Returns:
+        string -- path of the written profile, None if nothing was profiled
+    """
+    def stop(self, handle):
+        if handle is None:
+            return None
+
+        profile, target, label, sequence = handle
+        try:
+            profile.disable()
+        finally:
+            self._active_lock.release()
+
+        os.makedirs(self._output_dir, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S")
+        safe_label = "".join(c if c.isalnum() else "_" for c in label).strip("_")
+        file_name = "{}-{:06d}-{}-{}{}".format(timestamp, sequence, target, safe_label, IterationProfiler.FILE_EXTENSION)
+        path = os.path.join(self._output_dir, file_name)
+        profile.dump_stats(path)
+
+        self._rotate()
+        return path
+
+    """Context manager form of start()/stop()
+    """
+    def profile(self, target, label):
+        return _ProfileContext(self, target, label)
+
+    """List of profile files, oldest first
+    """
+    def profile_files(self):
+        if not os.path.isdir(self._output_dir):
+            return []
+
+        files = [f for f in os.listdir(self._output_dir) if f.endswith(IterationProfiler.FILE_EXTENSION)]
+        return [os.path.join(self._output_dir, f) for f in sorted(files)]
+
+    """Delete the oldest profiles until at most max_files remain
+    """
+    def _rotate(self):
+        files = self.profile_files()
+        for path in files[:max(0, len(files) - self._max_files)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    """Summarize the stored profiles by cumulative time
+
+    Arguments:
+        top {int} -- number of functions to return
+        target {string} -- only include profiles for this target if given
+
+    Returns:
+        dict -- number of profiles and the top functions by cumulative time
+    """
+    def summary(self, top=20, target=None):
+        files = self.profile_files()
+        if target is not None:
+            files = [f for f in files if "-{}-".format(target) in os.path.basename(f)]
+
+        functions = []
+        if files:
+            stats = pstats.Stats(files[0])
+            for path in files[1:]:
+                stats.add(path)
+
+            for (file_name, line, function), (_, num_calls, total_time, cumulative_time, _) in stats.stats.items():
+                functions.append({
+                    "function": function,
+                    "file": file_name,
+                    "line": line,
+                    "calls": num_calls,
+                    "total_time": total_time,
+                    "cumulative_time": cumulative_time,
+                })
+            functions.sort(key=lambda entry: entry["cumulative_time"], reverse=True)
+
+        return {
+            "profiles": len(files),
+            "remaining": self.status(),
+            "functions": functions[:top],
+        }
+
+"""Context manager returned by IterationProfiler.profile
+"""
+class _ProfileContext:
+    def __init__(self, profiler, target, label):
+        self._profiler = profiler
+        self._target = target
+        self._label = label
+        self._handle = None
+
+    def __enter__(self):
+        self._handle = self._profiler.start(self._target, self._label)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._profiler.stop(self._handle)
+        return False
@@ -21,8 +21,14 @@ CALIBRATE_POSITION_ROUTE = API_BASE_ROUTE + "/calibratepos"
 STATUS_ROUTE = API_BASE_ROUTE + "/status"
 SCHEDULE_ROUTE = API_BASE_ROUTE + "/schedule"
 COMMAND_ROUTE = API_BASE_ROUTE + "/command"
+PROFILE_ROUTE = API_BASE_ROUTE + "/profile"
+HISTORY_ROUTE = API_BASE_ROUTE + "/history"
+PREVIEW_ROUTE = API_BASE_ROUTE + "/preview"
 
 USER_ROUTE = API_BASE_ROUTE + "/user"
 LOGIN_ROUTE = "/login"
 
+# Unversioned, scraped by monitoring
+METRICS_ROUTE = "/metrics"
+
 # ---------- END OF API Constants ---------- #
@@ -11,16 +11,25 @@ Author: Alex (Yin) Chen
 Creation Date: February 1, 2020
 '''
 
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, request, jsonify, make_response, g
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from piserver.api_routes import *
 from blinds.blinds_api import Blinds, SmartBlindsSystem
 from blinds.blinds_schedule import BlindsSchedule, BlindMode
-from piserver.config import DevelopmentConfig, ProductionConfig
+from piserver.config import DevelopmentConfig, ProductionConfig, MOTOR_PIN_BACKENDS
 from tempsensor.tempsensor import BME280TemperatureSensor, MockTemperatureSensor
-from easydriver.easydriver import EasyDriver
-from controlalgorithm.angle_step_mapper import AngleStepMapper
+from easydriver.easydriver import EasyDriver, PowerPolicy
+from controlalgorithm.angle_step_mapper import get_mapper
+from controlalgorithm.motion_planner import MotionPlanner
+from controlalgorithm.heat_mgmt_algorithm import PredictiveHeatMgmt
+from controlalgorithm.glare_algorithm import GlareAwareLight, WindowGeometry
+from controlalgorithm.thermal_model import ThermalController, ThermalModel, samples_from_history
+from metrics.metrics import REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from metrics.profiler import IterationProfiler
+from piserver.control_channel import ControlChannelServer
+from piserver.local_api import LOCAL_API_METHODS, LocalApiServer
+import storage.store as store
 from gpiozero import Device
 import os
 import uuid
@@ -40,9 +49,14 @@ cfg = DevelopmentConfig(
 ) if app.config["ENV"] == "development" else ProductionConfig()
 app.config.from_object(cfg)
 
-# set the users db for auth, irrespective of the dev/production config
+# the users for auth are kept in the store with the rest of the state of the system, irrespective of the dev/production config
+if app.config["STORE_PATH"]:
+    store.store_file = app.config["STORE_PATH"]
+system_store = store.get_store()
 app.config["SQLALCHEMY_DATABASE_URI"] = 'sqlite:///' + \
-    appFilePath + '/users.db'
+    os.path.abspath(store.store_file)
+# users database used before the store, its users are copied into the store on first start
+LEGACY_USERS_DB = os.path.join(appFilePath, 'users.db')
 CORS(app)
 
 db = SQLAlchemy(app)
@@ -61,9 +75,17 @@ MS2_PIN = 23
 # Default User
 DEFAULT_USER = "blindUser"
 
+# a typo would otherwise silently select the RPi.GPIO backend
+if app.config["MOTOR_PIN_BACKEND"] not in MOTOR_PIN_BACKENDS:
+    raise ValueError("Unknown MOTOR_PIN_BACKEND {!r}, expected one of {}".format(
+        app.config["MOTOR_PIN_BACKEND"], ", ".join(MOTOR_PIN_BACKENDS)))
+
 # Guard imports behind config flag
 # This ensures that server can be run in Docker container
-if app.config["USE_MOTOR"]:
+if app.config["USE_MOTOR"] and app.config["MOTOR_PIN_BACKEND"] == "gpiomem":
+    from easydriver.gpiomem import GPIOMemFactory
+    Device.pin_factory = GPIOMemFactory()
+elif app.config["USE_MOTOR"]:
     import RPi.GPIO as rpigpio
     from gpiozero.pins.rpigpio import RPiGPIOFactory
     rpigpio.setmode(rpigpio.BCM)
@@ -77,7 +99,10 @@ motor_driver = EasyDriver(step_pin=STEP_PIN,
                           dir_pin=DIR_PIN,
                           ms1_pin=MS1_PIN,
                           ms2_pin=MS2_PIN,
-                          enable_pin=ENABLE_PIN)
+                          enable_pin=ENABLE_PIN,
+                          power_policy=PowerPolicy(hold_seconds=app.config["MOTOR_HOLD_SECONDS"],
+                                                   reduced_seconds=app.config["MOTOR_REDUCED_SECONDS"],
+                                                   reduced_duty=app.config["MOTOR_REDUCED_DUTY"]))
 
 '''
 Small database model for the users.
@@ -92,6 +117,22 @@ class User(db.Model):
     password = db.Column(db.String(50))
 
 
+db.create_all()
+if User.query.count() == 0 and os.path.isfile(LEGACY_USERS_DB):
+    system_store.import_table(LEGACY_USERS_DB, User.__tablename__)
+
+
+'''
+Decode a JWT and return the user it was issued to, None if there is no such user.
+Raises an exception if the token is invalid or expired.
+'''
+
+
+def decode_token(token):
+    data = jwt.decode(token, app.config["PISERVER_SECRET_KEY"])
+    return User.query.filter_by(public_id=data['public_id']).first()
+
+
 '''
 Decorator for using the JWT token.
 Add the @token_required annotation to force that handler to
@@ -104,11 +145,8 @@ def token_required(fxn):
     def decorated(*args, **kwargs):
         token = None
 
-        src_addr = request.remote_addr
-
-        # we skip jwt check for localhost for voice control, but it can be enabled for easier testing
-        if (not app.config["JWT_BYPASS_LOCALHOST"] or (app.config["JWT_BYPASS_LOCALHOST"] and src_addr != '127.0.0.1')) and \
-                not (app.config["ENV"] == "development" and (app.config["JWT_BYPASS_ALL"] or "Bypass-Auth" in request.headers)):
+        # on-device clients (ex. voice control) use the local API instead, see piserver/local_api.py
+        if not (app.config["ENV"] == "development" and (app.config["JWT_BYPASS_ALL"] or "Bypass-Auth" in request.headers)):
             if 'x-access-token' in request.headers:
                 token = request.headers['x-access-token']
 
@@ -116,9 +154,7 @@ def token_required(fxn):
                 return make_response("Missing token", RESP_CODES["UNAUTHORIZED"])
 
             try:
-                data = jwt.decode(token, app.config["PISERVER_SECRET_KEY"])
-                current_user = User.query.filter_by(
-                    public_id=data['public_id']).first()
+                current_user = decode_token(token)
 
             except Exception as e:
                 return make_response("INVALID TOKEN", RESP_CODES["UNAUTHORIZED"])
@@ -131,14 +167,133 @@ def token_required(fxn):
 # default empty schedule
 app_schedule = BlindsSchedule(BlindMode.DARK, None, None)
 
-mapper = AngleStepMapper()
+# calibration table of the blinds, recorded with scripts/calibrate_blinds.py
+mapper = get_mapper()
+
+# Profiler for main loop iterations and requests, armed from config or PROFILE_ROUTE
+profiler = IterationProfiler(
+    app.config["PROFILE_DIR"], max_files=app.config["PROFILE_MAX_FILES"])
+profiler.arm(app.config["PROFILE_ITERATIONS"], IterationProfiler.ITERATIONS)
+profiler.arm(app.config["PROFILE_REQUESTS"], IterationProfiler.REQUESTS)
+
+blinds = Blinds(motor_driver, mapper, angularAccuracy=app.config["BLINDS_ANGULAR_ACCURACY"])
+
+# Plans moves for the algorithm driven modes so the motor doesn't move for every small change
+motion_planner = MotionPlanner(step_resolution=blinds.step_resolution,
+                               deadband=app.config["PLANNER_DEADBAND"],
+                               hysteresis=app.config["PLANNER_HYSTERESIS"],
+                               max_rate=app.config["PLANNER_MAX_RATE"],
+                               speed=motor_driver.speed,
+                               mapper=mapper)
+
+# Plans BlindMode.ECO from the weather forecast
+predictive_heat_mgmt = PredictiveHeatMgmt(horizon_hours=app.config["HEAT_MGMT_HORIZON_HOURS"],
+                                          lead_minutes=app.config["HEAT_MGMT_LEAD_MINUTES"]) \
+    if app.config["HEAT_MGMT_PREDICTIVE"] else None
+
+# Learns the response of the room for BlindMode.ECO, starting from the samples recorded in previous runs
+thermal_controller = None
+if app.config["THERMAL_MODEL"]:
+    thermal_model = ThermalModel(forgetting_factor=app.config["THERMAL_MODEL_FORGETTING_FACTOR"])
+    thermal_model.fit(*samples_from_history(system_store.history.recent(store.HISTORY_MAX_ROWS, event="thermal")))
+    thermal_controller = ThermalController(thermal_model,
+                                           horizon_minutes=app.config["THERMAL_MODEL_HORIZON_MINUTES"],
+                                           min_samples=app.config["THERMAL_MODEL_MIN_SAMPLES"])
+
+# Cuts off the direct sunlight on the window in BlindMode.LIGHT
+glare_aware_light = GlareAwareLight(WindowGeometry(float(app.config["WINDOW_AZIMUTH"]), app.config["SLAT_WIDTH_MM"],
+                                                   app.config["SLAT_SPACING_MM"])) \
+    if app.config["WINDOW_AZIMUTH"] else None
 
 # Init SmartBlindsSystem object
 smart_blinds_system = SmartBlindsSystem(
-    Blinds(motor_driver, mapper), app_schedule, temp_sensor)
+    blinds, app_schedule, temp_sensor, profiler=profiler, motionPlanner=motion_planner, store=system_store,
+    predictiveHeatMgmt=predictive_heat_mgmt, thermalController=thermal_controller,
+    glareAwareLight=glare_aware_light, coalesceWindow=app.config["REQUEST_COALESCE_SECONDS"])
 
 # END OF INIT BLINDS SYSTEM RELATED COMPONENTS #
 
+# Metrics for API requests
+API_REQUEST_SECONDS = REGISTRY.histogram("smartblinds_api_request_seconds",
+                                         "Latency of API requests per route", labelnames=("route", "method"))
+API_REQUESTS = REGISTRY.counter("smartblinds_api_requests",
+                                "API requests per route and status code", labelnames=("route", "method", "status"))
+
+'''
+Record the start time of each request for the latency metrics
+'''
+@app.before_request
+def start_request_timer():
+    g.request_start_time = time.perf_counter()
+
+    # the profiling and metrics routes are not profiled themselves
+    if request.path not in (PROFILE_ROUTE, METRICS_ROUTE):
+        g.request_profile = profiler.start(
+            IterationProfiler.REQUESTS, request.method + " " + request.path)
+
+
+'''
+Record latency and status for each request. The route template is used as the label
+so that path parameters don't create new label values.
+'''
+@app.after_request
+def record_request_metrics(response):
+    start_time = g.pop("request_start_time", None)
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+    if start_time is not None:
+        API_REQUEST_SECONDS.labels(route, request.method).observe(
+            time.perf_counter() - start_time)
+    API_REQUESTS.labels(route, request.method, response.status_code).inc()
+
+    return response
+
+
+'''
+Stop the request profile, if any. Done on teardown so that the profiler is released even when the handler raises.
+'''
+@app.teardown_request
+def stop_request_profile(exception=None):
+    profiler.stop(g.pop("request_profile", None))
+
+
+'''
+API handler exposing all metrics in the Prometheus text exposition format
+'''
+@app.route(METRICS_ROUTE, methods=['GET'])
+def get_metrics():
+    return make_response(REGISTRY.render(), RESP_CODES["OK"], {"Content-Type": METRICS_CONTENT_TYPE})
+
+
+'''
+API handler for the profiler. GET returns the top functions by cumulative time over the stored profiles,
+POST arms the profiler for the next N iterations and/or requests with a body of the form
+{
+    "iterations" : non-negative integer,
+    "requests" : non-negative integer
+}
+Requires authenticated user's JWT to use.
+'''
+@app.route(PROFILE_ROUTE, methods=['GET', 'POST'])
+@token_required
+def handle_profile():
+    try:
+        if request.method == 'GET':
+            top = int(request.args.get("top", 20))
+            target = request.args.get("target")
+            return make_response(profiler.summary(top=top, target=target), RESP_CODES["OK"])
+
+        if request.method == 'POST':
+            data = request.json or {}
+            for target in IterationProfiler.TARGETS:
+                if target in data:
+                    profiler.arm(int(data[target]), target)
+            return make_response(profiler.status(), RESP_CODES["ACCEPTED"])
+
+    except Exception as err:
+        return make_response(str(err), RESP_CODES["BAD_REQUEST"])
+
+
 # Basic response routes for testing purposes
 @app.route('/')
 def index():
@@ -230,6 +385,27 @@ def handle_command():
         return smart_blinds_system.deleteBlindsCommand(forceUpdate=True)
 
 
+'''
+API handler for the history of the system, latest events first.
+Optional query parameters: limit (default 100) and event (ex. move).
+Requires authenticated user's JWT to use.
+'''
+@app.route(HISTORY_ROUTE, methods=['GET'])
+@token_required
+def get_history():
+    return smart_blinds_system.getHistory(limit=request.args.get("limit", 100), event=request.args.get("event"))
+
+'''
+API route handler for the preview of the positions over the next hours.
+Optional query parameter: hours (default 24).
+Requires authenticated user's JWT to use.
+'''
+@app.route(PREVIEW_ROUTE, methods=['GET'])
+@token_required
+def get_preview():
+    return smart_blinds_system.getPreview(hours=request.args.get("hours", 24))
+
+
 ### ======== BEGIN AUTH RELATED ROUTES ======== ###
 '''
 API route handler for listing all users. Mainly serves testing and verification purposes
@@ -350,13 +526,62 @@ def login():
 
 
 '''
-Perform setup for running the main loop for the server system.
+Perform setup for running the main loop for the server system, and start the control channel and the local API.
 
 '''
 @app.before_first_request
 def start_main_loop():
-    smart_blinds_system.activate_main_loop(
-        iter_per_min=app.config["SMARTBLINDS_UPDATES_PER_MIN"])
+    if app.config["START_MAIN_LOOP"]:
+        smart_blinds_system.activate_main_loop(
+            iter_per_min=app.config["SMARTBLINDS_UPDATES_PER_MIN"])
+
+    if app.config["CONTROL_CHANNEL_PORT"]:
+        start_control_channel()
+
+    if app.config["LOCAL_API_SOCKET"]:
+        start_local_api()
+
+
+'''
+Check a token of a control channel connection, which is authenticated once when it is opened
+'''
+
+
+def authenticate_channel(token):
+    try:
+        with app.app_context():
+            return decode_token(token) is not None
+    except Exception:
+        return False
+
+
+'''
+Start the control channel for continuous positioning, see piserver/control_channel.py
+'''
+
+
+def start_control_channel():
+    server = ControlChannelServer((app.config["CONTROL_CHANNEL_HOST"], app.config["CONTROL_CHANNEL_PORT"]),
+                                  smart_blinds_system.motionExecutor, authenticate_channel)
+    server.start()
+    print("Control channel listening on port", server.server_address[1])
+    return server
+
+
+'''
+Start the local API for on-device clients, see piserver/local_api.py
+'''
+
+
+def start_local_api():
+    methods = [method for method in LOCAL_API_METHODS
+               if method != "postPosition" or app.config["ENABLE_POST_POSITION"]]
+    server = LocalApiServer(app.config["LOCAL_API_SOCKET"], smart_blinds_system, methods=methods,
+                            mode=app.config["LOCAL_API_SOCKET_MODE"],
+                            group=app.config["LOCAL_API_SOCKET_GROUP"] or None)
+    server.start()
+    print("Local API listening on", server.server_address)
+    return server
 
 
 '''
@@ -392,4 +617,5 @@ def start_runner():
 
 
 # Force an api call to itself to ensure that the main loop thread is properly started
-start_runner()
+if app.config["START_MAIN_LOOP"]:
+    start_runner()
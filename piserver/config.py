@@ -7,16 +7,66 @@ Contents: Contains configuration classes for web server
 import os
 from distutils.util import strtobool
 
+# GPIO backends of the motor pins
+MOTOR_PIN_BACKENDS = ("rpigpio", "gpiomem")
+
 class Config:
     USE_TEMP_SENSOR = bool(strtobool(os.environ.get("USE_TEMP_SENSOR", "false").lower()))
     USE_MOTOR =  bool(strtobool(os.environ.get("USE_MOTOR", "false").lower()))
+    # GPIO backend of the motor pins: "rpigpio" through RPi.GPIO, or "gpiomem" writing the registers mapped from /dev/gpiomem
+    MOTOR_PIN_BACKEND = os.environ.get("MOTOR_PIN_BACKEND", "rpigpio").lower()
+    # Power of the motor driver after a move: fully enabled for HOLD seconds, then with REDUCED_DUTY of the power for
+    # REDUCED seconds, then disabled
+    MOTOR_HOLD_SECONDS = float( os.environ.get("MOTOR_HOLD_SECONDS", "2" ) )
+    MOTOR_REDUCED_SECONDS = float( os.environ.get("MOTOR_REDUCED_SECONDS", "0" ) )
+    MOTOR_REDUCED_DUTY = float( os.environ.get("MOTOR_REDUCED_DUTY", "0.5" ) )
     CORS_HEADERS = "Content-Type"
     TOKEN_DURATION_MINUTES = int( os.environ.get("TOKEN_DURATION_MINUTES", "30" ) )
     PISERVER_SECRET_KEY = os.environ.get("TOKEN_DURATION_MINUTES", "willekeurigegeheimesleutel" )
-    JWT_BYPASS_LOCALHOST = bool(strtobool(os.environ.get("JWT_BYPASS_LOCALHOST", "true").lower()))
     SQLALCHEMY_TRACK_MODIFICATIONS = False # Prevent deprecation warning by explicitly setting false
     ENABLE_POST_POSITION = bool(strtobool(os.environ.get("ENABLE_POST_POSITION", "true").lower()))
     SMARTBLINDS_UPDATES_PER_MIN = float( os.environ.get("SMARTBLINDS_UPDATES_PER_MIN", "1" ) )
+    # Seconds to collect a burst of POST position/command requests (ex. dragging a slider) into a single move
+    REQUEST_COALESCE_SECONDS = float( os.environ.get("REQUEST_COALESCE_SECONDS", "0.15" ) )
+    # TCP control channel streaming target positions to the motion executor, authenticated once per connection with a
+    # JWT (port 0 to disable)
+    CONTROL_CHANNEL_HOST = os.environ.get("CONTROL_CHANNEL_HOST", "0.0.0.0")
+    CONTROL_CHANNEL_PORT = int( os.environ.get("CONTROL_CHANNEL_PORT", "5001" ) )
+    # Unix socket of the local API for on-device clients (ex. voice control), authenticated by the permissions of the
+    # socket file (empty path to disable). The mode is octal, the group is a name or id, empty to keep the server's.
+    LOCAL_API_SOCKET = os.environ.get("LOCAL_API_SOCKET", "/tmp/smartblinds.sock")
+    LOCAL_API_SOCKET_MODE = int( os.environ.get("LOCAL_API_SOCKET_MODE", "660" ), 8 )
+    LOCAL_API_SOCKET_GROUP = os.environ.get("LOCAL_API_SOCKET_GROUP", "")
+    # Allowed error of the slat tilt angle in degrees, finer microstep resolutions are used as needed to meet it
+    BLINDS_ANGULAR_ACCURACY = float( os.environ.get("BLINDS_ANGULAR_ACCURACY", "0.9" ) )
+    # Motion planning for the algorithm driven modes, in percent and percent per minute (0 for no rate limit)
+    PLANNER_DEADBAND = float( os.environ.get("PLANNER_DEADBAND", "4" ) )
+    PLANNER_HYSTERESIS = float( os.environ.get("PLANNER_HYSTERESIS", "2" ) )
+    PLANNER_MAX_RATE = float( os.environ.get("PLANNER_MAX_RATE", "0" ) )
+    # Predictive heat management for BlindMode.ECO, following the hourly forecast LEAD minutes ahead
+    HEAT_MGMT_PREDICTIVE = bool(strtobool(os.environ.get("HEAT_MGMT_PREDICTIVE", "false").lower()))
+    HEAT_MGMT_HORIZON_HOURS = float( os.environ.get("HEAT_MGMT_HORIZON_HOURS", "12" ) )
+    HEAT_MGMT_LEAD_MINUTES = int( os.environ.get("HEAT_MGMT_LEAD_MINUTES", "60" ) )
+    # Thermal model for BlindMode.ECO, learned online and trained from the recorded history at startup
+    THERMAL_MODEL = bool(strtobool(os.environ.get("THERMAL_MODEL", "false").lower()))
+    THERMAL_MODEL_HORIZON_MINUTES = float( os.environ.get("THERMAL_MODEL_HORIZON_MINUTES", "30" ) )
+    THERMAL_MODEL_MIN_SAMPLES = int( os.environ.get("THERMAL_MODEL_MIN_SAMPLES", "60" ) )
+    THERMAL_MODEL_FORGETTING_FACTOR = float( os.environ.get("THERMAL_MODEL_FORGETTING_FACTOR", "0.999" ) )
+    # Window of the blinds for the glare aware BlindMode.LIGHT: azimuth in degrees clockwise from north ("" to track the
+    # sun instead), slat width and vertical slat spacing in mm
+    WINDOW_AZIMUTH = os.environ.get("WINDOW_AZIMUTH", "")
+    SLAT_WIDTH_MM = float( os.environ.get("SLAT_WIDTH_MM", "25" ) )
+    SLAT_SPACING_MM = float( os.environ.get("SLAT_SPACING_MM", "21" ) )
+    # SQLite store of the users, schedules, active command, weather cache and history. Defaults to piserver/smartblinds.db
+    STORE_PATH = os.environ.get("STORE_PATH", "")
+    # Disable to import the app without starting the main loop, ex. for benchmarks
+    START_MAIN_LOOP = bool(strtobool(os.environ.get("START_MAIN_LOOP", "true").lower()))
+
+    # Profiling of main loop iterations/requests, disabled when the counts are 0
+    PROFILE_ITERATIONS = int( os.environ.get("PROFILE_ITERATIONS", "0" ) )
+    PROFILE_REQUESTS = int( os.environ.get("PROFILE_REQUESTS", "0" ) )
+    PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles") )
+    PROFILE_MAX_FILES = int( os.environ.get("PROFILE_MAX_FILES", "20" ) )
 
     # TESTING ONLY. Bypass all auth for more convenient testing
     JWT_BYPASS_ALL = bool(strtobool(os.environ.get("JWT_BYPASS_ALL", "false").lower()))
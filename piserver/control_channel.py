@@ -0,0 +1,215 @@
+'''
+File for the control channel of the server, for continuous positioning (ex. from a slider or a voice assistant).
+A client keeps a TCP connection open, authenticates once with a JWT from the login route, then streams target
+positions to the motion executor of the system and gets the live position and step progress of the moves pushed back.
+Messages are JSON frames, see piserver/framing.py:
+
+    client: {"type": "auth", "token": "<JWT>"}      server: {"type": "auth", "ok": true, "position": 12.0}
+    client: {"type": "target", "position": 40}      server: {"type": "progress", ...} for each step of progress,
+                                                            then {"type": "done", ...}, see MotionExecutor
+    client: {"type": "ping", "id": 1}               server: {"type": "pong", "id": 1}
+
+Invalid messages are answered with {"type": "error", "message": "..."}. The connection is closed if the auth fails.
+Progress and done events are pushed to every authenticated client, whichever client set the target.
+
+Messages to a client are queued and sent from a writer thread of the connection, so a client that stops reading never
+holds up the motion executor or the other clients. Queued progress events are replaced by newer progress of the same
+move, and a client with more than MAX_QUEUED_MESSAGES messages waiting is disconnected.
+
+Author: ECE 492 Group 6
+Creation Date: October 19, 2026
+'''
+
+import collections
+import socket
+import socketserver
+import threading
+
+from blinds.motion_executor import isSupersededProgress
+from metrics.metrics import REGISTRY
+from piserver.framing import FrameError, read_frame, send_frame
+
+CHANNEL_CONNECTIONS = REGISTRY.counter("smartblinds_control_channel_connections",
+                                       "Connections to the control channel by auth result", labelnames=("result",))
+CHANNEL_SLOW_CLIENTS = REGISTRY.counter("smartblinds_control_channel_slow_clients",
+                                        "Control channel clients disconnected for not reading their messages")
+
+# messages waiting to be sent to a client before it is disconnected
+MAX_QUEUED_MESSAGES = 256
+# seconds to wait for the queued messages to be sent when a connection ends
+DRAIN_SECONDS = 1
+
+
+'''
+TCP server of the control channel, serving each connection from a thread of its own
+
+Arguments:
+    address : (host, port) to listen on, port 0 for any free port
+    executor : MotionExecutor moving the blinds to the targets
+    authenticate : function of a token, true if it is valid
+'''
+class ControlChannelServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, executor, authenticate):
+        self.executor = executor
+        self.authenticate = authenticate
+        super().__init__(address, ControlChannelHandler)
+
+    '''
+    Serve connections from a background thread
+    '''
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name="control-channel", daemon=True)
+        thread.start()
+        return thread
+
+
+'''
+Connection of one client to the control channel
+'''
+class ControlChannelHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        # frames are small and latency sensitive
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._outbox = collections.deque()
+        self._outbox_condition = threading.Condition()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="control-channel-writer", daemon=True)
+        self._writer.start()
+
+    def finish(self):
+        with self._outbox_condition:
+            self._closed = True
+            self._outbox_condition.notify()
+        self._writer.join(DRAIN_SECONDS)
+        if self._writer.is_alive():
+            # the client doesn't read, unblock the writer
+            self._shutdown()
+        super().finish()
+
+    def handle(self):
+        executor = self.server.executor
+        try:
+            message = read_frame(self.rfile)
+        except FrameError:
+            message = None
+        if not isinstance(message, dict) or message.get("type") != "auth" or \
+                not self.server.authenticate(message.get("token")):
+            CHANNEL_CONNECTIONS.labels("rejected").inc()
+            self._send({"type": "error", "message": "Invalid token"})
+            return
+
+        CHANNEL_CONNECTIONS.labels("accepted").inc()
+        self._send({"type": "auth", "ok": True, "position": executor.currentPosition})
+
+        executor.addListener(self._send)
+        try:
+            while True:
+                message = read_frame(self.rfile)
+                if message is None:
+                    break
+                self._handle_message(executor, message)
+        except (FrameError, OSError) as err:
+            print("control channel closed:", err)
+        finally:
+            executor.removeListener(self._send)
+
+    def _handle_message(self, executor, message):
+        message_type = message.get("type") if isinstance(message, dict) else None
+
+        if message_type == "target":
+            try:
+                executor.setTarget(float(message["position"]))
+            except Exception as err:
+                self._send({"type": "error", "message": str(err)})
+        elif message_type == "ping":
+            self._send({"type": "pong", "id": message.get("id")})
+        else:
+            self._send({"type": "error", "message": "Unknown message type {!r}".format(message_type)})
+
+    '''
+    Queue a message for the writer thread, never blocks on the client. Also the listener of the motion executor.
+    '''
+    def _send(self, message):
+        with self._outbox_condition:
+            if self._closed:
+                return
+            if self._outbox and isinstance(message, dict) and message.get("type") == "progress" and \
+                    isSupersededProgress(self._outbox[-1], message):
+                self._outbox[-1] = message
+            elif len(self._outbox) >= MAX_QUEUED_MESSAGES:
+                print("control channel client is not reading, disconnecting it")
+                CHANNEL_SLOW_CLIENTS.inc()
+                self._closed = True
+                self._outbox.clear()
+                self._shutdown()
+            else:
+                self._outbox.append(message)
+            self._outbox_condition.notify()
+
+    '''
+    Send the queued messages until the connection is closed and the queue is empty.
+    A failed send is left to the read loop, which sees the closed connection.
+    '''
+    def _write_loop(self):
+        while True:
+            with self._outbox_condition:
+                while not self._outbox and not self._closed:
+                    self._outbox_condition.wait()
+                if not self._outbox:
+                    return
+                message = self._outbox.popleft()
+
+            try:
+                send_frame(self.request, message)
+            except OSError:
+                with self._outbox_condition:
+                    self._closed = True
+                    self._outbox.clear()
+                return
+
+    def _shutdown(self):
+        try:
+            self.request.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+'''
+Client of the control channel, used by scripts/control_channel_latency.py and the tests
+
+Arguments:
+    address : (host, port) of the control channel
+    timeout : seconds to wait for a frame
+'''
+class ControlChannelClient:
+    def __init__(self, address, timeout=10):
+        self._sock = socket.create_connection(address, timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._stream = self._sock.makefile("rb")
+
+    '''
+    Authenticate the channel, returns the reply of the server
+    '''
+    def authenticate(self, token):
+        self.send({"type": "auth", "token": token})
+        return self.receive()
+
+    def set_target(self, position):
+        self.send({"type": "target", "position": position})
+
+    def send(self, message):
+        send_frame(self._sock, message)
+
+    '''
+    Wait for the next message from the server, None if the server closed the channel
+    '''
+    def receive(self):
+        return read_frame(self._stream)
+
+    def close(self):
+        self._stream.close()
+        self._sock.close()
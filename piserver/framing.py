@@ -0,0 +1,63 @@
+'''
+File for the framing of the messages of the socket APIs of the server.
+Each frame is a 4 byte big-endian length followed by that many bytes of UTF-8 encoded JSON.
+
+Author: ECE 492 Group 6
+Creation Date: October 19, 2026
+'''
+
+import json
+import struct
+
+# length prefix of a frame
+FRAME_HEADER = struct.Struct(">I")
+# frames longer than this are rejected, so that a bad length can't make the reader allocate without bound
+MAX_FRAME_BYTES = 1 << 20
+
+
+'''
+Raised for frames that are cut short, too long or not JSON
+'''
+class FrameError(Exception):
+    pass
+
+
+'''
+Encode a message (JSON serializable) as a frame
+'''
+def encode_frame(message):
+    payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    if len(payload) > MAX_FRAME_BYTES:
+        raise FrameError("Frame of {} bytes is too long".format(len(payload)))
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+'''
+Send a message as a frame on a socket
+'''
+def send_frame(sock, message):
+    sock.sendall(encode_frame(message))
+
+
+'''
+Read a frame from a binary file-like stream (ex. socket.makefile("rb")) and return its message.
+Returns None if the stream ends before the frame starts.
+'''
+def read_frame(stream):
+    header = stream.read(FRAME_HEADER.size)
+    if not header:
+        return None
+    if len(header) < FRAME_HEADER.size:
+        raise FrameError("Frame header cut short")
+
+    length, = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise FrameError("Frame of {} bytes is too long".format(length))
+
+    payload = stream.read(length)
+    if len(payload) < length:
+        raise FrameError("Frame cut short")
+    try:
+        return json.loads(payload.decode("utf-8"))
+    except ValueError as err:
+        raise FrameError("Frame is not JSON: {}".format(err))
@@ -0,0 +1,186 @@
+'''
+File for the local API of the server, for clients on the same device (ex. voice control).
+Clients connect to a Unix domain socket and call the methods of SmartBlindsSystem with JSON frames, see
+piserver/framing.py. There is no token: access is granted by the permissions of the socket file, so only the owner of
+the server and the members of its group can connect.
+
+    client: {"id": 1, "method": "getPosition", "params": {}}
+    server: {"id": 1, "status": 200, "data": {"position": 12.0}}
+
+    client: {"id": 2, "method": "postBlindsCommand", "params": {"command": {...}, "forceUpdate": true}}
+    server: {"id": 2, "status": 200, "data": {...}}
+
+The status and data are those returned by the method, as for the matching HTTP route. Unknown methods are answered
+with status 404 and invalid params with status 400. A connection can make any number of calls, they are answered in
+order.
+
+Author: ECE 492 Group 6
+Creation Date: October 19, 2026
+'''
+
+import inspect
+import os
+import shutil
+import socket
+import socketserver
+import stat
+import threading
+import time
+
+from requests import codes as RESP_CODES
+
+from metrics.metrics import REGISTRY
+from piserver.framing import FrameError, read_frame, send_frame
+
+LOCAL_API_REQUEST_SECONDS = REGISTRY.histogram("smartblinds_local_api_request_seconds",
+                                               "Latency of local API calls per method", labelnames=("method",))
+
+# methods of SmartBlindsSystem that can be called through the local API
+LOCAL_API_METHODS = ("getTemperature", "getPosition", "postPosition", "postCalibratePosition", "getStatus",
+                     "getSchedule", "testMotor", "postSchedule", "deleteSchedule", "postBlindsCommand",
+                     "deleteBlindsCommand", "getHistory", "getPreview")
+
+
+'''
+Unix domain socket server of the local API, serving each connection from a thread of its own
+
+Arguments:
+    path : path of the socket file, a stale socket left there is replaced
+    system : SmartBlindsSystem whose methods are called
+    methods : names of the methods that can be called
+    mode : permissions of the socket file, connecting takes write permission
+    group : name or id of the group given the socket file, None to keep the group of the server
+'''
+class LocalApiServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, system, methods=LOCAL_API_METHODS, mode=0o660, group=None):
+        self.system = system
+        self.mode = mode
+        self.group = group
+        self.methods = {name: getattr(system, name) for name in methods}
+        self.signatures = {name: inspect.signature(method) for name, method in self.methods.items()}
+        # true once the socket file is ours to remove
+        self._bound = False
+        super().__init__(path, LocalApiHandler)
+
+    def server_bind(self):
+        path = self.server_address
+        if os.path.exists(path):
+            if not stat.S_ISSOCK(os.stat(path).st_mode):
+                raise FileExistsError("{} exists and is not a socket".format(path))
+            os.remove(path)
+
+        # create the socket file accessible to the owner only, so that there is no window in which anyone else can
+        # connect before the permissions are set
+        old_umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(old_umask)
+        self._bound = True
+
+        if self.group is not None:
+            shutil.chown(path, group=self.group)
+        os.chmod(path, self.mode)
+
+    def server_close(self):
+        super().server_close()
+        if self._bound:
+            self._bound = False
+            try:
+                os.remove(self.server_address)
+            except FileNotFoundError:
+                pass
+
+    '''
+    Serve connections from a background thread
+    '''
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name="local-api", daemon=True)
+        thread.start()
+        return thread
+
+    '''
+    Call a method with the params of a request, returns (data, status)
+    '''
+    def call(self, method, params):
+        if method not in self.methods:
+            return "Unknown method {!r}".format(method), RESP_CODES["NOT_FOUND"]
+        if not isinstance(params, dict):
+            return "params must be an object", RESP_CODES["BAD_REQUEST"]
+        try:
+            self.signatures[method].bind(**params)
+        except TypeError as err:
+            return str(err), RESP_CODES["BAD_REQUEST"]
+
+        start = time.perf_counter()
+        try:
+            return self.methods[method](**params)
+        except Exception as err:
+            return str(err), RESP_CODES["INTERNAL_SERVER_ERROR"]
+        finally:
+            LOCAL_API_REQUEST_SECONDS.labels(method).observe(time.perf_counter() - start)
+
+
+'''
+Connection of one client to the local API
+'''
+class LocalApiHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            while True:
+                request = read_frame(self.rfile)
+                if request is None:
+                    break
+                self._handle_request(request)
+        except (FrameError, OSError) as err:
+            print("local API connection closed:", err)
+
+    def _handle_request(self, request):
+        if not isinstance(request, dict):
+            self._reply(None, "Request must be an object", RESP_CODES["BAD_REQUEST"])
+            return
+
+        request_id = request.get("id")
+        data, status = self.server.call(request.get("method"), request.get("params", {}))
+        try:
+            self._reply(request_id, data, status)
+        except (TypeError, ValueError, FrameError) as err:
+            self._reply(request_id, "Response can't be sent: {}".format(err), RESP_CODES["INTERNAL_SERVER_ERROR"])
+
+    def _reply(self, request_id, data, status):
+        send_frame(self.request, {"id": request_id, "status": status, "data": data})
+
+
+'''
+Client of the local API, for on-device clients and the tests
+
+Arguments:
+    path : path of the socket file of the local API
+    timeout : seconds to wait for a reply
+'''
+class LocalApiClient:
+    def __init__(self, path, timeout=10):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(path)
+        self._stream = self._sock.makefile("rb")
+        self._next_id = 0
+
+    '''
+    Call a method of SmartBlindsSystem with params as keyword arguments, returns (data, status)
+    '''
+    def call(self, method, **params):
+        self._next_id += 1
+        send_frame(self._sock, {"id": self._next_id, "method": method, "params": params})
+        reply = read_frame(self._stream)
+        if reply is None:
+            raise ConnectionError("the local API closed the connection")
+        if reply.get("id") != self._next_id:
+            raise FrameError("Reply to request {} instead of {}".format(reply.get("id"), self._next_id))
+        return reply["data"], reply["status"]
+
+    def close(self):
+        self._stream.close()
+        self._sock.close()
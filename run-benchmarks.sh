@@ -0,0 +1,11 @@
+# Date: Oct 19, 2026
+# Author: ECE 492 Group 6
+# Contents: bash script to run the benchmark suite
+# Any arguments are passed on, ex. ./run-benchmarks.sh --baseline benchmarks/results/baseline.json
+
+# Source common definitions
+source common.sh
+
+# Run benchmarks in container and exit, results are kept in benchmarks/results on the host
+docker run --rm -v "$(pwd)/benchmarks/results:/src/benchmarks/results" $RPI_IMAGE \
+    python3 -m benchmarks.run_benchmarks --output benchmarks/results/latest.json "$@"
@@ -0,0 +1,64 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Interactive calibration of the blinds. Records the calibration table used by the server to map the slat
+tilt angle to the motor position. Stop the server before running it.
+"""
+
+from controlalgorithm.calibration import CalibrationRoutine
+import controlalgorithm.persistent_data as p_data
+from easydriver.easydriver import EasyDriver
+from gpiozero.pins.rpigpio import RPiGPIOFactory
+from gpiozero import Device
+import RPi.GPIO as rpigpio
+
+if __name__ == "__main__":
+    STEP_PIN = 20
+    DIR_PIN = 21
+    ENABLE_PIN = 25
+    MS1_PIN = 24
+    MS2_PIN = 23
+
+    rpigpio.setmode(rpigpio.BCM)
+    rpigpio.setwarnings(False)
+
+    Device.pin_factory = RPiGPIOFactory()
+
+    driver = EasyDriver(step_pin=STEP_PIN,
+                dir_pin=DIR_PIN,
+                ms1_pin=MS1_PIN,
+                ms2_pin=MS2_PIN,
+                enable_pin=ENABLE_PIN)
+
+    routine = CalibrationRoutine(driver)
+
+    print("Jog the motor with a number of eighth steps, negative to reverse.")
+    print("Bring the slats to each angle moving forward, from below it, and enter 'r' to record it.")
+
+    while routine.next_angle is not None:
+        command = input("Slats to {} degrees [steps or r]: ".format(routine.next_angle))
+        try:
+            if command.lower() == "r":
+                routine.record()
+            else:
+                routine.jog(int(command))
+        except ValueError as e:
+            print(e)
+
+    print("Reverse the motor until the slats just start to move, and enter 'r' to record the backlash.")
+    while routine.backlash is None:
+        command = input("Backlash [steps or r]: ")
+        try:
+            if command.lower() == "r":
+                routine.record_backlash()
+            else:
+                routine.jog(int(command))
+        except ValueError as e:
+            print(e)
+
+    table = routine.table()
+    p_data.set_calibration(table.to_dict())
+    p_data.set_motor_microsteps(routine.motor_microsteps, routine.direction)
+    driver.close()
+
+    print("Calibration saved: {}".format(table.to_dict()))
@@ -0,0 +1,90 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Measures the latency of the control channel: the time from sending a target position to the first step of
+the move to it (command to motion), and to the end of the move. Alternates between two positions.
+
+    python -m scripts.control_channel_latency --token <JWT from /login> --count 20
+"""
+
+import argparse
+import statistics
+import time
+
+from piserver.control_channel import ControlChannelClient
+
+
+"""
+Send a target and wait for the move to it. Returns the seconds to the first step and to the end of the move,
+the first is None if the blinds were already at the target.
+"""
+def measure_move(client, position):
+    start = time.perf_counter()
+    client.set_target(position)
+
+    motion_seconds = None
+    while True:
+        message = client.receive()
+        if message is None:
+            raise ConnectionError("the control channel was closed")
+        if message.get("type") == "error":
+            raise RuntimeError(message.get("message"))
+        if message.get("target") != position:
+            continue
+
+        if message["type"] == "progress" and motion_seconds is None:
+            motion_seconds = time.perf_counter() - start
+        elif message["type"] == "done":
+            return motion_seconds, time.perf_counter() - start
+
+
+"""
+Send a ping and return the seconds to the pong
+"""
+def measure_ping(client, ping_id):
+    start = time.perf_counter()
+    client.send({"type": "ping", "id": ping_id})
+    while True:
+        message = client.receive()
+        if message is None:
+            raise ConnectionError("the control channel was closed")
+        if message.get("type") == "pong" and message.get("id") == ping_id:
+            return time.perf_counter() - start
+
+
+def summary(name, seconds):
+    seconds = sorted(seconds)
+    if not seconds:
+        print("{}: no samples".format(name))
+        return
+    p95 = seconds[min(len(seconds) - 1, int(round(0.95 * (len(seconds) - 1))))]
+    print("{}: median {:.2f} ms, p95 {:.2f} ms, max {:.2f} ms over {} samples".format(
+        name, statistics.median(seconds) * 1000, p95 * 1000, seconds[-1] * 1000, len(seconds)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the command to motion latency of the control channel")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--token", required=True, help="JWT from the login route")
+    parser.add_argument("--count", type=int, default=20, help="number of moves")
+    parser.add_argument("--positions", type=float, nargs=2, default=(-20, 20), help="positions to alternate between")
+    args = parser.parse_args()
+
+    client = ControlChannelClient((args.host, args.port))
+    reply = client.authenticate(args.token)
+    if reply is None or not reply.get("ok"):
+        raise SystemExit("authentication failed: {}".format(reply))
+
+    pings = [measure_ping(client, i) for i in range(args.count)]
+    motion, done = [], []
+    for i in range(args.count):
+        motion_seconds, done_seconds = measure_move(client, args.positions[i % 2])
+        if motion_seconds is not None:
+            motion.append(motion_seconds)
+        done.append(done_seconds)
+    client.close()
+
+    summary("round trip", pings)
+    summary("command to motion", motion)
+    summary("command to end of move", done)
@@ -0,0 +1,262 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Simulated time harness for the smart blinds system.
+Drives SmartBlindsSystem through days of simulated time as fast as the CPU allows, using
+a simulated clock, a step-counting motor driver, a precomputed solar table and synthetic weather.
+The result is the timeline of blind positions.
+
+Usage:
+    python -m simulation.simulator --schedule tests/blinds/schedule1.json --start 2020-03-01 --days 7 --output timeline.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import sys
+
+import controlalgorithm.persistent_data as p_data
+from blinds.blinds_api import Blinds, SmartBlindsSystem
+from blinds.blinds_schedule import BlindsSchedule
+from blinds.clock import SimulatedClock
+from controlalgorithm.angle_step_mapper import AngleStepMapper
+from controlalgorithm.glare_algorithm import GlareAwareLight, WindowGeometry
+from controlalgorithm.heat_mgmt_algorithm import PredictiveHeatMgmt
+from controlalgorithm.solar_table import SolarTable
+from easydriver.easydriver import MicroStepResolution, StepDirection
+from tempsensor.tempsensor import MockTemperatureSensor
+
+"""
+Constants
+
+DEFAULT_CLOUD_COVER_PERCENTAGE: cloud cover used when no weather is given
+DEFAULT_EXT_TEMP_CELSIUS: external temperature used when no weather is given
+"""
+DEFAULT_CLOUD_COVER_PERCENTAGE = 30.0
+DEFAULT_EXT_TEMP_CELSIUS = 5.0
+
+"""
+Stand-in for EasyDriver that counts steps instead of driving GPIO pins and never sleeps
+"""
+class SimulatedMotorDriver:
+    def __init__(self):
+        self.microstep_resolution = MicroStepResolution.FULL_STEP
+        self.total_steps = 0
+
+    def step(self, steps=1, direction=StepDirection.FORWARD):
+        self.total_steps += steps
+
+    @contextlib.contextmanager
+    def stream(self):
+        yield self
+
+    def close(self):
+        pass
+
+"""
+Environment with the solar angle from a precomputed SolarTable and synthetic weather
+
+Arguments:
+    solar_table (SolarTable): solar position lookup for the location
+    weather: either a (cloud_cover_percentage, ext_temp_celsius) tuple, or a function taking a datetime
+        and returning such a tuple
+    forecast (WeatherForecast): forecast for the predictive heat management, None for no forecast
+"""
+class SimulatedEnvironment:
+    def __init__(self, solar_table, weather=None, forecast=None):
+        self._solar_table = solar_table
+        self._forecast = forecast
+        if weather is None:
+            weather = (DEFAULT_CLOUD_COVER_PERCENTAGE, DEFAULT_EXT_TEMP_CELSIUS)
+        self._weather = weather if callable(weather) else (lambda date_time: weather)
+
+    def get_solar_angle(self, date_time):
+        return self._solar_table.elevation_at(date_time)
+
+    def get_weather(self, date_time):
+        return self._weather(date_time)
+
+    def get_forecast(self, date_time):
+        return self._forecast
+
+"""
+Runs a SmartBlindsSystem over simulated time.
+
+Arguments:
+    schedule (BlindsSchedule): the schedule to simulate
+    start (datetime): start of the simulation, naive datetimes are taken to be in the schedule's timezone
+    days (float): number of simulated days
+    tick_minutes (float): simulated minutes between main loop iterations
+    temperature_sensor (TemperatureSensor): interior temperature source, defaults to MockTemperatureSensor
+    weather: see SimulatedEnvironment
+    solar_table (SolarTable): defaults to a table for the location in persistent data
+    commands (list): (datetime, command dict) pairs, each command is posted at the first tick at or after its time
+    quiet (bool): suppress the output printed by the system on every tick
+    motion_planner (MotionPlanner): planner for the system, defaults to the SmartBlindsSystem default
+    forecast (WeatherForecast): when given, BlindMode.ECO uses the predictive heat management with this forecast
+    thermal_controller (ThermalController): when given, learns the response of the room and drives BlindMode.ECO once trained
+    window (WindowGeometry): when given, BlindMode.LIGHT is glare aware for this window
+"""
+class BlindsSimulator:
+    def __init__(self, schedule, start, days=1, tick_minutes=1, temperature_sensor=None, weather=None,
+                 solar_table=None, commands=None, quiet=True, motion_planner=None, forecast=None, thermal_controller=None,
+                 window=None):
+        if start.tzinfo is None:
+            start = schedule._timezone.localize(start) if hasattr(schedule._timezone, "localize") \
+                else start.replace(tzinfo=schedule._timezone)
+        if tick_minutes <= 0:
+            raise ValueError("tick_minutes must be positive")
+
+        self.schedule = schedule
+        self.start = start
+        self.days = days
+        self.tick_minutes = tick_minutes
+        self.temperature_sensor = temperature_sensor if temperature_sensor is not None else MockTemperatureSensor()
+        self.weather = weather
+        self.solar_table = solar_table
+        self.commands = sorted(commands or [], key=lambda command: command[0])
+        self.quiet = quiet
+        self.motion_planner = motion_planner
+        self.forecast = forecast
+        self.thermal_controller = thermal_controller
+        self.window = window
+
+        self.clock = None
+        self.driver = None
+        self.system = None
+        self.moves = 0
+
+    """
+    Run the simulation.
+    Persistent data is redirected to a temporary copy for the duration of the run.
+
+    Output:
+        timeline (list): one entry per change of mode or position, each a dict with the
+        time (ISO format), mode, position and the motor steps issued at that tick
+    """
+    def run(self):
+        with p_data.isolated_persistent_data(), self._output_context():
+            # start from the horizontal position, as after a calibration
+            p_data.set_motor_position(0)
+
+            self._create_system()
+
+            num_ticks = int(round(self.days * 24 * 60 / self.tick_minutes))
+            tick_seconds = self.tick_minutes * 60
+            self.moves = 0
+            pending_commands = list(self.commands)
+            timeline = []
+            last_entry = None
+
+            for _ in range(num_ticks):
+                now = self.clock.now(self.schedule._timezone)
+
+                while pending_commands and pending_commands[0][0] <= now:
+                    self.system.postBlindsCommand(pending_commands.pop(0)[1])
+
+                steps_before = self.driver.total_steps
+                self.system.check_state_and_update()
+
+                entry = {
+                    "time": now.isoformat(),
+                    "mode": self.system._currentMode.name,
+                    "position": self.system._blinds.currentPosition,
+                    "steps": self.driver.total_steps - steps_before,
+                }
+                if entry["steps"]:
+                    self.moves += 1
+                if last_entry is None or entry["mode"] != last_entry["mode"] or entry["position"] != last_entry["position"]:
+                    timeline.append(entry)
+                    last_entry = entry
+
+                self.clock.advance(tick_seconds)
+
+        return timeline
+
+    """
+    Preview of the schedule from the start of the simulation, from SmartBlindsSystem.getPreview with the same setup as run().
+    The preview estimates the timeline run() gives with one minute ticks, without running the simulation.
+
+    Inputs:
+        hours (float): length of the preview, the simulated days by default
+
+    Output:
+        preview (dict): the compressed timeline and the estimated moves, see SmartBlindsSystem.getPreview
+    """
+    def preview(self, hours=None):
+        with p_data.isolated_persistent_data(), self._output_context():
+            p_data.set_motor_position(0)
+            self._create_system()
+            data, status = self.system.getPreview(self.days * 24 if hours is None else hours)
+
+        if not isinstance(data, dict):
+            raise ValueError(data)
+        return data
+
+    def _create_system(self):
+        solar_table = self.solar_table if self.solar_table is not None else SolarTable.from_persistent_data()
+        self.clock = SimulatedClock(self.start)
+        self.driver = SimulatedMotorDriver()
+        predictive_heat_mgmt = PredictiveHeatMgmt(solar_table=solar_table) if self.forecast is not None else None
+        glare_aware_light = GlareAwareLight(self.window, solar_table=solar_table) if self.window is not None else None
+        self.system = SmartBlindsSystem(Blinds(self.driver, AngleStepMapper()), self.schedule, self.temperature_sensor,
+                                        clock=self.clock,
+                                        environment=SimulatedEnvironment(solar_table, self.weather, self.forecast),
+                                        motionPlanner=self.motion_planner, predictiveHeatMgmt=predictive_heat_mgmt,
+                                        thermalController=self.thermal_controller, glareAwareLight=glare_aware_light,
+                                        solarTable=solar_table)
+
+    @contextlib.contextmanager
+    def _output_context(self):
+        if not self.quiet:
+            yield
+            return
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+
+    """
+    Totals for the last run
+    """
+    def summary(self):
+        return {
+            "moves": self.moves,
+            "total_steps": self.driver.total_steps if self.driver else 0,
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fast-forward the smart blinds system through simulated time")
+    parser.add_argument("--schedule", required=True, help="schedule JSON file, same format as the schedule API")
+    parser.add_argument("--start", required=True, help="start date or datetime in ISO format, in the schedule timezone")
+    parser.add_argument("--days", type=float, default=1, help="number of simulated days (default %(default)s)")
+    parser.add_argument("--tick-minutes", type=float, default=1, help="simulated minutes per iteration (default %(default)s)")
+    parser.add_argument("--cloud-cover", type=float, default=DEFAULT_CLOUD_COVER_PERCENTAGE, help="cloud cover percentage")
+    parser.add_argument("--ext-temp", type=float, default=DEFAULT_EXT_TEMP_CELSIUS, help="external temperature in Celsius")
+    parser.add_argument("--window-azimuth", type=float, help="window azimuth in degrees, for the glare aware LIGHT mode")
+    parser.add_argument("--slat-width", type=float, default=25, help="slat width in mm (default %(default)s)")
+    parser.add_argument("--slat-spacing", type=float, default=21, help="vertical slat spacing in mm (default %(default)s)")
+    parser.add_argument("--output", help="write the timeline as JSON to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    with open(args.schedule, "r") as fp:
+        schedule = BlindsSchedule.fromJson(fp.read())
+
+    simulator = BlindsSimulator(schedule, datetime.datetime.fromisoformat(args.start), days=args.days,
+                                tick_minutes=args.tick_minutes, weather=(args.cloud_cover, args.ext_temp),
+                                window=WindowGeometry(args.window_azimuth, args.slat_width, args.slat_spacing)
+                                if args.window_azimuth is not None else None)
+    timeline = simulator.run()
+    result = {"summary": simulator.summary(), "timeline": timeline}
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(result, fp, indent=4)
+    else:
+        json.dump(result, sys.stdout, indent=4)
+        print()
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Embedded SQLite store for the state of the smart blinds system, with a thin repository per kind of state:
+    weather: cached weather readings and hourly forecasts
+    schedules: every posted schedule, versioned
+    commands: the active manual command
+    history: events such as moves of the blinds, written in batches
+
+The database runs in WAL mode, so the readers (API requests) never block the writer (main loop).
+Statements are constant SQL strings with parameters, so sqlite3 prepares each once and reuses it from its statement cache.
+The users table of the authentication is kept in the same database by the web server.
+"""
+
+import contextlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import shutil
+
+from metrics.metrics import REGISTRY
+
+"""
+Constants
+
+SCHEMA_VERSION: version of the schema created by SmartBlindsStore, stored in the database
+DEFAULT_BATCH_INTERVAL: seconds that batched writes may wait before they are written
+DEFAULT_BATCH_SIZE: number of batched writes that triggers a write
+HISTORY_MAX_ROWS: the oldest history events are deleted past this number of events
+WEATHER_MAX_AGE_SECONDS: weather readings older than this are deleted
+"""
+SCHEMA_VERSION = 2
+DEFAULT_BATCH_INTERVAL = 5.0
+DEFAULT_BATCH_SIZE = 100
+HISTORY_MAX_ROWS = 100000
+WEATHER_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS weather_cache (id INTEGER PRIMARY KEY, fetched_at REAL NOT NULL, lat REAL NOT NULL, "
+    "lon REAL NOT NULL, cloud_cover_percentage REAL NOT NULL, ext_temp_celsius REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS weather_cache_fetched_at ON weather_cache (fetched_at)",
+    "CREATE TABLE IF NOT EXISTS weather_forecast (id INTEGER PRIMARY KEY, fetched_at REAL NOT NULL, lat REAL NOT NULL, "
+    "lon REAL NOT NULL, forecast TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS schedules (version INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL NOT NULL, "
+    "schedule TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS active_command (id INTEGER PRIMARY KEY CHECK (id = 1), created_at REAL NOT NULL, "
+    "date TEXT NOT NULL, command TEXT NOT NULL, time_block TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY, time REAL NOT NULL, event TEXT NOT NULL, data TEXT)",
+    "CREATE INDEX IF NOT EXISTS history_event ON history (event, id)",
+)
+
+STORE_WRITES = REGISTRY.counter("smartblinds_store_writes", "Statements written to the store, by whether they were batched",
+                                labelnames=("batched",))
+STORE_FLUSH_SECONDS = REGISTRY.histogram("smartblinds_store_flush_seconds", "Duration of writing a batch to the store")
+
+"""
+SQLite store for the smart blinds system.
+
+Arguments:
+    path (string): database file, ":memory:" for a temporary database
+    batch_interval (float): seconds that batched writes may wait before they are written
+    batch_size (int): number of batched writes that triggers a write
+"""
+class SmartBlindsStore:
+    def __init__(self, path, batch_interval=DEFAULT_BATCH_INTERVAL, batch_size=DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.batch_interval = batch_interval
+        self.batch_size = batch_size
+
+        # a single connection shared by the API threads and the main loop, serialized by the lock
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("PRAGMA busy_timeout=5000")
+
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+        self._create_schema()
+
+        self.weather = WeatherRepository(self)
+        self.schedules = ScheduleRepository(self)
+        self.commands = CommandRepository(self)
+        self.history = HistoryRepository(self)
+
+    def _create_schema(self):
+        with self.transaction() as connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+            # all changes to the schema so far only added tables, which the statements above create
+            if connection.execute("SELECT version FROM schema_version").fetchone() is None:
+                connection.execute("INSERT INTO schema_version (version) VALUES (?)", (SCHEMA_VERSION,))
+            else:
+                connection.execute("UPDATE schema_version SET version = ?", (SCHEMA_VERSION,))
+
+    """
+    Context manager for a write transaction, yields the connection
+    """
+    @contextlib.contextmanager
+    def transaction(self):
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    """
+    Run a read query and return all rows. Pending batched writes are written first so that reads see them.
+    """
+    def query(self, sql, parameters=()):
+        with self._lock:
+            self._flush()
+            return self._connection.execute(sql, parameters).fetchall()
+
+    """
+    Write a statement immediately, in its own transaction
+    """
+    def write(self, sql, parameters=()):
+        with self.transaction() as connection:
+            cursor = connection.execute(sql, parameters)
+        STORE_WRITES.labels("false").inc()
+        return cursor
+
+    """
+    Queue a statement to be written with the next batch.
+    A batch is written when batch_size statements are queued, batch_interval seconds have passed since the
+    last batch, or on flush().
+    """
+    def enqueue(self, sql, parameters=()):
+        with self._lock:
+            self._pending.append((sql, parameters))
+            STORE_WRITES.labels("true").inc()
+            if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.batch_interval:
+                self._flush()
+
+    """
+    Write all queued statements in a single transaction
+    """
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, []
+        with STORE_FLUSH_SECONDS.time(), self.transaction() as connection:
+            for sql, parameters in pending:
+                connection.execute(sql, parameters)
+            self.history._prune(connection)
+
+    """
+    Copy the rows of a table from another SQLite database, keeping the rows already in this one.
+    Used to bring the state of older databases into the store.
+
+    Output:
+        number of rows copied
+    """
+    def import_table(self, database_path, table):
+        with self._lock:
+            self._flush()
+            self._connection.execute("ATTACH DATABASE ? AS legacy", (database_path,))
+            try:
+                with self.transaction() as connection:
+                    cursor = connection.execute("INSERT OR IGNORE INTO main.{0} SELECT * FROM legacy.{0}".format(table))
+                    return cursor.rowcount
+            finally:
+                self._connection.execute("DETACH DATABASE legacy")
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._connection.close()
+
+"""
+Cached weather readings
+"""
+class WeatherRepository:
+    def __init__(self, store):
+        self._store = store
+
+    """
+    Store a weather reading
+    """
+    def save(self, lat, lon, cloud_cover_percentage, ext_temp_celsius, fetched_at=None):
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._store.transaction() as connection:
+            connection.execute("INSERT INTO weather_cache (fetched_at, lat, lon, cloud_cover_percentage, ext_temp_celsius) "
+                               "VALUES (?, ?, ?, ?, ?)", (fetched_at, lat, lon, cloud_cover_percentage, ext_temp_celsius))
+            connection.execute("DELETE FROM weather_cache WHERE fetched_at < ?", (fetched_at - WEATHER_MAX_AGE_SECONDS,))
+        STORE_WRITES.labels("false").inc()
+
+    """
+    Get the latest reading for a location if it is at most max_age seconds old
+
+    Output:
+        (cloud_cover_percentage, ext_temp_celsius), None if there is no recent reading
+    """
+    def latest(self, lat, lon, max_age, now=None):
+        now = time.time() if now is None else now
+        rows = self._store.query("SELECT cloud_cover_percentage, ext_temp_celsius FROM weather_cache "
+                                 "WHERE lat = ? AND lon = ? AND fetched_at >= ? ORDER BY fetched_at DESC LIMIT 1",
+                                 (lat, lon, now - max_age))
+        return tuple(rows[0]) if rows else None
+
+    """
+    Store a forecast dictionary (as produced by WeatherForecast.to_dict). Only the latest forecast is kept.
+    """
+    def save_forecast(self, lat, lon, forecast_dict, fetched_at=None):
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._store.transaction() as connection:
+            connection.execute("DELETE FROM weather_forecast")
+            connection.execute("INSERT INTO weather_forecast (fetched_at, lat, lon, forecast) VALUES (?, ?, ?, ?)",
+                               (fetched_at, lat, lon, json.dumps(forecast_dict)))
+        STORE_WRITES.labels("false").inc()
+
+    """
+    Get the latest forecast for a location if it is at most max_age seconds old
+
+    Output:
+        forecast dictionary, None if there is no recent forecast
+    """
+    def latest_forecast(self, lat, lon, max_age, now=None):
+        now = time.time() if now is None else now
+        rows = self._store.query("SELECT forecast FROM weather_forecast WHERE lat = ? AND lon = ? AND fetched_at >= ? "
+                                 "ORDER BY fetched_at DESC LIMIT 1", (lat, lon, now - max_age))
+        return json.loads(rows[0][0]) if rows else None
+
+"""
+Every posted schedule, each as a new version. The latest version is the active schedule.
+"""
+class ScheduleRepository:
+    def __init__(self, store):
+        self._store = store
+
+    """
+    Store a schedule dictionary (as produced by BlindsSchedule.toDict) as a new version
+
+    Output:
+        version (int)
+    """
+    def save(self, schedule_dict):
+        cursor = self._store.write("INSERT INTO schedules (created_at, schedule) VALUES (?, ?)",
+                                   (time.time(), json.dumps(schedule_dict)))
+        return cursor.lastrowid
+
+    """
+    Output:
+        (version, schedule dictionary) of the latest schedule, None if no schedule was stored
+    """
+    def latest(self):
+        rows = self._store.query("SELECT version, schedule FROM schedules ORDER BY version DESC LIMIT 1")
+        return (rows[0][0], json.loads(rows[0][1])) if rows else None
+
+    """
+    Output:
+        schedule dictionary of a version, None if there is no such version
+    """
+    def get(self, version):
+        rows = self._store.query("SELECT schedule FROM schedules WHERE version = ?", (version,))
+        return json.loads(rows[0][0]) if rows else None
+
+    """
+    Output:
+        list of (version, created_at) pairs, latest first
+    """
+    def versions(self, limit=100):
+        rows = self._store.query("SELECT version, created_at FROM schedules ORDER BY version DESC LIMIT ?", (limit,))
+        return [tuple(row) for row in rows]
+
+"""
+The active manual command. There is at most one.
+"""
+class CommandRepository:
+    def __init__(self, store):
+        self._store = store
+
+    """
+    Store the active command
+
+    Inputs:
+        command_dict (dict): the command as posted
+        time_block_dict (dict): the time block the command was converted to
+        date (string): ISO format date the time block applies to
+    """
+    def set_active(self, command_dict, time_block_dict, date):
+        self._store.write("INSERT OR REPLACE INTO active_command (id, created_at, date, command, time_block) "
+                          "VALUES (1, ?, ?, ?, ?)", (time.time(), date, json.dumps(command_dict), json.dumps(time_block_dict)))
+
+    """
+    Output:
+        dict with the command, time_block, date and created_at of the active command, None if there is none
+    """
+    def get_active(self):
+        rows = self._store.query("SELECT command, time_block, date, created_at FROM active_command WHERE id = 1")
+        if not rows:
+            return None
+
+        command, time_block, date, created_at = rows[0]
+        return {"command": json.loads(command), "time_block": json.loads(time_block), "date": date, "created_at": created_at}
+
+    def clear_active(self):
+        self._store.write("DELETE FROM active_command WHERE id = 1")
+
+"""
+Log of events, written in batches
+"""
+class HistoryRepository:
+    def __init__(self, store, max_rows=HISTORY_MAX_ROWS):
+        self._store = store
+        self.max_rows = max_rows
+
+    """
+    Queue an event
+
+    Inputs:
+        event (string): kind of event, ex. "move"
+        data (dict): details of the event
+        event_time (float): UNIX time of the event, defaults to now
+    """
+    def record(self, event, data=None, event_time=None):
+        event_time = time.time() if event_time is None else event_time
+        self._store.enqueue("INSERT INTO history (time, event, data) VALUES (?, ?, ?)",
+                            (event_time, event, json.dumps(data) if data is not None else None))
+
+    """
+    Output:
+        list of dicts with the time, event and data of the latest events, latest first
+    """
+    def recent(self, limit=100, event=None):
+        if event is None:
+            rows = self._store.query("SELECT time, event, data FROM history ORDER BY id DESC LIMIT ?", (limit,))
+        else:
+            rows = self._store.query("SELECT time, event, data FROM history WHERE event = ? ORDER BY id DESC LIMIT ?",
+                                     (event, limit))
+        return [{"time": row[0], "event": row[1], "data": json.loads(row[2]) if row[2] is not None else None} for row in rows]
+
+    def _prune(self, connection):
+        connection.execute("DELETE FROM history WHERE id <= (SELECT MAX(id) FROM history) - ?", (self.max_rows,))
+
+"""
+Path of the store used by the system. For the main program, in the piserver folder next to the legacy users database.
+"""
+store_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "piserver", "smartblinds.db")
+_store = None
+_store_lock = threading.Lock()
+
+"""
+Get the store of the system, opening store_file on first use
+"""
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SmartBlindsStore(store_file)
+        return _store
+
+"""
+Temporarily use a store in a temporary directory, so that simulations, benchmarks and tests never modify the real store.
+Yields the temporary store, which is deleted on exit.
+"""
+@contextlib.contextmanager
+def isolated_store():
+    global _store, store_file
+    original_store, original_file = _store, store_file
+    temp_dir = tempfile.mkdtemp(prefix="smartblinds-store-")
+    try:
+        with _store_lock:
+            store_file = os.path.join(temp_dir, "smartblinds.db")
+            _store = SmartBlindsStore(store_file)
+        yield _store
+    finally:
+        with _store_lock:
+            _store.close()
+            _store, store_file = original_store, original_file
+        shutil.rmtree(temp_dir, ignore_errors=True)
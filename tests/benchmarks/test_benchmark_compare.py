@@ -0,0 +1,53 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the benchmark measurement and baseline comparison helpers
+"""
+
+from benchmarks.run_benchmarks import compare, measure, make_schedule_dict
+from blinds.blinds_schedule import BlindsSchedule
+
+def _results(**medians):
+    return {"results": {name: {"median": median} for name, median in medians.items()}}
+
+"""Class holding unit tests for the benchmark helpers
+"""
+class TestBenchmarkHelpers:
+
+    """Test that slowdowns beyond the threshold are flagged as regressions
+    """
+    def test_compare_regression(self):
+        baseline = _results(fast=1.0, slow=1.0)
+        current = _results(fast=1.1, slow=1.5)
+
+        comparison = {entry["name"]: entry for entry in compare(current, baseline, threshold=0.25)}
+
+        assert not comparison["fast"]["regression"]
+        assert comparison["slow"]["regression"]
+        assert comparison["slow"]["ratio"] == 1.5
+
+    """Test that benchmarks missing from either side or with errors are skipped
+    """
+    def test_compare_skips_missing(self):
+        baseline = _results(a=1.0)
+        baseline["results"]["broken"] = {"error": "failed"}
+        current = _results(a=1.0, b=1.0, broken=1.0)
+
+        assert [entry["name"] for entry in compare(current, baseline)] == ["a"]
+
+    """Test the measurement statistics
+    """
+    def test_measure(self):
+        result = measure(lambda: None, rounds=3, min_round_time=0.001)
+
+        assert result["rounds"] == 3
+        assert result["iterations"] >= 1
+        assert result["min"] <= result["median"]
+
+    """Test generated schedules parse with the requested number of blocks
+    """
+    def test_make_schedule_dict(self):
+        schedule = BlindsSchedule.fromDict(make_schedule_dict(10))
+
+        for day in BlindsSchedule.DAYS_OF_WEEK:
+            assert len(schedule._schedule[day]) == 10
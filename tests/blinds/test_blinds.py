@@ -8,10 +8,45 @@ Creation Date: February 1, 2020
 '''
 
 import pytest
+import contextlib
 from blinds.blinds_api import Blinds, InvalidBlindPositionException
-from controlalgorithm.angle_step_mapper import AngleStepMapper
+import random
+import controlalgorithm.persistent_data as p_data
+from controlalgorithm.angle_step_mapper import AngleStepMapper, CalibrationTable, MICROSTEPS_PER_STEP, ANGLE_POSITION_FACTOR
 from easydriver.easydriver import EasyDriver, MicroStepResolution, StepDirection
 
+'''
+Stand-in for the motor driver that records the steps it is given and integrates the shaft position in eighth steps
+'''
+class RecordingDriver:
+    microstep_resolution = MicroStepResolution.FULL_STEP
+
+    def __init__( self ):
+        self.steps = []
+        self.shaftMicrosteps = 0
+
+    def step( self, steps=1, direction=StepDirection.FORWARD ):
+        self.steps.append( ( self.microstep_resolution, steps, direction ) )
+        sign = 1 if direction == StepDirection.FORWARD else -1
+        self.shaftMicrosteps += sign * steps * MICROSTEPS_PER_STEP[ self.microstep_resolution ]
+
+    def stream( self ):
+        return contextlib.nullcontext( self )
+
+'''
+Recording driver of blinds whose slats lag the motor by backlash eighth steps when it reverses. The slats are at the 
+motor position after a forward move, and backlash eighth steps above it after a reverse move
+'''
+class BacklashDriver( RecordingDriver ):
+    def __init__( self, backlash ):
+        super().__init__()
+        self.backlash = backlash
+        self.slatMicrosteps = 0
+
+    def step( self, steps=1, direction=StepDirection.FORWARD ):
+        super().step( steps=steps, direction=direction )
+        self.slatMicrosteps = min( max( self.slatMicrosteps, self.shaftMicrosteps ), self.shaftMicrosteps + self.backlash )
+
 class TestBlinds:
     STEP_PIN = 20
     DIR_PIN = 21
@@ -19,6 +54,13 @@ class TestBlinds:
     MS1_PIN = 24
     MS2_PIN = 23
 
+    """Runs every test against a temporary copy of the persistent data and position journal
+    """
+    @pytest.fixture( autouse=True )
+    def isolatedData( self ):
+        with p_data.isolated_persistent_data():
+            yield
+
     """Creates and returns a fresh instance of a driver for tests.
 
     Also handles cleanup after the yield.
@@ -37,23 +79,23 @@ class TestBlinds:
         driver.close()
 
     '''
-    Test rotateToPosition to check that the internal position is updated. 
+    Test rotateToPosition to check that the internal position is updated to within the angular accuracy (0.9 degrees = 1%). 
     '''
     def test_rotate( self, driver ):
         mapper = AngleStepMapper()
         blinds = Blinds( driver, mapper )
         
         blinds.rotateToPosition( 12 )
-        assert ( blinds._currentPosition == 12 )
+        assert ( blinds.currentPosition == pytest.approx( 12, abs=1 ) )
 
         blinds.rotateToPosition( 100 )
-        assert ( blinds._currentPosition == 100 )
+        assert ( blinds.currentPosition == pytest.approx( 100, abs=1 ) )
 
         blinds.rotateToPosition( -54 )
-        assert ( blinds._currentPosition == -54 )
+        assert ( blinds.currentPosition == pytest.approx( -54, abs=1 ) )
 
         blinds.rotateToPosition( -100 )
-        assert ( blinds._currentPosition == -100 )
+        assert ( blinds.currentPosition == pytest.approx( -100, abs=1 ) )
 
     '''
     Test for invalid rotational positions given to rotateToPosition. 
@@ -80,7 +122,134 @@ class TestBlinds:
     def test_reset_position( self, driver ):
         mapper = AngleStepMapper()
         blinds = Blinds( driver, mapper )
-        blinds._currentPosition = 20
+        blinds.rotateToPosition( 20 )
         blinds.reset_position()
 
-        assert ( blinds._currentPosition == 0 )
\ No newline at end of file
+        assert ( blinds.currentPosition == 0 )
+        assert ( blinds.motorMicrosteps == 0 )
+
+    '''
+    Test that the driver is enabled once for all the chunks and segments of a move
+    '''
+    def test_rotate_streams_segments( self, driver ):
+        driver.speed = 100000
+        blinds = Blinds( driver, AngleStepMapper(), angularAccuracy=0.1 )
+        blinds.progressMicrosteps = 8
+        blinds.calibratePosition()
+
+        enableStates = len( driver.enable_pin.states )
+        blinds.rotateToPosition( 10 )
+        assert ( [ state.state for state in driver.enable_pin.states[ enableStates: ] ] == [ False, True ] )
+        assert ( blinds.motorMicrosteps == 52 )
+    '''
+    Test that moves are split into coarse and fine steps for the angular accuracy, with the motor position 
+    accounted for in eighth steps
+    '''
+    def test_rotate_mixed_resolutions( self ):
+        driver = RecordingDriver()
+        steps = driver.steps
+        blinds = Blinds( driver, AngleStepMapper(), angularAccuracy=0.1 )
+        blinds.calibratePosition()
+
+        # 10% = 9 degrees = 52 eighth steps, so 6 full steps and a half step
+        blinds.rotateToPosition( 10 )
+        assert ( steps == [ ( MicroStepResolution.FULL_STEP, 6, StepDirection.FORWARD ),
+                ( MicroStepResolution.HALF_STEP, 1, StepDirection.FORWARD ) ] )
+        assert ( blinds._motorMicrosteps == 52 )
+
+        del steps[ : ]
+        blinds.reset_position()
+        assert ( steps == [ ( MicroStepResolution.HALF_STEP, 1, StepDirection.REVERSE ),
+                ( MicroStepResolution.FULL_STEP, 6, StepDirection.REVERSE ) ] )
+        assert ( blinds._motorMicrosteps == 0 )
+
+    '''
+    Test that the position doesn't drift from the motor shaft over many random moves at mixed accuracies. 
+    Every move is an exact step delta, so the shaft always ends where the blinds think it is. 
+    '''
+    def test_no_drift( self ):
+        rng = random.Random( 492 )
+        driver = RecordingDriver()
+
+        with p_data.isolated_persistent_data():
+            blinds = Blinds( driver, AngleStepMapper() )
+            blinds.calibratePosition()
+
+            for _ in range( 10000 ):
+                blinds.angularAccuracy = rng.choice( ( 0, 0.2, 0.9 ) )
+                # mostly small adjustments, as from the control algorithms, with some full range moves
+                if rng.random() < 0.8:
+                    position = max( -100, min( 100, blinds.currentPosition + rng.uniform( -3, 3 ) ) )
+                else:
+                    position = rng.uniform( -100, 100 )
+
+                blinds.rotateToPosition( position )
+                assert ( driver.shaftMicrosteps == blinds.motorMicrosteps )
+                assert ( abs( blinds.currentPosition - position ) <= max( blinds.angularAccuracy, 0.1 ) / 0.9 )
+
+            assert ( p_data.get_motor_microsteps() == driver.shaftMicrosteps )
+
+            blinds.reset_position()
+            assert ( driver.shaftMicrosteps == 0 )
+
+    '''
+    Test that the position is recovered from the journal after a power cut in the middle of a move
+    '''
+    def test_power_cut_recovery( self ):
+        class PowerCut( Exception ):
+            pass
+
+        driver = RecordingDriver()
+        step = driver.step
+        def failingStep( steps=1, direction=StepDirection.FORWARD ):
+            if driver.shaftMicrosteps >= 200:
+                raise PowerCut()
+            step( steps=steps, direction=direction )
+        driver.step = failingStep
+
+        with p_data.isolated_persistent_data():
+            blinds = Blinds( driver, AngleStepMapper() )
+            blinds.calibratePosition()
+
+            with pytest.raises( PowerCut ):
+                blinds.rotateToPosition( 100 )
+
+            # restart
+            p_data.get_position_journal().close()
+            p_data._position_journal = None
+
+            assert ( p_data.get_position_journal().state.interrupted )
+            recovered = Blinds( RecordingDriver(), AngleStepMapper() )
+            assert ( recovered.motorMicrosteps == driver.shaftMicrosteps )
+
+    '''
+    Test that with a calibration table the slats land on the target in a single move, over random moves in both 
+    directions of blinds with a nonlinear tilt and backlash
+    '''
+    def test_rotate_calibrated( self ):
+        rng = random.Random( 492 )
+        driver = BacklashDriver( 16 )
+        table = CalibrationTable( [ -90, 0, 45, 90 ], [ -600, 0, 200, 520 ], { StepDirection.REVERSE: -16 } )
+        # the slats without the backlash
+        slats = AngleStepMapper( CalibrationTable( table.angles, table.microsteps ) )
+
+        with p_data.isolated_persistent_data():
+            blinds = Blinds( driver, AngleStepMapper( table ) )
+            blinds.calibratePosition()
+
+            for _ in range( 500 ):
+                position = rng.uniform( -100, 100 )
+                blinds.rotateToPosition( position )
+
+                slatPosition = slats.microsteps_to_tilt_angle( driver.slatMicrosteps ) / ANGLE_POSITION_FACTOR
+                assert ( abs( slatPosition - position ) <= 1 + 1e-9 )
+                assert ( blinds.currentPosition == pytest.approx( slatPosition ) )
+
+                # no corrective move
+                moves = len( driver.steps )
+                blinds.rotateToPosition( position )
+                assert ( len( driver.steps ) == moves )
+
+            # the direction of the last move is recovered with the position
+            recovered = Blinds( RecordingDriver(), AngleStepMapper( table ) )
+            assert ( recovered.currentPosition == pytest.approx( blinds.currentPosition ) )
@@ -8,6 +8,7 @@ Creation Date: March 7, 2020
 import pytest
 import json
 import datetime
+import pytz
 from blinds.blinds_schedule import BlindMode, ScheduleTimeBlock
 from blinds.blinds_command import BlindsCommand, InvalidBlindsCommandException
 
@@ -118,33 +119,56 @@ class TestBlindsCommand:
         assert( timeBlock._end.hour == ScheduleTimeBlock.END_OF_DAY.hour )
         assert( timeBlock._end.minute == ScheduleTimeBlock.END_OF_DAY.minute )
 
-        # case of end of day with duration too long
+        # command lasting past midnight wraps into the next day, 6000 minutes is 4 days and 4 hours
         commandTime = 6000
         command = BlindsCommand( commandMode, commandTime, commandPos )
         timeBlock = command.toTimeBlock( currentTimeProvider=mockCurrentTime )
 
         assert( timeBlock._start.hour == mockHour )
         assert( timeBlock._start.minute == mockMinute )
-        assert( timeBlock._end.hour == ScheduleTimeBlock.END_OF_DAY.hour )
-        assert( timeBlock._end.minute == ScheduleTimeBlock.END_OF_DAY.minute )
+        assert( timeBlock._end == datetime.time( 20, 31 ) )
+        assert( timeBlock.crossesMidnight() is False )
 
-        # case of true 0 duration with various command times
+        # case of commands given at the end of the day
         mockCurrentTime = lambda: ScheduleTimeBlock.END_OF_DAY
 
-        # arbitrary command time
+        # arbitrary command time crosses midnight
         command = BlindsCommand( commandMode, 120, commandPos )
         timeBlock = command.toTimeBlock( currentTimeProvider=mockCurrentTime )
-        assert( timeBlock is None )
+        assert( timeBlock._end == datetime.time( 1, 59 ) )
+        assert( timeBlock.crossesMidnight() )
 
-        # 0 command time
+        # 0 command time, true 0 duration
         command = BlindsCommand( commandMode, 0, commandPos )
         timeBlock = command.toTimeBlock( currentTimeProvider=mockCurrentTime )
         assert( timeBlock is None )
 
-        # command time too long
+        # multi day command time
         command = BlindsCommand( commandMode, 6000, commandPos )
         timeBlock = command.toTimeBlock( currentTimeProvider=mockCurrentTime )
-        assert( timeBlock is None )
+        assert( timeBlock._end == datetime.time( 3, 59 ) )
+
+    '''
+    Test the end of commands, which may be days after they are given
+    '''
+    def test_endDateTime( self ):
+        now = pytz.timezone( "America/Edmonton" ).localize( datetime.datetime( 2020, 3, 6, 16, 31 ) )
+
+        assert( BlindsCommand( BlindMode.DARK, 120 ).endDateTime( now ) == now + datetime.timedelta( minutes=120 ) )
+        assert( BlindsCommand( BlindMode.DARK, 6000 ).endDateTime( now ) == now + datetime.timedelta( minutes=6000 ) )
+
+        # duration 0 lasts until the next midnight in the timezone of the command
+        end = BlindsCommand( BlindMode.DARK, 0 ).endDateTime( now )
+        assert( end.date() == datetime.date( 2020, 3, 7 ) and end.time() == datetime.time( 0, 0 ) )
+        assert( end.utcoffset() == now.utcoffset() )
+
+    '''
+    Test that commands are limited to a week
+    '''
+    def test_maxDuration( self ):
+        BlindsCommand( BlindMode.DARK, BlindsCommand.MAX_DURATION ).validate()
+        with pytest.raises( InvalidBlindsCommandException ):
+            BlindsCommand( BlindMode.DARK, BlindsCommand.MAX_DURATION + 1 ).validate()
 
     '''
     Test toDict function 
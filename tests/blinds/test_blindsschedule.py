@@ -11,7 +11,7 @@ import pytest
 import datetime
 import json
 import os
-from blinds.blinds_schedule import BlindMode, ScheduleTimeBlock, BlindsSchedule, BlindSchedulingException, InvalidBlindsScheduleException, InvalidTimeZoneStringException
+from blinds.blinds_schedule import BlindMode, ScheduleTimeBlock, SolarAnchor, ScheduleOverride, BlindsSchedule, BlindSchedulingException, InvalidBlindsScheduleException, InvalidTimeZoneStringException
 from pytz import timezone
 
 # path used for opening json files
@@ -181,6 +181,134 @@ class TestScheduleTimeBlock:
         with pytest.raises( BlindSchedulingException ):
             blindsSchedule.checkHasNoTimeConflicts()
 
+    '''
+    Test for time blocks crossing midnight, including from Sunday into Monday, and the compiled weekly timeline
+    '''
+    def test_crossMidnightTimeline( self ):
+        sched = { day : [] for day in BlindsSchedule.DAYS_OF_WEEK }
+        night = ScheduleTimeBlock( datetime.time( 22, 00 ), datetime.time( 6, 00 ), BlindMode.DARK, None )
+        morning = ScheduleTimeBlock( datetime.time( 6, 00 ), datetime.time( 9, 00 ), BlindMode.LIGHT, None )
+        sched[ BlindsSchedule.SUNDAY ].append( night )
+        sched[ BlindsSchedule.MONDAY ].append( morning )
+
+        blindsSchedule = BlindsSchedule( BlindMode.LIGHT, None, schedule=sched )
+
+        # 2020-03-08 is a Sunday
+        sunday = datetime.datetime( 2020, 3, 8 )
+        assert( blindsSchedule.timeBlockAt( sunday.replace( hour=21, minute=59 ) ) is None )
+        assert( blindsSchedule.timeBlockAt( sunday.replace( hour=23, minute=30 ) ) is night )
+        assert( blindsSchedule.timeBlockAt( sunday + datetime.timedelta( hours=29, minutes=59 ) ) is night )
+        assert( blindsSchedule.timeBlockAt( sunday + datetime.timedelta( hours=30 ) ) is morning )
+        # the night block of sunday does not apply early on sunday
+        assert( blindsSchedule.timeBlockAt( sunday.replace( hour=3 ) ) is None )
+
+        # a block crossing into a block of the next day is a conflict
+        sched[ BlindsSchedule.MONDAY ] = [ ScheduleTimeBlock( datetime.time( 5, 00 ), datetime.time( 9, 00 ), BlindMode.LIGHT, None ) ]
+        blindsSchedule._schedule = sched
+        with pytest.raises( BlindSchedulingException ):
+            blindsSchedule.checkHasNoTimeConflicts()
+
+        # as is a block crossing midnight with a later block of the same day
+        assert( BlindsSchedule.hasConflict( [
+            ScheduleTimeBlock( datetime.time( 20, 00 ), datetime.time( 4, 30 ), BlindMode.DARK, None ),
+            ScheduleTimeBlock( datetime.time( 22, 00 ), datetime.time( 23, 00 ), BlindMode.LIGHT, None ),
+        ] ) == True )
+
+    '''
+    Test that solar anchors are resolved once per day, with the solar times of the date of each day of the week
+    '''
+    def test_resolveSolarAnchors( self ):
+        sched = { day : [] for day in BlindsSchedule.DAYS_OF_WEEK }
+        evening = ScheduleTimeBlock( SolarAnchor( SolarAnchor.SUNSET, -30 ), datetime.time( 23, 00 ), BlindMode.DARK, None )
+        sched[ BlindsSchedule.TUESDAY ].append( evening )
+        sched[ BlindsSchedule.WEDNESDAY ].append( ScheduleTimeBlock( datetime.time( 20, 00 ), datetime.time( 21, 00 ), BlindMode.ECO, None ) )
+        blindsSchedule = BlindsSchedule( BlindMode.LIGHT, None, schedule=sched )
+
+        # sunset moves a minute later every day of the year
+        requestedDates = []
+        def solarTimesForDate( date ):
+            requestedDates.append( date )
+            return { SolarAnchor.SUNSET : 20 * 60 + date.timetuple().tm_yday }
+
+        # 2020-06-03 is a Wednesday, tuesday resolves for the day before
+        wednesday = datetime.date( 2020, 6, 3 )
+        assert( blindsSchedule.resolveSolarAnchors( wednesday, solarTimesForDate ) == True )
+        assert( requestedDates == [ datetime.date( 2020, 6, 2 ) ] )
+        assert( evening._start == datetime.time( 22, 4 ) )
+        assert( blindsSchedule.timeBlockAt( datetime.datetime( 2020, 6, 2, 22, 4 ) ) is evening )
+
+        # only once per day
+        assert( blindsSchedule.resolveSolarAnchors( wednesday, solarTimesForDate ) == False )
+        assert( len( requestedDates ) == 1 )
+
+        # from thursday, tuesday is 5 days ahead
+        blindsSchedule.resolveSolarAnchors( datetime.date( 2020, 6, 4 ), solarTimesForDate )
+        assert( requestedDates[ -1 ] == datetime.date( 2020, 6, 9 ) )
+
+        # time blocks conflicting at the resolved times keep their previous times
+        sched[ BlindsSchedule.TUESDAY ].append( ScheduleTimeBlock( datetime.time( 21, 00 ), datetime.time( 22, 00 ), BlindMode.ECO, None ) )
+        blindsSchedule.sortScheduleBlocks()
+        blindsSchedule.checkHasNoTimeConflicts()
+        with pytest.raises( BlindSchedulingException ):
+            blindsSchedule.resolveSolarAnchors( datetime.date( 2020, 6, 5 ), lambda date: { SolarAnchor.SUNSET : 21 * 60 } )
+        assert( evening._start == datetime.time( 22, 11 ) )
+        assert( blindsSchedule.timeBlockAt( datetime.datetime( 2020, 6, 2, 22, 30 ) ) is evening )
+
+    '''
+    Test for overrides of the weekly schedule on a range of dates, their lookup by date and their serialization
+    '''
+    def test_overrides( self ):
+        sched = { day : [] for day in BlindsSchedule.DAYS_OF_WEEK }
+        sched[ BlindsSchedule.THURSDAY ].append( ScheduleTimeBlock( datetime.time( 8, 00 ), datetime.time( 17, 00 ), BlindMode.ECO, None ) )
+        night = ScheduleTimeBlock( datetime.time( 22, 00 ), datetime.time( 7, 00 ), BlindMode.DARK, None )
+        vacation = ScheduleOverride( datetime.date( 2020, 12, 24 ), datetime.date( 2021, 1, 3 ), BlindMode.ECO, timeBlocks=[ night ], 
+                name="Vacation", setpoint=16 )
+        holiday = ScheduleOverride( datetime.date( 2021, 2, 15 ), datetime.date( 2021, 2, 15 ), BlindMode.LIGHT )
+        blindsSchedule = BlindsSchedule( BlindMode.LIGHT, None, schedule=sched, timezone=timezone( "Etc/GMT+7" ), 
+                overrides=[ vacation, holiday ] )
+
+        # 2020-12-31 is a Thursday
+        assert( blindsSchedule.overrideAt( datetime.datetime( 2020, 12, 31, 12, 0 ) ) is vacation )
+        assert( blindsSchedule.overrideAt( datetime.datetime( 2021, 1, 3, 23, 59 ) ) is vacation )
+        assert( blindsSchedule.overrideAt( datetime.datetime( 2021, 1, 4, 0, 0 ) ) is None )
+        assert( blindsSchedule.overrideAt( datetime.datetime( 2021, 2, 15, 9, 0 ) ) is holiday )
+        assert( vacation.timeBlockAt( datetime.datetime( 2020, 12, 31, 12, 0 ) ) is None )
+        assert( vacation.timeBlockAt( datetime.datetime( 2020, 12, 31, 23, 0 ) ) is night )
+        assert( vacation.timeBlockAt( datetime.datetime( 2021, 1, 1, 6, 59 ) ) is night )
+        # the weekly schedule itself is unchanged
+        assert( blindsSchedule.timeBlockAt( datetime.datetime( 2020, 12, 31, 12, 0 ) )._mode == BlindMode.ECO )
+
+        # serialized with the schedule, schedules without overrides keep their format
+        scheduleDict = BlindsSchedule.toDict( blindsSchedule )
+        assert( scheduleDict[ "overrides" ][ 0 ] == {
+            "start": "2020-12-24",
+            "end": "2021-01-03",
+            "name": "Vacation",
+            "mode": "ECO",
+            "position": None,
+            "setpoint": 16,
+            "schedule": [ { "start": "22:00:00", "end": "07:00:00", "mode": "DARK", "position": None } ]
+        } )
+        restored = BlindsSchedule.fromDict( scheduleDict )
+        assert( restored._overrides == [ vacation, holiday ] )
+        assert( restored.overrideAt( datetime.datetime( 2021, 2, 15 ) ) == holiday )
+        assert( "overrides" not in BlindsSchedule.toDict( BlindsSchedule( BlindMode.LIGHT ) ) )
+
+        # overrides may not overlap
+        blindsSchedule._overrides.append( ScheduleOverride( datetime.date( 2021, 1, 3 ), datetime.date( 2021, 1, 5 ), BlindMode.DARK ) )
+        with pytest.raises( BlindSchedulingException ):
+            blindsSchedule.checkHasNoTimeConflicts()
+
+        with pytest.raises( InvalidBlindsScheduleException ):
+            ScheduleOverride( datetime.date( 2021, 1, 3 ), datetime.date( 2021, 1, 2 ), BlindMode.DARK )
+        with pytest.raises( InvalidBlindsScheduleException ):
+            ScheduleOverride( datetime.date( 2021, 1, 1 ), datetime.date( 2022, 1, 2 ), BlindMode.DARK )
+        with pytest.raises( InvalidBlindsScheduleException ):
+            ScheduleOverride.fromDict( { "start": "2021-13-01", "end": "2021-13-02", "mode": "DARK" } )
+        with pytest.raises( BlindSchedulingException ):
+            ScheduleOverride( datetime.date( 2021, 1, 1 ), datetime.date( 2021, 1, 1 ), BlindMode.DARK, timeBlocks=[ 
+                night, ScheduleTimeBlock( datetime.time( 6, 00 ), datetime.time( 8, 00 ), BlindMode.LIGHT, None ) ] )
+
     '''
     Test for timezone string parsing without error
     '''
@@ -316,3 +444,28 @@ class TestScheduleTimeBlock:
 
             with pytest.raises( InvalidBlindsScheduleException ):
                 parsedSched = BlindsSchedule.fromJson( scheduleJson )
+
+    '''
+    Test that schedules created without time blocks do not share their schedule dictionary
+    '''
+    def test_defaultScheduleNotShared( self ):
+        sched1 = BlindsSchedule( BlindMode.DARK )
+        sched2 = BlindsSchedule( BlindMode.LIGHT )
+
+        sched1._schedule[ BlindsSchedule.MONDAY ].append( ScheduleTimeBlock( datetime.time( 1, 0 ), datetime.time( 2, 0 ), BlindMode.LIGHT ) )
+
+        assert ( sched2._schedule[ BlindsSchedule.MONDAY ] == [] )
+
+    '''
+    Test for the default setpoint, only serialized when set and validated for its range
+    '''
+    def test_defaultSetpoint( self ):
+        blindsSchedule = BlindsSchedule( BlindMode.ECO, default_setpoint=20 )
+        scheduleDict = BlindsSchedule.toDict( blindsSchedule )
+        assert( scheduleDict[ "default_setpoint" ] == 20 )
+        assert( BlindsSchedule.fromDict( scheduleDict )._default_setpoint == 20 )
+
+        assert( "default_setpoint" not in BlindsSchedule.toDict( BlindsSchedule( BlindMode.ECO ) ) )
+
+        with pytest.raises( InvalidBlindsScheduleException ):
+            BlindsSchedule( BlindMode.ECO, default_setpoint=50 )
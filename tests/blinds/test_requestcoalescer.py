@@ -0,0 +1,101 @@
+'''
+Unit tests for the RequestCoalescer, collapsing bursts of requests into a single move
+
+Author: ECE 492 Group 6
+Creation Date: October 19, 2026
+'''
+
+import pytest
+import threading
+import time
+from blinds.request_coalescer import RequestCoalescer
+
+class TestRequestCoalescer:
+    '''
+    Submit jobs from threads, returns the threads and the list the results are appended to
+    '''
+    def submitAll( self, coalescer, jobs ):
+        results = []
+        threads = [ threading.Thread( target=lambda job=job: results.append( coalescer.submit( job ) ) ) for job in jobs ]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    '''
+    Wait until the coalescer has a number of waiting requests
+    '''
+    def waitForRequests( self, coalescer, count ):
+        deadline = time.monotonic() + 5
+        while len( coalescer._waiting ) < count:
+            assert ( time.monotonic() < deadline )
+            time.sleep( 0.001 )
+
+    '''
+    Test that a single request runs its job right away
+    '''
+    def test_submit( self ):
+        coalescer = RequestCoalescer()
+        assert ( coalescer.submit( lambda: 7 ) == 7 )
+        assert ( not coalescer.cancelEvent.is_set() )
+
+    '''
+    Test that requests made during a move cancel it, and only the latest of them runs next. Every request gets the 
+    result of the latest
+    '''
+    def test_supersede_running( self ):
+        coalescer = RequestCoalescer()
+        gate = threading.Event()
+        ran = []
+        cancelled = []
+
+        def job( value ):
+            def run():
+                ran.append( value )
+                if value == 1:
+                    gate.wait()
+                    cancelled.append( coalescer.cancelEvent.is_set() )
+                return value
+            return run
+
+        threads, results = self.submitAll( coalescer, [ job( 1 ) ] )
+        self.waitForRequests( coalescer, 1 )
+        while not ran:
+            time.sleep( 0.001 )
+
+        moreThreads, moreResults = self.submitAll( coalescer, [ job( 2 ) ] )
+        self.waitForRequests( coalescer, 2 )
+        lastThreads, lastResults = self.submitAll( coalescer, [ job( 3 ) ] )
+        self.waitForRequests( coalescer, 3 )
+        gate.set()
+
+        for thread in threads + moreThreads + lastThreads:
+            thread.join( 5 )
+        assert ( ran == [ 1, 3 ] )
+        assert ( cancelled == [ True ] )
+        assert ( results + moreResults + lastResults == [ 3, 3, 3 ] )
+
+    '''
+    Test that a burst within the window is collapsed into a single job
+    '''
+    def test_window( self ):
+        coalescer = RequestCoalescer( window=0.2 )
+        ran = []
+        threads, results = self.submitAll( coalescer, [ lambda value=value: ran.append( value ) or value for value in range( 5 ) ] )
+        for thread in threads:
+            thread.join( 5 )
+
+        assert ( len( ran ) == 1 )
+        assert ( results == ran * 5 )
+
+    '''
+    Test that the exception of the final job is raised to every request of the burst
+    '''
+    def test_error( self ):
+        coalescer = RequestCoalescer()
+        def fail():
+            raise ValueError( "failed" )
+
+        with pytest.raises( ValueError ):
+            coalescer.submit( fail )
+        # the coalescer is ready for the next burst
+        assert ( coalescer.submit( lambda: 1 ) == 1 )
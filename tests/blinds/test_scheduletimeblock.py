@@ -8,7 +8,7 @@ Creation Date: February 20, 2020
 import pytest
 import datetime
 import json
-from blinds.blinds_schedule import BlindMode, ScheduleTimeBlock, InvalidTimeBlockException
+from blinds.blinds_schedule import BlindMode, ScheduleTimeBlock, SolarAnchor, InvalidTimeBlockException
 
 class TestScheduleTimeBlock: 
 
@@ -58,12 +58,28 @@ class TestScheduleTimeBlock:
         position = 7
 
         timeBlock = ScheduleTimeBlock( startTime, endTime, mode, position )
-        timeBlock._start = endTime
-        timeBlock._end = startTime
+        timeBlock._end = "17:55"
 
         with pytest.raises( InvalidTimeBlockException ):
             timeBlock.validate()
 
+    '''
+    Test for time blocks crossing midnight, which end at or before their start
+    '''
+    def test_crossesMidnight( self ):
+        timeBlock = ScheduleTimeBlock( datetime.time( 22, 0 ), datetime.time( 6, 30 ), BlindMode.DARK )
+
+        assert( timeBlock.crossesMidnight() )
+        assert( timeBlock.durationMinutes() == 8 * 60 + 30 )
+        assert( timeBlock.checkTime( datetime.time( 23, 0 ) ) == 0 )
+        assert( timeBlock.checkTime( datetime.time( 3, 0 ) ) == 0 )
+        assert( timeBlock.checkTime( datetime.time( 6, 30 ) ) == -1 )
+        assert( timeBlock.checkTime( datetime.time( 12, 0 ) ) == -1 )
+
+        # same start and end is a whole day
+        timeBlock = ScheduleTimeBlock( datetime.time( 8, 0 ), datetime.time( 8, 0 ), BlindMode.DARK )
+        assert( timeBlock.durationMinutes() == ScheduleTimeBlock.MINUTES_PER_DAY )
+
     '''
     Test for validate with invalid mode
     '''
@@ -171,4 +187,68 @@ class TestScheduleTimeBlock:
     def test_invalidDeserialize( self ):
         invalidJson = '''{"start": "12:00:00", "end": "15:00:00", "mode": "MANUAL"}'''
         with pytest.raises( InvalidTimeBlockException ):
-            timeBlock = ScheduleTimeBlock.fromJson( invalidJson )
\ No newline at end of file
+            timeBlock = ScheduleTimeBlock.fromJson( invalidJson )
+
+    '''
+    Test for setpoints, valid for ECO and BALANCED only and only serialized when set
+    '''
+    def test_setpoint( self ):
+        timeBlock = ScheduleTimeBlock( datetime.time( 12, 0 ), datetime.time( 15, 0 ), BlindMode.ECO, None, 19.5 )
+        assert( timeBlock._setpoint == 19.5 )
+        assert( ScheduleTimeBlock.toDict( timeBlock )[ "setpoint" ] == 19.5 )
+        assert( ScheduleTimeBlock.fromJson( ScheduleTimeBlock.toJson( timeBlock ) ) == timeBlock )
+        assert( timeBlock != ScheduleTimeBlock( datetime.time( 12, 0 ), datetime.time( 15, 0 ), BlindMode.ECO, None, 21 ) )
+
+        timeBlock.update( mode=BlindMode.BALANCED, setpoint=24 )
+        assert( timeBlock._setpoint == 24 )
+
+        timeBlock.update( mode=BlindMode.LIGHT )
+        assert( timeBlock._setpoint is None )
+        assert( "setpoint" not in ScheduleTimeBlock.toDict( timeBlock ) )
+
+        with pytest.raises( InvalidTimeBlockException ):
+            ScheduleTimeBlock( datetime.time( 12, 0 ), datetime.time( 15, 0 ), BlindMode.LIGHT, None, 20 )
+        with pytest.raises( InvalidTimeBlockException ):
+            ScheduleTimeBlock( datetime.time( 12, 0 ), datetime.time( 15, 0 ), BlindMode.ECO, None, 40 )
+        with pytest.raises( InvalidTimeBlockException ):
+            ScheduleTimeBlock( datetime.time( 12, 0 ), datetime.time( 15, 0 ), BlindMode.ECO, None, "20" )
+
+    '''
+    Test for time blocks starting or ending relative to sunrise, solar noon or sunset
+    '''
+    def test_solarAnchors( self ):
+        timeBlockDict = {
+            "start": "sunset-30",
+            "end": "23:00:00",
+            "mode": "DARK",
+            "position": None
+        }
+        timeBlock = ScheduleTimeBlock.fromDict( timeBlockDict )
+
+        assert( timeBlock._startAnchor == SolarAnchor( SolarAnchor.SUNSET, -30 ) )
+        assert( timeBlock.hasSolarAnchors() )
+        assert( ScheduleTimeBlock.toDict( timeBlock ) == timeBlockDict )
+        # nominal times until resolved
+        assert( timeBlock._start == datetime.time( 17, 30 ) )
+
+        timeBlock.resolveSolarAnchors( { SolarAnchor.SUNRISE : 330, SolarAnchor.SOLAR_NOON : 810, SolarAnchor.SUNSET : 1290 } )
+        assert( timeBlock._start == datetime.time( 21, 0 ) )
+        assert( timeBlock._end == datetime.time( 23, 0 ) )
+        # equal to the same anchors whatever they resolved to
+        assert( timeBlock == ScheduleTimeBlock.fromDict( timeBlockDict ) )
+        assert( timeBlock != ScheduleTimeBlock( datetime.time( 21, 0 ), datetime.time( 23, 0 ), BlindMode.DARK ) )
+
+        for anchorStr, expected in ( ( "sunrise+15", SolarAnchor( SolarAnchor.SUNRISE, 15 ) ), ( "solar_noon", SolarAnchor( SolarAnchor.SOLAR_NOON ) ) ):
+            assert( ScheduleTimeBlock.parseTime( anchorStr ) == expected )
+            assert( str( expected ) == anchorStr )
+
+        # resolved times stay within the day
+        assert( SolarAnchor( SolarAnchor.SUNRISE, -600 ).resolve( { SolarAnchor.SUNRISE : 300 } ) == datetime.time( 0, 0 ) )
+        assert( SolarAnchor( SolarAnchor.SUNSET, 300 ).resolve( { SolarAnchor.SUNSET : 1320 } ) == ScheduleTimeBlock.END_OF_DAY )
+
+        with pytest.raises( InvalidTimeBlockException ):
+            SolarAnchor( "moonrise" )
+        with pytest.raises( InvalidTimeBlockException ):
+            SolarAnchor( SolarAnchor.SUNSET, 1440 )
+        with pytest.raises( ValueError ):
+            ScheduleTimeBlock.parseTime( "sunset+" )
@@ -6,13 +6,43 @@ Author: Alex (Yin) Chen
 Creation Date: February 2, 2020
 '''
 import pytest
+import contextlib
 import datetime
+import threading
+import time
+import controlalgorithm.persistent_data as p_data
 from blinds.blinds_api import Blinds, SmartBlindsSystem
 from blinds.blinds_schedule import BlindMode, ScheduleTimeBlock, BlindsSchedule
 from blinds.blinds_command import BlindsCommand
+from blinds.clock import SimulatedClock
+from controlalgorithm.solar_table import SolarTable
+from pytz import timezone
 from tempsensor.tempsensor import MockTemperatureSensor
 from requests import codes as RESP_CODES
 from unittest.mock import MagicMock
+from storage.store import SmartBlindsStore
+from easydriver.easydriver import StepDirection
+from controlalgorithm.thermal_model import ThermalController
+from httpclient.client import HttpClientException
+
+'''
+Stand-in for the motor driver that blocks the first step until its gate is opened, to hold a move in flight
+'''
+class GatedDriver:
+    microstep_resolution = None
+
+    def __init__( self ):
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.steps = []
+
+    def step( self, steps=1, direction=StepDirection.FORWARD ):
+        self.started.set()
+        self.gate.wait( 5 )
+        self.steps.append( ( steps, direction ) )
+
+    def stream( self ):
+        return contextlib.nullcontext( self )
 
 '''
 Class for testing the blinds API
@@ -20,6 +50,13 @@ TODO: Current is WIP, more work needed to first fill out the API code and extend
 '''
 class TestSmartBlindsSystemApi:
 
+    '''Runs every test against a temporary copy of the persistent data and position journal
+    '''
+    @pytest.fixture( autouse=True )
+    def isolatedData( self ):
+        with p_data.isolated_persistent_data():
+            yield
+
     '''Creates and returns a fresh instance of the blinds system for each test case
     
     Yields:
@@ -106,3 +143,125 @@ class TestSmartBlindsSystemApi:
         # not checking the response data for regular cases because it is taken from return values of 
         # BlindsCommand.toTimeBlock, which are tested in test_blindscommand
         assert ( blindsSystem.postBlindsCommand( BlindsCommand.toDict( command1 ) )[1] == RESP_CODES[ "ACCEPTED" ] )
+
+    '''
+    Test that the preview follows the active command until its end and then the schedule
+    '''
+    def test_getPreview( self ):
+        tz = timezone( "Etc/GMT+6" )
+        start = tz.localize( datetime.datetime( 2020, 3, 2, 10, 0 ) )
+        blindsSystem = SmartBlindsSystem( Blinds( None, None ), BlindsSchedule( BlindMode.DARK, timezone=tz ), MockTemperatureSensor(), 
+                clock=SimulatedClock( start ), solarTable=SolarTable( 53.5, -113.5, tz ), 
+                environment=MagicMock( get_forecast=MagicMock( return_value=None ), get_weather=MagicMock( return_value=( 30, 5 ) ) ) )
+        blindsSystem.postBlindsCommand( BlindsCommand.toDict( BlindsCommand( BlindMode.MANUAL, 30, 20 ) ) )
+
+        data, status = blindsSystem.getPreview( hours="2" )
+        assert ( status == RESP_CODES[ "OK" ] )
+        assert ( data[ "start" ] == start.isoformat() and data[ "hours" ] == 2 )
+        assert ( data[ "timeline" ] == [ 
+                { "time" : "2020-03-02T10:00:00-06:00", "mode" : "MANUAL", "position" : 20 },
+                { "time" : "2020-03-02T10:30:00-06:00", "mode" : "DARK", "position" : -100 } ] )
+        assert ( data[ "moves" ] >= 1 and data[ "steps" ] > 0 )
+
+        for hours in ( 0, 49, "abc" ):
+            assert ( blindsSystem.getPreview( hours=hours )[1] == RESP_CODES[ "BAD_REQUEST" ] )
+
+    '''
+    Test that the schedule and active command are saved to the store and restored by a new system
+    '''
+    def test_restoreFromStore( self ):
+        store = SmartBlindsStore( ":memory:" )
+        blindsSystem = SmartBlindsSystem( Blinds( None, None ), BlindsSchedule( BlindMode.DARK ), MockTemperatureSensor(), store=store )
+
+        scheduleBlocks = { day : [] for day in BlindsSchedule.DAYS_OF_WEEK }
+        scheduleBlocks[ BlindsSchedule.MONDAY ].append( ScheduleTimeBlock( datetime.time( 12, 00 ), datetime.time( 15, 00 ), BlindMode.MANUAL, 20 ) )
+        schedule = BlindsSchedule.toDict( BlindsSchedule( BlindMode.LIGHT, schedule=scheduleBlocks ) )
+        assert ( blindsSystem.postSchedule( schedule )[1] == RESP_CODES[ "ACCEPTED" ] )
+        command = BlindsCommand.toDict( BlindsCommand( BlindMode.MANUAL, 30, -5 ) )
+        timeBlock = blindsSystem.postBlindsCommand( command )[0]
+        until = timeBlock.pop( "until" )
+
+        restored = SmartBlindsSystem( Blinds( None, None ), BlindsSchedule( BlindMode.DARK ), MockTemperatureSensor(), store=store )
+        assert ( restored.getSchedule()[0] == schedule )
+        commandBlock, commandEnd = restored._activeCommand
+        assert ( ScheduleTimeBlock.toDict( commandBlock ) == timeBlock )
+        assert ( commandEnd.isoformat() == until )
+
+        restored.deleteBlindsCommand()
+        assert ( store.commands.get_active() is None )
+        assert ( len( store.schedules.versions() ) == 1 )
+        store.close()
+
+    '''
+    Test that POST position requests made during a move cancel it at a step boundary, and that every request gets the 
+    response of the move to the latest position
+    '''
+    def test_postPosition_coalesced( self ):
+        driver = GatedDriver()
+        with p_data.isolated_persistent_data():
+            blinds = Blinds( driver, None )
+            blinds.calibratePosition()
+            blindsSystem = SmartBlindsSystem( blinds, BlindsSchedule( BlindMode.DARK ), MockTemperatureSensor() )
+
+            responses = []
+            def post( position ):
+                thread = threading.Thread( target=lambda: responses.append( blindsSystem.postPosition( { "position" : position } ) ) )
+                thread.start()
+                return thread
+
+            threads = [ post( 100 ) ]
+            assert ( driver.started.wait( 5 ) )
+            for position, waiting in ( ( 50, 2 ), ( -30, 3 ) ):
+                threads.append( post( position ) )
+                while len( blindsSystem._coalescer._waiting ) < waiting:
+                    time.sleep( 0.001 )
+            driver.gate.set()
+            for thread in threads:
+                thread.join( 5 )
+
+            # the move to 100 stopped after its first chunk, the move to 50 never started
+            directions = [ direction for _, direction in driver.steps ]
+            assert ( directions[ 0 ] == StepDirection.FORWARD and set( directions[ 1: ] ) == { StepDirection.REVERSE } )
+            assert ( [ status for _, status in responses ] == [ RESP_CODES[ "OK" ] ] * 3 )
+            assert ( all( data == responses[ 0 ][ 0 ] for data, _ in responses ) )
+            assert ( responses[ 0 ][ 0 ][ "target" ] == -30 )
+            assert ( responses[ 0 ][ 0 ][ "position" ] == pytest.approx( -30, abs=1 ) )
+            assert ( p_data.get_motor_microsteps() == blinds.motorMicrosteps )
+
+            assert ( blindsSystem.postPosition( { "position" : 101 } )[1] == RESP_CODES[ "BAD_REQUEST" ] )
+
+    '''
+    Test that the thermal model only observes the updates of the modes that use it, and skips the samples while the 
+    weather is not available
+    '''
+    def test_thermalObservation_weatherOutage( self ):
+        driver = GatedDriver()
+        driver.gate.set()
+        environment = MagicMock( get_weather=MagicMock( side_effect=HttpClientException( "DarkSky is down" ) ), 
+                get_solar_angle=MagicMock( return_value=30 ) )
+        thermalController = ThermalController()
+        blindsSystem = SmartBlindsSystem( Blinds( driver, None ), BlindsSchedule( BlindMode.DARK ), MockTemperatureSensor(), 
+                environment=environment, thermalController=thermalController )
+
+        blindsSystem.do_blinds_update( BlindMode.DARK )
+        blindsSystem.do_blinds_update( BlindMode.MANUAL, 20 )
+        assert ( not environment.get_weather.called )
+
+        blindsSystem._observeThermalConditions( datetime.datetime.now() )
+        assert ( environment.get_weather.called )
+        assert ( thermalController.applied( 0 ) is None )
+
+    '''
+    Test that the active command is replaced as a whole, and that clearing an expired command leaves a newer one
+    '''
+    def test_activeCommand_swap( self, blindsSystem ):
+        blindsSystem.postBlindsCommand( BlindsCommand.toDict( BlindsCommand( BlindMode.MANUAL, 30, 20 ) ) )
+        expired = blindsSystem._activeCommand
+        assert ( expired[ 0 ]._position == 20 and expired[ 1 ] is not None )
+
+        blindsSystem.postBlindsCommand( BlindsCommand.toDict( BlindsCommand( BlindMode.MANUAL, 30, -40 ) ) )
+        blindsSystem._clearActiveCommand( expired=expired )
+        assert ( blindsSystem._activeCommand[ 0 ]._position == -40 )
+
+        blindsSystem._clearActiveCommand()
+        assert ( blindsSystem._activeCommand is None )
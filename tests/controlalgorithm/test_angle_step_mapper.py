@@ -0,0 +1,146 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the per move step resolution planning and the calibration of the angle step mapper
+"""
+
+import unittest
+import unittest.mock
+
+import controlalgorithm.persistent_data as p_data
+from controlalgorithm.angle_step_mapper import AngleStepMapper, CalibrationTable, MICROSTEPS_PER_STEP, \
+    resolution_for_accuracy, tilt_angle_to_microsteps, microsteps_to_tilt_angle
+from easydriver.easydriver import MicroStepResolution, StepDirection
+
+"""
+Test class for the angle step mapper.
+Inherits from the TestCase class
+"""
+class TestAngleStepMapper(unittest.TestCase):
+    def setUp(self):
+        self.mapper = AngleStepMapper()
+
+    def apply(self, position, segments):
+        for resolution, num_steps, direction in segments:
+            # steps are only taken from positions aligned to their resolution
+            self.assertEqual(position % MICROSTEPS_PER_STEP[resolution], 0)
+            sign = 1 if direction == StepDirection.FORWARD else -1
+            position += sign * num_steps * MICROSTEPS_PER_STEP[resolution]
+        return position
+
+    def test_resolution_for_accuracy(self):
+        self.assertEqual(resolution_for_accuracy(0.9), MicroStepResolution.FULL_STEP)
+        self.assertEqual(resolution_for_accuracy(0.5), MicroStepResolution.HALF_STEP)
+        self.assertEqual(resolution_for_accuracy(0.01), MicroStepResolution.EIGHTH_STEP)
+
+    def test_decompose_coarse_then_fine(self):
+        segments = self.mapper.decompose_move(0, 21)
+        self.assertEqual(segments, [
+            (MicroStepResolution.FULL_STEP, 2, StepDirection.FORWARD),
+            (MicroStepResolution.HALF_STEP, 1, StepDirection.FORWARD),
+            (MicroStepResolution.EIGHTH_STEP, 1, StepDirection.FORWARD),
+        ])
+
+        # unaligned start is first brought onto the full step grid
+        segments = self.mapper.decompose_move(3, -13)
+        self.assertEqual(segments[0], (MicroStepResolution.EIGHTH_STEP, 1, StepDirection.REVERSE))
+        self.assertEqual(self.apply(3, segments), -13)
+        self.assertEqual(self.mapper.decompose_move(7, 7), [])
+
+    def test_plan_move_accuracy(self):
+        for accuracy in (0, 0.1, 0.3, 0.9, 2):
+            position = 5
+            for tilt_angle in (45, -12.3, 0.7, 89.9, -90, 3.3):
+                target, segments = self.mapper.plan_move(position, tilt_angle, accuracy)
+                self.assertEqual(self.apply(position, segments), target)
+                # within the accuracy, or the closest eighth step when it is finer than an eighth step
+                self.assertLessEqual(abs(self.mapper.microsteps_to_tilt_angle(target) - tilt_angle),
+                                     max(accuracy, self.mapper.microsteps_to_tilt_angle(0.5) + 1e-9))
+                position = target
+
+    def test_plan_move_prefers_fewer_steps(self):
+        # at the default accuracy an aligned move is made in full steps only
+        target, segments = self.mapper.plan_move(0, 45)
+        self.assertEqual([resolution for resolution, _, _ in segments], [MicroStepResolution.FULL_STEP])
+
+        # exact moves use the closest eighth step, with the minimal number of steps to get there
+        target, segments = self.mapper.plan_move(0, 45, 0)
+        self.assertEqual(target, self.mapper.tilt_angle_to_microsteps(45))
+        self.assertEqual(sum(num_steps for _, num_steps, _ in segments), target // 8 + 1)
+
+    def test_calibration_table(self):
+        table = CalibrationTable([-90, 0, 45, 90], [-600, 0, 200, 520], {StepDirection.REVERSE: -16})
+        mapper = AngleStepMapper(table)
+
+        self.assertEqual(mapper.tilt_angle_to_microsteps(45), 200)
+        self.assertEqual(mapper.tilt_angle_to_microsteps(45, StepDirection.REVERSE), 184)
+        self.assertAlmostEqual(mapper.exact_microsteps(22.5), 100)
+        self.assertAlmostEqual(mapper.exact_microsteps(67.5), 360)
+        # extrapolated from the first and last segments
+        self.assertAlmostEqual(mapper.exact_microsteps(-99), -660)
+
+        # the precompiled lookup of every eighth step agrees with the table
+        for microsteps in range(-610, 530):
+            for direction in (None, StepDirection.FORWARD, StepDirection.REVERSE):
+                tilt_angle = mapper.microsteps_to_tilt_angle(microsteps, direction)
+                self.assertAlmostEqual(mapper.exact_microsteps(tilt_angle, direction or StepDirection.FORWARD), microsteps)
+        self.assertAlmostEqual(mapper.microsteps_to_tilt_angle(100.5), 22.5 * 100.5 / 100)
+
+        # the steepest segment sets the step angle
+        self.assertAlmostEqual(mapper.tilt_angle_per_step(MicroStepResolution.FULL_STEP), 8 * 45 / 200)
+        self.assertEqual(mapper.resolution_for_accuracy(0.9), MicroStepResolution.FULL_STEP)
+        self.assertEqual(mapper.resolution_for_accuracy(0.8), MicroStepResolution.HALF_STEP)
+
+        self.assertEqual(CalibrationTable.from_dict(table.to_dict()).to_dict(), table.to_dict())
+        with self.assertRaises(ValueError):
+            CalibrationTable([0, 10], [5, 5])
+        with self.assertRaises(ValueError):
+            CalibrationTable([0], [0])
+
+    def test_module_functions_follow_calibration(self):
+        table = CalibrationTable([-90, 0, 45, 90], [-600, 0, 200, 520], {StepDirection.REVERSE: -16})
+        with p_data.isolated_persistent_data():
+            self.assertEqual(tilt_angle_to_microsteps(45), self.mapper.tilt_angle_to_microsteps(45))
+
+            p_data.set_calibration(table.to_dict())
+            self.assertEqual(tilt_angle_to_microsteps(45), 200)
+            self.assertAlmostEqual(microsteps_to_tilt_angle(100), 22.5)
+            self.assertEqual(resolution_for_accuracy(0.8), MicroStepResolution.HALF_STEP)
+
+            # the position in degrees takes the backlash of the last move into account
+            p_data.set_motor_microsteps(184, StepDirection.REVERSE)
+            self.assertAlmostEqual(p_data.get_motor_position(), 45)
+            self.assertAlmostEqual(p_data.set_motor_position(22.5), 22.5)
+            self.assertEqual(p_data.get_motor_microsteps(), 100)
+
+    def test_set_calibration_atomic(self):
+        table = CalibrationTable([-90, 90], [-520, 520])
+        with p_data.isolated_persistent_data() as path:
+            p_data.set_calibration(table.to_dict())
+            with open(path, "r") as fp:
+                saved = fp.read()
+
+            # a crash in the middle of writing leaves the previous file in place
+            def partial_dump(data, fp, **kwargs):
+                fp.write('{"calibration": ')
+                raise OSError("power cut")
+            with unittest.mock.patch.object(p_data.json, "dump", side_effect=partial_dump):
+                with self.assertRaises(OSError):
+                    p_data.set_calibration(CalibrationTable([-90, 90], [-600, 600]).to_dict())
+            with open(path, "r") as fp:
+                self.assertEqual(fp.read(), saved)
+            self.assertEqual(p_data.get_calibration(), table.to_dict())
+
+    def test_plan_move_backlash(self):
+        mapper = AngleStepMapper(CalibrationTable([-90, 90], [-520, 520], {StepDirection.REVERSE: -16}))
+
+        target, segments = mapper.plan_move(0, 45, 0, StepDirection.FORWARD)
+        self.assertEqual(target, 260)
+        # reversing takes up the backlash, ending below the position of the angle approached forward
+        target, segments = mapper.plan_move(260, 0, 0, StepDirection.FORWARD)
+        self.assertEqual(target, -16)
+        self.assertEqual(segments[0][2], StepDirection.REVERSE)
+        # the slats are at 0 degrees after the reverse move, so there is nothing to correct
+        self.assertEqual(mapper.plan_move(-16, 0, 0, StepDirection.REVERSE), (-16, []))
+        target, segments = mapper.plan_move(-16, 45, 0, StepDirection.REVERSE)
+        self.assertEqual(target, 260)
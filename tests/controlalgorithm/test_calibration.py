@@ -0,0 +1,75 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the guided calibration routine
+"""
+
+import unittest
+
+from controlalgorithm.angle_step_mapper import AngleStepMapper, MICROSTEPS_PER_STEP
+from controlalgorithm.calibration import CalibrationRoutine
+from easydriver.easydriver import MicroStepResolution, StepDirection
+
+"""
+Stand-in for the motor driver that integrates the shaft position in eighth steps
+"""
+class ShaftDriver:
+    microstep_resolution = MicroStepResolution.FULL_STEP
+
+    def __init__(self):
+        self.shaft_microsteps = 0
+
+    def step(self, steps=1, direction=StepDirection.FORWARD):
+        sign = 1 if direction == StepDirection.FORWARD else -1
+        self.shaft_microsteps += sign * steps * MICROSTEPS_PER_STEP[self.microstep_resolution]
+
+"""
+Test class for the calibration routine.
+Inherits from the TestCase class
+"""
+class TestCalibrationRoutine(unittest.TestCase):
+    def test_routine(self):
+        driver = ShaftDriver()
+        routine = CalibrationRoutine(driver, angles=(90, -90, 0))
+        self.assertEqual(routine.next_angle, -90)
+
+        # down to the closed position and back up, approaching it forward
+        routine.jog(-700)
+        with self.assertRaises(ValueError):
+            routine.record()
+        routine.jog(10)
+        routine.record()
+        routine.jog(590 + 3)
+        routine.record()
+        with self.assertRaises(ValueError):
+            routine.record_backlash()
+        routine.jog(500)
+        routine.record()
+        self.assertIsNone(routine.next_angle)
+        self.assertEqual(driver.shaft_microsteps, routine.position)
+
+        # the slats start to move 12 eighth steps after reversing
+        routine.jog(-12)
+        routine.record_backlash()
+        self.assertEqual(routine.backlash, -12)
+
+        table = routine.table()
+        # horizontal at -97 is moved to the full step closest to 0
+        self.assertEqual(table.microsteps, [-594, -1, 499])
+        self.assertEqual(table.backlash[StepDirection.REVERSE], -12)
+        self.assertEqual(routine.motor_microsteps, 487)
+
+        # the stored position is where the slats are
+        mapper = AngleStepMapper(table)
+        self.assertAlmostEqual(mapper.microsteps_to_tilt_angle(routine.motor_microsteps, routine.direction), 90)
+
+    def test_record_out_of_order(self):
+        routine = CalibrationRoutine(ShaftDriver())
+        routine.jog(10)
+        routine.record()
+        routine.jog(-5)
+        routine.jog(2)
+        with self.assertRaises(ValueError):
+            routine.record()
+        with self.assertRaises(ValueError):
+            routine.table()
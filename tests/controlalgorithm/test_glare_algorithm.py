@@ -0,0 +1,79 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the glare aware sunlight algorithm
+"""
+
+import datetime
+import math
+import unittest
+
+import numpy
+from pytz import timezone
+
+import controlalgorithm.user_defined_exceptions as exceptions
+from controlalgorithm.glare_algorithm import GlareAwareLight, WindowGeometry, glare_free_tilt_angles, OPEN_TILT_ANGLE
+from controlalgorithm.solar_table import SolarTable
+
+"""
+Check if direct sunlight with a profile angle passes between slats at a tilt angle
+"""
+def light_passes(tilt_angle, profile_angle, window):
+    # projection of a slat and of the slat spacing on the normal of the sunlight
+    slat = window.slat_width * abs(math.sin(math.radians(tilt_angle + profile_angle)))
+    return slat < window.slat_spacing * math.cos(math.radians(profile_angle)) - 1e-9
+
+"""
+Test class for the glare aware sunlight algorithm.
+Inherits from the TestCase class
+"""
+class TestGlareAlgorithm(unittest.TestCase):
+    def setUp(self):
+        self.window = WindowGeometry(180, 25, 21)
+
+    def test_cuts_off_sunlight(self):
+        for elevation in (1, 10, 30, 45, 60, 80):
+            tilt_angle = float(glare_free_tilt_angles(elevation, 180, self.window))
+            self.assertFalse(light_passes(tilt_angle, elevation, self.window))
+            # any more open and the sun shines through, unless the slats are horizontal already
+            if tilt_angle > 0:
+                self.assertTrue(light_passes(tilt_angle - 1, elevation, self.window))
+        self.assertEqual(float(glare_free_tilt_angles(80, 180, self.window)), 0)
+
+    def test_sun_not_on_facade(self):
+        tilt_angles = glare_free_tilt_angles([30, 30, -5, 30], [0, 90, 180, 275], self.window)
+        numpy.testing.assert_array_equal(tilt_angles, [OPEN_TILT_ANGLE] * 4)
+
+    def test_oblique_sun(self):
+        # at 60 degrees off the window normal, the sun is higher in the profile of the window
+        profile_angle = math.degrees(math.atan(math.tan(math.radians(15)) / math.cos(math.radians(60))))
+        tilt_angle = float(glare_free_tilt_angles(15, 240, self.window))
+        self.assertFalse(light_passes(tilt_angle, profile_angle, self.window))
+        self.assertTrue(light_passes(tilt_angle - 1, profile_angle, self.window))
+        self.assertLess(tilt_angle, float(glare_free_tilt_angles(15, 180, self.window)))
+
+    def test_invalid_geometry(self):
+        with self.assertRaises(exceptions.InputError):
+            WindowGeometry(360, 25, 21)
+        with self.assertRaises(exceptions.InputError):
+            WindowGeometry(180, 0, 21)
+
+    def test_daily_table(self):
+        tz = timezone("Etc/GMT+7")
+        solar_table = SolarTable(53.5, -113.5, tz)
+        south = GlareAwareLight(self.window, solar_table=solar_table)
+        north = GlareAwareLight(WindowGeometry(0, 25, 21), solar_table=solar_table)
+
+        # low winter sun
+        noon = tz.localize(datetime.datetime(2020, 12, 1, 13, 0))
+        daily_table = solar_table.for_datetime(noon)
+        expected = float(glare_free_tilt_angles(daily_table.elevation_at(noon), daily_table.azimuth_at(noon), self.window))
+        self.assertEqual(south.tilt_angle(noon), expected)
+        self.assertNotEqual(south.tilt_angle(noon), OPEN_TILT_ANGLE)
+        self.assertIs(south.tilt_angles_for_date(noon.date()), south.tilt_angles_for_date(noon.date()))
+
+        self.assertEqual(north.tilt_angle(noon), OPEN_TILT_ANGLE)
+        self.assertEqual(south.tilt_angle(noon.replace(hour=1)), OPEN_TILT_ANGLE)
+
+if __name__ == "__main__":
+    unittest.main()
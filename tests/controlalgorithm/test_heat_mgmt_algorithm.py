@@ -5,15 +5,32 @@ Contents: Unit tests for the Heat Algorithm
 for obtaining the optimal tilt angle for minimum power consumption for energy efficiency
 """
 
+import datetime
+import itertools
 import unittest
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+import numpy
+from pytz import timezone
+
 import controlalgorithm.user_defined_exceptions as exceptions
 import controlalgorithm.heat_mgmt_algorithm as heat_mgmt
 import controlalgorithm.persistent_data as p_data
+from controlalgorithm.solar_table import SolarTable
+from controlalgorithm.weather_forecast import WeatherForecast
 from tempsensor.tempsensor import MockTemperatureSensor
 
+"""
+Temperature sensor returning a fixed temperature
+"""
+class FixedTemperatureSensor:
+    def __init__(self, temperature):
+        self.temperature = temperature
+
+    def getSample(self):
+        return self.temperature
+
 """
 Test class for the control algorithm tests.
 Inherits from the TestCase class
@@ -61,5 +78,102 @@ class TestControlAlgorithms(unittest.TestCase):
         # in actuality motor should do nothing
         self.assertAlmostEqual(heat_mgmt.heat_mgmt_algorithm( MockTemperatureSensor() ), 0, places=0)
 
+    def test_vectorized_matches_scalar(self):
+        ext_temps = [-30, -6, -3, 0, 3, 6, 22, 25, 35]
+        cloud_covers = [0, 24.9, 25, 60, 75, 100]
+        solar_angles = [-10, 0, 30, 60]
+        int_temps = [15, 16, 19, 22, 24, 28, 30]
+
+        conditions = numpy.array(list(itertools.product(ext_temps, cloud_covers, solar_angles, int_temps)))
+        angles = heat_mgmt.heat_mgmt_tilt_angles(conditions[:, 0], conditions[:, 1], conditions[:, 2], conditions[:, 3])
+
+        for (ext_temp, cloud_cover, solar_angle, int_temp), angle in zip(conditions, angles):
+            expected = heat_mgmt.heat_mgmt_algorithm(FixedTemperatureSensor(int_temp), (cloud_cover, ext_temp), solar_angle)
+            self.assertAlmostEqual(angle, expected)
+
+    def test_setpoint(self):
+        sensor = FixedTemperatureSensor(22)
+        # 22 is the setpoint by default: equilibrium inside, nothing to do
+        self.assertAlmostEqual(heat_mgmt.heat_mgmt_algorithm(sensor, (87, 22), 0), 0)
+        # with a setpoint of 18 the same room and weather are hot
+        self.assertEqual(heat_mgmt.heat_mgmt_algorithm(sensor, (87, 22), 0, des_int_temp=18),
+                         heat_mgmt.heat_mgmt_algorithm(FixedTemperatureSensor(26), (87, 26), 0))
+
+        conditions = numpy.array(list(itertools.product([-10, 15, 19, 30], [0, 60], [0, 45], [14, 18, 21, 25])))
+        angles = heat_mgmt.heat_mgmt_tilt_angles(conditions[:, 0], conditions[:, 1], conditions[:, 2], conditions[:, 3], des_int_temp=18)
+        for (ext_temp, cloud_cover, solar_angle, int_temp), angle in zip(conditions, angles):
+            expected = heat_mgmt.heat_mgmt_algorithm(FixedTemperatureSensor(int_temp), (cloud_cover, ext_temp), solar_angle, 18)
+            self.assertAlmostEqual(angle, expected)
+
+"""
+Test class for the predictive mode of the heat management algorithm.
+Inherits from the TestCase class
+"""
+class TestPredictiveHeatMgmt(unittest.TestCase):
+    def setUp(self):
+        self.tz = timezone("Etc/GMT+7")
+        self.solar_table = SolarTable(53.5, -113.5, self.tz)
+        self.start = self.tz.localize(datetime.datetime(2020, 6, 1, 6, 0))
+
+    def forecast(self, fetched_at, cloud_covers, ext_temps):
+        times = [self.start.timestamp() + hour * 3600 for hour in range(len(cloud_covers))]
+        return WeatherForecast(fetched_at, times, cloud_covers, ext_temps)
+
+    def test_follows_forecast_ahead(self):
+        # clear and hot in the morning, overcast and cold from noon
+        forecast = self.forecast(1, [0] * 6 + [100] * 18, [35] * 6 + [-10] * 18)
+        predictive = heat_mgmt.PredictiveHeatMgmt(horizon_hours=12, lead_minutes=60, solar_table=self.solar_table)
+        sensor = FixedTemperatureSensor(25)
+
+        for minutes in (0, 90, 299, 301, 420):
+            date_time = self.start + datetime.timedelta(minutes=minutes)
+            ahead = date_time + datetime.timedelta(minutes=60)
+            weather = tuple(float(value) for value in forecast.at(ahead.timestamp()))
+            expected = heat_mgmt.heat_mgmt_algorithm(sensor, weather, self.solar_table.elevation_at(ahead))
+            self.assertAlmostEqual(predictive.tilt_angle(sensor, date_time, forecast), expected)
+
+    def test_plan_reuse(self):
+        forecast = self.forecast(1, [50] * 24, [0] * 24)
+        predictive = heat_mgmt.PredictiveHeatMgmt(horizon_hours=2, solar_table=self.solar_table)
+        sensor = MockTemperatureSensor()
+
+        predictive.tilt_angle(sensor, self.start, forecast)
+        plan = predictive.plan
+        self.assertEqual(plan.angles.shape, (len(heat_mgmt.TEMP_RANGES), 120))
+
+        predictive.tilt_angle(sensor, self.start + datetime.timedelta(minutes=119), forecast)
+        self.assertIs(predictive.plan, plan)
+
+        # past the horizon, or with a new forecast
+        predictive.tilt_angle(sensor, self.start + datetime.timedelta(minutes=120), forecast)
+        self.assertIsNot(predictive.plan, plan)
+        plan = predictive.plan
+        predictive.tilt_angle(sensor, self.start + datetime.timedelta(minutes=121), self.forecast(2, [50] * 24, [0] * 24))
+        self.assertIsNot(predictive.plan, plan)
+
+    def test_plan_per_setpoint(self):
+        forecast = self.forecast(1, [0] * 24, [18] * 24)
+        predictive = heat_mgmt.PredictiveHeatMgmt(horizon_hours=2, lead_minutes=0, solar_table=self.solar_table)
+        sensor = FixedTemperatureSensor(20)
+
+        for setpoint in (None, 16, 24):
+            expected = heat_mgmt.heat_mgmt_algorithm(sensor, (0, 18), self.solar_table.elevation_at(self.start), setpoint)
+            self.assertAlmostEqual(predictive.tilt_angle(sensor, self.start, forecast, setpoint), expected)
+        plan = predictive.plan
+        self.assertEqual(plan.setpoint, 24)
+
+        # switching between setpoints reuses their plans
+        predictive.tilt_angle(sensor, self.start + datetime.timedelta(minutes=1), forecast, 16)
+        predictive.tilt_angle(sensor, self.start + datetime.timedelta(minutes=2), forecast, 24)
+        self.assertIs(predictive.plan, plan)
+
+    def test_without_forecast(self):
+        predictive = heat_mgmt.PredictiveHeatMgmt(solar_table=self.solar_table)
+        self.assertIsNone(predictive.tilt_angle(MockTemperatureSensor(), self.start, None))
+
+        # a forecast that ended before now is not used
+        forecast = self.forecast(1, [0, 0], [20, 20])
+        self.assertIsNone(predictive.tilt_angle(MockTemperatureSensor(), self.start + datetime.timedelta(hours=2), forecast))
+
 if __name__ == "__main__":
     unittest.main()
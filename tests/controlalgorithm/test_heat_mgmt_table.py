@@ -0,0 +1,99 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the decision table of the heat management algorithm
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import controlalgorithm.user_defined_exceptions as exceptions
+from controlalgorithm.heat_mgmt_table import HeatMgmtTable, DEFAULT_TABLE_FILE, TEMP_RANGES, CLOUD_COVERS, \
+    HOT_INDEX, WARM_INDEX, COOL_INDEX, COLD_INDEX, EQUILIBRIUM_INDEX
+
+"""
+Test class for the heat management decision table.
+Inherits from the TestCase class
+"""
+class TestHeatMgmtTable(unittest.TestCase):
+    def setUp(self):
+        with open(DEFAULT_TABLE_FILE, "r") as fp:
+            self.table_dict = json.load(fp)
+        self.table = HeatMgmtTable.from_dict(self.table_dict)
+
+    def test_default_table(self):
+        self.assertEqual(self.table.evd_cc_tilt_angle(HOT_INDEX, CLOUD_COVERS.index("clear")), 70)
+        self.assertEqual(self.table.evd_cc_tilt_angle(COLD_INDEX, CLOUD_COVERS.index("overcast")), 51)
+        self.assertEqual(self.table.evd_avd_tilt_angle(EQUILIBRIUM_INDEX, COOL_INDEX), -10)
+        # combinations without an entry
+        self.assertEqual(self.table.evd_cc_tilt_angle(EQUILIBRIUM_INDEX, 0), 0)
+        self.assertEqual(self.table.evd_avd_tilt_angle(HOT_INDEX, EQUILIBRIUM_INDEX), 0)
+
+    def test_temp_ranges(self):
+        temps = [10, 6, 5.9, 0.1, 0, -0.1, -5.9, -6, -10]
+        expected = [HOT_INDEX, HOT_INDEX, WARM_INDEX, WARM_INDEX, EQUILIBRIUM_INDEX, COOL_INDEX, COOL_INDEX, COLD_INDEX, COLD_INDEX]
+        self.assertEqual([self.table.temp_range_index(temp) for temp in temps], expected)
+        self.assertEqual(self.table.temp_range_indices(temps).tolist(), expected)
+
+    def test_cloud_covers(self):
+        percentages = [0, 24.9, 25, 49.9, 50, 74.9, 75, 100]
+        expected = [0, 0, 1, 1, 2, 2, 3, 3]
+        self.assertEqual([self.table.cloud_cover_index(percentage) for percentage in percentages], expected)
+        self.assertEqual(self.table.cloud_cover_indices(percentages).tolist(), expected)
+
+        with self.assertRaises(exceptions.InputError):
+            self.table.cloud_cover_index(101)
+        self.assertEqual(self.table.cloud_cover_indices([-5, 120]).tolist(), [0, 3])
+
+    def test_for_setpoint(self):
+        setpoint_table = self.table.for_setpoint(20)
+        self.assertIs(self.table.for_setpoint(20), setpoint_table)
+
+        temps = [30, 26, 25.9, 20.1, 20, 19.9, 14.1, 14, 10]
+        expected = [self.table.temp_range_index(temp - 20) for temp in temps]
+        self.assertEqual([setpoint_table.temp_range_index(temp) for temp in temps], expected)
+        self.assertEqual(setpoint_table.temp_range_indices(temps).tolist(), expected)
+
+    def test_custom_thresholds(self):
+        self.table_dict["temp_thresholds"] = {"hot": 3, "cold": -3, "equilibrium": 1}
+        self.table_dict["cloud_cover_thresholds"] = [10, 20, 90]
+        self.table_dict["evd_cc_tilt_angles"]["hot"]["clear"] = 12
+        table = HeatMgmtTable.from_dict(self.table_dict)
+
+        self.assertEqual([table.temp_range_index(temp) for temp in (3, 2, 1, -1, -2, -3)],
+                         [HOT_INDEX, WARM_INDEX, EQUILIBRIUM_INDEX, EQUILIBRIUM_INDEX, COOL_INDEX, COLD_INDEX])
+        self.assertEqual(table.cloud_cover_index(89), 2)
+        self.assertEqual(table.evd_cc_tilt_angle(HOT_INDEX, 0), 12)
+
+    def test_load(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "table.json")
+            with open(path, "w") as fp:
+                json.dump(self.table_dict, fp)
+            table = HeatMgmtTable.load(path)
+            self.assertTrue(numpy.array_equal(table.evd_avd, self.table.evd_avd))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def test_invalid(self):
+        self.table_dict["temp_thresholds"] = {"hot": -1, "cold": 1}
+        with self.assertRaises(exceptions.InputError):
+            HeatMgmtTable.from_dict(self.table_dict)
+
+        del self.table_dict["temp_thresholds"]
+        with self.assertRaises(exceptions.InputError):
+            HeatMgmtTable.from_dict(self.table_dict)
+
+        self.setUp()
+        self.table_dict["evd_cc_tilt_angles"]["hot"]["sunny"] = 10
+        with self.assertRaises(exceptions.InputError):
+            HeatMgmtTable.from_dict(self.table_dict)
+
+if __name__ == "__main__":
+    unittest.main()
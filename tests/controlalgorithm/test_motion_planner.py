@@ -0,0 +1,118 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the motion planner
+"""
+
+import datetime
+import unittest
+
+from controlalgorithm.motion_planner import MotionPlanner, REASON_MOVE, REASON_NO_CHANGE, REASON_SUB_STEP, \
+    REASON_DEADBAND, REASON_HYSTERESIS, REASON_RATE_LIMITED, REASON_RATE_LIMITED_WAIT
+from easydriver.easydriver import MicroStepResolution
+
+"""
+Test class for the motion planner.
+Inherits from the TestCase class
+"""
+class TestMotionPlanner(unittest.TestCase):
+    def setUp(self):
+        self.start = datetime.datetime(2020, 3, 1, 12, 0)
+
+    def test_quantization(self):
+        planner = MotionPlanner(step_resolution=MicroStepResolution.FULL_STEP)
+        # a full step of the motor tilts the slats by 1.8 / 1.3 degrees
+        self.assertAlmostEqual(planner.position_quantum, 2 / 1.3)
+
+        plan = planner.plan(0, 0.7)
+        self.assertFalse(plan.move)
+        self.assertEqual(plan.reason, REASON_SUB_STEP)
+        self.assertEqual(plan.target_position, 0)
+
+        plan = planner.plan(0, 7.3)
+        self.assertTrue(plan.move)
+        self.assertAlmostEqual(plan.target_position, 5 * 2 / 1.3)
+
+        planner.step_resolution = MicroStepResolution.EIGHTH_STEP
+        self.assertAlmostEqual(planner.position_quantum, 0.25 / 1.3)
+        self.assertAlmostEqual(planner.plan(0, 7.3).target_position, 38 * 0.25 / 1.3)
+
+    def test_exact_moves(self):
+        planner = MotionPlanner(deadband=10, max_rate=1)
+
+        plan = planner.plan(20, 23, self.start, exact=True)
+        self.assertTrue(plan.move)
+        self.assertEqual(plan.target_position, 23)
+
+        self.assertEqual(planner.plan(23, 23, self.start, exact=True).reason, REASON_NO_CHANGE)
+
+    def test_deadband(self):
+        planner = MotionPlanner(deadband=5)
+
+        self.assertEqual(planner.plan(0, 4).reason, REASON_DEADBAND)
+        # drifts are measured from the current position, so they accumulate into one move
+        plan = planner.plan(0, 6)
+        self.assertEqual(plan.reason, REASON_MOVE)
+        self.assertAlmostEqual(plan.target_position, 4 * 2 / 1.3)
+
+    def test_hysteresis(self):
+        planner = MotionPlanner(deadband=4, hysteresis=4)
+
+        self.assertTrue(planner.plan(0, 10).move)
+        # same direction only needs the deadband
+        self.assertTrue(planner.plan(10, 14).move)
+        # reversing needs the deadband and the hysteresis
+        self.assertEqual(planner.plan(14, 8).reason, REASON_HYSTERESIS)
+        self.assertEqual(planner.plan(14, 12).reason, REASON_DEADBAND)
+        self.assertTrue(planner.plan(14, 4).move)
+
+    def test_rate_limit(self):
+        planner = MotionPlanner(max_rate=2)
+
+        self.assertTrue(planner.plan(0, 50, self.start).move)
+
+        plan = planner.plan(50, 60, self.start + datetime.timedelta(seconds=30))
+        self.assertEqual(plan.reason, REASON_RATE_LIMITED_WAIT)
+
+        plan = planner.plan(50, 60, self.start + datetime.timedelta(minutes=2))
+        self.assertEqual(plan.reason, REASON_RATE_LIMITED)
+        # 4% in 2 minutes is 2 full steps
+        self.assertAlmostEqual(plan.target_position, 50 + 2 * 2 / 1.3)
+
+    def test_estimates(self):
+        planner = MotionPlanner(speed=30)
+
+        plan = planner.plan(0, 9.3)
+        # 6 full steps of 1.8 / 1.3 degrees of slat tilt each
+        self.assertEqual(plan.num_steps, 6)
+        self.assertAlmostEqual(plan.motor_seconds, 0.201, places=3)
+        self.assertGreater(plan.energy_joules, 0)
+
+        planner.plan(plan.target_position, plan.target_position)
+        self.assertEqual(planner.stats["moves"], 1)
+        self.assertEqual(planner.stats["skipped"], 1)
+        self.assertEqual(planner.stats["steps"], 6)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            MotionPlanner(deadband=-1)
+
+    def test_preview(self):
+        planner = MotionPlanner(deadband=5, hysteresis=5, max_rate=10)
+        planner.plan(0, 20, self.start)
+        requested = [20, 23, 40, 40, 10, 12, -50, 30]
+        exact = [False] * 6 + [True, False]
+        times = [self.start + datetime.timedelta(minutes=minute) for minute in range(1, 9)]
+
+        positions, totals = planner.preview(20.0, requested, exact, times)
+        self.assertEqual(planner.stats["moves"], 1)
+
+        # same positions and totals as planning each update in turn
+        expected = []
+        for requested_position, is_exact, now in zip(requested, exact, times):
+            current_position = expected[-1] if expected else 20.0
+            expected.append(planner.plan(current_position, requested_position, now, exact=is_exact).target_position)
+        self.assertEqual(list(positions), expected)
+        self.assertEqual(totals["moves"], planner.stats["moves"] - 1)
+        self.assertEqual(totals["steps"], planner.stats["steps"] - planner.estimate(0, 20)[0])
+        self.assertAlmostEqual(totals["energy_joules"], planner.stats["energy_joules"] - planner.estimate(0, 20)[2])
@@ -0,0 +1,141 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the append-only position journal
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+import controlalgorithm.persistent_data as p_data
+import controlalgorithm.position_journal as journal_module
+from controlalgorithm.position_journal import PositionJournal, recover
+
+"""
+Test class for the position journal.
+Inherits from the TestCase class
+"""
+class TestPositionJournal(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "position_journal.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def read_records(self):
+        with open(self.path, "r") as fp:
+            return [json.loads(line) for line in fp]
+
+    def test_recover_committed(self):
+        journal = PositionJournal(self.path)
+        self.assertEqual(journal.open(default_position=40).position, 40)
+
+        journal.begin(40, 300)
+        journal.progress(104)
+        journal.commit(300)
+        journal.close()
+
+        state = recover(self.path)
+        self.assertEqual(state.position, 300)
+        self.assertFalse(state.interrupted)
+
+    def test_recover_interrupted(self):
+        journal = PositionJournal(self.path)
+        journal.open()
+        journal.begin(0, 520)
+        journal.progress(64)
+        journal.progress(128)
+        # power cut in the middle of writing the next record
+        journal._fp.write('{"type":"progress","seq":1,"posi')
+        journal.close()
+
+        state = recover(self.path)
+        self.assertTrue(state.interrupted)
+        self.assertEqual(state.position, 128)
+        self.assertEqual(state.target, 520)
+
+        # the interrupted move is kept through compaction until the next move
+        reopened = PositionJournal(self.path)
+        self.assertTrue(reopened.open().interrupted)
+        self.assertEqual(reopened.position, 128)
+        reopened.commit(0)
+        reopened.close()
+        self.assertFalse(recover(self.path).interrupted)
+
+    def test_compaction(self):
+        journal = PositionJournal(self.path, compact_records=50)
+        journal.open()
+        for i in range(1, 40):
+            journal.begin(i - 1, i)
+            journal.commit(i)
+        journal.close()
+        self.assertLessEqual(len(self.read_records()), 50)
+
+        reopened = PositionJournal(self.path)
+        self.assertEqual(reopened.open().position, 39)
+        self.assertEqual(self.read_records(), [{"type": "commit", "seq": 39, "position": 39}])
+
+        # moves after a restart continue the sequence numbers on disk
+        reopened.begin(39, 40)
+        reopened.commit(40)
+        reopened.close()
+        self.assertEqual([record["seq"] for record in self.read_records()], [39, 40, 40])
+
+    def test_direction(self):
+        journal = PositionJournal(self.path)
+        self.assertIsNone(journal.open().direction)
+        journal.begin(0, 520)
+        self.assertEqual(journal.state.direction, 1)
+        journal.commit(520, 1)
+        journal.begin(520, 300)
+        journal.commit(300, -1)
+        journal.close()
+        self.assertEqual(recover(self.path).direction, -1)
+
+        # kept through compaction
+        reopened = PositionJournal(self.path)
+        self.assertEqual(reopened.open().direction, -1)
+        self.assertEqual(self.read_records(), [{"type": "commit", "seq": 2, "position": 300, "direction": -1}])
+
+        # unknown after a position set without a move, and taken from the intent of an interrupted move
+        reopened.commit(0)
+        reopened.begin(0, -40)
+        reopened.close()
+        self.assertEqual(recover(self.path).direction, -1)
+        self.assertTrue(recover(self.path).interrupted)
+
+    def test_batched_fsync(self):
+        journal = PositionJournal(self.path, sync_interval=3600)
+        journal.open()
+
+        with unittest.mock.patch.object(journal_module.os, "fsync", wraps=os.fsync) as fsync:
+            for i in range(10):
+                journal.begin(i * 8, (i + 1) * 8)
+                journal.progress(i * 8 + 4)
+                journal.commit((i + 1) * 8)
+            # only the intents are synced, each one also covering the commit of the previous move
+            self.assertEqual(fsync.call_count, 10)
+
+            journal.sync()
+            self.assertEqual(fsync.call_count, 11)
+        journal.close()
+
+    def test_migrates_legacy_position(self):
+        with p_data.isolated_persistent_data() as data_file:
+            with open(data_file, "r") as fp:
+                data = json.load(fp)
+            data.pop("motor_microsteps", None)
+            data["motor_position"] = 45
+            with open(data_file, "w") as fp:
+                json.dump(data, fp)
+            if os.path.isfile(p_data.position_journal_file):
+                os.remove(p_data.position_journal_file)
+
+            self.assertEqual(p_data.get_motor_microsteps(), 260)
+            p_data.set_motor_microsteps(100)
+            self.assertEqual(recover(p_data.position_journal_file).position, 100)
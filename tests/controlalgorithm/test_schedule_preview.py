@@ -0,0 +1,82 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the vectorized schedule preview
+"""
+
+import unittest
+
+import numpy
+
+from controlalgorithm.composite_algorithm import composite_algorithm
+from controlalgorithm.glare_algorithm import WindowGeometry, glare_free_tilt_angles
+from controlalgorithm.heat_mgmt_algorithm import heat_mgmt_algorithm
+from controlalgorithm.max_sunlight_algorithm import max_sunlight_algorithm
+from controlalgorithm.schedule_preview import preview_positions, change_indices, MODE_LIGHT, MODE_DARK, MODE_ECO, \
+    MODE_MANUAL, MODE_BALANCED
+from tempsensor.tempsensor import MockTemperatureSensor
+
+"""
+Test class for the schedule preview.
+Inherits from the TestCase class
+"""
+class TestSchedulePreview(unittest.TestCase):
+    def setUp(self):
+        rng = numpy.random.default_rng(44)
+        self.minutes = 500
+        self.modes = rng.choice([MODE_LIGHT, MODE_DARK, MODE_ECO, MODE_MANUAL, MODE_BALANCED], self.minutes)
+        self.positions = rng.uniform(-100, 100, self.minutes)
+        self.setpoints = rng.choice([numpy.nan, 18.0, 25.0], self.minutes)
+        self.solar_angle = rng.uniform(-30, 70, self.minutes)
+        self.cloud_cover = rng.uniform(0, 100, self.minutes)
+        self.ext_temp = rng.uniform(-30, 35, self.minutes)
+        # MockTemperatureSensor
+        self.act_int_temp = 20
+
+    def test_matches_algorithms(self):
+        positions = preview_positions(self.modes, self.positions, self.setpoints, self.solar_angle, self.cloud_cover,
+                                      self.ext_temp, self.act_int_temp)
+
+        sensor = MockTemperatureSensor()
+        for minute in range(self.minutes):
+            mode, solar_angle = self.modes[minute], self.solar_angle[minute]
+            weather = (self.cloud_cover[minute], self.ext_temp[minute])
+            setpoint = None if numpy.isnan(self.setpoints[minute]) else self.setpoints[minute]
+            if mode == MODE_LIGHT:
+                expected = max_sunlight_algorithm(solar_angle) / 0.9
+            elif mode == MODE_DARK:
+                expected = -100
+            elif mode == MODE_ECO:
+                expected = heat_mgmt_algorithm(sensor, weather, solar_angle, setpoint) / 0.9
+            elif mode == MODE_BALANCED:
+                expected = composite_algorithm(sensor, weather, solar_angle, setpoint) / 0.9
+            else:
+                expected = self.positions[minute]
+            self.assertAlmostEqual(positions[minute], max(-100, min(100, expected)), places=6)
+
+    def test_glare_aware_light_and_eco_conditions(self):
+        window = WindowGeometry(90, 25, 21)
+        azimuth = numpy.linspace(60, 250, self.minutes)
+        eco_conditions = (self.cloud_cover[::-1], self.ext_temp[::-1], self.solar_angle[::-1])
+        positions = preview_positions(self.modes, self.positions, self.setpoints, self.solar_angle, self.cloud_cover,
+                                      self.ext_temp, self.act_int_temp, solar_azimuth=azimuth, window=window,
+                                      eco_conditions=eco_conditions)
+
+        light = self.modes == MODE_LIGHT
+        numpy.testing.assert_allclose(positions[light],
+                                      glare_free_tilt_angles(self.solar_angle, azimuth, window)[light] / 0.9)
+
+        eco = self.modes == MODE_ECO
+        # ECO takes its conditions from eco_conditions only
+        eco_positions = preview_positions(self.modes, self.positions, self.setpoints, self.solar_angle[::-1],
+                                          self.cloud_cover[::-1], self.ext_temp[::-1], self.act_int_temp)
+        numpy.testing.assert_allclose(positions[eco], eco_positions[eco])
+
+    def test_change_indices(self):
+        modes = numpy.array([MODE_DARK, MODE_DARK, MODE_LIGHT, MODE_LIGHT, MODE_LIGHT, MODE_DARK])
+        positions = numpy.array([-100, -100, 10, 10, 12, -100])
+        self.assertEqual(list(change_indices(modes, positions)), [0, 2, 4, 5])
+        self.assertEqual(len(change_indices(modes[:0], positions[:0])), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the precomputed daily solar position tables
+"""
+
+import datetime
+import unittest
+import unittest.mock
+
+import controlalgorithm.max_sunlight_algorithm as max_sun
+from controlalgorithm.solar_table import SolarTable, MINUTES_PER_DAY, SUNRISE, SOLAR_NOON, SUNSET, timezone_from_adjustment
+
+"""
+Test class for the solar tables.
+Inherits from the TestCase class
+"""
+class TestSolarTable(unittest.TestCase):
+    def setUp(self):
+        self.tz = timezone_from_adjustment(-6)
+        self.table = SolarTable(53.5, -113.5, self.tz, cache_size=2)
+
+    def test_timezone_from_adjustment(self):
+        self.assertEqual(timezone_from_adjustment(-6).zone, "Etc/GMT+6")
+        self.assertEqual(timezone_from_adjustment(3).zone, "Etc/GMT-3")
+
+    def test_daily_table(self):
+        daily = self.table.for_date(datetime.date(2020, 6, 21))
+        self.assertEqual(len(daily.elevation), MINUTES_PER_DAY)
+        self.assertEqual(len(daily.azimuth), MINUTES_PER_DAY)
+
+        # sun is up around local solar noon and down at midnight
+        noon = self.tz.localize(datetime.datetime(2020, 6, 21, 13, 30))
+        midnight = self.tz.localize(datetime.datetime(2020, 6, 21, 0, 30))
+        self.assertGreater(self.table.elevation_at(noon), 50)
+        self.assertLess(self.table.elevation_at(midnight), 0)
+        self.assertAlmostEqual(self.table.azimuth_at(noon), 180, delta=15)
+
+    def test_matches_pvlib_single_lookup(self):
+        date_time = self.tz.localize(datetime.datetime(2020, 3, 1, 10, 17))
+        with unittest.mock.patch("controlalgorithm.persistent_data.get_lat_lon", return_value=(53.5, -113.5, -6)):
+            self.assertAlmostEqual(self.table.elevation_at(date_time), max_sun.get_solar_angle(date_time), places=6)
+
+    def test_other_timezone_lookup(self):
+        utc_time = datetime.datetime(2020, 6, 21, 19, 30, tzinfo=datetime.timezone.utc)
+        local_time = self.tz.localize(datetime.datetime(2020, 6, 21, 13, 30))
+        self.assertEqual(self.table.elevation_at(utc_time), self.table.elevation_at(local_time))
+
+    def test_solar_events(self):
+        # Edmonton on the summer solstice, sunrise 5:06, solar noon 13:36 and sunset 22:07 mountain daylight time
+        events = self.table.for_date(datetime.date(2020, 6, 21)).solar_events()
+        for event, hour, minute in ((SUNRISE, 5, 6), (SOLAR_NOON, 13, 36), (SUNSET, 22, 7)):
+            expected = self.tz.localize(datetime.datetime(2020, 6, 21, hour, minute))
+            self.assertLessEqual(abs(events[event] - expected), datetime.timedelta(minutes=3))
+
+        # polar day and night
+        arctic = SolarTable(80, 0, timezone_from_adjustment(0))
+        events = arctic.for_date(datetime.date(2020, 6, 21)).solar_events()
+        self.assertEqual(events[SUNSET] - events[SUNRISE], datetime.timedelta(days=1))
+        events = arctic.for_date(datetime.date(2020, 12, 21)).solar_events()
+        self.assertEqual(events[SUNRISE], events[SUNSET])
+        self.assertEqual(events[SUNRISE], events[SOLAR_NOON])
+
+    def test_cache(self):
+        first = self.table.for_date(datetime.date(2020, 1, 1))
+        self.assertIs(self.table.for_date(datetime.date(2020, 1, 1)), first)
+
+        self.table.for_date(datetime.date(2020, 1, 2))
+        self.table.for_date(datetime.date(2020, 1, 3))
+        self.assertIsNot(self.table.for_date(datetime.date(2020, 1, 1)), first)
+
+if __name__ == "__main__":
+    unittest.main()
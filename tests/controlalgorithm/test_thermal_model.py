@@ -0,0 +1,126 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the thermal model and its controller
+"""
+
+import unittest
+
+import numpy
+
+from controlalgorithm.thermal_model import ThermalModel, ThermalController, thermal_features, samples_from_history, \
+    NUM_FEATURES, MAX_SAMPLE_GAP_MINUTES
+
+"""
+Parameters of the simulated room: it tends to the external temperature and the sun heats it through open slats
+"""
+TRUE_THETA = numpy.array([0.1, 0.3, 0.5, 8.0, 0.0])
+
+"""
+Random conditions and the rates of the simulated room for them
+"""
+def random_samples(count, seed=0):
+    rng = numpy.random.RandomState(seed)
+    features = thermal_features(rng.uniform(-20, 35, count), rng.uniform(15, 30, count), rng.uniform(0, 100, count),
+                                rng.uniform(-10, 60, count), rng.uniform(-90, 90, count))
+    return features, features @ TRUE_THETA + rng.normal(0, 0.01, count)
+
+"""
+Test class for the thermal model.
+Inherits from the TestCase class
+"""
+class TestThermalModel(unittest.TestCase):
+    def test_features(self):
+        features = thermal_features(10, 20, 50, 30, 60)
+        numpy.testing.assert_allclose(features, [1, -10, 0.25, 0.125, 0.5])
+        # no sun below the horizon, vectorized over the tilt angle
+        features = thermal_features(10, 20, 0, -5, [0, 90])
+        self.assertEqual(features.shape, (2, NUM_FEATURES))
+        numpy.testing.assert_allclose(features[:, 2:4], 0)
+
+    def test_online_update(self):
+        features, rates = random_samples(500)
+        model = ThermalModel(forgetting_factor=1)
+        for sample_features, rate in zip(features, rates):
+            model.update(sample_features, rate)
+
+        numpy.testing.assert_allclose(model.theta, TRUE_THETA, atol=0.05)
+        self.assertEqual(model.samples, 500)
+        self.assertEqual(model.covariance.shape, (NUM_FEATURES, NUM_FEATURES))
+
+    def test_fit_matches_online(self):
+        features, rates = random_samples(500)
+        online = ThermalModel(forgetting_factor=1)
+        for sample_features, rate in zip(features, rates):
+            online.update(sample_features, rate)
+
+        batch = ThermalModel(forgetting_factor=1)
+        batch.fit(features, rates, regularization=0)
+        numpy.testing.assert_allclose(batch.theta, online.theta, atol=1e-6)
+        numpy.testing.assert_allclose(batch.covariance, online.covariance, atol=1e-9)
+
+        # online updates carry on from the trained model
+        more_features, more_rates = random_samples(10, seed=1)
+        for sample_features, rate in zip(more_features, more_rates):
+            batch.update(sample_features, rate)
+            online.update(sample_features, rate)
+        numpy.testing.assert_allclose(batch.theta, online.theta, atol=1e-6)
+
+    def test_samples_from_history(self):
+        data = {"ext_temp": 10, "cloud_cover": 0, "solar_angle": 30, "tilt_angle": 0}
+        gap = MAX_SAMPLE_GAP_MINUTES * 60 + 1
+        records = [{"time": time, "event": "thermal", "data": dict(data, int_temp=int_temp)}
+                   for time, int_temp in ((1200, 20.5), (0, 20), (600, 20.2), (1200 + gap, 25))]
+
+        features, rates = samples_from_history(records)
+        numpy.testing.assert_allclose(rates, [1.2, 1.8])
+        numpy.testing.assert_allclose(features[:, 1], [-10, -10.2])
+
+        features, rates = samples_from_history(records[:1])
+        self.assertEqual(features.shape, (0, NUM_FEATURES))
+
+"""
+Test class for the thermal controller.
+Inherits from the TestCase class
+"""
+class TestThermalController(unittest.TestCase):
+    def setUp(self):
+        model = ThermalModel()
+        model.fit(*random_samples(200))
+        self.controller = ThermalController(model, horizon_minutes=30, min_samples=100)
+
+    def test_tilt_angle(self):
+        # hot room in the sun: close the slats
+        self.controller.observe(0, 26, 20, 0, 60)
+        self.assertEqual(abs(self.controller.tilt_angle(22)), 90)
+
+        # cold room in the sun: open them
+        self.controller.observe(0, 18, 10, 0, 60)
+        self.assertEqual(self.controller.tilt_angle(22), 0)
+
+        # in between: partly open, on the side the blinds already are
+        self.controller.applied(-60)
+        self.controller.observe(0, 22, 22, 0, 60)
+        tilt_angle = self.controller.tilt_angle(22.5)
+        self.assertTrue(-90 < tilt_angle < 0)
+
+    def test_learns_from_ticks(self):
+        controller = ThermalController(min_samples=3)
+        self.assertIsNone(controller.tilt_angle(22))
+
+        int_temp = 20.0
+        for tick in range(5):
+            controller.observe(tick * 600, int_temp, 10, 0, 30)
+            sample = controller.applied(0)
+            self.assertEqual(sample["int_temp"], int_temp)
+            int_temp += (thermal_features(10, int_temp, 0, 30, 0) @ TRUE_THETA) / 6
+
+        self.assertEqual(controller.model.samples, 4)
+
+        # nothing is learned across a gap
+        controller.observe(4 * 600 + MAX_SAMPLE_GAP_MINUTES * 60 + 1, int_temp, 10, 0, 30)
+        self.assertEqual(controller.model.samples, 4)
+        self.assertIsNotNone(controller.tilt_angle(22))
+
+if __name__ == "__main__":
+    unittest.main()
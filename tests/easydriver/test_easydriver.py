@@ -5,9 +5,11 @@ Contents: Unit tests for Software Driver of SparkFun EasyDriver Board
 """
 
 import pytest
-from easydriver.easydriver import EasyDriver, MicroStepResolution, StepDirection
+import time
+from easydriver.easydriver import EasyDriver, MicroStepResolution, StepDirection, PowerPolicy, PowerState, \
+    REDUCED_PWM_FREQUENCY, WAKEUPS_TOTAL
 from gpiozero import GPIOPinMissing, Device
-from gpiozero.pins.mock import MockFactory
+from gpiozero.pins.mock import MockFactory, MockPWMPin
 
 # Set the default pin factory to a mock factory
 Device.pin_factory = MockFactory()
@@ -124,3 +126,124 @@ class TestEasyDriver:
         assert driver.step_pin.state == 0
         assert driver.enable_pin.state == 1
 
+    """Creates drivers with a power policy. The mock pins are shared by all mock factories, so they are reset
+    first to start from fresh pins.
+
+    Also handles cleanup after the yield.
+
+    Yields:
+        function -- taking the PowerPolicy and optionally the mock pin class, and returning a driver that steps
+            without delay
+    """
+    @pytest.fixture()
+    def make_driver(self):
+        Device.pin_factory.reset()
+        drivers = []
+        def make_driver(power_policy, pin_class=None):
+            factory = MockFactory(pin_class=pin_class) if pin_class is not None else MockFactory()
+            driver = EasyDriver(step_pin=self.STEP_PIN,
+                        dir_pin=self.DIR_PIN,
+                        ms1_pin=self.MS1_PIN,
+                        ms2_pin=self.MS2_PIN,
+                        enable_pin=self.ENABLE_PIN,
+                        power_policy=power_policy,
+                        pin_factory=factory)
+            driver.speed = 1000000
+            drivers.append(driver)
+            return driver
+        yield make_driver
+        for driver in drivers:
+            driver.close()
+
+    """Count the times the enable pin was pulled low, ie. the driver was woken up
+    """
+    def wakeups(self, driver):
+        states = [state.state for state in driver.enable_pin.states]
+        return sum(1 for previous, state in zip(states, states[1:]) if previous and not state)
+
+    """Test that the driver holds after a move and is disabled after the hold
+    """
+    def test_hold(self, make_driver):
+        driver = make_driver(PowerPolicy(hold_seconds=60))
+        driver.step(5)
+        driver.step(5, direction=StepDirection.REVERSE)
+        assert driver.power_state == PowerState.ON
+        assert driver.enable_pin.state == 0
+        assert self.wakeups(driver) == 1
+
+        driver.apply_power_policy(59)
+        assert driver.power_state == PowerState.ON
+        driver.apply_power_policy(60)
+        assert driver.power_state == PowerState.OFF
+        assert driver.enable_pin.state == 1
+
+        energized = driver.energized_seconds
+        assert energized > 0
+        assert driver.energized_seconds == energized
+
+    """Test the timed auto-disable
+    """
+    def test_auto_disable(self, make_driver):
+        driver = make_driver(PowerPolicy(hold_seconds=0.05))
+        driver.step(1)
+        assert driver.enable_pin.state == 0
+
+        deadline = time.monotonic() + 5
+        while driver.power_state != PowerState.OFF and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert driver.enable_pin.state == 1
+
+    """Test reduced power by PWM of the enable pin after the hold
+    """
+    def test_reduced_power(self, make_driver):
+        driver = make_driver(PowerPolicy(hold_seconds=1, reduced_seconds=5, reduced_duty=0.25), pin_class=MockPWMPin)
+        wakeups = WAKEUPS_TOTAL.value
+        driver.step(1)
+
+        driver.apply_power_policy(2)
+        assert driver.power_state == PowerState.REDUCED
+        assert driver.enable_pin.frequency == REDUCED_PWM_FREQUENCY
+        # the enable pin is active low
+        assert driver.enable_pin.state == 0.75
+
+        driver.step(1)
+        assert driver.power_state == PowerState.ON
+        assert driver.enable_pin.frequency is None
+        assert driver.enable_pin.state == 0
+        # only the first step woke the driver from off
+        assert WAKEUPS_TOTAL.value == wakeups + 1
+
+        driver.apply_power_policy(6)
+        assert driver.power_state == PowerState.OFF
+        assert driver.enable_pin.state == 1
+
+    """Test that the driver stays fully enabled instead of reduced power without PWM
+    """
+    def test_reduced_power_without_pwm(self, make_driver):
+        driver = make_driver(PowerPolicy(hold_seconds=1, reduced_seconds=5))
+        driver.step(1)
+        driver.apply_power_policy(2)
+        assert driver.power_state == PowerState.ON
+        driver.apply_power_policy(6)
+        assert driver.power_state == PowerState.OFF
+
+    """Test that moves streamed together wake up the driver once, also without a hold
+    """
+    def test_stream(self, make_driver):
+        driver = make_driver(PowerPolicy())
+        with driver.stream():
+            driver.microstep_resolution = MicroStepResolution.FULL_STEP
+            driver.step(3)
+            driver.microstep_resolution = MicroStepResolution.EIGHTH_STEP
+            driver.step(3)
+            assert driver.power_state == PowerState.ON
+        assert driver.power_state == PowerState.OFF
+        assert self.wakeups(driver) == 1
+
+    """Test invalid power policies
+    """
+    def test_invalid_power_policy(self):
+        with pytest.raises(ValueError):
+            PowerPolicy(hold_seconds=-1)
+        with pytest.raises(ValueError):
+            PowerPolicy(reduced_duty=1)
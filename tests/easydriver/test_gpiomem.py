@@ -0,0 +1,120 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the memory mapped GPIO pin factory, on a mock memory region
+"""
+
+import pytest
+from easydriver.easydriver import EasyDriver, MicroStepResolution, StepDirection
+from easydriver.gpiomem import GPIOMemFactory, MockGPIOMemory, GPFSEL0, GPLEV0
+from gpiozero import PinInvalidFunction, PinInvalidPin, PinSetInput
+
+"""Class holding unit tests for the pin factory
+"""
+class TestGPIOMem:
+    STEP_PIN = 20
+    DIR_PIN = 21
+    ENABLE_PIN = 25
+    MS1_PIN = 24
+    MS2_PIN = 23
+
+    """Creates and returns a pin factory on a fresh mock memory region
+
+    Yields:
+        GPIOMemFactory -- factory for each test
+    """
+    @pytest.fixture()
+    def factory(self):
+        factory = GPIOMemFactory(MockGPIOMemory())
+        yield factory
+        factory.close()
+
+    """Creates and returns a driver using the factory
+
+    Yields:
+        EasyDriver -- fresh instance of driver for each test
+    """
+    @pytest.fixture()
+    def driver(self, factory):
+        driver = EasyDriver(step_pin=self.STEP_PIN,
+                    dir_pin=self.DIR_PIN,
+                    ms1_pin=self.MS1_PIN,
+                    ms2_pin=self.MS2_PIN,
+                    enable_pin=self.ENABLE_PIN,
+                    pin_factory=factory)
+        driver.speed = 1000000
+        yield driver
+        driver.close()
+
+    """Test that pins write the function select, set and clear registers of their number
+    """
+    def test_registers(self, factory):
+        pin = factory.pin("GPIO37")
+        assert pin is factory.pin(37)
+        assert pin.function == "input"
+
+        pin.output_with_state(1)
+        # GPIO37 is the 7th pin of the 4th function select register and bit 5 of the second bank
+        assert factory.registers[GPFSEL0 + 3] == 0b001 << 21
+        assert factory.registers[GPLEV0 + 1] == 1 << 5
+        assert pin.function == "output"
+        assert pin.state == 1
+
+        pin.state = 0
+        assert factory.registers[GPLEV0 + 1] == 0
+        assert factory.registers.writes == 3
+
+        pin.close()
+        assert factory.registers[GPFSEL0 + 3] == 0
+        with pytest.raises(PinSetInput):
+            pin.state = 1
+
+    """Test that setting a function keeps the functions of the other pins of the register
+    """
+    def test_shared_function_register(self, factory):
+        factory.pin(20).function = "output"
+        factory.pin(21).function = "output"
+        factory.pin(20).function = "input"
+        assert factory.pin(21).function == "output"
+        assert factory.registers[GPFSEL0 + 2] == 0b001 << 3
+
+    """Test invalid pins and functions
+    """
+    def test_invalid(self, factory):
+        with pytest.raises(PinInvalidPin):
+            factory.pin(54)
+        with pytest.raises(PinInvalidPin):
+            factory.pin("SCL")
+        with pytest.raises(PinInvalidFunction):
+            factory.pin(20).function = "alt0"
+
+    """Test the initial states of the driver pins
+    """
+    def test_driver_init(self, driver):
+        assert driver.step_pin.state == 0
+        assert driver.dir_pin.state == 0
+        assert driver.ms1_pin.state == 0
+        assert driver.ms2_pin.state == 0
+        assert driver.enable_pin.state == 1
+
+    """Test that a move writes one set and one clear of the step pin per step
+    """
+    def test_driver_step(self, driver, factory):
+        driver.microstep_resolution = MicroStepResolution.EIGHTH_STEP
+        assert driver.ms1_pin.state == 1
+        assert driver.ms2_pin.state == 1
+
+        writes = factory.registers.writes
+        driver.step(10, direction=StepDirection.REVERSE)
+        # enable, direction, 20 step edges and disable
+        assert factory.registers.writes - writes == 23
+        assert driver.dir_pin.state == 1
+        assert driver.step_pin.state == 0
+        assert driver.enable_pin.state == 1
+
+    """Test that the pins are inputs again after closing the driver
+    """
+    def test_driver_close(self, driver, factory):
+        driver.close()
+        for number in (self.STEP_PIN, self.DIR_PIN, self.ENABLE_PIN, self.MS1_PIN, self.MS2_PIN):
+            assert factory.pin(number).function == "input"
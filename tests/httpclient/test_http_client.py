@@ -0,0 +1,182 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the shared HTTP client, against a stub HTTP server on localhost
+"""
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import threading
+import time
+import unittest
+
+from httpclient.client import HttpClient, CircuitBreaker, ResponseCache, HttpClientException, CircuitOpenException, \
+    CIRCUIT_CLOSED, CIRCUIT_OPEN, CIRCUIT_HALF_OPEN
+
+"""
+Stub server. Each request pops the next scripted response of its path, the last one is repeated.
+A response is (status, body) or ("sleep", seconds) to stall past the read timeout.
+"""
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.connections.add(self.client_address)
+            script = server.responses.get(self.path.split("?")[0], [(404, {})])
+            response = script.pop(0) if len(script) > 1 else script[0]
+
+        if response[0] == "sleep":
+            time.sleep(response[1])
+            response = (200, {})
+
+        body = response[1] if isinstance(response[1], bytes) else json.dumps(response[1]).encode()
+        self.send_response(response[0])
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+"""
+Test class for the HTTP client.
+Inherits from the TestCase class
+"""
+class TestHttpClient(unittest.TestCase):
+    def setUp(self):
+        self.server = HTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.connections = set()
+        self.server.responses = {}
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base_url = "http://127.0.0.1:{}".format(self.server.server_address[1])
+
+        self.now = 0.0
+        self.sleeps = []
+        self.client = HttpClient(read_timeout=0.5, retries=2, backoff=0.1, failure_threshold=2, reset_timeout=30,
+                                 sleep=self.sleeps.append, clock=lambda: self.now)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keep_alive(self):
+        self.server.responses["/weather"] = [(200, {"temperature": 20})]
+
+        for _ in range(5):
+            self.assertEqual(self.client.get_json(self.base_url + "/weather"), {"temperature": 20})
+        self.assertEqual(len(self.server.requests), 5)
+        # all requests went over a single pooled connection
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_retry_with_backoff(self):
+        self.server.responses["/weather"] = [(503, {}), (500, {}), (200, {"ok": True})]
+
+        self.assertEqual(self.client.get_json(self.base_url + "/weather"), {"ok": True})
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(self.sleeps), 2)
+        # the backoff doubles, with jitter of up to 50%
+        self.assertTrue(0.05 <= self.sleeps[0] <= 0.15)
+        self.assertTrue(0.1 <= self.sleeps[1] <= 0.3)
+
+    def test_no_retry_on_client_error(self):
+        self.server.responses["/weather"] = [(401, {})]
+
+        with self.assertRaises(HttpClientException):
+            self.client.get_json(self.base_url + "/weather")
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.client.breaker("127.0.0.1:{}".format(self.server.server_address[1])).state, CIRCUIT_CLOSED)
+
+    def test_timeout(self):
+        self.server.responses["/slow"] = [("sleep", 1)]
+        client = HttpClient(read_timeout=0.2, retries=0, sleep=self.sleeps.append)
+
+        start = time.monotonic()
+        with self.assertRaises(HttpClientException):
+            client.get_json(self.base_url + "/slow")
+        self.assertLess(time.monotonic() - start, 0.8)
+        client.close()
+
+    def test_circuit_breaker(self):
+        self.server.responses["/weather"] = [(500, {})]
+
+        for _ in range(2):
+            with self.assertRaises(HttpClientException):
+                self.client.get_json(self.base_url + "/weather")
+        self.assertEqual(len(self.server.requests), 6)
+
+        # open: fails without a request
+        with self.assertRaises(CircuitOpenException):
+            self.client.get_json(self.base_url + "/weather")
+        self.assertEqual(len(self.server.requests), 6)
+
+        # after the reset timeout a trial request closes the circuit again
+        self.server.responses["/weather"] = [(200, {"ok": True})]
+        self.now += 30
+        self.assertEqual(self.client.get_json(self.base_url + "/weather"), {"ok": True})
+
+    def test_response_cache(self):
+        self.server.responses["/weather"] = [(200, {"temperature": 1}), (200, {"temperature": 2}), (500, {})]
+        url = self.base_url + "/weather"
+
+        self.assertEqual(self.client.get_json(url, params={"units": "si"}, cache_ttl=60), {"temperature": 1})
+        self.assertEqual(self.client.get_json(url, params={"units": "si"}, cache_ttl=60), {"temperature": 1})
+        self.assertEqual(len(self.server.requests), 1)
+
+        self.now += 61
+        self.assertEqual(self.client.get_json(url, params={"units": "si"}, cache_ttl=60), {"temperature": 2})
+
+        # while the server fails, the expired response is served
+        self.now += 61
+        self.assertEqual(self.client.get_json(url, params={"units": "si"}, cache_ttl=60), {"temperature": 2})
+        with self.assertRaises(HttpClientException):
+            self.client.get_json(url, params={"units": "us"}, cache_ttl=60)
+
+    def test_invalid_json(self):
+        self.server.responses["/weather"] = [(200, {"temperature": 1}), (200, b'{"temperature": ')]
+        url = self.base_url + "/weather"
+
+        self.assertEqual(self.client.get_json(url, cache_ttl=60), {"temperature": 1})
+        # a truncated body falls back to the expired response, and raises without one
+        self.now += 61
+        self.assertEqual(self.client.get_json(url, cache_ttl=60), {"temperature": 1})
+        with self.assertRaises(HttpClientException):
+            self.client.get_json(url)
+
+"""
+Test class for the circuit breaker and cache on their own.
+Inherits from the TestCase class
+"""
+class TestHttpClientParts(unittest.TestCase):
+    def test_half_open_single_trial(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CIRCUIT_OPEN)
+        self.assertFalse(breaker.allow())
+
+        now[0] = 10
+        self.assertEqual(breaker.state, CIRCUIT_HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CIRCUIT_OPEN)
+
+    def test_cache_eviction(self):
+        cache = ResponseCache(max_entries=2, clock=lambda: 0)
+        cache.put("a", 1, 60)
+        cache.put("b", 2, 60)
+        cache.get("a")
+        cache.put("c", 3, 60)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+
+if __name__ == "__main__":
+    unittest.main()
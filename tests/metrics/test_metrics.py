@@ -0,0 +1,104 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the metrics registry and text exposition rendering
+"""
+
+import pytest
+from metrics.metrics import MetricsRegistry, Counter, Histogram
+
+"""Class holding unit tests for the metrics registry
+"""
+class TestMetrics:
+
+    """Creates a fresh registry for each test
+
+    Yields:
+        MetricsRegistry -- empty registry
+    """
+    @pytest.fixture()
+    def registry(self):
+        yield MetricsRegistry()
+
+    """Test counter increments and rendering
+    """
+    def test_counter(self, registry):
+        counter = registry.counter("test_events", "Events seen")
+        counter.inc()
+        counter.inc(2)
+
+        assert counter.value == 3
+        text = registry.render()
+        assert "# TYPE test_events counter" in text
+        assert "test_events_total 3.0" in text
+
+    """Test that counters reject negative increments
+    """
+    def test_counter_negative(self, registry):
+        counter = registry.counter("test_events", "Events seen")
+        with pytest.raises(ValueError):
+            counter.inc(-1)
+
+    """Test labelled counters are rendered per label value and escaped
+    """
+    def test_counter_labels(self, registry):
+        counter = registry.counter("test_requests", "Requests", labelnames=("route",))
+        counter.labels("/a").inc()
+        counter.labels(route="/a").inc()
+        counter.labels("/\"b\"").inc()
+
+        text = registry.render()
+        assert "test_requests_total{route=\"/a\"} 2.0" in text
+        assert "test_requests_total{route=\"/\\\"b\\\"\"} 1.0" in text
+
+    """Test that labelled metrics require the correct labels
+    """
+    def test_labels_required(self, registry):
+        counter = registry.counter("test_requests", "Requests", labelnames=("route",))
+        with pytest.raises(ValueError):
+            counter.inc()
+        with pytest.raises(ValueError):
+            counter.labels("a", "b")
+
+    """Test histogram buckets are cumulative and include +Inf
+    """
+    def test_histogram(self, registry):
+        histogram = registry.histogram("test_latency_seconds", "Latency", buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.1)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(5.65)
+
+        text = registry.render()
+        assert "test_latency_seconds_bucket{le=\"0.1\"} 2" in text
+        assert "test_latency_seconds_bucket{le=\"1.0\"} 3" in text
+        assert "test_latency_seconds_bucket{le=\"+Inf\"} 4" in text
+        assert "test_latency_seconds_count 4" in text
+
+    """Test the histogram timer as a context manager and a decorator
+    """
+    def test_histogram_timer(self, registry):
+        histogram = registry.histogram("test_latency_seconds", "Latency")
+
+        with histogram.time():
+            pass
+
+        @histogram.time()
+        def timed():
+            return 5
+
+        assert timed() == 5
+        assert histogram.count == 2
+
+    """Test get-or-create semantics of the registry
+    """
+    def test_get_or_create(self, registry):
+        counter = registry.counter("test_events", "Events seen")
+        assert registry.counter("test_events", "Events seen") is counter
+        assert registry.get("test_events") is counter
+
+        with pytest.raises(ValueError):
+            registry.histogram("test_events", "Events seen")
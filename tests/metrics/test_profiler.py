@@ -0,0 +1,93 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the iteration profiler
+"""
+
+import os
+import pytest
+from metrics.profiler import IterationProfiler
+
+def _work():
+    return sum(i * i for i in range(1000))
+
+"""Class holding unit tests for the iteration profiler
+"""
+class TestIterationProfiler:
+
+    """Creates a profiler writing to a temporary directory
+
+    Yields:
+        IterationProfiler -- fresh, unarmed profiler
+    """
+    @pytest.fixture()
+    def profiler(self, tmp_path):
+        yield IterationProfiler(str(tmp_path), max_files=3)
+
+    """Test that nothing is profiled when not armed
+    """
+    def test_not_armed(self, profiler):
+        with profiler.profile(IterationProfiler.ITERATIONS, "loop"):
+            _work()
+
+        assert profiler.profile_files() == []
+        assert profiler.summary()["profiles"] == 0
+
+    """Test that only the next N iterations are profiled
+    """
+    def test_armed_iterations(self, profiler):
+        profiler.arm(2)
+        for _ in range(4):
+            with profiler.profile(IterationProfiler.ITERATIONS, "loop"):
+                _work()
+
+        assert len(profiler.profile_files()) == 2
+        assert profiler.status()[IterationProfiler.ITERATIONS] == 0
+
+    """Test that targets are armed independently
+    """
+    def test_targets(self, profiler):
+        profiler.arm(1, IterationProfiler.REQUESTS)
+        with profiler.profile(IterationProfiler.ITERATIONS, "loop"):
+            _work()
+        with profiler.profile(IterationProfiler.REQUESTS, "GET /api/v1/pos"):
+            _work()
+
+        files = profiler.profile_files()
+        assert len(files) == 1
+        assert "-requests-GET__api_v1_pos" in os.path.basename(files[0])
+
+    """Test that old profiles are rotated out
+    """
+    def test_rotation(self, profiler):
+        profiler.arm(5)
+        for _ in range(5):
+            with profiler.profile(IterationProfiler.ITERATIONS, "loop"):
+                _work()
+
+        files = profiler.profile_files()
+        assert len(files) == 3
+        assert os.path.basename(files[0]).split("-")[1] == "000003"
+
+    """Test that the summary is sorted by cumulative time and includes the profiled function
+    """
+    def test_summary(self, profiler):
+        profiler.arm(2)
+        for _ in range(2):
+            with profiler.profile(IterationProfiler.ITERATIONS, "loop"):
+                _work()
+
+        summary = profiler.summary(top=5)
+        assert summary["profiles"] == 2
+        assert len(summary["functions"]) <= 5
+        times = [entry["cumulative_time"] for entry in summary["functions"]]
+        assert times == sorted(times, reverse=True)
+        assert any(entry["function"] == "_work" for entry in profiler.summary(top=100)["functions"])
+
+    """Test invalid arm requests
+    """
+    def test_invalid_arm(self, profiler):
+        with pytest.raises(ValueError):
+            profiler.arm(1, "bogus")
+        with pytest.raises(ValueError):
+            profiler.arm(-1)
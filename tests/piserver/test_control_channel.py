@@ -0,0 +1,217 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the control channel and its framing, with a motion executor moving blinds on a recording driver
+"""
+
+import contextlib
+import io
+import pytest
+import threading
+import time
+
+import controlalgorithm.persistent_data as p_data
+from blinds.blinds_api import Blinds
+from blinds.motion_executor import MotionExecutor
+from controlalgorithm.angle_step_mapper import MICROSTEPS_PER_STEP
+from easydriver.easydriver import MicroStepResolution, StepDirection
+import piserver.control_channel as control_channel
+from piserver.control_channel import ControlChannelClient, ControlChannelServer
+from piserver.framing import FrameError, encode_frame, read_frame
+
+TOKEN = "valid-token"
+
+"""
+Stand-in for the motor driver that integrates the shaft position, taking delay seconds per step call
+"""
+class SlowDriver:
+    microstep_resolution = MicroStepResolution.FULL_STEP
+
+    def __init__(self, delay=0.002):
+        self.delay = delay
+        self.shaft_microsteps = 0
+
+    def step(self, steps=1, direction=StepDirection.FORWARD):
+        time.sleep(self.delay)
+        sign = 1 if direction == StepDirection.FORWARD else -1
+        self.shaft_microsteps += sign * steps * MICROSTEPS_PER_STEP[self.microstep_resolution]
+
+    def stream(self):
+        return contextlib.nullcontext(self)
+
+
+"""Class holding unit tests for the control channel
+"""
+class TestControlChannel:
+    """Creates a control channel server on a free port, moving blinds on a SlowDriver
+
+    Yields:
+        (ControlChannelServer, SlowDriver, Blinds)
+    """
+    @pytest.fixture()
+    def server(self):
+        driver = SlowDriver(delay=0.01)
+        with p_data.isolated_persistent_data():
+            blinds = Blinds(driver, None)
+            blinds.calibratePosition()
+            executor = MotionExecutor(blinds)
+            server = ControlChannelServer(("127.0.0.1", 0), executor, lambda token: token == TOKEN)
+            server.start()
+            yield server, driver, blinds
+            server.shutdown()
+            server.server_close()
+            executor.stop()
+
+    def connect(self, server, token=TOKEN):
+        client = ControlChannelClient(server.server_address, timeout=5)
+        return client, client.authenticate(token)
+
+    """Receive messages until a done message for target
+    """
+    def wait_done(self, client, target):
+        messages = []
+        while True:
+            message = client.receive()
+            assert message is not None
+            messages.append(message)
+            if message["type"] == "done" and message["target"] == target:
+                return messages
+
+    """Test framing of messages, and the rejection of bad frames
+    """
+    def test_framing(self):
+        stream = io.BytesIO(encode_frame({"type": "ping", "id": 1}) + encode_frame([1, 2]))
+        assert read_frame(stream) == {"type": "ping", "id": 1}
+        assert read_frame(stream) == [1, 2]
+        assert read_frame(stream) is None
+
+        with pytest.raises(FrameError):
+            read_frame(io.BytesIO(encode_frame({"a": 1})[:-1]))
+        with pytest.raises(FrameError):
+            read_frame(io.BytesIO(b"\xff\xff\xff\xff"))
+        with pytest.raises(FrameError):
+            read_frame(io.BytesIO(b"\x00\x00\x00\x03abc"))
+
+    """Test that an invalid token closes the channel
+    """
+    def test_auth_rejected(self, server):
+        client, reply = self.connect(server[0], token="wrong")
+        assert reply["type"] == "error"
+        assert client.receive() is None
+        client.close()
+
+    """Test a move with its progress pushed back, and pings
+    """
+    def test_move(self, server):
+        server, driver, blinds = server
+        client, reply = self.connect(server)
+        assert reply == {"type": "auth", "ok": True, "position": 0}
+
+        client.send({"type": "ping", "id": 3})
+        assert client.receive() == {"type": "pong", "id": 3}
+
+        client.set_target(50)
+        messages = self.wait_done(client, 50)
+        progress = [message for message in messages if message["type"] == "progress"]
+        assert progress[0]["steps"] == 0
+        assert progress[-1]["steps"] == progress[-1]["total_steps"]
+        assert messages[-1]["position"] == pytest.approx(50, abs=1)
+        assert driver.shaft_microsteps == blinds.motorMicrosteps
+
+        client.set_target(150)
+        assert client.receive()["type"] == "error"
+        client.send({"type": "unknown"})
+        assert client.receive()["type"] == "error"
+        client.close()
+
+    """Test that a stream of targets preempts the moves in flight and ends at the latest target
+    """
+    def test_preempt(self, server):
+        server, driver, blinds = server
+        client, reply = self.connect(server)
+
+        client.set_target(100)
+        # wait for the move to start, then change the target before it ends
+        while client.receive()["type"] != "progress":
+            pass
+        for position in (-40, -60, -80):
+            client.set_target(position)
+        messages = self.wait_done(client, -80)
+
+        # the move to 100 was cut short and never reported as done
+        assert all(message["type"] != "done" for message in messages[:-1])
+        assert messages[-1]["position"] == pytest.approx(-80, abs=1)
+        assert max(message["position"] for message in messages) < 100
+        assert driver.shaft_microsteps == blinds.motorMicrosteps
+        client.close()
+
+    """Test that a listener that blocks doesn't hold up the moves, and gets the latest progress once it resumes
+    """
+    def test_blocked_listener(self):
+        driver = SlowDriver(delay=0)
+        with p_data.isolated_persistent_data():
+            blinds = Blinds(driver, None)
+            blinds.calibratePosition()
+            executor = MotionExecutor(blinds)
+
+            gate = threading.Event()
+            events = []
+            def listener(event):
+                gate.wait(5)
+                events.append(event)
+            executor.addListener(listener)
+
+            executor.setTarget(60)
+            deadline = time.monotonic() + 5
+            while blinds.currentPosition < 59 and time.monotonic() < deadline:
+                time.sleep(0.001)
+            assert blinds.currentPosition == pytest.approx(60, abs=1)
+
+            gate.set()
+            while not events or events[-1]["type"] != "done":
+                assert time.monotonic() < deadline
+                time.sleep(0.001)
+            # the start of the move, at most one coalesced progress in the middle, the end
+            assert events[0]["steps"] == 0
+            assert [event["type"] for event in events].count("progress") <= 3
+            executor.stop()
+
+    """Test that a client that stops reading doesn't hold up the moves, and is disconnected once its queue is full
+    """
+    def test_slow_client(self, server, monkeypatch):
+        server, driver, blinds = server
+        slow, reply = self.connect(server)
+        assert reply["ok"]
+
+        # from now on the writer of the slow connection blocks, as if the client didn't read
+        gate = threading.Event()
+        stalled = []
+        send_frame = control_channel.send_frame
+        def stalled_send_frame(sock, message):
+            if not stalled:
+                stalled.append(threading.current_thread())
+            if threading.current_thread() is stalled[0]:
+                gate.wait(10)
+            send_frame(sock, message)
+        monkeypatch.setattr(control_channel, "send_frame", stalled_send_frame)
+
+        try:
+            slow.send({"type": "ping", "id": 0})
+            while not stalled:
+                time.sleep(0.001)
+
+            client, reply = self.connect(server)
+            client.set_target(30)
+            assert self.wait_done(client, 30)[-1]["position"] == pytest.approx(30, abs=1)
+            client.close()
+
+            disconnected = control_channel.CHANNEL_SLOW_CLIENTS.value
+            for ping_id in range(control_channel.MAX_QUEUED_MESSAGES + 1):
+                slow.send({"type": "ping", "id": ping_id})
+            deadline = time.monotonic() + 5
+            while control_channel.CHANNEL_SLOW_CLIENTS.value == disconnected:
+                assert time.monotonic() < deadline
+                time.sleep(0.001)
+        finally:
+            gate.set()
+        slow.close()
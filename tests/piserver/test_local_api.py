@@ -0,0 +1,125 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the local API, calling a SmartBlindsSystem with blinds on a recording driver over a Unix socket
+"""
+
+import contextlib
+import os
+import pytest
+import socket
+import stat
+
+import controlalgorithm.persistent_data as p_data
+from blinds.blinds_api import Blinds, SmartBlindsSystem
+from blinds.blinds_schedule import BlindMode, BlindsSchedule
+from controlalgorithm.angle_step_mapper import MICROSTEPS_PER_STEP
+from easydriver.easydriver import MicroStepResolution, StepDirection
+from piserver.local_api import LOCAL_API_METHODS, LocalApiClient, LocalApiServer
+from requests import codes as RESP_CODES
+from tempsensor.tempsensor import MockTemperatureSensor
+
+"""
+Stand-in for the motor driver that integrates the shaft position
+"""
+class RecordingDriver:
+    microstep_resolution = MicroStepResolution.FULL_STEP
+
+    def __init__(self):
+        self.shaft_microsteps = 0
+
+    def step(self, steps=1, direction=StepDirection.FORWARD):
+        sign = 1 if direction == StepDirection.FORWARD else -1
+        self.shaft_microsteps += sign * steps * MICROSTEPS_PER_STEP[self.microstep_resolution]
+
+    def stream(self):
+        return contextlib.nullcontext(self)
+
+
+"""Class holding unit tests for the local API
+"""
+class TestLocalApi:
+    """Creates a local API server on a socket in a temporary directory
+
+    Yields:
+        (LocalApiServer, RecordingDriver, Blinds)
+    """
+    @pytest.fixture()
+    def server(self, tmp_path):
+        driver = RecordingDriver()
+        with p_data.isolated_persistent_data():
+            blinds = Blinds(driver, None)
+            blinds.calibratePosition()
+            system = SmartBlindsSystem(blinds, BlindsSchedule(BlindMode.DARK), MockTemperatureSensor())
+            server = LocalApiServer(str(tmp_path / "smartblinds.sock"), system)
+            server.start()
+            yield server, driver, blinds
+            server.shutdown()
+            server.server_close()
+
+    def connect(self, server):
+        return LocalApiClient(server.server_address, timeout=5)
+
+    """Test that the socket file is only accessible to the owner and group, and removed on close
+    """
+    def test_socket_permissions(self, tmp_path):
+        path = str(tmp_path / "smartblinds.sock")
+        # only a stale socket is replaced, never another file
+        open(path, "w").close()
+        with pytest.raises(FileExistsError):
+            LocalApiServer(path, None, methods=())
+        assert os.path.isfile(path)
+        os.remove(path)
+
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+
+        server = LocalApiServer(path, None, methods=(), mode=0o600)
+        mode = os.stat(path).st_mode
+        assert stat.S_ISSOCK(mode)
+        assert stat.S_IMODE(mode) == 0o600
+        server.server_close()
+
+        server = LocalApiServer(path, None, methods=())
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o660
+        server.server_close()
+        assert not os.path.exists(path)
+
+    """Test calls of the methods of the system, several on one connection
+    """
+    def test_calls(self, server):
+        server, driver, blinds = server
+        client = self.connect(server)
+
+        data, status = client.call("getPosition")
+        assert status == RESP_CODES["OK"]
+        assert float(data["position"]) == 0
+        data, status = client.call("postPosition", data={"position": 50})
+        assert status == RESP_CODES["OK"]
+        assert data["position"] == pytest.approx(50, abs=1)
+        assert driver.shaft_microsteps == blinds.motorMicrosteps
+
+        data, status = client.call("getSchedule")
+        assert status == RESP_CODES["OK"]
+        assert data == BlindsSchedule.toDict(BlindsSchedule(BlindMode.DARK))
+
+        data, status = client.call("postPosition", data={"position": 150})
+        assert status == RESP_CODES["BAD_REQUEST"]
+        client.close()
+
+    """Test that unknown methods and invalid params are rejected without closing the connection
+    """
+    def test_invalid_calls(self, server):
+        client = self.connect(server[0])
+        assert client.call("_saveSchedule")[1] == RESP_CODES["NOT_FOUND"]
+        assert client.call("activate_main_loop")[1] == RESP_CODES["NOT_FOUND"]
+        assert client.call("getPosition", extra=1)[1] == RESP_CODES["BAD_REQUEST"]
+        assert client.call("postPosition")[1] == RESP_CODES["BAD_REQUEST"]
+        assert client.call("getPosition")[1] == RESP_CODES["OK"]
+        client.close()
+
+    """Test that only the allowed methods are exposed
+    """
+    def test_methods(self, server):
+        assert set(server[0].methods) == set(LOCAL_API_METHODS)
@@ -0,0 +1,285 @@
+'''
+Unit tests for the simulated clock and the simulated time harness
+
+Author: ECE 492 Group 6
+Creation Date: October 19, 2026
+'''
+
+import pytest
+import datetime
+import math
+from pytz import timezone
+from blinds.blinds_schedule import BlindMode, BlindsSchedule, ScheduleTimeBlock, SolarAnchor, ScheduleOverride
+from blinds.blinds_command import BlindsCommand
+from blinds.clock import SimulatedClock
+from controlalgorithm.motion_planner import MotionPlanner
+from controlalgorithm.solar_table import SolarTable
+from controlalgorithm.glare_algorithm import WindowGeometry
+from controlalgorithm.thermal_model import ThermalController
+from controlalgorithm.weather_forecast import WeatherForecast
+from simulation.simulator import BlindsSimulator
+
+TZ = timezone( "Etc/GMT+6" )
+
+'''
+Simulated room for the thermal model. The room tends to the external temperature, and the sun heats it through 
+the open slats. The temperature is integrated up to the simulated time of each sample. 
+'''
+class SimulatedRoom:
+    def __init__( self, solarTable, extTemp ):
+        self.solarTable = solarTable
+        self.extTemp = extTemp
+        self.temperature = 22.0
+        self.simulator = None
+        self.lastTime = None
+        self.samples = []
+
+    def getSample( self ):
+        now = self.simulator.clock.now( TZ )
+        if self.lastTime is not None:
+            hours = ( now - self.lastTime ).total_seconds() / 3600
+            tiltAngle = self.simulator.system._blinds.currentPosition * 0.9
+            sun = max( math.sin( math.radians( self.solarTable.elevation_at( now ) ) ), 0 )
+            self.temperature += hours * ( 0.3 * ( self.extTemp - self.temperature ) + 8 * sun * math.cos( math.radians( tiltAngle ) ) )
+        self.lastTime = now
+        self.samples.append( ( now, self.temperature ) )
+        return self.temperature
+
+class TestSimulator:
+
+    '''Solar table for Edmonton, independent of persistent data
+    
+    Yields:
+        SolarTable -- solar table in the schedule timezone
+    '''
+    @pytest.fixture()
+    def solarTable( self ):
+        yield SolarTable( 53.5, -113.5, TZ )
+
+    '''
+    Test that the simulated clock only moves when advanced and converts timezones
+    '''
+    def test_simulatedClock( self ):
+        clock = SimulatedClock( TZ.localize( datetime.datetime( 2020, 3, 1, 12, 0 ) ) )
+
+        assert ( clock.now( TZ ) == TZ.localize( datetime.datetime( 2020, 3, 1, 12, 0 ) ) )
+        assert ( clock.now() == datetime.datetime( 2020, 3, 1, 18, 0 ) )
+
+        clock.sleep( 90 )
+        assert ( clock.now( TZ ).time() == datetime.time( 12, 1, 30 ) )
+
+        with pytest.raises( ValueError ):
+            clock.advance( -1 )
+
+        with pytest.raises( ValueError ):
+            SimulatedClock( datetime.datetime( 2020, 3, 1 ) )
+
+    '''
+    Test that scheduled blocks are applied at their simulated times, and the default mode otherwise
+    '''
+    def test_scheduleTimeline( self, solarTable ):
+        schedule = BlindsSchedule( BlindMode.DARK, timezone=TZ, schedule={
+            BlindsSchedule.SUNDAY: [ ScheduleTimeBlock( datetime.time( 8, 0 ), datetime.time( 9, 0 ), BlindMode.MANUAL, 50 ) ],
+            BlindsSchedule.MONDAY: [],
+            BlindsSchedule.TUESDAY: [],
+            BlindsSchedule.WEDNESDAY: [],
+            BlindsSchedule.THURSDAY: [],
+            BlindsSchedule.FRIDAY: [],
+            BlindsSchedule.SATURDAY: []
+        } )
+
+        # March 1, 2020 is a Sunday
+        simulator = BlindsSimulator( schedule, datetime.datetime( 2020, 3, 1 ), days=2, tick_minutes=15, solar_table=solarTable )
+        timeline = simulator.run()
+
+        assert ( [ ( entry[ "time" ], entry[ "mode" ], entry[ "position" ] ) for entry in timeline ] == [
+            ( "2020-03-01T00:00:00-06:00", "DARK", -100 ),
+            ( "2020-03-01T08:00:00-06:00", "MANUAL", pytest.approx( 50, abs=1 ) ),
+            ( "2020-03-01T09:00:00-06:00", "DARK", -100 ),
+        ] )
+        assert ( simulator.summary()[ "moves" ] == 3 )
+
+    '''
+    Test that time blocks anchored to sunrise and sunset follow the sun from day to day
+    '''
+    def test_solarAnchoredSchedule( self, solarTable ):
+        daytime = { day: [ ScheduleTimeBlock( SolarAnchor( SolarAnchor.SUNRISE, 15 ), SolarAnchor( SolarAnchor.SUNSET, -30 ), BlindMode.MANUAL, 50 ) ]
+                    for day in BlindsSchedule.DAYS_OF_WEEK }
+        start = TZ.localize( datetime.datetime( 2020, 3, 1 ) )
+        simulator = BlindsSimulator( BlindsSchedule( BlindMode.DARK, timezone=TZ, schedule=daytime ), start, days=2, tick_minutes=1, 
+                solar_table=solarTable )
+        timeline = simulator.run()
+
+        expected = [ start.isoformat() ]
+        for day in range( 2 ):
+            events = solarTable.for_date( datetime.date( 2020, 3, 1 + day ) ).solar_events()
+            expected += [ ( events[ "sunrise" ] + datetime.timedelta( minutes=15 ) ).isoformat(), 
+                          ( events[ "sunset" ] - datetime.timedelta( minutes=30 ) ).isoformat() ]
+        assert ( [ entry[ "time" ] for entry in timeline ] == expected )
+        # sunrise is earlier the next day in spring
+        assert ( timeline[ 3 ][ "time" ][ 11: ] < timeline[ 1 ][ "time" ][ 11: ] )
+
+    '''
+    Test that an override replaces the weekly schedule on its days only
+    '''
+    def test_scheduleOverride( self, solarTable ):
+        morning = { day: [ ScheduleTimeBlock( datetime.time( 8, 0 ), datetime.time( 9, 0 ), BlindMode.MANUAL, 50 ) ] 
+                    for day in BlindsSchedule.DAYS_OF_WEEK }
+        holiday = ScheduleOverride( datetime.date( 2020, 3, 2 ), datetime.date( 2020, 3, 2 ), BlindMode.MANUAL, 20 )
+        schedule = BlindsSchedule( BlindMode.DARK, timezone=TZ, schedule=morning, overrides=[ holiday ] )
+
+        simulator = BlindsSimulator( schedule, datetime.datetime( 2020, 3, 1 ), days=3, tick_minutes=15, solar_table=solarTable )
+        timeline = simulator.run()
+
+        assert ( [ ( entry[ "time" ], entry[ "position" ] ) for entry in timeline ] == [
+            ( "2020-03-01T00:00:00-06:00", -100 ),
+            ( "2020-03-01T08:00:00-06:00", pytest.approx( 50, abs=1 ) ),
+            ( "2020-03-01T09:00:00-06:00", -100 ),
+            ( "2020-03-02T00:00:00-06:00", pytest.approx( 20, abs=1 ) ),
+            ( "2020-03-03T00:00:00-06:00", -100 ),
+            ( "2020-03-03T08:00:00-06:00", pytest.approx( 50, abs=1 ) ),
+            ( "2020-03-03T09:00:00-06:00", -100 ),
+        ] )
+
+    '''
+    Test that commands are applied at their simulated times
+    '''
+    def test_commands( self, solarTable ):
+        command = BlindsCommand.toDict( BlindsCommand( BlindMode.MANUAL, 30, 20 ) )
+        simulator = BlindsSimulator( BlindsSchedule( BlindMode.DARK, timezone=TZ ), datetime.datetime( 2020, 3, 2 ), days=0.5,
+                tick_minutes=10, solar_table=solarTable, commands=[ ( TZ.localize( datetime.datetime( 2020, 3, 2, 6, 0 ) ), command ) ] )
+        timeline = simulator.run()
+
+        assert ( [ ( entry[ "time" ], entry[ "position" ] ) for entry in timeline ] == [
+            ( "2020-03-02T00:00:00-06:00", -100 ),
+            ( "2020-03-02T06:00:00-06:00", 20 ),
+            ( "2020-03-02T06:30:00-06:00", -100 ),
+        ] )
+
+    '''
+    Test that LIGHT mode follows the precomputed solar angle
+    '''
+    def test_lightMode( self, solarTable ):
+        simulator = BlindsSimulator( BlindsSchedule( BlindMode.LIGHT, timezone=TZ ), datetime.datetime( 2020, 6, 21 ), days=1,
+                tick_minutes=60, solar_table=solarTable )
+        timeline = simulator.run()
+
+        noon = next( entry for entry in timeline if entry[ "time" ] == "2020-06-21T13:00:00-06:00" )
+        # moves are quantized to whole motor steps, 2% at full step resolution
+        assert ( noon[ "position" ] == pytest.approx( -solarTable.elevation_at( TZ.localize( datetime.datetime( 2020, 6, 21, 13 ) ) ) / 0.9, abs=1 ) )
+        assert ( noon[ "position" ] < -60 )
+
+    '''
+    Test that a deadband batches the small drifts of LIGHT mode into fewer moves
+    '''
+    def test_lightModeDeadband( self, solarTable ):
+        schedule = BlindsSchedule( BlindMode.LIGHT, timezone=TZ )
+        start = datetime.datetime( 2020, 6, 21 )
+
+        following = BlindsSimulator( schedule, start, days=1, tick_minutes=5, solar_table=solarTable )
+        following.run()
+
+        batched = BlindsSimulator( schedule, start, days=1, tick_minutes=5, solar_table=solarTable,
+                motion_planner=MotionPlanner( deadband=10 ) )
+        batchedTimeline = batched.run()
+
+        assert ( batched.summary()[ "moves" ] < following.summary()[ "moves" ] / 3 )
+        assert ( all( abs( entry[ "position" ] - -solarTable.elevation_at( datetime.datetime.fromisoformat( entry[ "time" ] ) ) / 0.9 ) <= 11
+                for entry in batchedTimeline[ 1: ] ) )
+
+    '''
+    Test that ECO mode in predictive mode takes the position the reactive algorithm takes an hour later
+    '''
+    def test_predictiveEcoMode( self, solarTable ):
+        schedule = BlindsSchedule( BlindMode.ECO, timezone=TZ )
+        start = TZ.localize( datetime.datetime( 2020, 6, 1 ) )
+        # hot and clear until noon, then cold and overcast
+        times = [ start.timestamp() + hour * 3600 for hour in range( 25 ) ]
+        forecast = WeatherForecast( 0, times, [ 0 ] * 12 + [ 100 ] * 13, [ 35 ] * 12 + [ -10 ] * 13 )
+        weather = lambda dateTime: tuple( float( value ) for value in forecast.at( dateTime.timestamp() ) )
+
+        def hourlyPositions( timeline ):
+            positions = [ None ] * 24
+            for entry in timeline:
+                positions[ datetime.datetime.fromisoformat( entry[ "time" ] ).hour ] = entry[ "position" ]
+            for hour in range( 1, 24 ):
+                if positions[ hour ] is None:
+                    positions[ hour ] = positions[ hour - 1 ]
+            return positions
+
+        reactive = hourlyPositions( BlindsSimulator( schedule, start, days=1, tick_minutes=60, solar_table=solarTable, 
+                weather=weather ).run() )
+        simulator = BlindsSimulator( schedule, start, days=1, tick_minutes=60, solar_table=solarTable, weather=weather, 
+                forecast=forecast )
+        predictive = hourlyPositions( simulator.run() )
+
+        assert ( simulator.system._predictiveHeatMgmt.plan is not None )
+        assert ( predictive[ :23 ] == pytest.approx( reactive[ 1: ], abs=1 ) )
+        assert ( predictive != pytest.approx( reactive, abs=1 ) )
+
+    '''
+    Test that the thermal model learns the response of the room, and then keeps it closer to the setpoint than 
+    the reactive algorithm
+    '''
+    def test_thermalModelEcoMode( self, solarTable ):
+        def daytimeDeviation( thermalController ):
+            room = SimulatedRoom( solarTable, 15 )
+            simulator = BlindsSimulator( BlindsSchedule( BlindMode.ECO, timezone=TZ ), TZ.localize( datetime.datetime( 2020, 6, 1 ) ), 
+                    days=3, tick_minutes=10, temperature_sensor=room, weather=( 0, 15 ), solar_table=solarTable, 
+                    thermal_controller=thermalController )
+            room.simulator = simulator
+            simulator.run()
+
+            # last day, once the model is trained
+            deviations = [ abs( temperature - 22 ) for time, temperature in room.samples if time.day == 3 and 8 <= time.hour < 20 ]
+            return sum( deviations ) / len( deviations )
+
+        thermalController = ThermalController()
+        assert ( daytimeDeviation( thermalController ) < 1 )
+        assert ( thermalController.ready )
+        assert ( daytimeDeviation( None ) > 3 )
+
+    '''
+    Test that the glare aware LIGHT mode only moves while the sun is on an east facing window
+    '''
+    def test_glareAwareLightMode( self, solarTable ):
+        simulator = BlindsSimulator( BlindsSchedule( BlindMode.LIGHT, timezone=TZ ), TZ.localize( datetime.datetime( 2020, 6, 1 ) ), 
+                days=1, tick_minutes=10, solar_table=solarTable, window=WindowGeometry( 90, 25, 21 ) )
+        timeline = simulator.run()
+
+        moveHours = [ datetime.datetime.fromisoformat( entry[ "time" ] ).hour for entry in timeline if entry[ "steps" ] ]
+        assert ( moveHours )
+        # the sun passes south at solar noon, around 13:30 here
+        assert ( max( moveHours ) < 14 )
+        assert ( timeline[ -1 ][ "position" ] == 0 )
+
+    '''
+    Test that the preview of a day gives the timeline of simulating the day with one minute ticks
+    '''
+    @pytest.mark.parametrize( "forecast", [ False, True ] )
+    def test_preview( self, solarTable, forecast ):
+        start = TZ.localize( datetime.datetime( 2020, 6, 1 ) )
+        times = [ start.timestamp() + hour * 3600 for hour in range( 25 ) ]
+        weatherForecast = WeatherForecast( 0, times, [ 0 ] * 12 + [ 100 ] * 13, [ 35 ] * 12 + [ -10 ] * 13 )
+        # without a forecast, the preview can only assume that the current weather lasts
+        weather = ( lambda dateTime: tuple( float( value ) for value in weatherForecast.at( dateTime.timestamp() ) ) ) \
+            if forecast else ( 0, 35 )
+
+        blocks = [ ScheduleTimeBlock( datetime.time( 6, 0 ), datetime.time( 9, 0 ), BlindMode.LIGHT ),
+                   ScheduleTimeBlock( datetime.time( 9, 0 ), datetime.time( 13, 0 ), BlindMode.ECO, setpoint=20 ),
+                   ScheduleTimeBlock( datetime.time( 13, 0 ), datetime.time( 18, 0 ), BlindMode.BALANCED ),
+                   ScheduleTimeBlock( datetime.time( 18, 0 ), datetime.time( 20, 0 ), BlindMode.MANUAL, 40 ) ]
+        schedule = BlindsSchedule( BlindMode.DARK, timezone=TZ, schedule={ day: list( blocks ) for day in BlindsSchedule.DAYS_OF_WEEK } )
+        simulator = BlindsSimulator( schedule, start, days=1, tick_minutes=1, solar_table=solarTable, weather=weather, 
+                forecast=weatherForecast if forecast else None, motion_planner=MotionPlanner( deadband=5 ) )
+
+        preview = simulator.preview()
+        timeline = simulator.run()
+
+        assert ( preview[ "start" ] == start.isoformat() )
+        assert ( [ ( entry[ "time" ], entry[ "mode" ] ) for entry in preview[ "timeline" ] ] == 
+                [ ( entry[ "time" ], entry[ "mode" ] ) for entry in timeline ] )
+        assert ( [ entry[ "position" ] for entry in preview[ "timeline" ] ] == 
+                pytest.approx( [ entry[ "position" ] for entry in timeline ], abs=1e-6 ) )
+        assert ( preview[ "moves" ] == simulator.summary()[ "moves" ] )
+        assert ( { "LIGHT", "ECO", "BALANCED", "MANUAL", "DARK" } <= { entry[ "mode" ] for entry in preview[ "timeline" ] } )
@@ -0,0 +1,131 @@
+"""
+Date: Oct 19, 2026
+Author: ECE 492 Group 6
+Contents: Unit tests for the SQLite store and its repositories
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import storage.store as store_module
+from storage.store import SmartBlindsStore
+
+"""
+Test class for the store.
+Inherits from the TestCase class
+"""
+class TestSmartBlindsStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "smartblinds.db")
+        self.store = SmartBlindsStore(self.path, batch_interval=3600, batch_size=10)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_wal_mode(self):
+        journal_mode = sqlite3.connect(self.path).execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(journal_mode, "wal")
+
+    def test_weather_cache(self):
+        self.store.weather.save(53.5, -113.5, 40.0, -12.5, fetched_at=1000)
+
+        self.assertEqual(self.store.weather.latest(53.5, -113.5, 600, now=1500), (40.0, -12.5))
+        # too old, or for another location
+        self.assertIsNone(self.store.weather.latest(53.5, -113.5, 600, now=1700))
+        self.assertIsNone(self.store.weather.latest(0, 0, 600, now=1500))
+
+    def test_weather_forecast(self):
+        self.store.weather.save_forecast(53.5, -113.5, {"times": [1]}, fetched_at=1000)
+        self.store.weather.save_forecast(53.5, -113.5, {"times": [2]}, fetched_at=1100)
+
+        self.assertEqual(self.store.weather.latest_forecast(53.5, -113.5, 600, now=1500), {"times": [2]})
+        self.assertIsNone(self.store.weather.latest_forecast(53.5, -113.5, 600, now=1800))
+        self.assertEqual(len(self.store.query("SELECT * FROM weather_forecast")), 1)
+
+    def test_schedule_versions(self):
+        self.assertIsNone(self.store.schedules.latest())
+
+        first = self.store.schedules.save({"default_mode": "DARK"})
+        second = self.store.schedules.save({"default_mode": "LIGHT"})
+        self.assertGreater(second, first)
+
+        self.assertEqual(self.store.schedules.latest(), (second, {"default_mode": "LIGHT"}))
+        self.assertEqual(self.store.schedules.get(first), {"default_mode": "DARK"})
+        self.assertEqual([version for version, _ in self.store.schedules.versions()], [second, first])
+
+    def test_active_command(self):
+        self.store.commands.set_active({"mode": "MANUAL"}, {"start": "10:00"}, "2026-10-19")
+        self.store.commands.set_active({"mode": "DARK"}, {"start": "11:00"}, "2026-10-19")
+
+        active = self.store.commands.get_active()
+        self.assertEqual(active["command"], {"mode": "DARK"})
+        self.assertEqual(active["date"], "2026-10-19")
+
+        self.store.commands.clear_active()
+        self.assertIsNone(self.store.commands.get_active())
+
+    def test_batched_history(self):
+        for i in range(5):
+            self.store.history.record("move", {"to": i}, event_time=i)
+
+        # not yet written, but visible through the store
+        other = sqlite3.connect(self.path)
+        self.assertEqual(other.execute("SELECT COUNT(*) FROM history").fetchone()[0], 0)
+        recent = self.store.history.recent(limit=2, event="move")
+        self.assertEqual([event["data"]["to"] for event in recent], [4, 3])
+        self.assertEqual(other.execute("SELECT COUNT(*) FROM history").fetchone()[0], 5)
+
+        # a full batch is written without a flush
+        for i in range(10):
+            self.store.history.record("calibrate")
+        self.assertEqual(other.execute("SELECT COUNT(*) FROM history").fetchone()[0], 15)
+        other.close()
+
+    def test_history_pruning(self):
+        self.store.history.max_rows = 20
+        for i in range(50):
+            self.store.history.record("move", {"to": i})
+        self.store.flush()
+
+        recent = self.store.history.recent(limit=100)
+        self.assertEqual(len(recent), 20)
+        self.assertEqual(recent[0]["data"]["to"], 49)
+
+    def test_persists_across_reopen(self):
+        self.store.schedules.save({"default_mode": "ECO"})
+        self.store.history.record("move")
+        self.store.close()
+
+        self.store = SmartBlindsStore(self.path)
+        self.assertEqual(self.store.schedules.latest()[1], {"default_mode": "ECO"})
+        self.assertEqual(len(self.store.history.recent()), 1)
+
+    def test_import_table(self):
+        legacy_path = os.path.join(self.temp_dir, "users.db")
+        legacy = sqlite3.connect(legacy_path)
+        legacy.execute("CREATE TABLE user (id INTEGER PRIMARY KEY, public_id TEXT UNIQUE, name TEXT UNIQUE, password TEXT)")
+        legacy.executemany("INSERT INTO user VALUES (?, ?, ?, ?)", [(1, "a", "testuser", "x"), (2, "b", "blindUser", "y")])
+        legacy.commit()
+        legacy.close()
+
+        with self.store.transaction() as connection:
+            connection.execute("CREATE TABLE user (id INTEGER PRIMARY KEY, public_id TEXT UNIQUE, name TEXT UNIQUE, password TEXT)")
+        self.assertEqual(self.store.import_table(legacy_path, "user"), 2)
+        # rows already in the store are kept
+        self.assertEqual(self.store.import_table(legacy_path, "user"), 0)
+        self.assertEqual(len(self.store.query("SELECT * FROM user")), 2)
+
+    def test_isolated_store(self):
+        original_file = store_module.store_file
+        with store_module.isolated_store() as isolated:
+            self.assertIs(store_module.get_store(), isolated)
+            self.assertNotEqual(store_module.store_file, original_file)
+        self.assertEqual(store_module.store_file, original_file)
+
+if __name__ == "__main__":
+    unittest.main()